@@ -0,0 +1,112 @@
+"""
+Compares the SQL pushdown path of SQLiteService.filter_disks with the previous
+fetch-all path (get_all_disks() + filtering in Python).
+
+Usage:
+    python -m benchmarks.bench_filter_pushdown --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from typing import List, Optional
+
+from core.database import SQLiteService, _fold
+from core.models import Disk
+
+WORDS = ["Peliculas", "Series", "Fotos", "Documentos", "Juegos", "Musica", "Backups", "Proyectos", "Apps", "Sistema"]
+
+QUERIES = [
+    {"name_query": "disco 12"},
+    {"content_query": "peli"},
+    {"min_free_gb": 900},
+    {"name_query": "disco", "content_query": "fotos", "min_free_gb": 500},
+]
+
+def populate(service: SQLiteService, disk_count: int, items_per_disk: int = 5, seed: int = 42):
+    rng = random.Random(seed)
+    disks = []
+    items = []
+    for index in range(disk_count):
+        disk_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        name = f"Disco {index}"
+        capacity = rng.choice([128, 256, 500, 1000, 2000, 4000])
+        used = 0
+        for position in range(items_per_disk):
+            description = f"{rng.choice(WORDS)} {rng.randint(1, 9999)}"
+            size = rng.randint(0, capacity // items_per_disk)
+            used += size
+            items.append((disk_id, position, description, _fold(description), size))
+        disks.append((disk_id, name, _fold(name), capacity, used))
+
+    with service._conn:
+        service._conn.executemany(
+            "INSERT INTO disks (id, name, name_folded, total_capacity_gb, used_space_gb) VALUES (?, ?, ?, ?, ?)", disks
+        )
+        service._conn.executemany(
+            "INSERT INTO content_items (disk_id, position, description, description_folded, size_gb) VALUES (?, ?, ?, ?, ?)",
+            items,
+        )
+
+def fetch_all_filter(service: SQLiteService, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None) -> List[Disk]:
+    # Camino anterior: se traen todos los discos y se filtra en Python
+    disks = service.get_all_disks()
+    if name_query:
+        disks = [d for d in disks if name_query.lower() in d.name.lower()]
+    if content_query:
+        disks = [d for d in disks if any(content_query.lower() in item.description.lower() for item in d.contents)]
+    if min_free_gb is not None:
+        disks = [d for d in disks if d.free_space_gb >= min_free_gb]
+    return disks
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run(sizes: List[int], repeat: int) -> List[dict]:
+    results = []
+    for size in sizes:
+        service = SQLiteService(":memory:")
+        populate(service, size)
+        for query in QUERIES:
+            pushdown = service.filter_disks(**query)
+            fetch_all = fetch_all_filter(service, **query)
+            assert [d.id for d in pushdown] == [d.id for d in fetch_all], query
+
+            results.append({
+                "disks": size,
+                "query": query,
+                "matches": len(pushdown),
+                "pushdown_s": best_of(lambda: service.filter_disks(**query), repeat),
+                "fetch_all_s": best_of(lambda: fetch_all_filter(service, **query), repeat),
+            })
+        service.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", dest="json_path", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    print(f"{'disks':>8}  {'matches':>8}  {'pushdown ms':>12}  {'fetch-all ms':>12}  {'speedup':>8}  query")
+    for row in results:
+        speedup = row["fetch_all_s"] / row["pushdown_s"] if row["pushdown_s"] else float("inf")
+        print(
+            f"{row['disks']:>8}  {row['matches']:>8}  {row['pushdown_s'] * 1000:>12.2f}  "
+            f"{row['fetch_all_s'] * 1000:>12.2f}  {speedup:>7.1f}x  {row['query']}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Compares the per-row write path of SupabaseService (one add_disk/delete_disk
+request per disk) with the batched add_disks/upsert_disks/delete_disks methods.
+
+No Supabase project is needed: the real supabase/postgrest client is pointed at
+an httpx.MockTransport that stands in for PostgREST and sleeps `--latency-ms`
+per request to simulate the network round trip. Rows named "RECHAZADO ..." are
+rejected like a CHECK constraint would, to exercise per-row failure reporting.
+
+Usage:
+    python -m benchmarks.bench_supabase_batch --disks 200 1000 --latency-ms 20
+"""
+import argparse
+import json
+import random
+import time
+from typing import List
+
+import httpx
+from supabase import ClientOptions, create_client
+
+from core.models import ContentItem, Disk
+from services.supabase_service import SupabaseService
+
+REJECTED_PREFIX = "RECHAZADO"
+
+class FakePostgrest:
+    """Minimal PostgREST stand-in: accepts inserts/upserts/deletes on /disks."""
+
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.requests = 0
+        self.bytes_sent = 0
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.bytes_sent += len(request.content)
+        time.sleep(self.latency_s)
+
+        if request.method == "DELETE":
+            return httpx.Response(204)
+
+        rows = json.loads(request.content)
+        rows = rows if isinstance(rows, list) else [rows]
+        if any(row.get("name", "").startswith(REJECTED_PREFIX) for row in rows):
+            # PostgREST rechaza la petición entera si una fila viola una restricción
+            return httpx.Response(400, json={"message": "new row violates check constraint", "code": "23514", "hint": None, "details": None})
+        if "return=representation" in request.headers.get("prefer", ""):
+            return httpx.Response(201, json=[dict(row, id=row.get("id") or f"srv-{self.requests}") for row in rows])
+        return httpx.Response(201)
+
+def create_service(server: FakePostgrest, chunk_size: int) -> SupabaseService:
+    http_client = httpx.Client(transport=httpx.MockTransport(server.handle))
+    client = create_client("http://localhost:54321", "bench-key", options=ClientOptions(httpx_client=http_client))
+    return SupabaseService(client=client, chunk_size=chunk_size)
+
+def make_disks(count: int, rejected: int = 0, seed: int = 42) -> List[Disk]:
+    rng = random.Random(seed)
+    disks = [
+        Disk(None, f"Disco {index}", 1000, [ContentItem(f"Carpeta {index}-{item}", rng.randint(1, 100)) for item in range(5)])
+        for index in range(count)
+    ]
+    for index in rng.sample(range(count), rejected):
+        disks[index].name = f"{REJECTED_PREFIX} {index}"
+    return disks
+
+def timed(server: FakePostgrest, fn):
+    server.requests = 0
+    server.bytes_sent = 0
+    start = time.perf_counter()
+    result = fn()
+    return result, {"seconds": time.perf_counter() - start, "requests": server.requests, "bytes": server.bytes_sent}
+
+def run(sizes: List[int], latency_s: float, chunk_size: int, rejected: int) -> List[dict]:
+    results = []
+    for size in sizes:
+        server = FakePostgrest(latency_s)
+        service = create_service(server, chunk_size)
+        disks = make_disks(size)
+
+        def per_row_insert():
+            return [service.add_disk(disk.name, disk.total_capacity_gb, list(disk.contents)) for disk in disks]
+
+        _, per_row = timed(server, per_row_insert)
+        stored, batched = timed(server, lambda: service.add_disks(disks))
+        assert len(stored) == size and stored.ok
+        _, upsert = timed(server, lambda: service.upsert_disks(stored))
+
+        ids = [disk.id for disk in stored]
+        _, per_row_delete = timed(server, lambda: [service.delete_disk(disk_id) for disk_id in ids])
+        deleted, batched_delete = timed(server, lambda: service.delete_disks(ids))
+        assert len(deleted) == size
+
+        failing = make_disks(size, rejected=min(rejected, size))
+        partial, with_failures = timed(server, lambda: service.add_disks(failing))
+        assert len(partial.failures) == min(rejected, size)
+        assert len(partial) == size - len(partial.failures)
+
+        results.append({
+            "disks": size,
+            "per_row_insert": per_row,
+            "add_disks": batched,
+            "upsert_disks": upsert,
+            "per_row_delete": per_row_delete,
+            "delete_disks": batched_delete,
+            "add_disks_with_failures": dict(with_failures, failures=len(partial.failures)),
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--disks", type=int, nargs="+", default=[200, 1000])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--rejected", type=int, default=3, help="Rejected rows in the partial-failure run")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.disks, args.latency_ms / 1000, args.chunk_size, args.rejected)
+    print(f"{'disks':>6}  {'operation':<24}  {'requests':>8}  {'seconds':>8}  {'KB sent':>8}")
+    for row in results:
+        for operation, stats in row.items():
+            if operation == "disks":
+                continue
+            print(f"{row['disks']:>6}  {operation:<24}  {stats['requests']:>8}  {stats['seconds']:>8.2f}  {stats['bytes'] / 1024:>8.0f}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Benchmark suite for the catalog: model serialization, the in-memory and SQLite
+services, in-memory filtering, headless card construction (HomeView/DiskCard
+without a Flet client), the directory scanner and startup (import time of
+main.py and the cached catalog of the first paint). All inputs come from the
+deterministic generator in benchmarks/synthetic.py.
+
+Results are written as JSON (one entry per benchmark and size) so two runs can
+be compared; --compare prints the ratio against a previous run and flags the
+benchmarks that got slower than --threshold.
+
+Usage:
+    python -m benchmarks.suite --sizes small medium --json resultados.json
+    python -m benchmarks.suite --sizes small --only sqlite ui --compare resultados.json
+"""
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic import make_catalog_rows, make_directory_tree, make_disks
+from core.content_tree import ContentTree
+from core.database import SQLiteService
+from core.filters import DiskFilter
+from core.models import COLUMNAR_THRESHOLD, Disk
+from services.catalog_cache import CatalogCache
+from services.disk_service import DiskService
+from services.scanner import DirectoryScanner
+
+# disks: discos generados; items: contenidos por disco; tree: (profundidad, ramificación, archivos por carpeta)
+SIZES = {
+    "small": {"disks": 1000, "items": 20, "tree": (3, 4, 10)},
+    "medium": {"disks": 10000, "items": 20, "tree": (4, 5, 10)},
+    "large": {"disks": 100000, "items": 20, "tree": (4, 8, 20)},
+}
+QUERIES = {
+    "name": {"name_query": "disco 12"},
+    "content": {"content_query": "peli"},
+    "free": {"min_free_gb": 900},
+}
+DEFAULT_THRESHOLD = 1.2
+
+def measure(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], object]] = None) -> dict:
+    """Runs fn `repeat` times (setup, if given, runs untimed before each call and its result is passed to fn)."""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            state = setup()
+            start = time.perf_counter()
+            fn(state)
+        else:
+            start = time.perf_counter()
+            fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "best_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "repeat": repeat,
+    }
+
+class Context:
+    def __init__(self, size: str, seed: int, repeat: int):
+        self.size = size
+        self.params = SIZES[size]
+        self.seed = seed
+        self.repeat = repeat
+        self.disks = make_disks(self.params["disks"], self.params["items"], seed)
+        self.rows = make_catalog_rows(self.params["disks"], self.params["items"], seed)
+
+# --- Benchmarks: cada uno devuelve {nombre: resultado de measure() + datos extra} ---
+
+def bench_model(ctx: Context) -> Dict[str, dict]:
+    huge_row = make_catalog_rows(1, COLUMNAR_THRESHOLD * 2, ctx.seed)[0]
+    return {
+        "model.from_dict": dict(measure(lambda: [Disk.from_dict(row) for row in ctx.rows], ctx.repeat), n=len(ctx.rows)),
+        "model.to_dict": dict(measure(lambda: [disk.to_dict() for disk in ctx.disks], ctx.repeat), n=len(ctx.disks)),
+        "model.from_dict_columnar": dict(measure(lambda: Disk.from_dict(huge_row), ctx.repeat), n=len(huge_row["contents"])),
+        "model.used_space": dict(measure(lambda: sum(disk.used_space_gb for disk in ctx.disks), ctx.repeat), n=len(ctx.disks)),
+    }
+
+def bench_memory_service(ctx: Context) -> Dict[str, dict]:
+    def populated() -> DiskService:
+        service = DiskService()
+        service.add_disks(ctx.disks)
+        return service
+
+    results = {"memory.add_disks": dict(measure(lambda service: service.add_disks(ctx.disks), ctx.repeat, setup=DiskService), n=len(ctx.disks))}
+    service = populated()
+    for label, query in QUERIES.items():
+        results[f"memory.filter_disks.{label}"] = dict(
+            measure(lambda: service.filter_disks(**query), ctx.repeat), matches=len(service.filter_disks(**query))
+        )
+    return results
+
+def bench_sqlite_service(ctx: Context) -> Dict[str, dict]:
+    def empty() -> SQLiteService:
+        return SQLiteService(":memory:")
+
+    results = {"sqlite.add_disks": dict(measure(lambda service: service.add_disks(ctx.disks), ctx.repeat, setup=empty), n=len(ctx.disks))}
+    service = empty()
+    service.add_disks(ctx.disks)
+    results["sqlite.get_all_disks"] = dict(measure(service.get_all_disks, ctx.repeat), n=len(ctx.disks))
+    results["sqlite.get_disk_summaries"] = dict(measure(service.get_disk_summaries, ctx.repeat), n=len(ctx.disks))
+    results["sqlite.iter_disks"] = dict(measure(lambda: sum(1 for _ in service.iter_disks()), ctx.repeat), n=len(ctx.disks))
+    for label, query in QUERIES.items():
+        results[f"sqlite.filter_disks.{label}"] = dict(
+            measure(lambda: service.filter_disks(**query), ctx.repeat), matches=len(service.filter_disks(**query))
+        )
+    service.close()
+    return results
+
+def bench_filter(ctx: Context) -> Dict[str, dict]:
+    broad = DiskFilter(name_query="disco")
+    narrow = DiskFilter(name_query="disco 1")
+    by_content = DiskFilter(content_query="fotos")
+    broad_result = broad.apply(ctx.disks)
+    return {
+        "filter.apply.name": dict(measure(lambda: broad.apply(ctx.disks), ctx.repeat), n=len(ctx.disks)),
+        "filter.apply.content": dict(measure(lambda: by_content.apply(ctx.disks), ctx.repeat), n=len(ctx.disks)),
+        "filter.narrow": dict(measure(lambda: narrow.apply(broad_result, base=broad), ctx.repeat), n=len(broad_result)),
+    }
+
+def bench_ui(ctx: Context) -> Dict[str, dict]:
+    # Flet es opcional para el resto de la suite: sin él se omiten estos benchmarks
+    try:
+        from ui.components.disk_card import DiskCard
+        from ui.views.home_view import CARD_PAGE_SIZE, HomeView
+    except ImportError as error:
+        return {"ui": {"skipped": str(error)}}
+
+    class HeadlessPage:
+        """Enough of ft.Page for HomeView to build its controls without a Flet client."""
+
+        def __init__(self):
+            self.overlay = []
+
+        def run_task(self, handler, *args):
+            pass
+
+        def update(self, *controls):
+            pass
+
+    class HeadlessHomeView(HomeView):
+        # Sin cliente no hay a quién enviar los cambios: se mide solo la construcción y el diff de controles
+        def _send_cards_update(self):
+            pass
+
+        def _set_loading(self, loading: bool):
+            pass
+
+    service = SQLiteService(":memory:")
+    service.add_disks(ctx.disks)
+    cards = ctx.disks[:2000]
+
+    def changed_disks() -> List[Disk]:
+        # Las mismas tarjetas con un disco de cada diez modificado: ejercita el parcheo en sitio
+        return [
+            Disk(disk.id, disk.name + " *", disk.total_capacity_gb, disk.contents) if index % 10 == 0 else disk
+            for index, disk in enumerate(ctx.disks[:CARD_PAGE_SIZE])
+        ]
+
+    def rendered_view() -> HomeView:
+        view = HeadlessHomeView(HeadlessPage(), disk_service=service)
+        view._render_disk_cards(ctx.disks)
+        return view
+
+    results = {
+        "ui.disk_card": dict(measure(lambda: [DiskCard(disk, on_card_click=None) for disk in cards], ctx.repeat), n=len(cards)),
+        "ui.render_disk_cards.first": dict(
+            measure(lambda view: view._render_disk_cards(ctx.disks), ctx.repeat,
+                    setup=lambda: HeadlessHomeView(HeadlessPage(), disk_service=service)),
+            n=CARD_PAGE_SIZE,
+        ),
+        "ui.render_disk_cards.diff": dict(
+            measure(lambda view: view._render_disk_cards(changed_disks()), ctx.repeat, setup=rendered_view), n=CARD_PAGE_SIZE
+        ),
+        "ui.update_disk_cards": dict(
+            measure(lambda view: asyncio.run(view._update_disk_cards()), ctx.repeat,
+                    setup=lambda: HeadlessHomeView(HeadlessPage(), disk_service=service)),
+            n=len(ctx.disks),
+        ),
+    }
+    service.close()
+    return results
+
+def bench_scan(ctx: Context) -> Dict[str, dict]:
+    root = tempfile.mkdtemp(prefix="bench_scan_")
+    try:
+        depth, fanout, files_per_dir = ctx.params["tree"]
+        stats = make_directory_tree(root, depth, fanout, files_per_dir, seed=ctx.seed)
+        scanner = DirectoryScanner()
+        scanner.scan(root, record_snapshot=True)
+        snapshot = scanner.snapshot
+        extra = {"files": stats.files, "directories": stats.directories}
+        return {
+            "scan.full": dict(measure(lambda: DirectoryScanner().scan(root, record_snapshot=True), ctx.repeat), **extra),
+            "scan.incremental": dict(measure(lambda: DirectoryScanner().scan(root, previous=snapshot), ctx.repeat), **extra),
+            "tree.from_snapshot": dict(measure(lambda: ContentTree.from_snapshot(snapshot), ctx.repeat), **extra),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def bench_startup(ctx: Context) -> Dict[str, dict]:
+    # Importar main.py en un proceso nuevo: lo que tarda el arranque antes de abrir la ventana
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    import_main = [sys.executable, "-c", "import main"]
+    directory = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        cache = CatalogCache(os.path.join(directory, "catalog_cache.json.gz"))
+        cache.save(ctx.disks)
+        extra = {"n": len(ctx.disks), "cache_bytes": os.path.getsize(cache.path)}
+        return {
+            "startup.import_main": measure(lambda: subprocess.run(import_main, cwd=repo_root, check=True), ctx.repeat),
+            "startup.catalog_cache.load": dict(measure(cache.load, ctx.repeat), **extra),
+            "startup.catalog_cache.save": dict(measure(lambda: cache.save(ctx.disks), ctx.repeat), **extra),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+BENCHMARKS = {
+    "model": bench_model,
+    "memory": bench_memory_service,
+    "sqlite": bench_sqlite_service,
+    "filter": bench_filter,
+    "ui": bench_ui,
+    "scan": bench_scan,
+    "startup": bench_startup,
+}
+
+# --- Ejecución y comparación ---
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(sizes: List[str], groups: List[str], seed: int, repeat: int, on_result: Optional[Callable[[dict], None]] = None) -> dict:
+    results = []
+    for size in sizes:
+        ctx = Context(size, seed, repeat)
+        for group in groups:
+            for name, result in BENCHMARKS[group](ctx).items():
+                entry = dict(result, name=name, group=group, size=size)
+                results.append(entry)
+                if on_result:
+                    on_result(entry)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[dict]:
+    """Ratio current/baseline of the best time of every benchmark present in both runs."""
+    previous = {(entry["name"], entry["size"]): entry for entry in baseline.get("results", []) if "best_s" in entry}
+    rows = []
+    for entry in current["results"]:
+        old = previous.get((entry["name"], entry["size"]))
+        if old is None or "best_s" not in entry or not old["best_s"]:
+            continue
+        ratio = entry["best_s"] / old["best_s"]
+        rows.append({"name": entry["name"], "size": entry["size"], "ratio": ratio, "regression": ratio > threshold})
+    return rows
+
+def _print_result(entry: dict):
+    if "skipped" in entry:
+        print(f"{entry['size']:<7} {entry['name']:<32} omitido: {entry['skipped']}")
+        return
+    extra = ", ".join(f"{key}={value}" for key, value in entry.items()
+                      if key not in ("name", "group", "size", "best_s", "median_s", "mean_s", "repeat"))
+    print(f"{entry['size']:<7} {entry['name']:<32} {entry['best_s'] * 1000:>10.2f} ms  (mediana {entry['median_s'] * 1000:.2f} ms)  {extra}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small"])
+    parser.add_argument("--only", nargs="+", default=["*"], help="Benchmark groups to run (glob patterns)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    groups = [group for group in BENCHMARKS if any(fnmatch.fnmatch(group, pattern) for pattern in args.only)]
+    current = run(args.sizes, groups, args.seed, args.repeat, on_result=_print_result)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            rows = compare(current, json.load(f), args.threshold)
+        print(f"\nComparación con {args.compare} (umbral {args.threshold:.2f}x):")
+        for row in rows:
+            flag = "  <-- más lento" if row["regression"] else ""
+            print(f"{row['size']:<7} {row['name']:<32} {row['ratio']:>6.2f}x{flag}")
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Deterministic synthetic data for the benchmarks: the same seed and sizes always
+produce the same disks, catalog rows and directory trees, so timings of
+different versions are measured on identical inputs.
+"""
+import os
+import random
+import uuid
+from typing import List, NamedTuple
+
+from core.models import ContentItem, Disk
+
+WORDS = ["Peliculas", "Series", "Fotos", "Documentos", "Juegos", "Musica", "Backups", "Proyectos", "Apps", "Sistema"]
+EXTENSIONS = [".mkv", ".mp4", ".jpg", ".pdf", ".iso", ".zip", ".flac", ".docx"]
+CAPACITIES = [128, 256, 500, 1000, 2000, 4000]
+
+def _disk_id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128)))
+
+def make_contents(rng: random.Random, count: int, capacity_gb: int) -> List[ContentItem]:
+    budget = max(1, capacity_gb // max(1, count))
+    items = []
+    for _ in range(count):
+        word = rng.choice(WORDS)
+        if rng.random() < 0.3:
+            description = f"(Carpeta) {word} {rng.randint(1, 9999)}"
+        else:
+            description = f"{word} {rng.randint(1, 9999)}{rng.choice(EXTENSIONS)}"
+        items.append(ContentItem(description, rng.randint(0, budget)))
+    return items
+
+def make_disks(count: int, items_per_disk: int = 20, seed: int = 42, with_ids: bool = True) -> List[Disk]:
+    rng = random.Random(seed)
+    disks = []
+    for index in range(count):
+        capacity = rng.choice(CAPACITIES)
+        disk_id = _disk_id(rng) if with_ids else None
+        disks.append(Disk(disk_id, f"Disco {index}", capacity, make_contents(rng, items_per_disk, capacity)))
+    return disks
+
+def make_catalog_rows(count: int, items_per_disk: int = 20, seed: int = 42) -> List[dict]:
+    """Rows shaped like the Supabase/JSONL representation (input of Disk.from_dict)."""
+    return [disk.to_dict() for disk in make_disks(count, items_per_disk, seed)]
+
+class TreeStats(NamedTuple):
+    directories: int
+    files: int
+    total_bytes: int
+
+def make_directory_tree(root: str, depth: int = 3, fanout: int = 4, files_per_dir: int = 10,
+                        max_file_bytes: int = 4096, seed: int = 42) -> TreeStats:
+    """
+    Creates fanout^1 + ... + fanout^depth folders under `root`, each with
+    `files_per_dir` files of random size. Files are sparse (truncate) so large
+    sizes do not cost disk space.
+    """
+    rng = random.Random(seed)
+    directories = files = total_bytes = 0
+    level = [root]
+    os.makedirs(root, exist_ok=True)
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for index in range(fanout):
+                path = os.path.join(parent, f"{rng.choice(WORDS)}_{index}")
+                os.makedirs(path, exist_ok=True)
+                directories += 1
+                for file_index in range(files_per_dir):
+                    size = rng.randint(0, max_file_bytes)
+                    with open(os.path.join(path, f"archivo_{file_index}{rng.choice(EXTENSIONS)}"), "wb") as f:
+                        f.truncate(size)
+                    files += 1
+                    total_bytes += size
+                next_level.append(path)
+        level = next_level
+    return TreeStats(directories, files, total_bytes)
+
+# Variables importantes:
+# - WORDS, EXTENSIONS, CAPACITIES: Vocabulario de los nombres y capacidades generados.
+# Métodos importantes:
+# - make_disks(), make_catalog_rows(): Discos y filas (formato de from_dict) deterministas por semilla.
+# - make_directory_tree(): Árbol de carpetas con archivos dispersos para los benchmarks del escáner.
@@ -0,0 +1,190 @@
+"""
+Import, export and deduplicate the disk catalog (JSON Lines or CSV files).
+
+Usage:
+    python catalog_cli.py export catalogo.jsonl
+    python catalog_cli.py import catalogo.csv --batch-size 1000
+    python catalog_cli.py --backend supabase import catalogo.jsonl
+    python catalog_cli.py dedup --top 20
+    python catalog_cli.py scan /media/usb1 /media/usb2 /media/usb3 --drives 8
+
+Imports are resumable: if a run is interrupted, running the same command again
+continues after the last batch that was stored (use --restart to ignore it).
+
+dedup looks for files duplicated across the scan snapshots of every disk and
+stores the computed hashes in the snapshots, so the next run only reads files
+that changed (see services/dedup.py).
+
+scan catalogs several mounted drives in parallel: each one creates a disk (or
+updates the disk with the same name) with its capacity and scanned contents
+(see services/batch_catalog.py).
+"""
+import argparse
+import sys
+import threading
+import time
+from core.models import Disk
+from services.catalog_io import DEFAULT_BATCH_SIZE, FORMATS, export_catalog, import_catalog
+
+def create_service(backend: str, db_path: str = None):
+    # Importaciones diferidas: el backend SQLite no necesita el cliente de Supabase
+    if backend == "sqlite":
+        from core.database import SQLiteService
+        return SQLiteService(db_path) if db_path else SQLiteService()
+    from services.supabase_service import SupabaseService
+    return SupabaseService()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["sqlite", "supabase"], default="sqlite")
+    parser.add_argument("--db", dest="db_path", help="SQLite database file (sqlite backend only)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write the whole catalog to a file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=FORMATS)
+
+    import_parser = subparsers.add_parser("import", help="Load disks from a file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=FORMATS)
+    import_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    import_parser.add_argument("--restart", action="store_true", help="Ignore any saved checkpoint")
+
+    dedup_parser = subparsers.add_parser("dedup", help="Find files duplicated across the scanned disks")
+    dedup_parser.add_argument("--snapshots", help="Snapshot directory (defaults to DISK_SNAPSHOT_DIR)")
+    dedup_parser.add_argument("--top", type=int, default=10, help="Duplicate groups to list")
+    dedup_parser.add_argument("--workers", type=int, help="Hashing processes (defaults to the CPU count)")
+    dedup_parser.add_argument("--store-hashes", action="store_true", help="Also save the hashes in the disks' contents")
+
+    scan_parser = subparsers.add_parser("scan", help="Catalog several mounted drives in parallel")
+    scan_parser.add_argument("mount_points", nargs="+")
+    scan_parser.add_argument("--drives", type=int, help="Drives scanned at the same time")
+    scan_parser.add_argument("--threads-per-drive", type=int, help="Directory listing threads per drive")
+    scan_parser.add_argument("--per-device", type=int, help="Concurrent scans on the same physical device")
+    scan_parser.add_argument("--snapshots", help="Snapshot directory (defaults to DISK_SNAPSHOT_DIR)")
+
+    args = parser.parse_args(argv)
+    service = create_service(args.backend, args.db_path)
+    start = time.perf_counter()
+
+    if args.command == "dedup":
+        return run_dedup(service, args)
+
+    if args.command == "scan":
+        return run_scan(service, args)
+
+    if args.command == "export":
+        count = export_catalog(service, args.path, args.format)
+        print(f"Exportados {count} discos a {args.path} en {time.perf_counter() - start:.1f}s")
+        return 0
+
+    def report(imported: int):
+        print(f"\r{imported} discos importados...", end="", file=sys.stderr, flush=True)
+
+    result = import_catalog(service, args.path, args.format, batch_size=args.batch_size,
+                            resume=not args.restart, on_progress=report)
+    print(file=sys.stderr)
+    if result.resumed_from:
+        print(f"Reanudado tras {result.resumed_from} discos ya importados")
+    print(f"Importados {result.imported} discos desde {args.path} en {time.perf_counter() - start:.1f}s")
+    if result.failed:
+        print(f"{result.failed} discos rechazados por el backend", file=sys.stderr)
+        return 1
+    return 0
+
+def run_dedup(service, args) -> int:
+    from services.dedup import DedupEngine, annotate_contents
+    from services.snapshot import SnapshotStore
+
+    start = time.perf_counter()
+    store = SnapshotStore(args.snapshots) if args.snapshots else SnapshotStore()
+    disks = {disk.id: disk for disk in service.get_disk_summaries()}
+    snapshots = {}
+    for disk_id in disks:
+        snapshot = store.load(disk_id)
+        if snapshot is not None:
+            snapshots[disk_id] = snapshot
+    print(f"{len(snapshots)} de {len(disks)} discos tienen snapshot de escaneo")
+
+    def report(kind: str, done: int, total: int):
+        print(f"\rHash {kind}: {done}/{total} archivos...", end="", file=sys.stderr, flush=True)
+
+    result = DedupEngine(max_workers=args.workers).find_duplicates(snapshots, on_progress=report)
+    print(file=sys.stderr)
+    # Se guardan los hashes para que la próxima ejecución no vuelva a leer los archivos sin cambios
+    for disk_id, snapshot in snapshots.items():
+        store.save(disk_id, snapshot)
+
+    for group in result.groups[:args.top]:
+        print(f"{group.reclaimable_gb:>8.2f} GB  {len(group.files)} copias de {group.size_bytes} bytes")
+        for duplicate in group.files:
+            print(f"          {disks[duplicate.disk_id].name}: {duplicate.path}")
+    print("GB recuperables por disco:")
+    for disk_id, reclaimable_gb in result.reclaimable_gb_by_disk().items():
+        print(f"  {disks[disk_id].name}: {reclaimable_gb:.2f} GB")
+    print(f"{len(result.groups)} grupos de duplicados, {result.reclaimable_bytes / 1024 ** 3:.2f} GB recuperables; "
+          f"{result.hashed_files} hashes calculados ({result.bytes_read / 1024 ** 2:.0f} MB leídos), "
+          f"{result.reused_hashes} reutilizados, {result.unreadable_files} archivos ilegibles, "
+          f"{time.perf_counter() - start:.1f}s")
+
+    if args.store_hashes:
+        changed = []
+        for disk_id, snapshot in snapshots.items():
+            disk = service.get_disk_by_id(disk_id)
+            if disk is None:
+                continue  # Borrado mientras se calculaban los hashes
+            # Se comparan valores: ContentColumns crea ContentItem nuevos en cada recorrido
+            original = [(item.description, item.content_hash) for item in disk.contents]
+            contents = annotate_contents(disk.contents, snapshot)
+            if [(item.description, item.content_hash) for item in contents] != original:
+                changed.append(Disk(disk.id, disk.name, disk.total_capacity_gb, contents))
+        if changed:
+            stored = service.upsert_disks(changed)
+            print(f"Hashes guardados en {len(stored)} discos")
+    return 0
+
+def run_scan(service, args) -> int:
+    from services.batch_catalog import (BatchCataloguer, DEFAULT_MAX_DRIVES, DEFAULT_SCANS_PER_DEVICE,
+                                        DEFAULT_THREADS_PER_DRIVE, DONE, FAILED, CANCELLED)
+    from services.snapshot import SnapshotStore
+
+    cataloguer = BatchCataloguer(
+        service,
+        snapshot_store=SnapshotStore(args.snapshots) if args.snapshots else SnapshotStore(),
+        max_drives=args.drives or DEFAULT_MAX_DRIVES,
+        threads_per_drive=args.threads_per_drive or DEFAULT_THREADS_PER_DRIVE,
+        scans_per_device=args.per_device or DEFAULT_SCANS_PER_DEVICE,
+    )
+    latest = {}
+    lock = threading.Lock()
+
+    def report(progress):
+        with lock:
+            latest[progress.mount_point] = progress
+            if progress.state in (DONE, FAILED, CANCELLED):
+                print(f"\r{progress.name}: {progress.state}, {progress.files} archivos, "
+                      f"{progress.total_bytes / 1024 ** 3:.2f} GB en {progress.elapsed_s:.1f}s "
+                      f"({progress.files_per_s:.0f} archivos/s)", file=sys.stderr, flush=True)
+                return
+            scanning = [item for item in latest.values() if item.state not in (DONE, FAILED, CANCELLED)]
+            files = sum(item.files for item in latest.values())
+            rate = sum(item.files_per_s for item in scanning)
+            finished = len(latest) - len(scanning)
+            print(f"\r{finished}/{len(latest)} unidades, {files} archivos, {rate:.0f} archivos/s...",
+                  end="", file=sys.stderr, flush=True)
+
+    result = cataloguer.run(args.mount_points, on_progress=report)
+    print(file=sys.stderr)
+    for drive in result.results:
+        if drive.ok:
+            action = "creado" if drive.created else "actualizado"
+            print(f"{drive.name} ({drive.mount_point}): {action}, {drive.disk.total_capacity_gb} GB, "
+                  f"{len(drive.disk.contents)} entradas")
+        else:
+            print(f"{drive.name} ({drive.mount_point}): error: {drive.error}", file=sys.stderr)
+    print(f"{len(result.results) - len(result.failed)} de {len(result.results)} unidades catalogadas, "
+          f"{result.total_files} archivos ({result.total_bytes / 1024 ** 3:.2f} GB) en {result.elapsed_s:.1f}s")
+    return 1 if result.failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+import json
+from bisect import bisect_left, insort
+from itertools import count
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from core.models import ContentItem
+
+GB = 1024 ** 3
+FOLDER_PREFIX = "(Carpeta) "
+FORMAT_HEADER = "ContentTree 1"
+SERIAL_SPAN = 1 << 32
+
+def _rank_key(size_bytes: int, serial: int) -> int:
+    # Un solo entero (más rápido de comparar que una tupla): mayor tamaño primero, desempate por serial
+    return -size_bytes * SERIAL_SPAN + serial
+
+def _split(path: str) -> List[str]:
+    # Rutas relativas con "/" (las de los snapshots usan os.sep)
+    return [part for part in path.replace("\\", "/").split("/") if part]
+
+class ContentNode:
+    """
+    Folder of a ContentTree. size_bytes and file_count cover the whole subtree;
+    `files` holds only the files directly inside this folder.
+    """
+    __slots__ = ("name", "parent", "children", "files", "unlisted_bytes", "size_bytes", "file_count", "serial")
+
+    def __init__(self, name: str, parent: Optional["ContentNode"], serial: int):
+        self.name = name
+        self.parent = parent
+        self.children: Dict[str, "ContentNode"] = {}
+        self.files: Dict[str, int] = {}
+        self.unlisted_bytes = 0  # Tamaño conocido pero sin desglosar (carpetas que vienen de Disk.contents)
+        self.size_bytes = 0
+        self.file_count = 0
+        self.serial = serial
+
+    @property
+    def size_gb(self) -> float:
+        return round(self.size_bytes / GB, 2)
+
+    @property
+    def path(self) -> str:
+        parts = []
+        node = self
+        while node.parent is not None:
+            parts.append(node.name)
+            node = node.parent
+        return "/".join(reversed(parts))
+
+    def sorted_children(self) -> List["ContentNode"]:
+        return sorted(self.children.values(), key=lambda child: -child.size_bytes)
+
+    def sorted_files(self) -> List[Tuple[str, int]]:
+        return sorted(self.files.items(), key=lambda item: -item[1])
+
+class ContentTree:
+    """
+    Folder hierarchy of a disk with the aggregated size and file count of every
+    subtree. insert()/remove() update the totals of the ancestors (O(depth)) and
+    keep a ranking of all folders by size, so largest_folders(k) is a slice of
+    it instead of a walk over the tree.
+    """
+
+    def __init__(self):
+        self._serials = count()
+        self.root = ContentNode("", None, next(self._serials))
+        self._nodes: Dict[int, ContentNode] = {}
+        self._ranking: List[int] = []  # _rank_key() de cada carpeta, ordenada
+        self._bulk = False
+
+    # --- Construcción ---
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "ContentTree":
+        """Builds the tree from a DiskSnapshot (services/snapshot.py) in one pass."""
+        tree = cls()
+        tree._bulk = True
+        for relpath, record in snapshot.directories.items():
+            folder = tree._folder(_split(relpath), create=True)
+            for file_record in record.files:
+                folder.files[file_record[0]] = file_record[1]
+        tree._finish_bulk()
+        return tree
+
+    @classmethod
+    def from_contents(cls, contents: Iterable[ContentItem]) -> "ContentTree":
+        """Tree of a disk without snapshot: "(Carpeta) x" items become folders of unknown layout."""
+        tree = cls()
+        tree._bulk = True
+        for item in contents:
+            size_bytes = int(item.size_gb * GB)
+            if item.description.startswith(FOLDER_PREFIX):
+                tree._folder([item.description[len(FOLDER_PREFIX):]], create=True).unlisted_bytes += size_bytes
+            else:
+                tree.root.files[item.description] = size_bytes
+        tree._finish_bulk()
+        return tree
+
+    def _finish_bulk(self):
+        # Totales de abajo arriba y una sola ordenación del ranking
+        stack = [self.root]
+        order = []
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children.values())
+        # Recorrido inverso en lugar de recursión: los árboles profundos no agotan la pila de Python
+        for node in reversed(order):
+            node.size_bytes = node.unlisted_bytes + sum(node.files.values())
+            node.file_count = len(node.files)
+            for child in node.children.values():
+                node.size_bytes += child.size_bytes
+                node.file_count += child.file_count
+        self._ranking = sorted(_rank_key(node.size_bytes, node.serial) for node in self._nodes.values())
+        self._bulk = False
+
+    def _folder(self, parts: List[str], create: bool = False) -> Optional[ContentNode]:
+        node = self.root
+        for part in parts:
+            child = node.children.get(part)
+            if child is None:
+                if not create:
+                    return None
+                child = ContentNode(part, node, next(self._serials))
+                node.children[part] = child
+                self._nodes[child.serial] = child
+                if not self._bulk:
+                    insort(self._ranking, _rank_key(0, child.serial))
+            node = child
+        return node
+
+    # --- Cambios incrementales ---
+
+    def _propagate(self, node: ContentNode, delta_bytes: int, delta_files: int):
+        while node is not None:
+            if node.parent is not None and delta_bytes and not self._bulk:
+                self._ranking.pop(bisect_left(self._ranking, _rank_key(node.size_bytes, node.serial)))
+                insort(self._ranking, _rank_key(node.size_bytes + delta_bytes, node.serial))
+            node.size_bytes += delta_bytes
+            node.file_count += delta_files
+            node = node.parent
+
+    def insert(self, path: str, size_bytes: int):
+        """Adds (or resizes) the file at `path`, creating its folders."""
+        parts = _split(path)
+        folder = self._folder(parts[:-1], create=True)
+        previous = folder.files.get(parts[-1])
+        folder.files[parts[-1]] = size_bytes
+        if previous is None:
+            self._propagate(folder, size_bytes, 1)
+        else:
+            self._propagate(folder, size_bytes - previous, 0)
+
+    def remove(self, path: str) -> bool:
+        """Removes the file or folder (with its whole subtree) at `path`."""
+        parts = _split(path)
+        if not parts:
+            return False
+        parent = self._folder(parts[:-1])
+        if parent is None:
+            return False
+        name = parts[-1]
+        if name in parent.files:
+            self._propagate(parent, -parent.files.pop(name), -1)
+            return True
+        node = parent.children.get(name)
+        if node is None:
+            return False
+        self._propagate(parent, -node.size_bytes, -node.file_count)
+        del parent.children[name]
+        for gone in self._walk(node):
+            self._ranking.pop(bisect_left(self._ranking, _rank_key(gone.size_bytes, gone.serial)))
+            del self._nodes[gone.serial]
+        return True
+
+    # --- Consultas ---
+
+    @property
+    def size_bytes(self) -> int:
+        return self.root.size_bytes
+
+    @property
+    def file_count(self) -> int:
+        return self.root.file_count
+
+    def find(self, path: str) -> Optional[ContentNode]:
+        return self._folder(_split(path))
+
+    def largest_folders(self, k: int = 10) -> List[ContentNode]:
+        """The k largest folders of the disk (any depth), biggest first."""
+        return [self._nodes[key % SERIAL_SPAN] for key in self._ranking[:k]]
+
+    def _walk(self, start: Optional[ContentNode] = None) -> Iterator[ContentNode]:
+        stack = [start or self.root]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children.values())
+
+    # --- Serialización ---
+
+    def _entries(self) -> Iterator[Tuple[str, int]]:
+        # Rutas en orden lexicográfico: las carpetas vacías o con tamaño sin desglosar acaban en "/"
+        def visit(node: ContentNode, prefix: str):
+            if node.parent is not None and (node.unlisted_bytes or not (node.files or node.children)):
+                yield prefix, node.unlisted_bytes
+            for name in sorted(node.files):
+                yield prefix + name, node.files[name]
+            for name in sorted(node.children):
+                yield from visit(node.children[name], f"{prefix}{name}/")
+
+        yield from visit(self.root, "")
+
+    def to_compact(self) -> str:
+        """
+        Front-coded listing: one JSON line per path with the length of the prefix
+        shared with the previous path, the rest of the path and the size.
+        """
+        lines = [FORMAT_HEADER]
+        previous = ""
+        for path, size_bytes in self._entries():
+            shared = 0
+            limit = min(len(path), len(previous))
+            while shared < limit and path[shared] == previous[shared]:
+                shared += 1
+            lines.append(json.dumps([shared, path[shared:], size_bytes], ensure_ascii=False, separators=(",", ":")))
+            previous = path
+        return "\n".join(lines)
+
+    @classmethod
+    def from_compact(cls, text: str) -> "ContentTree":
+        lines = text.split("\n")
+        if not lines or lines[0] != FORMAT_HEADER:
+            raise ValueError("Formato de árbol de contenidos no reconocido")
+        tree = cls()
+        tree._bulk = True
+        previous = ""
+        for line in lines[1:]:
+            shared, suffix, size_bytes = json.loads(line)
+            path = previous[:shared] + suffix
+            previous = path
+            parts = _split(path)
+            if path.endswith("/"):
+                tree._folder(parts, create=True).unlisted_bytes += size_bytes
+            else:
+                tree._folder(parts[:-1], create=True).files[parts[-1]] = size_bytes
+        tree._finish_bulk()
+        return tree
+
+# Variables importantes:
+# - ContentNode: Carpeta con tamaño y número de archivos de todo su subárbol, sus subcarpetas y sus archivos directos.
+# - _ranking: Todas las carpetas ordenadas por tamaño (claves de _rank_key), mantenida en cada cambio.
+# Métodos importantes:
+# - ContentTree.from_snapshot(), from_contents(): Construyen el árbol desde un DiskSnapshot o desde Disk.contents.
+# - insert(), remove(): Cambios incrementales que actualizan los totales de los ancestros y el ranking.
+# - largest_folders(): Las k carpetas más grandes en O(k).
+# - to_compact(), from_compact(): Serialización con codificación por prefijo compartido entre rutas consecutivas.
@@ -0,0 +1,314 @@
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Dict, Iterator, List, Optional
+from core.models import COLUMNAR_THRESHOLD, ContentColumns, ContentItem, ContentList, Disk, summarize_contents
+from core.repository import DiskRepository
+
+DEFAULT_DB_PATH = os.environ.get("DISK_DB_PATH", "gestor_discos.db")
+
+# Cada entrada se aplica una sola vez; PRAGMA user_version guarda la última aplicada.
+# Porcentaje de uso como en Disk.usage_percentage; debe coincidir literalmente con el índice para que SQLite lo use
+USAGE_EXPRESSION = "(CASE WHEN total_capacity_gb = 0 THEN 0.0 ELSE used_space_gb * 100.0 / total_capacity_gb END)"
+
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS disks (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        total_capacity_gb INTEGER NOT NULL DEFAULT 0,
+        used_space_gb NUMERIC NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS content_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        disk_id TEXT NOT NULL REFERENCES disks(id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        description TEXT NOT NULL,
+        size_gb NUMERIC NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_disks_name ON disks(name);
+    CREATE INDEX IF NOT EXISTS idx_content_items_disk ON content_items(disk_id, position);
+    """,
+    # Columnas para filtrar en SQL: textos normalizados con fold() y espacio libre calculado
+    """
+    ALTER TABLE disks ADD COLUMN name_folded TEXT NOT NULL DEFAULT '';
+    ALTER TABLE disks ADD COLUMN free_space_gb NUMERIC GENERATED ALWAYS AS (total_capacity_gb - used_space_gb) VIRTUAL;
+    ALTER TABLE content_items ADD COLUMN description_folded TEXT NOT NULL DEFAULT '';
+    UPDATE disks SET name_folded = fold(name);
+    UPDATE content_items SET description_folded = fold(description);
+    CREATE INDEX IF NOT EXISTS idx_disks_free_space ON disks(free_space_gb);
+    CREATE INDEX IF NOT EXISTS idx_content_items_folded ON content_items(description_folded, disk_id);
+    """,
+    # Resumen precalculado para el listado ligero de las tarjetas (get_disk_summaries)
+    """
+    ALTER TABLE disks ADD COLUMN contents_summary TEXT NOT NULL DEFAULT '';
+    UPDATE disks SET contents_summary = substr(coalesce((
+        SELECT group_concat(description, ', ') FROM (
+            SELECT description FROM content_items c WHERE c.disk_id = disks.id ORDER BY position
+        )
+    ), ''), 1, 40);
+    """,
+    # Hash del contenido de los archivos (detector de duplicados)
+    """
+    ALTER TABLE content_items ADD COLUMN content_hash TEXT;
+    """,
+    # Índices para ordenar el catálogo (sorted_disks) por capacidad y porcentaje de uso
+    f"""
+    CREATE INDEX IF NOT EXISTS idx_disks_capacity ON disks(total_capacity_gb);
+    CREATE INDEX IF NOT EXISTS idx_disks_usage ON disks({USAGE_EXPRESSION});
+    """,
+]
+
+# Columna (o expresión indexada) de cada clave de SORT_KEYS
+SORT_COLUMNS = {
+    "free_space_gb": "free_space_gb",
+    "usage_percentage": USAGE_EXPRESSION,
+    "total_capacity_gb": "total_capacity_gb",
+}
+
+INSERT_CONTENT = (
+    "INSERT INTO content_items (disk_id, position, description, description_folded, size_gb, content_hash)"
+    " VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+def _fold(text: Optional[str]) -> str:
+    # Misma normalización que el filtrado en Python (str.lower), incluidos acentos
+    return (text or "").lower()
+
+def _compact_contents(items: List[ContentItem]):
+    # Los discos con muchísimos archivos escaneados se guardan en memoria en formato columnar
+    return ContentColumns(items) if len(items) >= COLUMNAR_THRESHOLD else ContentList(items)
+
+def _like_pattern(query: str) -> str:
+    escaped = _fold(query).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+class SQLiteService(DiskRepository):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        # La UI puede llamar desde hilos distintos, así que se comparte una conexión protegida por un lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.create_function("fold", 1, _fold, deterministic=True)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            # Con WAL, NORMAL evita un fsync por transacción sin riesgo de corromper la base
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._lock = threading.RLock()
+        self._migrate()
+
+    def _migrate(self):
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for index, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                with self._conn:
+                    self._conn.executescript(script)
+                    self._conn.execute(f"PRAGMA user_version = {index}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _insert_contents(self, disk_id: str, contents: List[ContentItem]):
+        self._conn.executemany(
+            INSERT_CONTENT,
+            [(disk_id, position, item.description, _fold(item.description), item.size_gb, item.content_hash)
+             for position, item in enumerate(contents)],
+        )
+
+    def _query_disks(self, where: str = "", params: tuple = ()) -> List[Disk]:
+        # Dos consultas con el mismo WHERE: una para los discos y otra para todos sus contenidos
+        rows = self._conn.execute(f"SELECT id, name, total_capacity_gb FROM disks d {where} ORDER BY rowid", params).fetchall()
+        if not rows:
+            return []
+
+        contents: Dict[str, List[ContentItem]] = {}
+        content_rows = self._conn.execute(
+            f"SELECT disk_id, description, size_gb, content_hash FROM content_items "
+            f"WHERE disk_id IN (SELECT id FROM disks d {where}) ORDER BY disk_id, position",
+            params,
+        )
+        for row in content_rows:
+            contents.setdefault(row["disk_id"], []).append(ContentItem(row["description"], row["size_gb"], row["content_hash"]))
+
+        return [
+            Disk(
+                id=row["id"],
+                name=row["name"],
+                total_capacity_gb=row["total_capacity_gb"],
+                contents=_compact_contents(contents.get(row["id"], [])),
+            )
+            for row in rows
+        ]
+
+    def add_disk(self, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        new_id = str(uuid.uuid4())
+        usage_gb = sum(item.size_gb for item in contents)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO disks (id, name, name_folded, total_capacity_gb, used_space_gb, contents_summary) VALUES (?, ?, ?, ?, ?, ?)",
+                (new_id, name, _fold(name), total_capacity_gb, usage_gb, summarize_contents(contents)),
+            )
+            self._insert_contents(new_id, contents)
+
+        return Disk(new_id, name, total_capacity_gb, list(contents))
+
+    def _write_disks(self, disks: List[Disk], replace: bool) -> List[Disk]:
+        # Un único INSERT múltiple (executemany) por tabla, todo en la misma transacción
+        stored = []
+        disk_rows = []
+        item_rows = []
+        for disk in disks:
+            disk_id = disk.id or str(uuid.uuid4())
+            disk_rows.append((disk_id, disk.name, _fold(disk.name), disk.total_capacity_gb, disk.used_space_gb, disk.summary))
+            item_rows.extend(
+                (disk_id, position, item.description, _fold(item.description), item.size_gb, item.content_hash)
+                for position, item in enumerate(disk.contents)
+            )
+            stored.append(Disk(disk_id, disk.name, disk.total_capacity_gb, disk.contents))
+
+        insert_disk = (
+            "INSERT INTO disks (id, name, name_folded, total_capacity_gb, used_space_gb, contents_summary)"
+            " VALUES (?, ?, ?, ?, ?, ?)"
+        )
+        if replace:
+            insert_disk += (
+                " ON CONFLICT(id) DO UPDATE SET name = excluded.name, name_folded = excluded.name_folded,"
+                " total_capacity_gb = excluded.total_capacity_gb, used_space_gb = excluded.used_space_gb,"
+                " contents_summary = excluded.contents_summary"
+            )
+        with self._lock, self._conn:
+            if replace:
+                self._conn.executemany("DELETE FROM content_items WHERE disk_id = ?", [(row[0],) for row in disk_rows])
+            self._conn.executemany(insert_disk, disk_rows)
+            self._conn.executemany(INSERT_CONTENT, item_rows)
+        return stored
+
+    def add_disks(self, disks: List[Disk]) -> List[Disk]:
+        return self._write_disks(disks, replace=False)
+
+    def upsert_disks(self, disks: List[Disk]) -> List[Disk]:
+        return self._write_disks(disks, replace=True)
+
+    def delete_disks(self, disk_ids: List[str]) -> List[str]:
+        deleted = []
+        with self._lock, self._conn:
+            # Trozos de 500 ids para no superar el límite de parámetros de SQLite
+            for start in range(0, len(disk_ids), 500):
+                chunk = disk_ids[start:start + 500]
+                cursor = self._conn.execute(
+                    f"DELETE FROM disks WHERE id IN ({', '.join('?' * len(chunk))}) RETURNING id", chunk
+                )
+                deleted.extend(row[0] for row in cursor)
+        return deleted
+
+    def get_all_disks(self) -> List[Disk]:
+        with self._lock:
+            return self._query_disks()
+
+    def get_disk_summaries(self) -> List[Disk]:
+        # Solo columnas escalares: los contenidos se piden con _load_contents al abrir un disco
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, total_capacity_gb, used_space_gb, contents_summary FROM disks ORDER BY rowid"
+            ).fetchall()
+        return [
+            Disk.lazy(row[0], row[1], row[2], row[3], row[4], self._load_contents)
+            for row in rows
+        ]
+
+    def sorted_disks(self, key: str, descending: bool = False, offset: int = 0, limit: Optional[int] = None) -> List[Disk]:
+        # ORDER BY sobre una columna indexada con LIMIT/OFFSET: SQLite recorre el índice sin ordenar la tabla
+        direction = "DESC" if descending else "ASC"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, total_capacity_gb, used_space_gb, contents_summary FROM disks"
+                f" ORDER BY {SORT_COLUMNS[key]} {direction}, id {direction} LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset),
+            ).fetchall()
+        return [Disk.lazy(row[0], row[1], row[2], row[3], row[4], self._load_contents) for row in rows]
+
+    def _load_contents(self, disk_id: str) -> List[ContentItem]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT description, size_gb, content_hash FROM content_items WHERE disk_id = ? ORDER BY position", (disk_id,)
+            ).fetchall()
+        return _compact_contents([ContentItem(row[0], row[1], row[2]) for row in rows])
+
+    def iter_disks(self, page_size: int = 1000) -> Iterator[Disk]:
+        # Paginación por rowid (keyset): cada página es una consulta independiente y acotada
+        last_rowid = 0
+        while True:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT max(rowid) FROM (SELECT rowid FROM disks WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+                    (last_rowid, page_size),
+                ).fetchone()
+                if row[0] is None:
+                    return
+                page = self._query_disks("WHERE d.rowid > ? AND d.rowid <= ?", (last_rowid, row[0]))
+            last_rowid = row[0]
+            yield from page
+
+    def get_disk_by_id(self, disk_id: str) -> Optional[Disk]:
+        with self._lock:
+            disks = self._query_disks("WHERE d.id = ?", (disk_id,))
+        return disks[0] if disks else None
+
+    def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        usage_gb = sum(item.size_gb for item in contents)
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE disks SET name = ?, name_folded = ?, total_capacity_gb = ?, used_space_gb = ?, contents_summary = ? WHERE id = ?",
+                (name, _fold(name), total_capacity_gb, usage_gb, summarize_contents(contents), disk_id),
+            )
+            if cursor.rowcount == 0:
+                return None
+            self._conn.execute("DELETE FROM content_items WHERE disk_id = ?", (disk_id,))
+            self._insert_contents(disk_id, contents)
+
+        return Disk(disk_id, name, total_capacity_gb, list(contents))
+
+    def delete_disk(self, disk_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM disks WHERE id = ?", (disk_id,))
+        return cursor.rowcount > 0
+
+    def filter_disks(self, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None) -> List[Disk]:
+        # Los filtros se traducen a predicados SQL en lugar de cargar y recorrer todo el catálogo
+        conditions = []
+        params = []
+
+        if name_query:
+            conditions.append("d.name_folded LIKE ? ESCAPE '\\'")
+            params.append(_like_pattern(name_query))
+
+        if content_query:
+            # Se recorre una sola vez el índice cubriente (description_folded, disk_id)
+            conditions.append("d.id IN (SELECT disk_id FROM content_items WHERE description_folded LIKE ? ESCAPE '\\')")
+            params.append(_like_pattern(content_query))
+
+        if min_free_gb is not None:
+            conditions.append("d.free_space_gb >= ?")
+            params.append(min_free_gb)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            return self._query_disks(where, tuple(params))
+
+# Variables importantes:
+# - DEFAULT_DB_PATH: Ruta del archivo SQLite (configurable con la variable de entorno DISK_DB_PATH).
+# - SORT_COLUMNS, USAGE_EXPRESSION: Columna o expresión indexada de cada clave de orden.
+# - MIGRATIONS: Esquema normalizado (tablas disks y content_items con índices), versionado con PRAGMA user_version.
+#   Incluye name_folded/description_folded (texto en minúsculas), free_space_gb (columna generada e indexada) y contents_summary.
+# - _conn, _lock: Conexión compartida y lock para usarla desde varios hilos.
+# Métodos importantes:
+# - add_disk, get_all_disks, get_disk_by_id, update_disk, delete_disk: CRUD local, sin red.
+# - get_disk_summaries: Listado sin contenidos (resumen y espacio usado precalculados); los contenidos se cargan al acceder.
+# - add_disks, upsert_disks, delete_disks, iter_disks: Escrituras por lotes en una transacción y recorrido paginado por rowid.
+# - filter_disks: Misma API que SupabaseService/DiskService, resuelta con predicados SQL (LIKE y rango numérico).
+# - sorted_disks: Listado ordenado por espacio libre, % de uso o capacidad con ORDER BY/LIMIT sobre columnas indexadas.
@@ -0,0 +1,75 @@
+from typing import Iterable, List, Optional
+from core.models import Disk
+
+def _min_or_unbounded(min_free_gb: Optional[int]) -> float:
+    return float("-inf") if min_free_gb is None else min_free_gb
+
+class DiskFilter:
+    """Immutable description of a filter_disks() query that can also be evaluated locally."""
+
+    def __init__(self, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None):
+        self.name_query = name_query or ""
+        self.content_query = content_query or ""
+        self.min_free_gb = min_free_gb
+        self._name_folded = self.name_query.lower()
+        self._content_folded = self.content_query.lower()
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DiskFilter) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return f"DiskFilter(name_query={self.name_query!r}, content_query={self.content_query!r}, min_free_gb={self.min_free_gb!r})"
+
+    def _key(self) -> tuple:
+        return (self._name_folded, self._content_folded, self.min_free_gb)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self._name_folded and not self._content_folded and self.min_free_gb is None
+
+    def matches(self, disk: Disk, check_contents: bool = True) -> bool:
+        # Misma semántica que filter_disks en los servicios
+        if self._name_folded and self._name_folded not in disk.name.lower():
+            return False
+        if self.min_free_gb is not None and disk.free_space_gb < self.min_free_gb:
+            return False
+        if check_contents and self._content_folded and not any(self._content_folded in item.description.lower() for item in disk.contents):
+            return False
+        return True
+
+    def apply(self, disks: Iterable[Disk], base: Optional["DiskFilter"] = None) -> List[Disk]:
+        """
+        Filters `disks` in memory. When `disks` is the result of `base` and both use
+        the same content query, that condition already holds and the contents are
+        not read (so lazily loaded disks stay unloaded).
+        """
+        check_contents = base is None or base._content_folded != self._content_folded
+        return [disk for disk in disks if self.matches(disk, check_contents)]
+
+    def needs_contents(self, base: "DiskFilter") -> bool:
+        # Refinar localmente a partir de `base` obliga a leer los contenidos de los discos
+        return bool(self._content_folded) and self._content_folded != base._content_folded
+
+    def narrows(self, other: "DiskFilter") -> bool:
+        """
+        True when every disk matching self also matches `other`, so the result of
+        `other` can be filtered locally instead of querying the backend again
+        (for example "pel" -> "peli", or a higher minimum of free space).
+        """
+        return (
+            other._name_folded in self._name_folded
+            and other._content_folded in self._content_folded
+            and _min_or_unbounded(self.min_free_gb) >= _min_or_unbounded(other.min_free_gb)
+        )
+
+    def to_kwargs(self) -> dict:
+        return {"name_query": self.name_query, "content_query": self.content_query, "min_free_gb": self.min_free_gb}
+
+# Métodos importantes:
+# - matches(), apply(): Evalúan el filtro en memoria con la misma semántica que filter_disks.
+# - needs_contents(): Indica si refinar en memoria tendría que leer los contenidos (caro con discos resumidos).
+# - narrows(): Indica si un filtro es más estricto que otro (su resultado se puede refinar localmente).
+# - to_kwargs(): Argumentos para llamar a filter_disks del servicio.
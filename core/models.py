@@ -1,28 +1,223 @@
-import flet as ft
-from typing import List
+import sys
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+# A partir de este número de contenidos, from_dict usa el almacenamiento columnar
+COLUMNAR_THRESHOLD = 10000
+# Caracteres del resumen de contenidos que muestra cada tarjeta
+SUMMARY_LENGTH = 40
 
 class ContentItem:
-    def __init__(self, description: str, size_gb: int):
+    __slots__ = ("description", "size_gb", "content_hash")
+
+    def __init__(self, description: str, size_gb: int, content_hash: Optional[str] = None):
         self.description = description
         self.size_gb = size_gb
+        self.content_hash = content_hash  # Hash del contenido del archivo (ver services/dedup.py), si se conoce
+
+    def __repr__(self):
+        if self.content_hash:
+            return f"ContentItem(description={self.description!r}, size_gb={self.size_gb!r}, content_hash={self.content_hash!r})"
+        return f"ContentItem(description={self.description!r}, size_gb={self.size_gb!r})"
 
     def to_dict(self):
-        return {"description": self.description, "size_gb": self.size_gb}
+        data = {"description": self.description, "size_gb": self.size_gb}
+        if self.content_hash:
+            data["content_hash"] = self.content_hash
+        return data
 
     @staticmethod
     def from_dict(data: dict):
-        return ContentItem(description=data.get("description", ""), size_gb=data.get("size_gb", 0))
+        return ContentItem(description=data.get("description", ""), size_gb=data.get("size_gb", 0),
+                           content_hash=data.get("content_hash"))
+
+class ContentList(list):
+    """
+    List of ContentItem that keeps the sum of size_gb up to date, so the used
+    space of a Disk is O(1). Items are treated as immutable once added.
+    """
+    __slots__ = ("total",)
+
+    def __init__(self, items: Iterable[ContentItem] = ()):
+        super().__init__(items)
+        self.total = sum(item.size_gb for item in self)
+
+    def _recalculate(self):
+        self.total = sum(item.size_gb for item in self)
+
+    def append(self, item: ContentItem):
+        super().append(item)
+        self.total += item.size_gb
+
+    def extend(self, items: Iterable[ContentItem]):
+        items = list(items)
+        super().extend(items)
+        self.total += sum(item.size_gb for item in items)
+
+    def __iadd__(self, items: Iterable[ContentItem]):
+        self.extend(items)
+        return self
+
+    def insert(self, index: int, item: ContentItem):
+        super().insert(index, item)
+        self.total += item.size_gb
+
+    # Las eliminaciones ya son O(n); recalcular evita acumular error de coma flotante
+    def remove(self, item: ContentItem):
+        super().remove(item)
+        self._recalculate()
+
+    def pop(self, index: int = -1) -> ContentItem:
+        item = super().pop(index)
+        self._recalculate()
+        return item
+
+    def clear(self):
+        super().clear()
+        self.total = 0
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._recalculate()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._recalculate()
+
+    def __imul__(self, factor: int):
+        super().__imul__(factor)
+        self._recalculate()
+        return self
+
+class ContentColumns:
+    """
+    Columnar store for very large content lists (hundreds of thousands of scanned
+    files): sizes live in a packed array of doubles and descriptions are interned,
+    instead of one ContentItem object per entry. Items are materialized on access.
+    """
+    __slots__ = ("descriptions", "sizes", "hashes", "total")
+
+    def __init__(self, items: Iterable[ContentItem] = ()):
+        self.descriptions: List[str] = []
+        self.sizes = array("d")
+        self.hashes: Dict[int, str] = {}  # Disperso: solo las posiciones con content_hash
+        self.total = 0
+        self.extend(items)
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def __bool__(self) -> bool:
+        return len(self.sizes) > 0
+
+    def _item(self, position: int) -> ContentItem:
+        return ContentItem(self.descriptions[position], _plain_number(self.sizes[position]), self.hashes.get(position))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._item(position) for position in range(*index.indices(len(self.sizes)))]
+        return self._item(range(len(self.sizes))[index])
+
+    def __iter__(self) -> Iterator[ContentItem]:
+        if self.hashes:
+            for position in range(len(self.sizes)):
+                yield self._item(position)
+            return
+        for description, size in zip(self.descriptions, self.sizes):
+            yield ContentItem(description, _plain_number(size))
+
+    def append(self, item: ContentItem):
+        if item.content_hash:
+            self.hashes[len(self.sizes)] = item.content_hash
+        self.descriptions.append(sys.intern(item.description))
+        self.sizes.append(item.size_gb)
+        self.total += item.size_gb
+
+    def extend(self, items: Iterable[ContentItem]):
+        for item in items:
+            self.append(item)
+
+    def clear(self):
+        self.descriptions.clear()
+        self.sizes = array("d")
+        self.hashes.clear()
+        self.total = 0
+
+def _plain_number(value: float):
+    # Los tamaños enteros se devuelven como int, igual que en ContentItem
+    return int(value) if value.is_integer() else value
+
+Contents = Union[ContentList, ContentColumns]
+
+def summarize_contents(items: Iterable[ContentItem], length: int = SUMMARY_LENGTH) -> str:
+    """First `length` characters of the comma-separated descriptions (stops reading once it has enough)."""
+    parts = []
+    size = -2  # Longitud del texto unido con ", "
+    for item in items:
+        parts.append(item.description)
+        size += len(item.description) + 2
+        if size >= length:
+            break
+    return ", ".join(parts)[:length]
 
 class Disk:
-    def __init__(self, id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]):
+    __slots__ = ("id", "name", "total_capacity_gb", "_contents", "_loader", "_used_space_gb", "_summary")
+
+    def __init__(self, id: str, name: str, total_capacity_gb: int, contents: Iterable[ContentItem]):
         self.id = id
         self.name = name
         self.total_capacity_gb = total_capacity_gb
+        self._loader = None
         self.contents = contents
 
+    @classmethod
+    def lazy(cls, id: str, name: str, total_capacity_gb: int, used_space_gb, summary: str,
+             loader: Optional[Callable[[str], Iterable[ContentItem]]]) -> "Disk":
+        """
+        Disk built from a summary listing: the used space and the content summary
+        come precomputed from the backend and `loader(disk_id)` is called to fetch
+        the contents the first time they are accessed.
+        """
+        disk = cls.__new__(cls)
+        disk.id = id
+        disk.name = name
+        disk.total_capacity_gb = total_capacity_gb
+        disk._contents = None
+        disk._loader = loader
+        disk._used_space_gb = used_space_gb or 0
+        disk._summary = summary or ""
+        return disk
+
+    @property
+    def contents_loaded(self) -> bool:
+        return self._contents is not None
+
+    @property
+    def contents(self) -> Contents:
+        if self._contents is None:
+            self.contents = self._loader(self.id) if self._loader else []
+        return self._contents
+
+    @contents.setter
+    def contents(self, items: Iterable[ContentItem]):
+        if not isinstance(items, (ContentList, ContentColumns)):
+            items = ContentList(items)
+        self._contents = items
+        self._loader = None
+        self._used_space_gb = None
+        self._summary = None
+
+    @property
+    def summary(self) -> str:
+        if self._contents is None:
+            return self._summary
+        return summarize_contents(self._contents)
+
     @property
     def used_space_gb(self) -> int:
-        return sum(item.size_gb for item in self.contents)
+        if self._contents is None:
+            return self._used_space_gb
+        return self._contents.total
 
     @property
     def free_space_gb(self) -> int:
@@ -43,19 +238,28 @@ class Disk:
         }
 
     @staticmethod
-    def from_dict(data: dict):
-        contents_list = [ContentItem.from_dict(item) for item in data.get("contents", [])]
+    def from_dict(data: dict, columnar: bool = None):
+        raw_contents = data.get("contents") or []
+        if columnar is None:
+            columnar = len(raw_contents) >= COLUMNAR_THRESHOLD
+        items = (ContentItem.from_dict(item) for item in raw_contents)
+        contents = ContentColumns(items) if columnar else ContentList(items)
         # The used_space_gb is now calculated, so it's not passed to the constructor
         return Disk(
             id=data.get("id"),
             name=data.get("name"),
             total_capacity_gb=data.get("total_capacity_gb"),
-            contents=contents_list,
+            contents=contents,
         )
 
 # Variables importantes:
+# - ContentItem.content_hash: Hash opcional del contenido (lo rellena el detector de duplicados).
 # - id: Identificador único del disco.
 # - name, total_capacity_gb, used_space_gb, contents: Atributos del disco.
+# - contents: ContentList (lista con total incremental) o ContentColumns (almacenamiento columnar para listas enormes).
+# - used_space_gb (property): Total mantenido por contents, O(1) (o el valor precalculado si contents aún no se ha cargado).
+# - summary (property), summarize_contents(): Resumen de SUMMARY_LENGTH caracteres que muestran las tarjetas.
+# - Disk.lazy(): Disco de un listado resumido; contents se carga con el loader en el primer acceso.
 # - free_space_gb (property): Calcula el espacio libre.
 # - usage_percentage (property): Calcula el porcentaje de uso.
-# - to_dict(), from_dict(): Métodos para serialización/deserialización (útil para JSON/SQLite).
\ No newline at end of file
+# - to_dict(), from_dict(): Métodos para serialización/deserialización (útil para JSON/SQLite); from_dict usa columnas a partir de COLUMNAR_THRESHOLD.
@@ -0,0 +1,173 @@
+import functools
+from abc import ABC, abstractmethod
+from operator import attrgetter
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from core.models import Disk, ContentItem
+
+# Atributos de Disk por los que se puede ordenar el catálogo (sorted_disks)
+SORT_KEYS = ("free_space_gb", "usage_percentage", "total_capacity_gb")
+
+def _sort_page(disks: List[Disk], key: str, descending: bool, offset: int, limit: Optional[int]) -> List[Disk]:
+    ordered = sorted(disks, key=attrgetter(key), reverse=descending)
+    return ordered[offset:] if limit is None else ordered[offset:offset + limit]
+
+@functools.lru_cache(maxsize=None)
+def backend_errors() -> Tuple[type, ...]:
+    """
+    Exceptions raised when a backend cannot complete a request: PostgREST
+    rejections, network failures and SQLite errors. Meant for `except
+    backend_errors():`, which only imports them when an exception is raised.
+    """
+    import sqlite3
+    import httpx
+    from postgrest.exceptions import APIError
+    return (APIError, httpx.HTTPError, sqlite3.Error)
+
+class RowFailure(NamedTuple):
+    index: int  # Posición de la fila en la lista recibida
+    disk_id: Optional[str]
+    error: str
+    transport: bool = False  # Fallo de red: la fila no llegó al servidor (no es un rechazo de la fila)
+
+class BatchResult(list):
+    """
+    Result of a batched write: the list of rows that were stored, plus
+    `failures` with the rows the backend rejected (one RowFailure each).
+    """
+
+    def __init__(self, items: Iterable = (), failures: Optional[List[RowFailure]] = None):
+        super().__init__(items)
+        self.failures: List[RowFailure] = failures or []
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+class DiskRepository(ABC):
+    """
+    Common interface for every disk catalog backend (Supabase, SQLite, memory).
+    HomeView only talks to this API, so backends can be swapped freely.
+    """
+
+    @abstractmethod
+    def add_disk(self, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        ...
+
+    @abstractmethod
+    def get_all_disks(self) -> List[Disk]:
+        ...
+
+    @abstractmethod
+    def get_disk_by_id(self, disk_id: str) -> Optional[Disk]:
+        ...
+
+    @abstractmethod
+    def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        ...
+
+    @abstractmethod
+    def delete_disk(self, disk_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def filter_disks(self, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None) -> List[Disk]:
+        ...
+
+    def add_disks(self, disks: List[Disk]) -> List[Disk]:
+        """
+        Inserts several disks at once, keeping their ids (a new one is generated when
+        the id is empty). Backends override this with a single batched write; the
+        default just calls add_disk for each disk, so it generates new ids.
+        """
+        stored = []
+        for disk in disks:
+            new_disk = self.add_disk(disk.name, disk.total_capacity_gb, list(disk.contents))
+            if new_disk:
+                stored.append(new_disk)
+        return stored
+
+    def upsert_disks(self, disks: List[Disk]) -> List[Disk]:
+        """Inserts or replaces several disks by id; replaying the same batch is harmless."""
+        stored = []
+        for disk in disks:
+            updated = self.update_disk(disk.id, disk.name, disk.total_capacity_gb, list(disk.contents)) if disk.id else None
+            stored.extend([updated] if updated else self.add_disks([disk]))
+        return stored
+
+    def delete_disks(self, disk_ids: List[str]) -> List[str]:
+        # Devuelve los ids que se han borrado
+        return [disk_id for disk_id in disk_ids if self.delete_disk(disk_id)]
+
+    def get_disk_summaries(self) -> List[Disk]:
+        """
+        Listing for the card grid: backends that can project the scalar columns
+        plus a precomputed summary return lazy Disks (see Disk.lazy) whose
+        contents are only fetched when accessed. Defaults to get_all_disks().
+        """
+        return self.get_all_disks()
+
+    def sorted_disks(self, key: str, descending: bool = False, offset: int = 0, limit: Optional[int] = None) -> List[Disk]:
+        """
+        Disks ordered by one of SORT_KEYS, skipping `offset` and returning at most
+        `limit` (top-N is descending=True, limit=N). In-memory stores answer from
+        sorted indexes; the default sorts the summary listing.
+        """
+        return _sort_page(self.get_disk_summaries(), key, descending, offset, limit)
+
+    def iter_disks(self, page_size: int = 1000) -> Iterator[Disk]:
+        # Recorre el catálogo completo; los backends con paginación lo hacen sin cargarlo entero en memoria
+        return iter(self.get_all_disks())
+
+    def refresh(self):
+        # Descarta el estado cacheado (si lo hay) para que la siguiente lectura vea los datos actuales
+        pass
+
+class AsyncDiskRepository(ABC):
+    """
+    Asynchronous counterpart of DiskRepository, used by the Flet event handlers so
+    that network I/O never blocks the UI.
+    """
+
+    @abstractmethod
+    async def add_disk(self, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        ...
+
+    @abstractmethod
+    async def get_all_disks(self) -> List[Disk]:
+        ...
+
+    @abstractmethod
+    async def get_disk_by_id(self, disk_id: str) -> Optional[Disk]:
+        ...
+
+    @abstractmethod
+    async def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        ...
+
+    @abstractmethod
+    async def delete_disk(self, disk_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def filter_disks(self, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None) -> List[Disk]:
+        ...
+
+    async def get_disk_summaries(self) -> List[Disk]:
+        return await self.get_all_disks()
+
+    async def sorted_disks(self, key: str, descending: bool = False, offset: int = 0, limit: Optional[int] = None) -> List[Disk]:
+        return _sort_page(await self.get_disk_summaries(), key, descending, offset, limit)
+
+    async def refresh(self):
+        pass
+
+# Métodos importantes:
+# - add_disk, get_all_disks, get_disk_by_id, update_disk, delete_disk: CRUD que todo backend debe implementar.
+# - filter_disks: Filtrado por nombre, contenido y espacio libre mínimo.
+# - sorted_disks: Discos ordenados por una de SORT_KEYS, por páginas (también sirve para top-N).
+# - get_disk_summaries: Listado ligero para las tarjetas (sin contenidos, que se cargan bajo demanda).
+# - add_disks, upsert_disks, delete_disks, iter_disks: Escrituras por lotes y lectura paginada (importación/exportación del catálogo).
+# - backend_errors: Excepciones de fallo del backend (APIError, httpx.HTTPError, sqlite3.Error) para capturarlas en la UI.
+# - BatchResult, RowFailure: Resultado de una escritura por lotes con los fallos por fila.
+# - refresh: Gancho opcional para backends con caché (por defecto no hace nada).
+# - AsyncDiskRepository: Misma API con corrutinas, para los manejadores de eventos de la UI.
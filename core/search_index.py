@@ -0,0 +1,258 @@
+import bisect
+import heapq
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set, Tuple
+from core.models import Disk
+
+# Palabras alfanuméricas; "_" separa tokens porque es habitual en nombres de archivo
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Puntuaciones por tipo de coincidencia (de mejor a peor)
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.8
+SUBSTRING_SCORE = 0.6
+FUZZY_WEIGHT = 0.5
+
+def _fold(text: str) -> str:
+    return (text or "").lower()
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text)
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchHit(NamedTuple):
+    disk_id: str
+    description: str
+    score: float
+
+class ContentIndex:
+    """
+    Inverted index over the ContentItem descriptions of every Disk.
+
+    Documents (one per ContentItem) are indexed by token; the token vocabulary is
+    itself indexed by trigram, so substring, prefix and fuzzy lookups only touch
+    the vocabulary and the postings of the matching tokens instead of every item.
+    """
+
+    def __init__(self, fuzzy_threshold: float = 0.4):
+        self.fuzzy_threshold = fuzzy_threshold
+        self._next_doc_id = 0
+        self._docs: Dict[int, Tuple[str, str, str]] = {}  # doc_id -> (disk_id, descripción, descripción en minúsculas)
+        self._disk_docs: Dict[str, List[int]] = {}
+        self._postings: Dict[str, Set[int]] = {}  # token -> doc_ids
+        self._disk_postings: Dict[str, Counter] = {}  # token -> {disk_id: nº de documentos}
+        self._token_trigrams: Dict[str, Set[str]] = {}  # trigrama -> tokens del vocabulario
+        self._sorted_tokens: List[str] = []  # vocabulario ordenado para búsquedas por prefijo
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # --- Mantenimiento incremental ---
+
+    def add_disk(self, disk: Disk):
+        if disk.id in self._disk_docs:
+            self.remove_disk(disk.id)
+
+        doc_ids = []
+        for item in disk.contents:
+            doc_id = self._next_doc_id
+            self._next_doc_id += 1
+            folded = _fold(item.description)
+            self._docs[doc_id] = (disk.id, item.description, folded)
+            for token in set(_tokenize(folded)):
+                self._add_posting(token, doc_id, disk.id)
+            doc_ids.append(doc_id)
+        self._disk_docs[disk.id] = doc_ids
+
+    def update_disk(self, disk: Disk):
+        self.add_disk(disk)
+
+    def remove_disk(self, disk_id: str):
+        for doc_id in self._disk_docs.pop(disk_id, []):
+            _, _, folded = self._docs.pop(doc_id)
+            for token in set(_tokenize(folded)):
+                self._remove_posting(token, doc_id, disk_id)
+
+    def rebuild(self, disks: Iterable[Disk]):
+        self.__init__(self.fuzzy_threshold)
+        for disk in disks:
+            self.add_disk(disk)
+
+    def _add_posting(self, token: str, doc_id: int, disk_id: str):
+        postings = self._postings.get(token)
+        if postings is None:
+            postings = self._postings[token] = set()
+            self._disk_postings[token] = Counter()
+            bisect.insort(self._sorted_tokens, token)
+            for trigram in _trigrams(token):
+                self._token_trigrams.setdefault(trigram, set()).add(token)
+        postings.add(doc_id)
+        self._disk_postings[token][disk_id] += 1
+
+    def _remove_posting(self, token: str, doc_id: int, disk_id: str):
+        postings = self._postings.get(token)
+        if postings is None:
+            return
+        postings.discard(doc_id)
+        disk_counts = self._disk_postings[token]
+        disk_counts[disk_id] -= 1
+        if disk_counts[disk_id] <= 0:
+            del disk_counts[disk_id]
+        if not postings:
+            del self._postings[token]
+            del self._disk_postings[token]
+            index = bisect.bisect_left(self._sorted_tokens, token)
+            if index < len(self._sorted_tokens) and self._sorted_tokens[index] == token:
+                del self._sorted_tokens[index]
+            for trigram in _trigrams(token):
+                tokens = self._token_trigrams.get(trigram)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._token_trigrams[trigram]
+
+    # --- Búsqueda sobre el vocabulario ---
+
+    def _tokens_with_prefix(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._sorted_tokens, prefix)
+        end = bisect.bisect_left(self._sorted_tokens, prefix + "\U0010ffff")
+        return self._sorted_tokens[start:end]
+
+    def _tokens_containing(self, fragment: str) -> List[str]:
+        if len(fragment) < 3:
+            return [token for token in self._sorted_tokens if fragment in token]
+        # Trigramas internos del fragmento (sin relleno): todo token que lo contiene los tiene
+        candidates = None
+        for trigram in sorted((fragment[i:i + 3] for i in range(len(fragment) - 2)),
+                              key=lambda t: len(self._token_trigrams.get(t, ()))):
+            tokens = self._token_trigrams.get(trigram)
+            if not tokens:
+                return []
+            candidates = set(tokens) if candidates is None else candidates & tokens
+            if not candidates:
+                return []
+        return [token for token in candidates if fragment in token]
+
+    def _fuzzy_tokens(self, token: str) -> Dict[str, float]:
+        query_trigrams = _trigrams(token)
+        overlap = Counter()
+        for trigram in query_trigrams:
+            overlap.update(self._token_trigrams.get(trigram, ()))
+
+        # Jaccard >= umbral exige compartir al menos umbral * |trigramas de la consulta|
+        min_shared = self.fuzzy_threshold * len(query_trigrams)
+        similar = {}
+        for candidate, shared in overlap.items():
+            if shared < min_shared:
+                continue
+            similarity = shared / (len(query_trigrams) + len(_trigrams(candidate)) - shared)
+            if similarity >= self.fuzzy_threshold:
+                similar[candidate] = similarity
+        return similar
+
+    def _ranked_tokens(self, part: str, fuzzy: bool) -> Iterator[Tuple[str, float]]:
+        # Tokens del vocabulario que coinciden con `part`, ordenados de mayor a menor puntuación
+        seen = set()
+        if part in self._postings:
+            seen.add(part)
+            yield part, EXACT_SCORE
+        for token in self._tokens_with_prefix(part):
+            if token not in seen:
+                seen.add(token)
+                yield token, PREFIX_SCORE
+        for token in self._tokens_containing(part):
+            if token not in seen:
+                seen.add(token)
+                yield token, SUBSTRING_SCORE
+        if fuzzy:
+            similar = self._fuzzy_tokens(part)
+            for token in sorted(similar, key=similar.get, reverse=True):
+                if token not in seen:
+                    yield token, similar[token] * FUZZY_WEIGHT
+
+    def _docs_for_tokens(self, tokens: Iterable[str]) -> Set[int]:
+        docs: Set[int] = set()
+        for token in tokens:
+            docs |= self._postings.get(token, set())
+        return docs
+
+    # --- API pública ---
+
+    def matching_disk_ids(self, query: str) -> Set[str]:
+        """Disk ids with a description containing `query` (same semantics as filter_disks)."""
+        folded = _fold(query)
+        parts = _tokenize(folded)
+        if not parts:
+            return {disk_id for disk_id, _, text in self._docs.values() if folded in text}
+
+        if len(parts) == 1 and parts[0] == folded:
+            # Una sola palabra: basta con unir los discos de los tokens que la contienen
+            disk_ids: Set[str] = set()
+            for token in self._tokens_containing(folded):
+                disk_ids.update(self._disk_postings[token])
+            return disk_ids
+
+        candidates = None
+        for part in sorted(parts, key=len, reverse=True):
+            docs = self._docs_for_tokens(self._tokens_containing(part))
+            candidates = docs if candidates is None else candidates & docs
+            if not candidates:
+                return set()
+
+        return {self._docs[doc_id][0] for doc_id in candidates if folded in self._docs[doc_id][2]}
+
+    def search(self, query: str, limit: int = 50, fuzzy: bool = True) -> List[SearchHit]:
+        """Ranked search: exact token > prefix > substring > fuzzy (trigram similarity)."""
+        folded = _fold(query)
+        parts = _tokenize(folded)
+        if not parts:
+            return []
+
+        if len(parts) == 1:
+            # Los tokens llegan de mejor a peor puntuación: se corta en cuanto hay `limit` resultados
+            hits: List[SearchHit] = []
+            seen: Set[int] = set()
+            for token, score in self._ranked_tokens(parts[0], fuzzy):
+                for doc_id in self._postings[token]:
+                    if doc_id not in seen:
+                        seen.add(doc_id)
+                        disk_id, description, _ = self._docs[doc_id]
+                        hits.append(SearchHit(disk_id=disk_id, description=description, score=score))
+                        if len(hits) >= limit:
+                            return hits
+            return hits
+
+        totals: Dict[int, float] = None
+        for part in parts:
+            scores: Dict[int, float] = {}
+            for token, score in self._ranked_tokens(part, fuzzy):
+                for doc_id in self._postings[token]:
+                    scores.setdefault(doc_id, score)
+
+            if totals is None:
+                totals = scores
+            else:
+                totals = {doc_id: totals[doc_id] + score for doc_id, score in scores.items() if doc_id in totals}
+            if not totals:
+                return []
+
+        best = heapq.nlargest(limit, totals.items(), key=lambda entry: entry[1])
+        return [
+            SearchHit(disk_id=self._docs[doc_id][0], description=self._docs[doc_id][1], score=score / len(parts))
+            for doc_id, score in best
+        ]
+
+# Variables importantes:
+# - _docs: Un documento por ContentItem (disk_id, descripción original y en minúsculas).
+# - _postings: Índice invertido token -> documentos.
+# - _disk_postings: Índice token -> discos (con contador) para resolver filtros de una palabra sin tocar documentos.
+# - _token_trigrams: Índice de trigramas sobre el vocabulario (para subcadenas y búsqueda difusa).
+# - _sorted_tokens: Vocabulario ordenado para búsquedas por prefijo con bisect.
+# Métodos importantes:
+# - add_disk, update_disk, remove_disk: Mantienen el índice de forma incremental.
+# - matching_disk_ids(): Discos cuyo contenido contiene la consulta (mismo resultado que el filtro lineal).
+# - search(): Resultados ordenados por calidad de coincidencia (exacta, prefijo, subcadena, difusa).
@@ -0,0 +1,104 @@
+import bisect
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Con más altas que esta fracción del índice de una vez, se añaden al final y se reordena todo
+BULK_FRACTION = 0.1
+
+class SortedIndex:
+    """
+    Secondary index of one numeric attribute of the disks (free space, usage
+    percentage, capacity): a list of (value, disk_id) kept sorted with bisect, plus
+    the current value of each disk so it can be found again on update or removal.
+    Range queries, top-N and ordered pages cost O(log n + k).
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[float, str]] = []  # (valor, disk_id) ordenado; el id desempata
+        self._values: Dict[str, float] = {}  # disk_id -> valor indexado
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, disk_id: str) -> bool:
+        return disk_id in self._values
+
+    # --- Mantenimiento ---
+
+    def add(self, disk_id: str, value: float):
+        if disk_id in self._values:
+            if self._values[disk_id] == value:
+                return
+            self.remove(disk_id)
+        self._values[disk_id] = value
+        bisect.insort(self._entries, (value, disk_id))
+
+    def add_many(self, pairs: Iterable[Tuple[str, float]]):
+        pairs = list(pairs)
+        new_ids = {disk_id for disk_id, _ in pairs}
+        if (len(pairs) < max(1, BULK_FRACTION * len(self._entries)) or len(new_ids) < len(pairs)
+                or not new_ids.isdisjoint(self._values)):
+            for disk_id, value in pairs:
+                self.add(disk_id, value)
+            return
+        # Carga inicial o lotes grandes: un solo sort en lugar de un insort (O(n)) por disco
+        self._entries.extend((value, disk_id) for disk_id, value in pairs)
+        self._entries.sort()
+        self._values.update(pairs)
+
+    def remove(self, disk_id: str) -> bool:
+        value = self._values.pop(disk_id, None)
+        if value is None:
+            return False
+        index = bisect.bisect_left(self._entries, (value, disk_id))
+        del self._entries[index]
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self._values.clear()
+
+    # --- Consultas ---
+
+    def value(self, disk_id: str) -> Optional[float]:
+        return self._values.get(disk_id)
+
+    def _bounds(self, low: Optional[float], high: Optional[float]) -> Tuple[int, int]:
+        # (valor,) va delante de cualquier (valor, id): bisect_left da la primera entrada >= valor
+        start = 0 if low is None else bisect.bisect_left(self._entries, (low,))
+        end = len(self._entries) if high is None else bisect.bisect_left(self._entries, (math.nextafter(high, math.inf),))
+        return start, max(start, end)
+
+    def range(self, low: Optional[float] = None, high: Optional[float] = None) -> List[str]:
+        """Ids with low <= value <= high (either bound may be None), in ascending order."""
+        start, end = self._bounds(low, high)
+        return [disk_id for _, disk_id in self._entries[start:end]]
+
+    def count(self, low: Optional[float] = None, high: Optional[float] = None) -> int:
+        start, end = self._bounds(low, high)
+        return end - start
+
+    def page(self, offset: int = 0, limit: Optional[int] = None, descending: bool = False) -> List[str]:
+        """Ids in value order, skipping `offset` and returning at most `limit`."""
+        size = len(self._entries)
+        end = size if limit is None else min(size, offset + limit)
+        if offset >= end:
+            return []
+        if not descending:
+            return [disk_id for _, disk_id in self._entries[offset:end]]
+        # En orden descendente se recorre desde el final sin copiar la lista entera
+        return [self._entries[size - 1 - position][1] for position in range(offset, end)]
+
+    def smallest(self, count: int) -> List[str]:
+        return self.page(0, count)
+
+    def largest(self, count: int) -> List[str]:
+        return self.page(0, count, descending=True)
+
+# Variables importantes:
+# - _entries: Pares (valor, disk_id) ordenados; _values: valor actual de cada disco para localizarlo al cambiar.
+# - BULK_FRACTION: Tamaño de lote a partir del cual add_many() reordena en bloque en vez de insertar uno a uno.
+# Métodos importantes:
+# - add(), add_many(), remove(): Mantenimiento con bisect (add también sirve para actualizar el valor).
+# - range(), count(): Discos con el valor dentro de un rango, en O(log n + k) y O(log n).
+# - page(), smallest(), largest(): Orden ascendente o descendente por páginas y top-N.
@@ -1,5 +1,44 @@
+import os
+import time
+
+# Referencia para las métricas de arranque (startup.* en el panel de diagnóstico)
+STARTED_AT = time.perf_counter()
+
 import flet as ft
-from ui.views.home_view import HomeView
+
+def create_disk_service():
+    # DISK_BACKEND=sqlite usa el catálogo local (sin red); supabase-async usa el cliente async nativo;
+    # supabase-cached usa la caché por entradas. Por defecto se usa una réplica local de Supabase que
+    # se sincroniza por deltas. Los servicios síncronos se ejecutan en hilos desde HomeView.
+    backend = os.environ.get("DISK_BACKEND", "supabase").lower()
+    if backend == "sqlite":
+        from core.database import SQLiteService
+        return SQLiteService()
+    if backend == "supabase-async":
+        from services.async_supabase_service import AsyncSupabaseService
+        return AsyncSupabaseService()
+    from services.supabase_service import SupabaseService
+    if backend == "supabase-cached":
+        from services.cached_service import CachedDiskService
+        service = CachedDiskService(SupabaseService())
+    else:
+        from services.sync_service import SyncEngine
+        service = SyncEngine(SupabaseService())
+    # Las escrituras a Supabase pasan por una cola local que se vacía en segundo plano;
+    # DISK_OFFLINE_QUEUE=0 vuelve a las escrituras directas
+    if os.environ.get("DISK_OFFLINE_QUEUE", "1") == "0":
+        return service
+    from services.write_queue import OfflineWriteQueue
+    return OfflineWriteQueue(service)
+
+def create_realtime_subscriber(disk_service):
+    # Los cambios en vivo necesitan la réplica del SyncEngine; DISK_REALTIME=0 los desactiva
+    from services.sync_service import SyncEngine
+    engine = getattr(disk_service, "remote", disk_service)  # Detrás de la cola de escrituras, si la hay
+    if not isinstance(engine, SyncEngine) or os.environ.get("DISK_REALTIME", "1") == "0":
+        return None
+    from services.realtime_service import RealtimeSubscriber
+    return RealtimeSubscriber(engine)
 
 def main(page: ft.Page):
     page.title = "Gestor de Discos"
@@ -20,15 +59,21 @@ def main(page: ft.Page):
             on_surface=ft.Colors.WHITE,
             on_background=ft.Colors.WHITE,
         ),
-        font_family="Roboto",
     )
+    # Sin fuentes remotas: la descarga desde Google Fonts retrasaba la primera pantalla (y fallaba sin red)
 
-    # Cargar la fuente Roboto desde Google Fonts
-    page.fonts = {
-        "Roboto": "https://fonts.googleapis.com/css2?family=Roboto:wght@400;500;700&display=swap"
-    }
-
-    home_view = HomeView(page)
+    # La vista se importa aquí para que arrancar el proceso no cargue todos los controles; los
+    # clientes de Supabase se crean con la primera petición, después de pintar la ventana
+    from services.catalog_cache import CatalogCache
+    from ui.views.home_view import HomeView
+    disk_service = create_disk_service()
+    home_view = HomeView(
+        page,
+        disk_service=disk_service,
+        realtime=create_realtime_subscriber(disk_service),
+        catalog_cache=CatalogCache(),
+        started_at=STARTED_AT,
+    )
     page.add(home_view)
     page.update()
 
@@ -1,3 +1,4 @@
+from core.models import ContentItem, Disk
 from services.supabase_service import SupabaseService
 
 def seed_data():
@@ -13,11 +14,14 @@ def seed_data():
 
     print("Seeding database with sample data...")
     
-    service.add_disk("SSD Principal", 500, 450, ["Sistema Operativo", "Apps"])
-    service.add_disk("HDD Backups", 2000, 1200, ["Fotos Familiares", "Documentos"])
-    service.add_disk("NVMe Juegos", 1000, 100, ["Juegos Actuales"])
-    service.add_disk("USB Trabajo", 128, 10, ["Proyectos Activos"])
-    service.add_disk("Servidor Media", 4000, 3800, ["Peliculas", "Series"])
+    # A single multi-row insert instead of one request per disk
+    service.add_disks([
+        Disk(None, "SSD Principal", 500, [ContentItem("Sistema Operativo", 300), ContentItem("Apps", 150)]),
+        Disk(None, "HDD Backups", 2000, [ContentItem("Fotos Familiares", 700), ContentItem("Documentos", 500)]),
+        Disk(None, "NVMe Juegos", 1000, [ContentItem("Juegos Actuales", 100)]),
+        Disk(None, "USB Trabajo", 128, [ContentItem("Proyectos Activos", 10)]),
+        Disk(None, "Servidor Media", 4000, [ContentItem("Peliculas", 2500), ContentItem("Series", 1300)]),
+    ])
     
     print("Seeding complete.")
 
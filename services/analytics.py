@@ -0,0 +1,211 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+import numpy as np
+from core.models import ContentColumns, Disk
+
+# Tolerancia para comparar tamaños en GB con coma flotante
+_EPSILON = 1e-9
+
+class FleetTotals(NamedTuple):
+    disk_count: int
+    item_count: int
+    total_capacity_gb: float
+    used_space_gb: float
+    free_space_gb: float
+    usage_percentage: float
+
+class Histogram(NamedTuple):
+    counts: np.ndarray
+    edges: np.ndarray
+
+class TopItem(NamedTuple):
+    disk_id: str
+    disk_name: str
+    description: str
+    size_gb: float
+
+class FitCandidate(NamedTuple):
+    disk_id: str
+    disk_name: str
+    free_space_gb: float
+    leftover_gb: float
+
+class PlacementPlan:
+    """Result of CatalogAnalytics.plan_placement()."""
+
+    def __init__(self, item_sizes: np.ndarray, item_disk_ids: List[Optional[str]], remaining_gb: Dict[str, float]):
+        self.item_sizes = item_sizes
+        self.item_disk_ids = item_disk_ids
+        self.remaining_gb = remaining_gb
+
+    @property
+    def assignments(self) -> Dict[str, List[int]]:
+        # disk_id -> índices (en la lista de entrada) de los elementos asignados a ese disco
+        result: Dict[str, List[int]] = {}
+        for index, disk_id in enumerate(self.item_disk_ids):
+            if disk_id is not None:
+                result.setdefault(disk_id, []).append(index)
+        return result
+
+    @property
+    def unplaced(self) -> List[int]:
+        return [index for index, disk_id in enumerate(self.item_disk_ids) if disk_id is None]
+
+    @property
+    def placed_gb(self) -> float:
+        placed = np.fromiter((disk_id is not None for disk_id in self.item_disk_ids), dtype=bool, count=len(self.item_disk_ids))
+        return float(self.item_sizes[placed].sum())
+
+    @property
+    def waste_gb(self) -> float:
+        """Free space left on the disks that received at least one item."""
+        used_disks = {disk_id for disk_id in self.item_disk_ids if disk_id is not None}
+        return float(sum(self.remaining_gb[disk_id] for disk_id in used_disks))
+
+class CatalogAnalytics:
+    """
+    Catalog statistics computed over NumPy arrays.
+
+    Disk capacities/usage are loaded into one array per column and every content
+    size into a single flat array (with per-disk offsets), so totals, histograms,
+    top-N and placement run vectorized instead of looping over Disk objects.
+    The snapshot is taken at construction time; build a new instance after edits.
+    """
+
+    def __init__(self, disks: Iterable[Disk]):
+        self.disks: List[Disk] = list(disks)
+        count = len(self.disks)
+        self.capacity = np.fromiter((d.total_capacity_gb or 0 for d in self.disks), dtype=np.float64, count=count)
+        self.used = np.fromiter((d.used_space_gb for d in self.disks), dtype=np.float64, count=count)
+        self.free = self.capacity - self.used
+
+        item_counts = np.fromiter((len(d.contents) for d in self.disks), dtype=np.int64, count=count)
+        # offsets[i] es la posición en item_sizes del primer contenido del disco i
+        self.offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(item_counts, out=self.offsets[1:])
+        self.item_sizes = np.concatenate([_content_sizes(d) for d in self.disks]) if count else np.zeros(0)
+
+    @property
+    def usage_percentage(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            usage = np.where(self.capacity > 0, self.used / self.capacity * 100, 0.0)
+        return usage
+
+    def fleet_totals(self) -> FleetTotals:
+        capacity = float(self.capacity.sum())
+        used = float(self.used.sum())
+        return FleetTotals(
+            disk_count=len(self.disks),
+            item_count=int(self.item_sizes.size),
+            total_capacity_gb=capacity,
+            used_space_gb=used,
+            free_space_gb=capacity - used,
+            usage_percentage=(used / capacity * 100) if capacity else 0.0,
+        )
+
+    def usage_histogram(self, bins: int = 10) -> Histogram:
+        # Los discos sobrecargados (>100%) caen en el último intervalo
+        counts, edges = np.histogram(np.clip(self.usage_percentage, 0, 100), bins=bins, range=(0, 100))
+        return Histogram(counts, edges)
+
+    def item_size_histogram(self, bins: int = 10) -> Histogram:
+        """Histogram of content sizes with logarithmic bins (sizes span several orders of magnitude)."""
+        sizes = self.item_sizes[self.item_sizes > 0]
+        if sizes.size == 0:
+            return Histogram(np.zeros(bins, dtype=np.int64), np.zeros(bins + 1))
+        low, high = sizes.min(), sizes.max()
+        edges = np.geomspace(low, high, bins + 1) if high > low else np.linspace(low, low + 1, bins + 1)
+        counts, edges = np.histogram(sizes, bins=edges)
+        return Histogram(counts, edges)
+
+    def top_items(self, n: int = 10) -> List[TopItem]:
+        total = self.item_sizes.size
+        n = min(n, total)
+        if n <= 0:
+            return []
+        # argpartition es O(total); solo se ordenan los n seleccionados
+        candidates = np.argpartition(-self.item_sizes, n - 1)[:n]
+        candidates = candidates[np.argsort(-self.item_sizes[candidates], kind="stable")]
+        disk_indexes = np.searchsorted(self.offsets, candidates, side="right") - 1
+
+        result = []
+        for item_index, disk_index in zip(candidates.tolist(), disk_indexes.tolist()):
+            disk = self.disks[disk_index]
+            item = disk.contents[item_index - int(self.offsets[disk_index])]
+            result.append(TopItem(disk.id, disk.name, item.description, item.size_gb))
+        return result
+
+    def top_disks_by_free_space(self, n: int = 10) -> List[Disk]:
+        order = np.argsort(-self.free, kind="stable")[:n]
+        return [self.disks[index] for index in order.tolist()]
+
+    def disks_that_fit(self, size_gb: float, reserve_gb: float = 0.0, limit: Optional[int] = None) -> List[FitCandidate]:
+        """Disks with room for `size_gb`, best fit first (least space left over)."""
+        available = self.free - reserve_gb
+        fits = np.flatnonzero(available >= size_gb - _EPSILON)
+        fits = fits[np.argsort(available[fits], kind="stable")]
+        if limit is not None:
+            fits = fits[:limit]
+        return [
+            FitCandidate(self.disks[i].id, self.disks[i].name, float(self.free[i]), float(available[i] - size_gb))
+            for i in fits.tolist()
+        ]
+
+    def plan_placement(self, item_sizes: Sequence[float], reserve_gb: float = 0.0,
+                       disk_ids: Optional[Iterable[str]] = None) -> PlacementPlan:
+        """
+        Assigns each item to a disk with best-fit decreasing: items are placed from
+        largest to smallest into the disk whose remaining space is the smallest that
+        still fits, which keeps the free space concentrated in as few disks as
+        possible. `reserve_gb` is kept free on every disk; `disk_ids` limits the
+        candidates. Items that do not fit anywhere are reported in `unplaced`.
+        """
+        sizes = np.asarray(item_sizes, dtype=np.float64)
+        candidates = np.arange(len(self.disks))
+        if disk_ids is not None:
+            allowed = set(disk_ids)
+            candidates = np.array([i for i, d in enumerate(self.disks) if d.id in allowed], dtype=np.int64)
+
+        remaining = np.maximum(self.free[candidates] - reserve_gb, 0.0)
+        # Espacio restante ordenado de menor a mayor, con el índice de disco en paralelo
+        by_remaining = np.argsort(remaining, kind="stable")
+        remaining_sorted = remaining[by_remaining]
+        disk_sorted = candidates[by_remaining]
+        assignment = np.full(sizes.size, -1, dtype=np.int64)
+        bins = remaining_sorted.size
+
+        order = np.argsort(-sizes, kind="stable")
+        for item_index, size in zip(order.tolist(), sizes[order].tolist()):
+            if bins == 0 or size > remaining_sorted[-1] + _EPSILON:
+                continue
+            # Búsqueda binaria del disco con menos espacio en el que aún cabe el elemento
+            pos = int(np.searchsorted(remaining_sorted, size - _EPSILON, side="left"))
+            disk_index = disk_sorted[pos]
+            assignment[item_index] = disk_index
+            left = max(remaining_sorted[pos] - size, 0.0)
+
+            # El disco solo puede bajar en el orden: se desplaza el tramo intermedio un hueco
+            insert_at = int(np.searchsorted(remaining_sorted[:pos], left, side="left"))
+            if insert_at < pos:
+                remaining_sorted[insert_at + 1:pos + 1] = remaining_sorted[insert_at:pos]
+                disk_sorted[insert_at + 1:pos + 1] = disk_sorted[insert_at:pos]
+            remaining_sorted[insert_at] = left
+            disk_sorted[insert_at] = disk_index
+
+        item_disk_ids = [self.disks[i].id if i >= 0 else None for i in assignment.tolist()]
+        remaining_gb = {self.disks[i].id: left for i, left in zip(disk_sorted.tolist(), remaining_sorted.tolist())}
+        return PlacementPlan(sizes, item_disk_ids, remaining_gb)
+
+def _content_sizes(disk: Disk) -> np.ndarray:
+    contents = disk.contents
+    if isinstance(contents, ContentColumns):
+        # Las columnas ya son un array('d'): se copian sin crear objetos ContentItem
+        return np.frombuffer(contents.sizes, dtype=np.float64).copy()
+    return np.fromiter((item.size_gb for item in contents), dtype=np.float64, count=len(contents))
+
+# Clases importantes:
+# - CatalogAnalytics: Carga capacidades y tamaños de contenidos en arrays de NumPy y calcula estadísticas vectorizadas.
+# - PlacementPlan: Resultado de plan_placement (disco asignado a cada elemento, elementos sin sitio, espacio restante).
+# Métodos importantes:
+# - fleet_totals(), usage_histogram(), item_size_histogram(), top_items(): Estadísticas del catálogo completo.
+# - disks_that_fit(): Discos donde cabe un tamaño dado, del mejor ajuste al peor.
+# - plan_placement(): Reparte una lista de tamaños entre los discos (best-fit decreasing) minimizando el espacio desperdiciado.
@@ -0,0 +1,43 @@
+import asyncio
+from typing import List, Optional
+from core.models import Disk, ContentItem
+from core.repository import AsyncDiskRepository, DiskRepository
+
+class ThreadedAsyncService(AsyncDiskRepository):
+    """
+    Adapts any synchronous DiskRepository (SQLite, CachedDiskService, ...) to the
+    async API by running each call in a worker thread with asyncio.to_thread.
+    """
+
+    def __init__(self, service: DiskRepository):
+        self.service = service
+
+    async def add_disk(self, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        return await asyncio.to_thread(self.service.add_disk, name, total_capacity_gb, contents)
+
+    async def get_all_disks(self) -> List[Disk]:
+        return await asyncio.to_thread(self.service.get_all_disks)
+
+    async def get_disk_summaries(self) -> List[Disk]:
+        return await asyncio.to_thread(self.service.get_disk_summaries)
+
+    async def get_disk_by_id(self, disk_id: str) -> Optional[Disk]:
+        return await asyncio.to_thread(self.service.get_disk_by_id, disk_id)
+
+    async def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        return await asyncio.to_thread(self.service.update_disk, disk_id, name, total_capacity_gb, contents)
+
+    async def delete_disk(self, disk_id: str) -> bool:
+        return await asyncio.to_thread(self.service.delete_disk, disk_id)
+
+    async def filter_disks(self, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None) -> List[Disk]:
+        return await asyncio.to_thread(self.service.filter_disks, name_query, content_query, min_free_gb)
+
+    async def sorted_disks(self, key: str, descending: bool = False, offset: int = 0, limit: Optional[int] = None) -> List[Disk]:
+        return await asyncio.to_thread(self.service.sorted_disks, key, descending, offset, limit)
+
+    async def refresh(self):
+        await asyncio.to_thread(self.service.refresh)
+
+# Clases importantes:
+# - ThreadedAsyncService: Adapta un DiskRepository síncrono (SQLite, caché, Supabase) a la API async usando hilos.
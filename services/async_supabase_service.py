@@ -0,0 +1,123 @@
+import asyncio
+from typing import Callable, List, Optional
+from supabase import acreate_client, AsyncClient
+from core.models import Disk, ContentItem
+from core.repository import AsyncDiskRepository
+from services.metrics import metrics
+from services.supabase_service import (CHANGES_PAGE_SIZE, DISK_COLUMNS, SUMMARY_COLUMNS, SupabaseService, supabase_credentials,
+                                       _disk_payload, _ilike_pattern, _in_creation_order)
+
+class AsyncSupabaseService(AsyncDiskRepository):
+    """SupabaseService on top of the async Supabase client (httpx.AsyncClient)."""
+
+    def __init__(self):
+        self._client: Optional[AsyncClient] = None
+        self._client_lock = asyncio.Lock()
+        # Disk.lazy llama a su loader de forma síncrona: los contenidos de un disco resumido se piden con el
+        # cliente síncrono (la UI los pide antes con get_disk_by_id, así que solo es el último recurso)
+        self._contents_service = SupabaseService()
+
+    async def _get_client(self) -> AsyncClient:
+        # acreate_client es una corrutina, así que el cliente se crea en la primera llamada
+        async with self._client_lock:
+            if self._client is None:
+                self._client = await acreate_client(*supabase_credentials())
+        return self._client
+
+    @metrics.timed("supabase_async.add_disk")
+    async def add_disk(self, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        client = await self._get_client()
+        response = await client.table('disks').insert(_disk_payload(name, total_capacity_gb, contents)).execute()
+        if response.data:
+            return Disk.from_dict(response.data[0])
+        return None
+
+    @metrics.timed("supabase_async.get_all_disks")
+    async def get_all_disks(self) -> List[Disk]:
+        client = await self._get_client()
+        response = await client.table('disks').select(DISK_COLUMNS).execute()
+        if response.data:
+            return [Disk.from_dict(disk_data) for disk_data in response.data]
+        return []
+
+    async def _fetch_pages(self, build_query: Callable[[], object], offset: int = 0, limit: Optional[int] = None) -> List[dict]:
+        # Páginas de CHANGES_PAGE_SIZE filas con range(); el límite de filas por respuesta de PostgREST no trunca el listado
+        rows = []
+        while limit is None or len(rows) < limit:
+            size = CHANGES_PAGE_SIZE if limit is None else min(CHANGES_PAGE_SIZE, limit - len(rows))
+            start = offset + len(rows)
+            page = (await build_query().range(start, start + size - 1).execute()).data or []
+            rows.extend(page)
+            if len(page) < size:
+                break
+        return rows
+
+    def _to_lazy_disks(self, rows: List[dict]) -> List[Disk]:
+        return [
+            Disk.lazy(row["id"], row["name"], row["total_capacity_gb"], row["used_space_gb"], row["contents_summary"],
+                      self._contents_service._load_contents)
+            for row in rows
+        ]
+
+    @metrics.timed("supabase_async.get_disk_summaries")
+    async def get_disk_summaries(self) -> List[Disk]:
+        # Sin la columna contents (JSONB), en orden de alta como SupabaseService.get_disk_summaries
+        client = await self._get_client()
+        rows = await self._fetch_pages(lambda: _in_creation_order(client.table('disks').select(SUMMARY_COLUMNS)))
+        return self._to_lazy_disks(rows)
+
+    @metrics.timed("supabase_async.sorted_disks")
+    async def sorted_disks(self, key: str, descending: bool = False, offset: int = 0, limit: Optional[int] = None) -> List[Disk]:
+        # ORDER BY sobre columna indexada (ver *_listing_order.sql); los empates quedan en orden de alta
+        client = await self._get_client()
+        rows = await self._fetch_pages(
+            lambda: _in_creation_order(client.table('disks').select(SUMMARY_COLUMNS).order(key, desc=descending)), offset, limit
+        )
+        return self._to_lazy_disks(rows)
+
+    @metrics.timed("supabase_async.get_disk_by_id")
+    async def get_disk_by_id(self, disk_id: str) -> Optional[Disk]:
+        client = await self._get_client()
+        response = await client.table('disks').select(DISK_COLUMNS).eq('id', disk_id).execute()
+        if response.data:
+            return Disk.from_dict(response.data[0])
+        return None
+
+    @metrics.timed("supabase_async.update_disk")
+    async def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        client = await self._get_client()
+        response = await client.table('disks').update(_disk_payload(name, total_capacity_gb, contents)).eq('id', disk_id).execute()
+        if response.data:
+            return Disk.from_dict(response.data[0])
+        return None
+
+    @metrics.timed("supabase_async.delete_disk")
+    async def delete_disk(self, disk_id: str) -> bool:
+        client = await self._get_client()
+        response = await client.table('disks').delete().eq('id', disk_id).execute()
+        return bool(response.data)
+
+    @metrics.timed("supabase_async.filter_disks")
+    async def filter_disks(self, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None) -> List[Disk]:
+        client = await self._get_client()
+        query = client.table('disks').select(DISK_COLUMNS)
+
+        if name_query:
+            query = query.ilike('name', _ilike_pattern(name_query))
+
+        if content_query:
+            query = query.ilike('contents_search', _ilike_pattern(content_query))
+
+        if min_free_gb is not None:
+            query = query.gte('free_space_gb', min_free_gb)
+
+        response = await query.execute()
+        if response.data:
+            return [Disk.from_dict(disk_data) for disk_data in response.data]
+        return []
+
+# Métodos importantes:
+# - _get_client(): Crea el AsyncClient en la primera llamada (acreate_client es una corrutina).
+# - add_disk, get_all_disks, get_disk_by_id, update_disk, delete_disk, filter_disks: Igual que SupabaseService, sin bloquear el bucle de eventos.
+# - get_disk_summaries(), sorted_disks(): Listado ligero (Disk.lazy) paginado con range(); sorted_disks ordena en el servidor.
+# - Cada método público se mide con metrics.timed("supabase_async.<método>").
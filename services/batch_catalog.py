@@ -0,0 +1,233 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+from core.models import Disk
+from core.repository import DiskRepository
+from services.metrics import metrics
+from services.scanner import DirectoryScanner, GB
+from services.snapshot import ScanDiff, SnapshotStore
+
+# Unidades que se escanean a la vez
+DEFAULT_MAX_DRIVES = 8
+# Hilos de os.scandir por unidad (el escáner reparte las ramas del árbol entre ellos)
+DEFAULT_THREADS_PER_DRIVE = 4
+# Escaneos simultáneos sobre un mismo dispositivo (st_dev): en discos mecánicos dos recorridos a la vez
+# se estorban con los saltos del cabezal, así que por defecto van de uno en uno
+DEFAULT_SCANS_PER_DEVICE = 1
+
+QUEUED, SCANNING, SAVING, DONE, FAILED, CANCELLED = "queued", "scanning", "saving", "done", "failed", "cancelled"
+
+class DriveProgress(NamedTuple):
+    mount_point: str
+    name: str
+    state: str
+    files: int
+    total_bytes: int
+    elapsed_s: float
+
+    @property
+    def files_per_s(self) -> float:
+        return self.files / self.elapsed_s if self.elapsed_s else 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        # Tamaño de los archivos recorridos por segundo (se leen metadatos, no el contenido)
+        return self.total_bytes / 1024 ** 2 / self.elapsed_s if self.elapsed_s else 0.0
+
+class DriveResult(NamedTuple):
+    mount_point: str
+    name: str
+    disk: Optional[Disk]
+    created: bool  # False si se actualizó un disco que ya estaba en el catálogo
+    progress: DriveProgress
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.disk is not None and self.error is None
+
+class BatchReport(NamedTuple):
+    results: List[DriveResult]
+    elapsed_s: float
+
+    @property
+    def failed(self) -> List[DriveResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def total_files(self) -> int:
+        return sum(result.progress.files for result in self.results)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(result.progress.total_bytes for result in self.results)
+
+def drive_name(mount_point: str) -> str:
+    # Mismo nombre que propone DiskForm al elegir una carpeta: la última parte de la ruta
+    return os.path.basename(os.path.normpath(mount_point).rstrip("\\/")) or mount_point
+
+class BatchCataloguer:
+    """
+    Catalogs several mounted drives at once. Each mount point is scanned with its
+    own DirectoryScanner in a bounded pool of drives, and scans of mount points
+    on the same device (st_dev) are limited by a per-device semaphore, so the
+    total time follows the slowest drive instead of the sum of all of them.
+
+    A drive whose name matches a disk of the catalog updates that disk (an
+    incremental re-scan when its snapshot exists, keeping hand-added contents);
+    otherwise a new disk is created. Capacity comes from shutil.disk_usage.
+    Mount points whose names collide (e.g. /media/a/USB and /media/b/USB) are
+    not scanned and are reported as failed, since they would write the same disk.
+    Errors are isolated per drive: one failure never discards the others.
+    """
+
+    def __init__(self, service: DiskRepository, snapshot_store: Optional[SnapshotStore] = None,
+                 max_drives: int = DEFAULT_MAX_DRIVES, threads_per_drive: int = DEFAULT_THREADS_PER_DRIVE,
+                 scans_per_device: int = DEFAULT_SCANS_PER_DEVICE, progress_interval: float = 0.5):
+        self.service = service
+        self.snapshot_store = snapshot_store or SnapshotStore()
+        self.max_drives = max_drives
+        self.threads_per_drive = threads_per_drive
+        self.scans_per_device = scans_per_device
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Las escrituras al backend se hacen de una en una
+        self._device_slots: Dict[int, threading.Semaphore] = {}
+        self._scanners: Dict[str, DirectoryScanner] = {}
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+        with self._lock:
+            for scanner in self._scanners.values():
+                scanner.cancel()
+
+    def _device_slot(self, mount_point: str) -> threading.Semaphore:
+        try:
+            device = os.stat(mount_point).st_dev
+        except OSError:
+            device = -1  # La ruta no existe: el escaneo fallará enseguida
+        with self._lock:
+            slot = self._device_slots.get(device)
+            if slot is None:
+                slot = self._device_slots[device] = threading.Semaphore(self.scans_per_device)
+            return slot
+
+    def run(self, mount_points: List[str], on_progress: Optional[Callable[[DriveProgress], None]] = None) -> BatchReport:
+        """Scans every mount point and stores its disk; results keep the order of mount_points."""
+        self._cancel_event.clear()
+        start = time.perf_counter()
+        # Nombre -> disco del catálogo (listado ligero) para saber qué unidades ya existen
+        existing = {disk.name.casefold(): disk for disk in self.service.get_disk_summaries()}
+        report = on_progress or (lambda progress: None)
+        # Unidades con el mismo nombre actualizarían el mismo disco (y su snapshot) a la vez
+        by_name: Dict[str, List[str]] = {}
+        for mount_point in mount_points:
+            by_name.setdefault(drive_name(mount_point).casefold(), []).append(mount_point)
+        for mount_point in mount_points:
+            report(DriveProgress(mount_point, drive_name(mount_point), QUEUED, 0, 0, 0.0))
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_drives), thread_name_prefix="batch-drive") as executor:
+            futures = [
+                None if len(by_name[drive_name(mount_point).casefold()]) > 1
+                else executor.submit(self._catalog_drive, mount_point, existing, report)
+                for mount_point in mount_points
+            ]
+            try:
+                results = [
+                    future.result() if future is not None
+                    else self._name_collision(mount_point, by_name[drive_name(mount_point).casefold()], report)
+                    for mount_point, future in zip(mount_points, futures)
+                ]
+            except BaseException:
+                # Ctrl+C (o un error inesperado): se detienen los escaneos antes de esperar a los hilos
+                self.cancel()
+                raise
+        return BatchReport(results, time.perf_counter() - start)
+
+    def _name_collision(self, mount_point: str, same_name: List[str], report: Callable[[DriveProgress], None]) -> DriveResult:
+        name = drive_name(mount_point)
+        others = ", ".join(other for other in same_name if other != mount_point) or mount_point
+        final = DriveProgress(mount_point, name, FAILED, 0, 0, 0.0)
+        report(final)
+        return DriveResult(mount_point, name, None, False, final,
+                           f"otra unidad del lote también se llama {name!r} ({others}); cataloga cada una por separado")
+
+    def _catalog_drive(self, mount_point: str, existing: Dict[str, Disk], report: Callable[[DriveProgress], None]) -> DriveResult:
+        name = drive_name(mount_point)
+        match = existing.get(name.casefold())
+
+        with self._device_slot(mount_point):
+            # El escáner se crea al conseguir turno: el tiempo en cola no cuenta para el ritmo de la unidad
+            scanner = DirectoryScanner(max_workers=self.threads_per_drive, progress_interval=self.progress_interval)
+
+            scanned = []  # Progreso al terminar el escaneo: el ritmo no incluye el guardado
+
+            def progress(state: str) -> DriveProgress:
+                current = scanned[0] if scanned else scanner.progress()
+                return DriveProgress(mount_point, name, state, current.files, current.total_bytes, current.elapsed_s)
+
+            with self._lock:
+                self._scanners[mount_point] = scanner
+            try:
+                if self._cancel_event.is_set():
+                    # Cancelado mientras esperaba turno
+                    final = progress(CANCELLED)
+                    report(final)
+                    return DriveResult(mount_point, name, None, False, final, "cancelled")
+                with metrics.timer("batch.drive") as measurement:
+                    capacity_gb = round(shutil.disk_usage(mount_point).total / GB)
+                    previous = self.snapshot_store.load(match.id) if match else None
+                    report(progress(SCANNING))
+                    entries = scanner.scan(mount_point, on_progress=lambda _: report(progress(SCANNING)),
+                                           previous=previous, record_snapshot=True)
+                    scanned.append(scanner.progress())
+                    measurement.rows = scanned[0].files
+                if scanner.cancelled:
+                    final = progress(CANCELLED)
+                    report(final)
+                    return DriveResult(mount_point, name, None, False, final, "cancelled")
+
+                report(progress(SAVING))
+                if previous is not None:
+                    # Re-escaneo incremental: solo cambian las entradas añadidas, borradas o redimensionadas
+                    current = self.service.get_disk_by_id(match.id)
+                    contents = ScanDiff.between(previous, scanner.snapshot).apply(list(current.contents) if current else [])
+                else:
+                    contents = [entry.to_content_item() for entry in entries]
+                disk = Disk(match.id if match else str(uuid.uuid4()), match.name if match else name, capacity_gb, contents)
+                with self._write_lock:
+                    stored = self.service.upsert_disks([disk])
+                failures = getattr(stored, "failures", [])
+                if failures or not stored:
+                    error = failures[0].error if failures else "el backend no guardó el disco"
+                    final = progress(FAILED)
+                    report(final)
+                    return DriveResult(mount_point, name, None, match is None, final, error)
+                self.snapshot_store.save(disk.id, scanner.snapshot)
+                final = progress(DONE)
+                report(final)
+                return DriveResult(mount_point, name, disk, match is None, final)
+            except Exception as error:
+                # Rutas inaccesibles y errores del backend (APIError, httpx.HTTPError, sqlite3.Error) solo afectan a esta unidad
+                final = progress(FAILED)
+                report(final)
+                return DriveResult(mount_point, name, None, match is None, final, str(error))
+            finally:
+                with self._lock:
+                    self._scanners.pop(mount_point, None)
+
+# Variables importantes:
+# - DEFAULT_MAX_DRIVES, DEFAULT_THREADS_PER_DRIVE, DEFAULT_SCANS_PER_DEVICE: Unidades a la vez, hilos por unidad
+#   y escaneos simultáneos por dispositivo físico.
+# - DriveProgress: Estado (queued, scanning, saving, done, failed, cancelled), archivos, bytes y ritmo de una unidad.
+# - DriveResult, BatchReport: Resultado por unidad (disco creado o actualizado, o el error) y del lote completo.
+# Métodos importantes:
+# - BatchCataloguer.run(): Escanea las unidades en paralelo y crea o actualiza su Disk con la capacidad de shutil.disk_usage.
+#   Los fallos se aíslan por unidad y las unidades con el mismo nombre se rechazan sin escanear (_name_collision()).
+# - BatchCataloguer.cancel(): Detiene los escaneos en curso y los que aún esperan turno.
+# - drive_name(): Nombre del disco a partir del punto de montaje (el mismo que propone DiskForm).
@@ -0,0 +1,234 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterator, List, Optional, Tuple
+from core.models import Disk, ContentItem
+from core.repository import DiskRepository
+
+class CachedDiskService(DiskRepository):
+    """
+    Read-through cache in front of any DiskRepository (normally SupabaseService).
+
+    Disks are cached one entry per id with LRU eviction and a TTL. Writes go to the
+    wrapped service and then patch only the affected entry, so after editing one
+    disk the next get_all_disks() is served from memory instead of a full select.
+    The summary listing the cards use (get_disk_summaries) is cached the same way
+    and patched in place on every write.
+    """
+
+    def __init__(self, service: DiskRepository, max_entries: int = 50000, ttl_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._service = service
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, Tuple[Disk, float]]" = OrderedDict()  # disk_id -> (disk, expira_en)
+        self._listing: Optional[Tuple[List[str], float]] = None  # ids del último get_all_disks y su expiración
+        self._summaries: Optional["OrderedDict[str, Disk]"] = None  # último get_disk_summaries (disk_id -> disco, en orden)
+        self._summaries_expire_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    # --- Gestión de entradas ---
+
+    def _put(self, disk: Disk):
+        self._entries[disk.id] = (disk, self._clock() + self.ttl_seconds)
+        self._entries.move_to_end(disk.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _get_fresh(self, disk_id: str) -> Optional[Disk]:
+        entry = self._entries.get(disk_id)
+        if entry is None:
+            return None
+        disk, expires_at = entry
+        if expires_at < self._clock():
+            del self._entries[disk_id]
+            return None
+        self._entries.move_to_end(disk_id)
+        return disk
+
+    def _patch_summaries(self, disks: List[Disk]):
+        # Los discos escritos sustituyen a su resumen (en su posición) o se añaden al final, como en el backend
+        if self._summaries is not None:
+            for disk in disks:
+                self._summaries[disk.id] = disk
+
+    def _drop_summaries(self, disk_ids: List[str]):
+        if self._summaries is not None:
+            for disk_id in disk_ids:
+                self._summaries.pop(disk_id, None)
+
+    def _cached_listing(self) -> Optional[List[Disk]]:
+        if self._listing is None or self._listing[1] < self._clock():
+            return None
+        disks = [self._get_fresh(disk_id) for disk_id in self._listing[0]]
+        return disks if all(disk is not None for disk in disks) else None
+
+    def invalidate(self, disk_id: Optional[str] = None):
+        with self._lock:
+            if disk_id is None:
+                self._entries.clear()
+                self._listing = None
+                self._summaries = None
+            else:
+                self._entries.pop(disk_id, None)
+                # El resumen de ese disco puede estar desfasado: el listado ligero se vuelve a pedir entero
+                self._summaries = None
+
+    def refresh(self):
+        self.invalidate()
+        self._service.refresh()
+
+    # --- DiskRepository ---
+
+    def add_disk(self, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        disk = self._service.add_disk(name, total_capacity_gb, contents)
+        if disk:
+            with self._lock:
+                self._put(disk)
+                self._patch_summaries([disk])
+                if self._listing is not None:
+                    self._listing[0].append(disk.id)
+        return disk
+
+    def add_disks(self, disks: List[Disk]) -> List[Disk]:
+        stored = self._service.add_disks(disks)
+        with self._lock:
+            self._patch_summaries(stored)
+            for disk in stored:
+                self._put(disk)
+                if self._listing is not None:
+                    self._listing[0].append(disk.id)
+        return stored
+
+    def upsert_disks(self, disks: List[Disk]) -> List[Disk]:
+        stored = self._service.upsert_disks(disks)
+        with self._lock:
+            self._patch_summaries(stored)
+            listed = set(self._listing[0]) if self._listing is not None else None
+            for disk in stored:
+                self._put(disk)
+                if listed is not None and disk.id not in listed:
+                    self._listing[0].append(disk.id)
+                    listed.add(disk.id)
+        return stored
+
+    def delete_disks(self, disk_ids: List[str]) -> List[str]:
+        deleted = self._service.delete_disks(disk_ids)
+        with self._lock:
+            for disk_id in disk_ids:
+                self._entries.pop(disk_id, None)
+            self._drop_summaries(disk_ids)
+            if self._listing is not None:
+                removed = set(disk_ids)
+                self._listing = ([disk_id for disk_id in self._listing[0] if disk_id not in removed], self._listing[1])
+        return deleted
+
+    def get_all_disks(self) -> List[Disk]:
+        with self._lock:
+            disks = self._cached_listing()
+            if disks is not None:
+                self.hits += 1
+                return disks
+            self.misses += 1
+
+        disks = self._service.get_all_disks()
+        with self._lock:
+            for disk in disks:
+                self._put(disk)
+            self._listing = ([disk.id for disk in disks], self._clock() + self.ttl_seconds)
+        return disks
+
+    def get_disk_summaries(self) -> List[Disk]:
+        # Listado aparte de _entries: los discos resumidos cargan sus contenidos bajo demanda y no ocupan la LRU
+        with self._lock:
+            if self._summaries is not None and self._summaries_expire_at >= self._clock():
+                self.hits += 1
+                return list(self._summaries.values())
+            self.misses += 1
+
+        disks = self._service.get_disk_summaries()
+        with self._lock:
+            self._summaries = OrderedDict((disk.id, disk) for disk in disks)
+            self._summaries_expire_at = self._clock() + self.ttl_seconds
+        return disks
+
+    def iter_disks(self, page_size: int = 1000) -> Iterator[Disk]:
+        # Se sirve de la caché si el listado completo sigue vigente; si no, el recorrido (exportación)
+        # va directo al servicio para no desalojar las entradas útiles
+        with self._lock:
+            disks = self._cached_listing()
+            if disks is not None:
+                self.hits += 1
+                return iter(disks)
+        return self._service.iter_disks(page_size)
+
+    def get_disk_by_id(self, disk_id: str) -> Optional[Disk]:
+        with self._lock:
+            disk = self._get_fresh(disk_id)
+            if disk is not None:
+                self.hits += 1
+                return disk
+            self.misses += 1
+
+        disk = self._service.get_disk_by_id(disk_id)
+        if disk:
+            with self._lock:
+                self._put(disk)
+        return disk
+
+    def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        disk = self._service.update_disk(disk_id, name, total_capacity_gb, contents)
+        with self._lock:
+            if disk:
+                self._put(disk)
+                self._patch_summaries([disk])
+            else:
+                self._entries.pop(disk_id, None)
+                self._drop_summaries([disk_id])
+        return disk
+
+    def delete_disk(self, disk_id: str) -> bool:
+        deleted = self._service.delete_disk(disk_id)
+        with self._lock:
+            self._entries.pop(disk_id, None)
+            self._drop_summaries([disk_id])
+            if self._listing is not None and disk_id in self._listing[0]:
+                self._listing[0].remove(disk_id)
+        return deleted
+
+    def filter_disks(self, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None) -> List[Disk]:
+        # El filtrado se resuelve en el backend; los resultados refrescan las entradas cacheadas
+        disks = self._service.filter_disks(name_query=name_query, content_query=content_query, min_free_gb=min_free_gb)
+        with self._lock:
+            for disk in disks:
+                self._put(disk)
+        return disks
+
+# Variables importantes:
+# - _entries: OrderedDict disk_id -> (Disk, expiración); el orden implementa la política LRU.
+# - _listing: Ids (en orden) del último listado completo, con su propia expiración.
+# - _summaries: Último listado ligero (get_disk_summaries), parcheado en cada escritura; expira en _summaries_expire_at.
+# - hits, misses, evictions: Contadores para dimensionar la caché (ver propiedad stats).
+# Métodos importantes:
+# - get_all_disks(), get_disk_summaries(), get_disk_by_id(): Lecturas read-through.
+# - add_disk(), add_disks(), upsert_disks(), update_disk(), delete_disk(), delete_disks(): Escriben en el servicio y actualizan solo la entrada afectada.
+# - invalidate(), refresh(): Descartan entradas (todas o una) para forzar la recarga.
@@ -0,0 +1,69 @@
+import gzip
+import json
+import os
+from typing import List
+from core.models import Disk
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "DISK_CATALOG_CACHE", os.path.join(os.path.expanduser("~"), ".gestor_discos", "catalog_cache.json.gz")
+)
+CACHE_VERSION = 1
+
+class CatalogCache:
+    """
+    Last listing of the card grid saved on disk (id, name, capacity, used space
+    and content summary of each disk), so the next start can paint the cards
+    before the backend answers. Disks are restored with Disk.lazy and no loader:
+    their contents are always requested from the backend when needed.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+
+    def load(self) -> List[Disk]:
+        """Disks of the last saved listing; [] when there is none or the file is unreadable or malformed."""
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                return []
+            return [Disk.lazy(disk_id, name, capacity, used, summary, None) for disk_id, name, capacity, used, summary in data["disks"]]
+        except (OSError, EOFError, ValueError, KeyError, TypeError, AttributeError):
+            # Gzip truncado, JSON con otra forma, filas incompletas...: sin caché la primera pantalla espera al backend
+            return []
+
+    def save(self, disks: List[Disk]) -> bool:
+        """Writes the listing; returns False when it could not be written (the cache is optional)."""
+        rows = [[disk.id, disk.name, disk.total_capacity_gb, disk.used_space_gb, disk.summary] for disk in disks]
+        # Temporal + rename: un cierre a mitad de escritura no deja una caché corrupta
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, "wb") as raw:
+                with gzip.open(raw, "wt", encoding="utf-8", compresslevel=1) as f:
+                    json.dump({"version": CACHE_VERSION, "disks": rows}, f, separators=(",", ":"))
+                # Los datos deben estar en disco antes del rename: si no, un corte de luz puede dejar el archivo vacío
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # Disco lleno, sin permisos...: el próximo arranque simplemente no tendrá primera pantalla
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+# Variables importantes:
+# - DEFAULT_CACHE_PATH: Archivo de la caché del listado (configurable con DISK_CATALOG_CACHE).
+# - CACHE_VERSION: Formato de las filas; una caché de otra versión se ignora.
+# Métodos importantes:
+# - load(): Discos del último listado (Disk.lazy sin contenidos) para la primera pantalla; [] si el archivo está dañado.
+# - save(): Guarda el listado actual de forma atómica (temporal con fsync + rename; los errores de escritura se ignoran y devuelve False).
@@ -0,0 +1,204 @@
+import csv
+import json
+import os
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+from core.models import ContentItem, Disk
+from core.repository import DiskRepository
+
+FORMATS = ("jsonl", "csv")
+# CSV: una fila por contenido; las filas de un mismo disco van seguidas (un disco vacío ocupa una fila sin contenido)
+CSV_FIELDS = ["disk_id", "name", "total_capacity_gb", "description", "size_gb"]
+# Columnas opcionales: se escriben siempre y se leen si están
+CSV_OPTIONAL_FIELDS = ["content_hash"]
+DEFAULT_BATCH_SIZE = 2000
+
+class ImportResult(NamedTuple):
+    imported: int
+    offset: int
+    resumed_from: int
+    failed: int = 0
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension == "csv":
+        return "csv"
+    raise ValueError(f"No se reconoce el formato de '{path}' (usa .jsonl o .csv)")
+
+def _parse_number(value: str):
+    # Mismo criterio que el formulario: los enteros se conservan como int
+    number = float(value) if value else 0
+    return int(number) if number.is_integer() else number
+
+# --- Lectura ---
+
+def _read_lines(f, start: int) -> Iterator[Tuple[str, int]]:
+    # Archivo binario: tell() tras cada línea da un offset exacto para el checkpoint
+    f.seek(start)
+    while True:
+        line = f.readline()
+        if not line:
+            return
+        yield line.decode("utf-8"), f.tell()
+
+def read_jsonl(path: str, start: int = 0) -> Iterator[Tuple[Disk, int]]:
+    """Yields (disk, offset just after it) for every line of a JSON Lines export."""
+    with open(path, "rb") as f:
+        for line, end in _read_lines(f, start):
+            if line.strip():
+                yield Disk.from_dict(json.loads(line)), end
+
+def read_csv(path: str, start: int = 0) -> Iterator[Tuple[Disk, int]]:
+    """Yields (disk, offset just after its last row), grouping consecutive rows by disk_id."""
+    with open(path, "rb") as f:
+        header_line = f.readline().decode("utf-8-sig")
+        header = next(csv.reader([header_line]))
+        missing = set(CSV_FIELDS) - set(header)
+        if missing:
+            raise ValueError(f"Faltan columnas en el CSV: {', '.join(sorted(missing))}")
+
+        position = [max(start, f.tell())]
+
+        def lines():
+            for line, end in _read_lines(f, position[0]):
+                position[0] = end
+                yield line
+
+        current: Optional[Disk] = None
+        row_end = position[0]
+        for values in csv.reader(lines()):
+            row_start, row_end = row_end, position[0]
+            row = dict(zip(header, values))
+            if current is None or row["disk_id"] != current.id:
+                if current is not None:
+                    yield current, row_start
+                current = Disk(row["disk_id"], row["name"], _parse_number(row["total_capacity_gb"]), [])
+            if row["description"] or row["size_gb"]:
+                current.contents.append(ContentItem(row["description"], _parse_number(row["size_gb"]), row.get("content_hash") or None))
+        if current is not None:
+            yield current, row_end
+
+def read_catalog(path: str, fmt: Optional[str] = None, start: int = 0) -> Iterator[Tuple[Disk, int]]:
+    fmt = fmt or detect_format(path)
+    return read_csv(path, start) if fmt == "csv" else read_jsonl(path, start)
+
+# --- Escritura ---
+
+def write_jsonl(disks: Iterable[Disk], f: TextIO) -> int:
+    count = 0
+    for disk in disks:
+        f.write(json.dumps(disk.to_dict(), ensure_ascii=False))
+        f.write("\n")
+        count += 1
+    return count
+
+def write_csv(disks: Iterable[Disk], f: TextIO) -> int:
+    writer = csv.writer(f)
+    writer.writerow(CSV_FIELDS + CSV_OPTIONAL_FIELDS)
+    count = 0
+    for disk in disks:
+        if not disk.contents:
+            writer.writerow([disk.id, disk.name, disk.total_capacity_gb, "", "", ""])
+        for item in disk.contents:
+            writer.writerow([disk.id, disk.name, disk.total_capacity_gb, item.description, item.size_gb, item.content_hash or ""])
+        count += 1
+    return count
+
+def export_catalog(service: DiskRepository, path: str, fmt: Optional[str] = None, page_size: int = 1000) -> int:
+    """Streams the whole catalog to `path` page by page; returns the number of disks written."""
+    fmt = fmt or detect_format(path)
+    partial_path = f"{path}.part"
+    with open(partial_path, "w", encoding="utf-8", newline="") as f:
+        disks = service.iter_disks(page_size)
+        count = write_csv(disks, f) if fmt == "csv" else write_jsonl(disks, f)
+    os.replace(partial_path, path)
+    return count
+
+# --- Importación reanudable ---
+
+class ImportCheckpoint:
+    """
+    Progress of an import, stored next to the source file as JSON. It records the
+    byte offset right after the last batch that was written, plus the size and
+    mtime of the source so a checkpoint is never applied to a different file.
+    """
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = os.path.abspath(source)
+
+    def _fingerprint(self) -> dict:
+        stat = os.stat(self.source)
+        return {"source": self.source, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def load(self) -> Tuple[int, int]:
+        """Returns (offset, imported) or (0, 0) when there is no valid checkpoint."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0, 0
+        if {key: data.get(key) for key in ("source", "size", "mtime_ns")} != self._fingerprint():
+            return 0, 0
+        return data.get("offset", 0), data.get("imported", 0)
+
+    def save(self, offset: int, imported: int):
+        data = dict(self._fingerprint(), offset=offset, imported=imported)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+def import_catalog(service: DiskRepository, path: str, fmt: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                   resume: bool = True, checkpoint_path: Optional[str] = None,
+                   on_progress: Optional[Callable[[int], None]] = None) -> ImportResult:
+    """
+    Streams an export into `service` in batches of `batch_size` disks (one
+    upsert_disks call per batch), so memory stays bounded by the batch size. After
+    each batch a checkpoint is saved; a later run with resume=True continues from
+    it instead of starting over. Disks are upserted by id, so a batch that was
+    stored but not yet checkpointed can be replayed safely. The checkpoint is
+    removed once the file is done.
+    """
+    checkpoint = ImportCheckpoint(checkpoint_path or f"{path}.checkpoint.json", path)
+    offset, imported = checkpoint.load() if resume else (0, 0)
+    resumed_from = imported
+    failed = 0
+
+    def store(batch: List[Disk]):
+        nonlocal imported, failed
+        stored = service.upsert_disks(batch)
+        imported += len(stored)
+        failed += len(getattr(stored, "failures", ()))
+        if on_progress:
+            on_progress(imported)
+
+    batch: List[Disk] = []
+    for disk, end in read_catalog(path, fmt, start=offset):
+        batch.append(disk)
+        offset = end
+        if len(batch) >= batch_size:
+            store(batch)
+            checkpoint.save(offset, imported)
+            batch = []
+    if batch:
+        store(batch)
+
+    checkpoint.clear()
+    return ImportResult(imported=imported, offset=offset, resumed_from=resumed_from, failed=failed)
+
+# Variables importantes:
+# - FORMATS, CSV_FIELDS: Formatos soportados (JSON Lines y CSV con una fila por contenido).
+# Clases importantes:
+# - ImportCheckpoint: Offset y número de discos ya importados, ligado al tamaño y fecha del archivo de origen.
+# Métodos importantes:
+# - read_jsonl(), read_csv(): Lectores en streaming que devuelven cada Disk con el offset tras él.
+# - export_catalog(): Escribe el catálogo paginando con iter_disks (memoria constante).
+# - import_catalog(): Importa por lotes con upsert_disks y guarda un checkpoint tras cada lote.
@@ -0,0 +1,311 @@
+import hashlib
+import mmap
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from core.models import ContentItem
+from services.snapshot import (DiskSnapshot, GB, FILE_HASH, FILE_INODE, FILE_MTIME, FILE_NAME,
+                               FILE_PARTIAL_HASH, FILE_SIZE)
+
+# Bytes leídos del principio y del final de cada archivo para el hash parcial
+PARTIAL_BYTES = 64 * 1024
+# Tamaño de cada bloque del hash completo (sobre el mmap o con lecturas normales)
+CHUNK_BYTES = 4 * 1024 * 1024
+# Cada tarea del pool agrupa archivos hasta este volumen, para no pagar un viaje entre procesos por archivo
+BATCH_BYTES = 256 * 1024 * 1024
+BATCH_FILES = 512
+# Por debajo de este volumen total se calcula en el propio proceso (arrancar el pool cuesta más)
+INLINE_BYTES = 32 * 1024 * 1024
+
+PARTIAL, FULL = "partial", "full"
+
+def _new_hash():
+    return hashlib.blake2b(digest_size=20)
+
+def _hash_partial(path: str, size: int) -> str:
+    # Tamaño + primeros y últimos PARTIAL_BYTES; si el archivo es pequeño se lee entero
+    digest = _new_hash()
+    digest.update(size.to_bytes(8, "little"))
+    with open(path, "rb") as f:
+        if size <= 2 * PARTIAL_BYTES:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(PARTIAL_BYTES))
+            f.seek(-PARTIAL_BYTES, os.SEEK_END)
+            digest.update(f.read(PARTIAL_BYTES))
+    return digest.hexdigest()
+
+def _hash_full(path: str, size: int) -> str:
+    digest = _new_hash()
+    digest.update(size.to_bytes(8, "little"))
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            mapped = None
+        if mapped is not None:
+            # mmap evita copiar cada bloque a un buffer de Python; el memoryview se libera antes de cerrar
+            with mapped, memoryview(mapped) as view:
+                for start in range(0, len(view), CHUNK_BYTES):
+                    digest.update(view[start:start + CHUNK_BYTES])
+        else:
+            buffer = bytearray(CHUNK_BYTES)
+            with memoryview(buffer) as view:
+                while True:
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    digest.update(view[:read])
+    return digest.hexdigest()
+
+def _hash_batch(kind: str, files: List[Tuple[int, str, int]]) -> List[Tuple[int, Optional[str]]]:
+    """Worker: hashes (key, path, size) entries; unreadable files get None."""
+    hash_file = _hash_partial if kind == PARTIAL else _hash_full
+    results = []
+    for key, path, size in files:
+        try:
+            results.append((key, hash_file(path, size)))
+        except OSError:
+            results.append((key, None))
+    return results
+
+class FileRef:
+    """One file of a catalogued disk, bound to its (mutable) snapshot record."""
+    __slots__ = ("disk_id", "relpath", "record", "readable_path")
+
+    def __init__(self, disk_id: str, relpath: str, record: list, readable_path: Optional[str]):
+        self.disk_id = disk_id
+        self.relpath = relpath
+        self.record = record
+        self.readable_path = readable_path  # None si la unidad no está montada
+
+    @property
+    def size_bytes(self) -> int:
+        return self.record[FILE_SIZE]
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.relpath, self.record[FILE_NAME])
+
+    def cached(self, index: int) -> Optional[str]:
+        return self.record[index] if len(self.record) > index else None
+
+    def store(self, index: int, value: str):
+        if len(self.record) <= FILE_HASH:
+            self.record.extend([None] * (FILE_HASH + 1 - len(self.record)))
+        self.record[index] = value
+
+class DuplicateFile(NamedTuple):
+    disk_id: str
+    path: str  # Ruta relativa a la raíz del escaneo del disco
+
+class DuplicateGroup:
+    """Files with identical contents; the first one is the copy that is kept."""
+
+    def __init__(self, digest: str, size_bytes: int, files: List[DuplicateFile]):
+        self.digest = digest
+        self.size_bytes = size_bytes
+        self.files = files
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        return self.size_bytes * (len(self.files) - 1)
+
+    @property
+    def reclaimable_gb(self) -> float:
+        return round(self.reclaimable_bytes / GB, 2)
+
+class DedupReport:
+    def __init__(self, groups: List[DuplicateGroup], hashed_files: int, reused_hashes: int,
+                 unreadable_files: int, bytes_read: int, elapsed_s: float):
+        self.groups = groups
+        self.hashed_files = hashed_files
+        self.reused_hashes = reused_hashes
+        self.unreadable_files = unreadable_files
+        self.bytes_read = bytes_read
+        self.elapsed_s = elapsed_s
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        return sum(group.reclaimable_bytes for group in self.groups)
+
+    def reclaimable_gb_by_disk(self) -> Dict[str, float]:
+        """GB that each disk would free by deleting its redundant copies (all but the first of each group)."""
+        totals: Dict[str, int] = defaultdict(int)
+        for group in self.groups:
+            for duplicate in group.files[1:]:
+                totals[duplicate.disk_id] += group.size_bytes
+        return {disk_id: round(size / GB, 2) for disk_id, size in sorted(totals.items(), key=lambda item: -item[1])}
+
+class DedupEngine:
+    """
+    Finds files with identical contents across the snapshots of every catalogued
+    disk. Candidates are narrowed in three passes so that only files that could
+    be duplicates are read:
+
+    1. group by size (snapshot metadata only, no I/O);
+    2. partial hash (size + first and last 64 KiB) of the groups with 2+ files;
+    3. full hash of the files that still collide.
+
+    Hashes are computed in a process pool and written into the snapshot file
+    records; the scanner carries them over to the next snapshot while size and
+    mtime do not change, so saving the snapshots afterwards means unchanged
+    files are never read again. Disks whose scan root is not mounted take part
+    only through the hashes they already have cached.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, min_size_bytes: int = 1, verify_cached: bool = True):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_size_bytes = min_size_bytes
+        # Comprueba con un stat que los archivos con hash guardado no cambiaron (re-escritos sin cambiar el mtime del directorio)
+        self.verify_cached = verify_cached
+
+    def find_duplicates(self, snapshots: Dict[str, DiskSnapshot],
+                        on_progress: Optional[Callable[[str, int, int], None]] = None) -> DedupReport:
+        """
+        `snapshots` maps disk id -> DiskSnapshot (in the order used to decide which
+        copy is kept). on_progress(pass, done, total) is called while hashing.
+        """
+        start = time.perf_counter()
+        self._hashed = self._reused = self._unreadable = self._bytes_read = 0
+
+        by_size: Dict[int, List[FileRef]] = defaultdict(list)
+        for ref in self._iter_files(snapshots):
+            by_size[ref.size_bytes].append(ref)
+        candidates = [refs for refs in by_size.values() if len(refs) > 1]
+
+        partial_groups = self._regroup(candidates, FILE_PARTIAL_HASH, on_progress)
+        # Los archivos pequeños se leyeron enteros en el hash parcial, así que ya es su hash completo
+        for refs in partial_groups:
+            for ref in refs:
+                if ref.size_bytes <= 2 * PARTIAL_BYTES and ref.cached(FILE_HASH) is None:
+                    ref.store(FILE_HASH, ref.cached(FILE_PARTIAL_HASH))
+        full_groups = self._regroup(partial_groups, FILE_HASH, on_progress)
+
+        groups = [
+            DuplicateGroup(refs[0].cached(FILE_HASH), refs[0].size_bytes, [DuplicateFile(ref.disk_id, ref.path) for ref in refs])
+            for refs in full_groups
+        ]
+        groups.sort(key=lambda group: group.reclaimable_bytes, reverse=True)
+        return DedupReport(groups, self._hashed, self._reused, self._unreadable, self._bytes_read, time.perf_counter() - start)
+
+    def _iter_files(self, snapshots: Dict[str, DiskSnapshot]) -> Iterable[FileRef]:
+        for disk_id, snapshot in snapshots.items():
+            mounted = bool(snapshot.root) and os.path.isdir(snapshot.root)
+            seen_inodes = set()
+            for relpath, directory in snapshot.directories.items():
+                base = os.path.join(snapshot.root, relpath) if mounted else None
+                for record in directory.files:
+                    if record[FILE_SIZE] < self.min_size_bytes:
+                        continue
+                    # Los enlaces duros comparten los datos: no liberan espacio al borrarlos
+                    inode = record[FILE_INODE]
+                    if inode:
+                        if inode in seen_inodes:
+                            continue
+                        seen_inodes.add(inode)
+                    readable_path = os.path.join(base, record[FILE_NAME]) if base is not None else None
+                    ref = FileRef(disk_id, relpath, record, readable_path)
+                    if readable_path and self.verify_cached and ref.cached(FILE_PARTIAL_HASH) is not None:
+                        self._revalidate(ref)
+                    yield ref
+
+    def _revalidate(self, ref: FileRef):
+        try:
+            stat_result = os.stat(ref.readable_path, follow_symlinks=False)
+        except OSError:
+            return
+        if stat_result.st_size != ref.record[FILE_SIZE] or stat_result.st_mtime_ns != ref.record[FILE_MTIME]:
+            # El archivo cambió sin que cambiara su directorio: se descartan sus hashes
+            del ref.record[FILE_PARTIAL_HASH:]
+            ref.record[FILE_SIZE] = stat_result.st_size
+            ref.record[FILE_MTIME] = stat_result.st_mtime_ns
+
+    def _regroup(self, groups: List[List[FileRef]], index: int,
+                 on_progress: Optional[Callable[[str, int, int], None]]) -> List[List[FileRef]]:
+        pending = [ref for refs in groups for ref in refs if ref.cached(index) is None and ref.readable_path]
+        self._reused += sum(1 for refs in groups for ref in refs if ref.cached(index) is not None)
+        self._compute(pending, index, on_progress)
+
+        result = []
+        for refs in groups:
+            by_hash: Dict[str, List[FileRef]] = defaultdict(list)
+            for ref in refs:
+                digest = ref.cached(index)
+                if digest is not None:
+                    by_hash[digest].append(ref)
+            result.extend(same for same in by_hash.values() if len(same) > 1)
+        return result
+
+    def _compute(self, refs: List[FileRef], index: int, on_progress: Optional[Callable[[str, int, int], None]]):
+        if not refs:
+            return
+        kind = PARTIAL if index == FILE_PARTIAL_HASH else FULL
+
+        def cost(ref: FileRef) -> int:
+            return min(ref.size_bytes, 2 * PARTIAL_BYTES) if kind == PARTIAL else ref.size_bytes
+
+        batches: List[List[Tuple[int, str, int]]] = [[]]
+        batch_bytes = 0
+        for key, ref in enumerate(refs):
+            if batches[-1] and (batch_bytes >= BATCH_BYTES or len(batches[-1]) >= BATCH_FILES):
+                batches.append([])
+                batch_bytes = 0
+            batches[-1].append((key, ref.readable_path, ref.size_bytes))
+            batch_bytes += cost(ref)
+
+        done = 0
+
+        def collect(results: List[Tuple[int, Optional[str]]]):
+            nonlocal done
+            for key, digest in results:
+                ref = refs[key]
+                if digest is None:
+                    self._unreadable += 1
+                else:
+                    ref.store(index, digest)
+                    self._hashed += 1
+                    self._bytes_read += cost(ref)
+            done += len(results)
+            if on_progress:
+                on_progress(kind, done, len(refs))
+
+        total_bytes = sum(cost(ref) for ref in refs)
+        if self.max_workers == 1 or len(batches) == 1 or total_bytes < INLINE_BYTES:
+            for batch in batches:
+                collect(_hash_batch(kind, batch))
+            return
+
+        # Procesos y no hilos: el hash de archivos en caché de disco está limitado por CPU
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            futures = [executor.submit(_hash_batch, kind, batch) for batch in batches]
+            for future in as_completed(futures):
+                collect(future.result())
+
+def annotate_contents(contents: Iterable[ContentItem], snapshot: DiskSnapshot) -> List[ContentItem]:
+    """
+    Returns the contents with content_hash set on the top-level files whose full
+    hash is known in `snapshot` (items added by hand are left as they are).
+    """
+    root = snapshot.directories.get("")
+    hashes = {}
+    if root is not None:
+        hashes = {record[FILE_NAME]: record[FILE_HASH] for record in root.files if len(record) > FILE_HASH and record[FILE_HASH]}
+    result = []
+    for item in contents:
+        digest = hashes.get(item.description)
+        if digest and digest != item.content_hash:
+            item = ContentItem(item.description, item.size_gb, digest)
+        result.append(item)
+    return result
+
+# Variables importantes:
+# - PARTIAL_BYTES, CHUNK_BYTES: Bytes del hash parcial (principio y final) y tamaño de bloque del hash completo.
+# - BATCH_BYTES, BATCH_FILES, INLINE_BYTES: Reparto del trabajo en el pool de procesos.
+# - DuplicateGroup: Archivos con el mismo contenido; se conserva el primero y el resto es espacio recuperable.
+# - DedupReport: Grupos de duplicados, contadores (hashes calculados, reutilizados, ilegibles) y GB recuperables por disco.
+# Métodos importantes:
+# - DedupEngine.find_duplicates(): Agrupa por tamaño, hash parcial y hash completo; guarda los hashes en los snapshots.
+# - annotate_contents(): Copia los hashes completos a los ContentItem de primer nivel del disco.
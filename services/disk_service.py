@@ -1,54 +1,122 @@
 import uuid
-from typing import List, Optional
-from core.models import Disk
+from typing import Dict, List, Optional
+from core.models import Disk, ContentItem
+from core.repository import SORT_KEYS, DiskRepository
+from core.search_index import ContentIndex
+from core.sorted_index import SortedIndex
 
-class DiskService:
+class DiskService(DiskRepository):
     def __init__(self):
-        self._disks: List[Disk] = [] # Almacenamiento en memoria por ahora
+        self._disks: Dict[str, Disk] = {} # Almacenamiento en memoria por ahora (id -> disco, en orden de alta)
+        self._order: Dict[str, int] = {}  # disk_id -> número de alta, para devolver los filtros en ese orden
+        self._next_order = 0
+        self._content_index = ContentIndex()
+        # Índices ordenados por espacio libre, porcentaje de uso y capacidad (rangos y top-N en O(log n + k))
+        self._sorted_indexes: Dict[str, SortedIndex] = {key: SortedIndex() for key in SORT_KEYS}
 
-    def add_disk(self, name: str, total_capacity_gb: int, used_space_gb: int, contents: list[str]) -> Disk:
+    # --- Mantenimiento de los índices ---
+
+    def _store(self, disks: List[Disk]):
+        for disk in disks:
+            if disk.id not in self._order:
+                self._order[disk.id] = self._next_order
+                self._next_order += 1
+            self._disks[disk.id] = disk
+            self._content_index.add_disk(disk)
+        for key, index in self._sorted_indexes.items():
+            index.add_many((disk.id, getattr(disk, key)) for disk in disks)
+
+    def _reindex(self, disk: Disk):
+        for key, index in self._sorted_indexes.items():
+            index.add(disk.id, getattr(disk, key))
+
+    def _forget(self, disk_id: str) -> bool:
+        if self._disks.pop(disk_id, None) is None:
+            return False
+        del self._order[disk_id]
+        self._content_index.remove_disk(disk_id)
+        for index in self._sorted_indexes.values():
+            index.remove(disk_id)
+        return True
+
+    # --- DiskRepository ---
+
+    def add_disk(self, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Disk:
         new_id = str(uuid.uuid4())
-        new_disk = Disk(new_id, name, total_capacity_gb, used_space_gb, contents)
-        self._disks.append(new_disk)
+        new_disk = Disk(new_id, name, total_capacity_gb, list(contents))
+        self._store([new_disk])
         return new_disk
 
+    def add_disks(self, disks: List[Disk]) -> List[Disk]:
+        stored = [Disk(disk.id or str(uuid.uuid4()), disk.name, disk.total_capacity_gb, disk.contents) for disk in disks]
+        self._store(stored)
+        return stored
+
     def get_all_disks(self) -> List[Disk]:
-        return list(self._disks)
+        return list(self._disks.values())
 
     def get_disk_by_id(self, disk_id: str) -> Optional[Disk]:
-        return next((d for d in self._disks if d.id == disk_id), None)
+        return self._disks.get(disk_id)
 
-    def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, used_space_gb: int, contents: list[str]) -> Optional[Disk]:
+    def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
         disk_to_update = self.get_disk_by_id(disk_id)
         if disk_to_update:
             disk_to_update.name = name
             disk_to_update.total_capacity_gb = total_capacity_gb
-            disk_to_update.used_space_gb = used_space_gb
-            disk_to_update.contents = contents
+            disk_to_update.contents = list(contents)
+            self._content_index.update_disk(disk_to_update)
+            self._reindex(disk_to_update)
             return disk_to_update
         return None
 
     def delete_disk(self, disk_id: str) -> bool:
-        initial_len = len(self._disks)
-        self._disks = [d for d in self._disks if d.id != disk_id]
-        return len(self._disks) < initial_len
+        return self._forget(disk_id)
+
+    def delete_disks(self, disk_ids: List[str]) -> List[str]:
+        return [disk_id for disk_id in disk_ids if self._forget(disk_id)]
 
     def filter_disks(self, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None) -> List[Disk]:
-        filtered = self._disks
+        if min_free_gb is not None:
+            # Rango sobre el índice de espacio libre; el resultado se devuelve en orden de alta como el resto de filtros
+            ids = self._sorted_indexes["free_space_gb"].range(low=min_free_gb)
+            filtered = [self._disks[disk_id] for disk_id in sorted(ids, key=self._order.__getitem__)]
+        else:
+            filtered = list(self._disks.values())
 
         if name_query:
             filtered = [d for d in filtered if name_query.lower() in d.name.lower()]
 
         if content_query:
-            filtered = [d for d in filtered if any(content_query.lower() in c.lower() for c in d.contents)]
-
-        if min_free_gb is not None:
-            filtered = [d for d in filtered if d.free_space_gb >= min_free_gb]
+            matching_ids = self._content_index.matching_disk_ids(content_query)
+            filtered = [d for d in filtered if d.id in matching_ids]
 
         return filtered
 
+    def sorted_disks(self, key: str, descending: bool = False, offset: int = 0, limit: Optional[int] = None) -> List[Disk]:
+        return [self._disks[disk_id] for disk_id in self._sorted_indexes[key].page(offset, limit, descending)]
+
+    # --- Consultas por rango sobre los índices ordenados ---
+
+    def disks_in_range(self, key: str, low: Optional[float] = None, high: Optional[float] = None) -> List[Disk]:
+        """Disks with low <= key <= high, in ascending order of key."""
+        return [self._disks[disk_id] for disk_id in self._sorted_indexes[key].range(low, high)]
+
+    def count_in_range(self, key: str, low: Optional[float] = None, high: Optional[float] = None) -> int:
+        return self._sorted_indexes[key].count(low, high)
+
+    def top_disks(self, key: str, count: int) -> List[Disk]:
+        # p. ej. top_disks("usage_percentage", 10): los diez discos más llenos
+        return self.sorted_disks(key, descending=True, limit=count)
+
+    def search_contents(self, query: str, limit: int = 50):
+        return self._content_index.search(query, limit=limit)
+
 # Variables importantes:
-# - _disks: Lista privada que almacena los objetos Disk.
+# - _disks: Diccionario privado (id -> Disk) que almacena los discos en orden de alta.
+# - _content_index: Índice invertido (ContentIndex) sobre las descripciones de los contenidos.
+# - _sorted_indexes: SortedIndex por clave de SORT_KEYS (espacio libre, % de uso, capacidad), actualizados en cada escritura.
 # Métodos importantes:
-# - add_disk, get_all_disks, get_disk_by_id, update_disk, delete_disk: Implementan el CRUD.
-# - filter_disks: Gestiona la lógica de filtrado según los requisitos.
\ No newline at end of file
+# - add_disk, add_disks, get_all_disks, get_disk_by_id, update_disk, delete_disk, delete_disks: Implementan el CRUD.
+# - filter_disks: Gestiona la lógica de filtrado (el espacio libre mínimo es un rango del índice y el contenido se resuelve con ContentIndex).
+# - sorted_disks, top_disks, disks_in_range, count_in_range: Orden, top-N y rangos en O(log n + k) sobre los índices ordenados.
+# - search_contents: Búsqueda por prefijo/difusa ordenada por relevancia.
@@ -0,0 +1,112 @@
+import asyncio
+from typing import Callable, List, Optional, Tuple
+from core.filters import DiskFilter
+from core.models import Disk
+from core.repository import AsyncDiskRepository
+
+class FilterPipeline:
+    """
+    Debounced, coalescing filter pipeline between the search inputs and the service.
+
+    submit() only records the latest DiskFilter; a single worker task waits until the
+    input has been quiet for `debounce_s` and evaluates whatever is pending at that
+    moment, so a burst of keystrokes becomes one query. When the new filter narrows
+    the previous one ("pel" -> "peli") the previous result set is refined in memory
+    instead of asking the backend again. If the evaluation fails, the filter is
+    dropped and the error goes to `on_error` (the worker stays usable).
+    """
+
+    def __init__(self, service: AsyncDiskRepository, on_result: Callable[[DiskFilter, List[Disk]], None],
+                 debounce_s: float = 0.3, on_busy: Optional[Callable[[bool], None]] = None,
+                 on_error: Optional[Callable[[DiskFilter, Exception], None]] = None):
+        self._service = service
+        self._on_result = on_result
+        self._on_busy = on_busy
+        self._on_error = on_error
+        self.debounce_s = debounce_s
+        self._pending: Optional[DiskFilter] = None
+        self._version = 0
+        self._last: Optional[Tuple[DiskFilter, List[Disk]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.backend_evaluations = 0
+        self.local_evaluations = 0
+
+    def submit(self, disk_filter: DiskFilter):
+        # Debe llamarse desde el bucle de eventos (manejadores async de Flet)
+        self._pending = disk_filter
+        self._version += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def prime(self, disk_filter: DiskFilter, disks: List[Disk]):
+        """Registers an already known result (e.g. the full listing) as a base for narrowing."""
+        self._last = (disk_filter, list(disks))
+
+    def invalidate(self):
+        # Tras escribir en el catálogo los resultados anteriores dejan de ser fiables
+        self._last = None
+
+    def cancel(self):
+        self._version += 1
+        self._pending = None
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self):
+        while self._pending is not None:
+            # Debounce: se espera hasta que no lleguen filtros nuevos durante debounce_s
+            version = -1
+            while version != self._version:
+                version = self._version
+                await asyncio.sleep(self.debounce_s)
+
+            disk_filter = self._pending
+            try:
+                result = await self._evaluate(disk_filter)
+            except Exception as error:
+                if version != self._version:
+                    # Ya hay un filtro más reciente: se evalúa ese en lugar de avisar del fallo
+                    continue
+                self._pending = None
+                if self._on_error is None:
+                    raise
+                self._on_error(disk_filter, error)
+                return
+            if version != self._version:
+                # Llegó un filtro más reciente mientras se evaluaba: este resultado se descarta
+                continue
+
+            self._pending = None
+            self._last = (disk_filter, result)
+            self._on_result(disk_filter, result)
+
+    async def _evaluate(self, disk_filter: DiskFilter) -> List[Disk]:
+        if self._last is not None:
+            last_filter, last_result = self._last
+            if disk_filter == last_filter:
+                return last_result
+            # Con discos resumidos (contenidos sin cargar) un filtro de contenido nuevo va al backend
+            lazy = disk_filter.needs_contents(last_filter) and not all(disk.contents_loaded for disk in last_result)
+            if disk_filter.narrows(last_filter) and not lazy:
+                self.local_evaluations += 1
+                return await asyncio.to_thread(disk_filter.apply, last_result, last_filter)
+
+        self.backend_evaluations += 1
+        if self._on_busy:
+            self._on_busy(True)
+        try:
+            return await self._service.filter_disks(**disk_filter.to_kwargs())
+        finally:
+            if self._on_busy:
+                self._on_busy(False)
+
+# Variables importantes:
+# - _pending, _version: Último filtro recibido y contador de envíos (para el debounce y descartar resultados obsoletos).
+# - _last: Último par (filtro, resultado), base para refinar localmente los filtros más estrictos.
+# - backend_evaluations, local_evaluations: Cuántas consultas fueron al backend y cuántas se resolvieron en memoria.
+# Métodos importantes:
+# - submit(): Registra el filtro más reciente y arranca el worker si no está activo.
+# - _run(): Worker con debounce; si la evaluación falla descarta el filtro y avisa con on_error.
+# - prime(), invalidate(), cancel(): Gestionan el resultado base y las consultas pendientes.
@@ -0,0 +1,321 @@
+import contextvars
+import functools
+import inspect
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Callable, Deque, Dict, List, Optional
+
+# Duraciones que se conservan por métrica para calcular los percentiles (ventana deslizante)
+WINDOW_SIZE = 1000
+# Intervalo entre muestras del perfilador (DISK_PROFILE=1 lo activa al arrancar)
+PROFILE_INTERVAL_S = 0.005
+PROFILE_MAX_DEPTH = 40
+DEFAULT_EXPORT_DIR = os.path.join(os.path.expanduser("~"), ".gestor_discos", "metrics")
+
+class Measurement:
+    """One timed call; rows and bytes can be filled in while it runs."""
+    __slots__ = ("name", "rows", "bytes_in", "bytes_out", "requests")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.bytes_in = 0  # Bytes recibidos (respuestas HTTP)
+        self.bytes_out = 0  # Bytes enviados (cuerpos de las peticiones)
+        self.requests = 0
+
+_current: contextvars.ContextVar[Optional[Measurement]] = contextvars.ContextVar("current_measurement", default=None)
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+class Series:
+    """Rolling window of durations (ms) plus running totals of one metric."""
+
+    def __init__(self, window: int = WINDOW_SIZE):
+        self.durations: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.requests = 0
+
+    def add(self, duration_ms: float, measurement: Measurement, failed: bool):
+        self.durations.append(duration_ms)
+        self.count += 1
+        self.errors += failed
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.rows += measurement.rows
+        self.bytes_in += measurement.bytes_in
+        self.bytes_out += measurement.bytes_out
+        self.requests += measurement.requests
+
+    def summary(self) -> dict:
+        ordered = sorted(self.durations)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": _percentile(ordered, 0.50),
+            "p90_ms": _percentile(ordered, 0.90),
+            "p99_ms": _percentile(ordered, 0.99),
+            "max_ms": self.max_ms,
+            "rows": self.rows,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "requests": self.requests,
+        }
+
+class _Timer:
+    def __init__(self, registry: "MetricsRegistry", name: str):
+        self._registry = registry
+        self.measurement = Measurement(name)
+
+    def __enter__(self) -> Measurement:
+        self._token = _current.set(self.measurement)
+        self._start = time.perf_counter()
+        return self.measurement
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = (time.perf_counter() - self._start) * 1000
+        _current.reset(self._token)
+        parent = _current.get()
+        if parent is not None:
+            # El tráfico HTTP de una llamada anidada también cuenta para la que la contiene
+            parent.bytes_in += self.measurement.bytes_in
+            parent.bytes_out += self.measurement.bytes_out
+            parent.requests += self.measurement.requests
+        self._registry.record(self.measurement, duration_ms, failed=exc_type is not None)
+        return False
+
+def _result_rows(result) -> int:
+    # Listas (incluido BatchResult) cuentan sus filas; un Disk suelto cuenta como una
+    if isinstance(result, list):
+        return len(result)
+    return 1 if result is not None and not isinstance(result, (bool, tuple)) else 0
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a background thread reads the stack of every other
+    thread each `interval_s` and counts the frames it sees. The overhead is one
+    stack walk per thread and interval, so it can stay on in production for a
+    while; results are folded stacks (for flame graphs) and per-function counts.
+    """
+
+    def __init__(self, interval_s: float = PROFILE_INTERVAL_S):
+        self.interval_s = interval_s
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._lock = threading.Lock()  # El hilo de muestreo escribe mientras la UI lee
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def reset(self):
+        with self._lock:
+            self.samples = 0
+            self.stacks.clear()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval_s):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                with self._lock:
+                    self.stacks[";".join(reversed(stack))] += 1
+            with self._lock:
+                self.samples += 1
+
+    def top_functions(self, limit: int = 20) -> List[dict]:
+        """Functions by samples on top of the stack (self) and anywhere in it (total)."""
+        with self._lock:
+            stacks = list(self.stacks.items())
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, hits in stacks:
+            frames = stack.split(";")
+            own[frames[-1]] += hits
+            for frame in set(frames):
+                total[frame] += hits
+        return [{"function": name, "self": own[name], "total": total[name]} for name, _ in total.most_common(limit)]
+
+    def folded(self) -> str:
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return "\n".join(f"{stack} {hits}" for stack, hits in stacks)
+
+class MetricsRegistry:
+    """
+    In-memory latency metrics of the app: timer()/timed() record durations,
+    row counts and HTTP payload sizes under a name (e.g. "supabase.get_all_disks",
+    "model.from_dict", "ui.page_update") and summary() gives rolling percentiles.
+    """
+
+    def __init__(self, window: int = WINDOW_SIZE):
+        self.window = window
+        self.enabled = os.environ.get("DISK_METRICS", "1") != "0"
+        self.profiler = SamplingProfiler()
+        self._series: Dict[str, Series] = {}
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+
+    def timer(self, name: str) -> _Timer:
+        return _Timer(self, name)
+
+    def timed(self, name: str) -> Callable:
+        """Decorator (sync or async functions); the row count is taken from a list result."""
+        def decorate(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await fn(*args, **kwargs)
+                    with self.timer(name) as measurement:
+                        result = await fn(*args, **kwargs)
+                        measurement.rows = measurement.rows or _result_rows(result)
+                        return result
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.timer(name) as measurement:
+                    result = fn(*args, **kwargs)
+                    measurement.rows = measurement.rows or _result_rows(result)
+                    return result
+            return wrapper
+        return decorate
+
+    def record(self, measurement: Measurement, duration_ms: float, failed: bool = False):
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._series.get(measurement.name)
+            if series is None:
+                series = self._series[measurement.name] = Series(self.window)
+            series.add(duration_ms, measurement, failed)
+
+    def record_duration(self, name: str, duration_ms: float, rows: int = 0):
+        # Duraciones medidas fuera de un timer (p. ej. desde el arranque del proceso hasta la primera pantalla)
+        measurement = Measurement(name)
+        measurement.rows = rows
+        self.record(measurement, duration_ms)
+
+    # --- Tamaño de las peticiones HTTP (event hooks de httpx) ---
+
+    @staticmethod
+    def http_request_hook(request):
+        measurement = _current.get()
+        if measurement is not None:
+            measurement.requests += 1
+            measurement.bytes_out += len(request.content or b"")
+
+    @staticmethod
+    def http_response_hook(response):
+        measurement = _current.get()
+        if measurement is not None:
+            # El cuerpo se lee aquí (postgrest lo leería igualmente) para contar los bytes recibidos
+            response.read()
+            measurement.bytes_in += response.num_bytes_downloaded
+
+    def instrument_http_client(self, client):
+        """Adds the payload hooks to an httpx.Client (once)."""
+        hooks = client.event_hooks
+        if self.http_request_hook not in hooks["request"]:
+            hooks["request"].append(self.http_request_hook)
+            hooks["response"].append(self.http_response_hook)
+            client.event_hooks = hooks
+
+    def instrument_page(self, page):
+        """Times every page.update() of a Flet page (control.update() goes through it too)."""
+        update = page.update
+
+        def timed_update(*controls):
+            with self.timer("ui.page_update") as measurement:
+                measurement.rows = len(controls) or 1
+                return update(*controls)
+
+        page.update = timed_update
+
+    # --- Consulta y exportación ---
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: series.summary() for name, series in sorted(self._series.items())}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+        self.profiler.reset()
+        self._started_at = time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": self._started_at,
+            "exported_at": time.time(),
+            "metrics": self.summary(),
+            "profile": {
+                "running": self.profiler.running,
+                "samples": self.profiler.samples,
+                "interval_s": self.profiler.interval_s,
+                "top_functions": self.profiler.top_functions(),
+                "folded": self.profiler.folded(),
+            },
+        }
+
+    def export(self, path: Optional[str] = None) -> str:
+        if path is None:
+            os.makedirs(DEFAULT_EXPORT_DIR, exist_ok=True)
+            path = os.path.join(DEFAULT_EXPORT_DIR, time.strftime("metrics-%Y%m%d-%H%M%S.json"))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+# Registro compartido por los servicios y la UI
+metrics = MetricsRegistry()
+if os.environ.get("DISK_PROFILE") == "1":
+    metrics.profiler.start()
+
+# Variables importantes:
+# - metrics: Registro global de métricas (DISK_METRICS=0 lo desactiva; DISK_PROFILE=1 arranca el perfilador).
+# - WINDOW_SIZE: Duraciones que se guardan por métrica para los percentiles.
+# - Measurement: Llamada en curso; rows, bytes_in, bytes_out y requests se rellenan mientras se ejecuta.
+# Métodos importantes:
+# - timer(), timed(): Miden un bloque o una función (síncrona o async); record_duration() guarda una duración ya medida.
+# - instrument_http_client(), instrument_page(): Cuentan los bytes HTTP de postgrest y miden cada page.update().
+# - summary(), export(): Percentiles p50/p90/p99 por métrica y exportación a JSON (incluye el perfil muestreado).
+# - SamplingProfiler: Perfilador por muestreo de pilas (opcional) con salida en formato folded para flame graphs.
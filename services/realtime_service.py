@@ -0,0 +1,125 @@
+import asyncio
+import inspect
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Optional, Union
+from core.models import Disk
+from services.supabase_service import supabase_credentials
+from services.sync_service import SyncEngine
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+
+CHANNEL_NAME = "disks-changes"
+# Espera antes de volver a intentar la suscripción tras un error del canal
+RESUBSCRIBE_DELAY_S = 5.0
+
+ChangesCallback = Callable[[List[Disk], List[str]], Union[None, Awaitable[None]]]
+
+class RealtimeSubscriber:
+    """
+    Subscribes to INSERT/UPDATE/DELETE events on the disks table through Supabase
+    Realtime (postgres_changes) and applies them to a SyncEngine replica, then
+    reports the changed disks and removed ids to `on_changes` so the UI can
+    patch only those cards.
+
+    Every time the channel reaches SUBSCRIBED (the first time, and after each
+    reconnect of the websocket) a delta sync from the engine's watermark fills
+    in whatever happened while there was no connection. Events that arrive
+    without a record (payload too large, errors) fall back to the same sync.
+    """
+
+    def __init__(self, engine: SyncEngine):
+        self.engine = engine
+        self.status: Optional[str] = None
+        self.events_applied = 0
+        self.catch_ups = 0
+        self._on_changes: Optional[ChangesCallback] = None
+        self._client: Optional["AsyncClient"] = None
+        self._channel = None
+        self._catch_up_task: Optional[asyncio.Task] = None
+        self._catch_up_again = False
+        self._resubscribe_task: Optional[asyncio.Task] = None
+
+    async def start(self, on_changes: ChangesCallback):
+        # Debe llamarse desde el bucle de eventos (page.run_task)
+        self._on_changes = on_changes
+        if self._client is None:
+            # Import diferido: el cliente de Realtime solo se necesita una vez pintado el catálogo
+            from supabase import acreate_client
+            self._client = await acreate_client(*supabase_credentials())
+        await self._subscribe()
+
+    async def stop(self):
+        self._on_changes = None
+        for task in (self._catch_up_task, self._resubscribe_task):
+            if task and not task.done():
+                task.cancel()
+        if self._client is not None and self._channel is not None:
+            await self._client.remove_channel(self._channel)
+        self._channel = None
+
+    async def _subscribe(self):
+        if self._channel is not None:
+            await self._client.remove_channel(self._channel)
+        self._channel = self._client.channel(CHANNEL_NAME)
+        self._channel.on_postgres_changes("*", schema="public", table="disks", callback=self._on_postgres_change)
+        await self._channel.subscribe(self._on_status)
+
+    def _on_status(self, status, error: Optional[Exception]):
+        from realtime import RealtimeSubscribeStates
+        self.status = status.value
+        if status == RealtimeSubscribeStates.SUBSCRIBED:
+            self._schedule_catch_up()
+        elif status in (RealtimeSubscribeStates.CHANNEL_ERROR, RealtimeSubscribeStates.TIMED_OUT):
+            # El cliente ya reintenta la conexión del websocket; aquí se reintenta unirse al canal
+            if self._on_changes is not None and (self._resubscribe_task is None or self._resubscribe_task.done()):
+                self._resubscribe_task = asyncio.get_running_loop().create_task(self._resubscribe())
+
+    async def _resubscribe(self):
+        await asyncio.sleep(RESUBSCRIBE_DELAY_S)
+        if self._on_changes is not None:
+            await self._subscribe()
+
+    def _on_postgres_change(self, payload: dict):
+        data = payload.get("data", {})
+        event_type = data.get("type")
+        event_type = getattr(event_type, "value", event_type)
+        record = data.get("record")
+        if data.get("errors") or (event_type != "DELETE" and not record):
+            # Sin fila completa (p. ej. contenidos demasiado grandes para el mensaje): se pide el delta
+            self._schedule_catch_up()
+            return
+
+        changed, removed = self.engine.apply_change(event_type, record, data.get("old_record"))
+        self.events_applied += 1
+        self._emit(changed, removed)
+
+    def _schedule_catch_up(self):
+        if self._catch_up_task is not None and not self._catch_up_task.done():
+            # Ya hay una sincronización en curso: se repite una vez al terminar
+            self._catch_up_again = True
+            return
+        self._catch_up_task = asyncio.get_running_loop().create_task(self._catch_up())
+
+    async def _catch_up(self):
+        while True:
+            self._catch_up_again = False
+            stats = await asyncio.to_thread(self.engine.sync)
+            self.catch_ups += 1
+            self._emit(stats.changed, stats.removed)
+            if not self._catch_up_again:
+                return
+
+    def _emit(self, changed: List[Disk], removed: List[str]):
+        if self._on_changes is None or (not changed and not removed):
+            return
+        result = self._on_changes(changed, removed)
+        if inspect.isawaitable(result):
+            asyncio.get_running_loop().create_task(result)
+
+# Variables importantes:
+# - CHANNEL_NAME: Canal de Realtime con los cambios de la tabla disks.
+# - status, events_applied, catch_ups: Estado del canal y contadores (eventos aplicados y sincronizaciones de recuperación).
+# Métodos importantes:
+# - start(), stop(): Abren y cierran la suscripción; on_changes recibe (discos cambiados, ids borrados).
+# - _on_status(): En cada SUBSCRIBED (también tras reconectar) sincroniza desde la marca de agua.
+# - _on_postgres_change(): Aplica el evento a la réplica del SyncEngine y avisa a la UI.
@@ -0,0 +1,261 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+from core.models import ContentItem
+from services.snapshot import DirectoryRecord, DiskSnapshot, GB, carry_hashes
+
+class ScanProgress(NamedTuple):
+    files: int
+    directories: int
+    total_bytes: int
+    errors: int
+    elapsed_s: float
+    reused_directories: int = 0
+
+class ScanEntry:
+    """Top-level entry of a scanned directory with its recursive size."""
+
+    def __init__(self, name: str, path: str, is_dir: bool, size_bytes: int = 0, file_count: int = 0):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.size_bytes = size_bytes
+        self.file_count = file_count
+
+    @property
+    def size_gb(self) -> float:
+        return round(self.size_bytes / GB, 2)
+
+    def to_content_item(self) -> ContentItem:
+        description = f"(Carpeta) {self.name}" if self.is_dir else self.name
+        return ContentItem(description=description, size_gb=self.size_gb)
+
+class DirectoryScanner:
+    """
+    Recursive directory scanner built on os.scandir.
+
+    Every directory listing is a task in a shared thread pool, so independent
+    branches of the tree are read concurrently. Top-level entries are yielded as
+    soon as their whole subtree has been measured, and the scan can be cancelled
+    from any thread with cancel().
+
+    With a previous DiskSnapshot, directories whose mtime and inode did not change
+    are not listed again: their files are taken from the snapshot and only their
+    subdirectories are stat'ed. Note that rewriting a file in place does not change
+    its directory's mtime, so such a resize is only picked up by a full scan.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, progress_interval: float = 0.2):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self.progress_interval = progress_interval
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self.snapshot: Optional[DiskSnapshot] = None
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self._files = 0
+        self._directories = 0
+        self._bytes = 0
+        self._errors = 0
+        self._reused = 0
+        self._started_at = time.perf_counter()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def progress(self) -> ScanProgress:
+        with self._lock:
+            return ScanProgress(self._files, self._directories, self._bytes, self._errors,
+                                time.perf_counter() - self._started_at, self._reused)
+
+    def scan(self, root: str, on_progress: Optional[Callable[[ScanProgress], None]] = None,
+             previous: Optional[DiskSnapshot] = None, record_snapshot: bool = False) -> List[ScanEntry]:
+        return list(self.iter_scan(root, on_progress=on_progress, previous=previous, record_snapshot=record_snapshot))
+
+    def iter_scan(self, root: str, on_progress: Optional[Callable[[ScanProgress], None]] = None,
+                  previous: Optional[DiskSnapshot] = None, record_snapshot: bool = False) -> Iterator[ScanEntry]:
+        """
+        Yields the top-level entries of `root`. When `record_snapshot` is set (or a
+        `previous` snapshot is given) the new snapshot is left in self.snapshot.
+        """
+        self._cancel_event.clear()
+        self._reset_counters()
+        recording = record_snapshot or previous is not None
+        self.snapshot = DiskSnapshot(root=root) if recording else None
+
+        completed: "queue.Queue[ScanEntry]" = queue.Queue()
+        pending: Dict[int, int] = {}  # id(entrada) -> tareas pendientes de su subárbol
+        outstanding = [0]  # entradas de primer nivel todavía sin terminar
+        queued = [0]  # tareas enviadas al pool que aún no han empezado
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="disk-scan")
+
+        def finish_directory(top: ScanEntry):
+            # Cuenta tareas pendientes por entrada de primer nivel; al llegar a cero su tamaño es definitivo
+            with self._lock:
+                pending[id(top)] -= 1
+                done = pending[id(top)] == 0
+            if done:
+                completed.put(top)
+
+        def list_directory(path: str, relpath: str):
+            dir_stat = None
+            cached = {}
+            if recording:
+                try:
+                    dir_stat = os.stat(path, follow_symlinks=False)
+                except OSError:
+                    pass
+                old_record = previous.directories.get(relpath) if previous else None
+                if old_record is not None and dir_stat is not None and old_record.matches(dir_stat):
+                    # Directorio sin cambios: se reutiliza su listado anterior sin volver a leerlo
+                    with self._lock:
+                        self.snapshot.directories[relpath] = old_record
+                        self._reused += 1
+                    subdirs = [(os.path.join(path, name), os.path.join(relpath, name)) for name in old_record.subdirs]
+                    return old_record.size_bytes, len(old_record.files), subdirs
+                if old_record is not None:
+                    # Los archivos que no cambiaron dentro de un directorio modificado conservan sus hashes
+                    cached = old_record.cached_hashes()
+
+            size = files = 0
+            subdirs = []
+            file_records = []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        try:
+                            # is_dir/stat con follow_symlinks=False reutilizan los datos de scandir cuando es posible
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append((entry.path, os.path.join(relpath, entry.name)))
+                            elif entry.is_file(follow_symlinks=False):
+                                entry_stat = entry.stat(follow_symlinks=False)
+                                size += entry_stat.st_size
+                                files += 1
+                                if recording:
+                                    file_record = [entry.name, entry_stat.st_size, entry_stat.st_mtime_ns, entry.inode()]
+                                    if cached:
+                                        carry_hashes(file_record, cached)
+                                    file_records.append(file_record)
+                        except OSError:
+                            with self._lock:
+                                self._errors += 1
+            except OSError:
+                with self._lock:
+                    self._errors += 1
+
+            if recording and dir_stat is not None:
+                record = DirectoryRecord(dir_stat.st_mtime_ns, dir_stat.st_ino, file_records, [os.path.basename(sub) for sub, _ in subdirs])
+                with self._lock:
+                    self.snapshot.directories[relpath] = record
+            return size, files, subdirs
+
+        def scan_tree(path: str, relpath: str, top: ScanEntry):
+            # Recorre en profundidad con una pila local y solo reparte subdirectorios al
+            # pool cuando hay hilos ociosos, para no pagar una tarea por cada carpeta
+            try:
+                with self._lock:
+                    queued[0] -= 1
+                stack = [(path, relpath)]
+                while stack and not self._cancel_event.is_set():
+                    size, files, subdirs = list_directory(*stack.pop())
+                    with self._lock:
+                        top.size_bytes += size
+                        top.file_count += files
+                        self._files += files
+                        self._bytes += size
+                        self._directories += 1
+
+                    for subdir in subdirs:
+                        if queued[0] < self.max_workers:
+                            with self._lock:
+                                queued[0] += 1
+                                pending[id(top)] += 1
+                            try:
+                                executor.submit(scan_tree, subdir[0], subdir[1], top)
+                            except RuntimeError:
+                                # El pool ya se cerró porque el escaneo fue cancelado
+                                finish_directory(top)
+                                return
+                        else:
+                            stack.append(subdir)
+            finally:
+                finish_directory(top)
+
+        try:
+            root_stat = os.stat(root)
+            old_root = previous.directories.get("") if previous else None
+            root_cached = old_root.cached_hashes() if old_root is not None else {}
+            with os.scandir(root) as entries:
+                top_entries = list(entries)
+            root_files = []
+            root_subdirs = []
+
+            for entry in top_entries:
+                if self._cancel_event.is_set():
+                    break
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        top = ScanEntry(entry.name, entry.path, is_dir=True)
+                        pending[id(top)] = 1
+                        outstanding[0] += 1
+                        root_subdirs.append(entry.name)
+                        with self._lock:
+                            queued[0] += 1
+                        executor.submit(scan_tree, entry.path, entry.name, top)
+                    elif entry.is_file(follow_symlinks=False):
+                        entry_stat = entry.stat(follow_symlinks=False)
+                        size = entry_stat.st_size
+                        file_record = [entry.name, size, entry_stat.st_mtime_ns, entry.inode()]
+                        if root_cached:
+                            carry_hashes(file_record, root_cached)
+                        root_files.append(file_record)
+                        with self._lock:
+                            self._files += 1
+                            self._bytes += size
+                        yield ScanEntry(entry.name, entry.path, is_dir=False, size_bytes=size, file_count=1)
+                except OSError:
+                    with self._lock:
+                        self._errors += 1
+
+            if recording:
+                with self._lock:
+                    self.snapshot.directories[""] = DirectoryRecord(root_stat.st_mtime_ns, root_stat.st_ino, root_files, root_subdirs)
+
+            while outstanding[0] and not self._cancel_event.is_set():
+                try:
+                    top = completed.get(timeout=self.progress_interval)
+                except queue.Empty:
+                    if on_progress:
+                        on_progress(self.progress())
+                    continue
+                outstanding[0] -= 1
+                yield top
+
+            if on_progress:
+                on_progress(self.progress())
+        finally:
+            # Al cancelar (o si el consumidor abandona el generador) se descartan las tareas en cola
+            if outstanding[0]:
+                self._cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# Variables importantes:
+# - GB: Bytes por gigabyte (para convertir tamaños a ContentItem.size_gb).
+# - ScanEntry: Entrada de primer nivel con su tamaño recursivo y número de archivos.
+# - ScanProgress: Contadores de progreso (archivos, directorios, bytes, errores, tiempo, directorios reutilizados).
+# - snapshot: DiskSnapshot del último escaneo (si se pidió registrarlo o se pasó uno anterior).
+# Métodos importantes:
+# - DirectoryScanner.iter_scan(): Recorre el árbol en paralelo y entrega cada entrada al terminar su subárbol;
+#   con un snapshot anterior solo vuelve a listar los directorios cuyo mtime/inodo cambió.
+# - DirectoryScanner.scan(): Versión bloqueante que devuelve la lista completa.
+# - DirectoryScanner.cancel(): Detiene el escaneo desde cualquier hilo.
+# - ScanEntry.to_content_item(): Convierte la entrada en un ContentItem con el tamaño real.
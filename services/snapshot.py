@@ -0,0 +1,214 @@
+import gzip
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from core.content_tree import ContentTree
+from core.models import ContentItem
+
+DEFAULT_SNAPSHOT_DIR = os.environ.get("DISK_SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), ".gestor_discos", "snapshots"))
+
+GB = 1024 ** 3
+
+# Índices de cada registro de archivo: [nombre, tamaño, mtime_ns, inodo, hash parcial, hash completo]
+# (los dos hashes solo existen si el detector de duplicados los calculó)
+FILE_NAME, FILE_SIZE, FILE_MTIME, FILE_INODE, FILE_PARTIAL_HASH, FILE_HASH = range(6)
+
+class DirectoryRecord:
+    """Listing of one directory as seen in the last scan (files and subdirectory names)."""
+
+    def __init__(self, mtime_ns: int, inode: int, files: List[list], subdirs: List[str]):
+        self.mtime_ns = mtime_ns
+        self.inode = inode
+        self.files = files
+        self.subdirs = subdirs
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(record[FILE_SIZE] for record in self.files)
+
+    def matches(self, stat_result: os.stat_result) -> bool:
+        return self.mtime_ns == stat_result.st_mtime_ns and self.inode == stat_result.st_ino
+
+    def cached_hashes(self) -> Dict[str, list]:
+        """Hashes of the files that have them: name -> [size, mtime_ns, partial, full]."""
+        return {
+            record[FILE_NAME]: [record[FILE_SIZE], record[FILE_MTIME]] + record[FILE_PARTIAL_HASH:]
+            for record in self.files if len(record) > FILE_PARTIAL_HASH
+        }
+
+    def to_list(self) -> list:
+        return [self.mtime_ns, self.inode, self.files, self.subdirs]
+
+    @staticmethod
+    def from_list(data: list) -> "DirectoryRecord":
+        return DirectoryRecord(mtime_ns=data[0], inode=data[1], files=data[2], subdirs=data[3])
+
+class DiskSnapshot:
+    """
+    File metadata (path, size, mtime, inode) of a scanned disk, keyed by the
+    directory path relative to the scan root ("" is the root itself).
+    """
+
+    def __init__(self, root: str = "", directories: Optional[Dict[str, DirectoryRecord]] = None, taken_at: float = 0.0):
+        self.root = root
+        self.directories: Dict[str, DirectoryRecord] = directories if directories is not None else {}
+        self.taken_at = taken_at or time.time()
+
+    @property
+    def file_count(self) -> int:
+        return sum(len(record.files) for record in self.directories.values())
+
+    def top_level_sizes(self) -> Dict[str, Tuple[bool, int]]:
+        """Recursive size of every top-level entry: name -> (is_dir, size_bytes)."""
+        sizes: Dict[str, Tuple[bool, int]] = {}
+        root = self.directories.get("")
+        if root is None:
+            return sizes
+
+        for record in root.files:
+            sizes[record[FILE_NAME]] = (False, record[FILE_SIZE])
+        for name in root.subdirs:
+            sizes[name] = (True, 0)
+
+        for relpath, record in self.directories.items():
+            if not relpath:
+                continue
+            top = relpath.split(os.sep, 1)[0]
+            if top in sizes:
+                sizes[top] = (True, sizes[top][1] + record.size_bytes)
+        return sizes
+
+    def to_dict(self) -> dict:
+        return {
+            "root": self.root,
+            "taken_at": self.taken_at,
+            "directories": {relpath: record.to_list() for relpath, record in self.directories.items()},
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "DiskSnapshot":
+        directories = {relpath: DirectoryRecord.from_list(record) for relpath, record in data.get("directories", {}).items()}
+        return DiskSnapshot(root=data.get("root", ""), directories=directories, taken_at=data.get("taken_at", 0.0))
+
+def carry_hashes(record: list, cached: Dict[str, list]):
+    """Copies the cached hashes of an unchanged file (same size and mtime) onto its new record."""
+    old = cached.get(record[FILE_NAME])
+    if old is not None and old[0] == record[FILE_SIZE] and old[1] == record[FILE_MTIME]:
+        record.extend(old[2:])
+
+def _content_description(name: str, is_dir: bool) -> str:
+    return f"(Carpeta) {name}" if is_dir else name
+
+class ScanDiff:
+    """Added, removed and resized top-level ContentItems between two snapshots."""
+
+    def __init__(self, added: List[ContentItem], removed: List[ContentItem], resized: List[ContentItem]):
+        self.added = added
+        self.removed = removed
+        self.resized = resized
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.resized)
+
+    @staticmethod
+    def between(previous: Optional[DiskSnapshot], current: DiskSnapshot) -> "ScanDiff":
+        old = previous.top_level_sizes() if previous else {}
+        new = current.top_level_sizes()
+
+        def item(name: str, is_dir: bool, size_bytes: int) -> ContentItem:
+            return ContentItem(description=_content_description(name, is_dir), size_gb=round(size_bytes / GB, 2))
+
+        added = [item(name, *new[name]) for name in new if name not in old]
+        removed = [item(name, *old[name]) for name in old if name not in new]
+        resized = [item(name, *new[name]) for name in new if name in old and old[name] != new[name]]
+        return ScanDiff(added=added, removed=removed, resized=resized)
+
+    def apply(self, contents: List[ContentItem]) -> List[ContentItem]:
+        # Los contenidos añadidos a mano (que no vienen del escaneo) se conservan tal cual
+        removed = {item.description for item in self.removed}
+        resized = {item.description: item.size_gb for item in self.resized}
+
+        result = []
+        for item in contents:
+            if item.description in removed:
+                continue
+            if item.description in resized:
+                item = ContentItem(description=item.description, size_gb=resized[item.description])
+            result.append(item)
+
+        existing = {item.description for item in result}
+        result.extend(item for item in self.added if item.description not in existing)
+        return result
+
+class SnapshotStore:
+    """
+    Stores one compressed JSON snapshot per disk id, plus its ContentTree in the
+    compact (prefix-encoded) form so the details dialog can browse the folders
+    without loading the whole snapshot.
+    """
+
+    def __init__(self, directory: str = DEFAULT_SNAPSHOT_DIR):
+        self.directory = directory
+
+    def _path(self, disk_id: str) -> str:
+        return os.path.join(self.directory, f"{disk_id}.json.gz")
+
+    def _tree_path(self, disk_id: str) -> str:
+        return os.path.join(self.directory, f"{disk_id}.tree.gz")
+
+    def load(self, disk_id: str) -> Optional[DiskSnapshot]:
+        try:
+            with gzip.open(self._path(disk_id), "rt", encoding="utf-8") as f:
+                return DiskSnapshot.from_dict(json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def save(self, disk_id: str, snapshot: DiskSnapshot):
+        os.makedirs(self.directory, exist_ok=True)
+        # Se escribe en un temporal y se renombra para no dejar snapshots a medias
+        tmp_path = self._path(disk_id) + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(snapshot.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, self._path(disk_id))
+        self._save_tree(disk_id, ContentTree.from_snapshot(snapshot))
+
+    def _save_tree(self, disk_id: str, tree: ContentTree):
+        tmp_path = self._tree_path(disk_id) + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(tree.to_compact())
+        os.replace(tmp_path, self._tree_path(disk_id))
+
+    def load_tree(self, disk_id: str) -> Optional[ContentTree]:
+        try:
+            with gzip.open(self._tree_path(disk_id), "rt", encoding="utf-8") as f:
+                return ContentTree.from_compact(f.read())
+        except (OSError, ValueError):
+            pass
+        # Snapshots guardados antes de existir el árbol: se construye una vez y se guarda
+        snapshot = self.load(disk_id)
+        if snapshot is None:
+            return None
+        tree = ContentTree.from_snapshot(snapshot)
+        self._save_tree(disk_id, tree)
+        return tree
+
+    def delete(self, disk_id: str):
+        for path in (self._path(disk_id), self._tree_path(disk_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+# Variables importantes:
+# - DEFAULT_SNAPSHOT_DIR: Carpeta de snapshots (configurable con DISK_SNAPSHOT_DIR).
+# - DirectoryRecord: mtime, inodo, archivos [nombre, tamaño, mtime_ns, inodo] y subcarpetas de un directorio.
+# - DiskSnapshot: Todos los DirectoryRecord de un disco, por ruta relativa a la raíz.
+# - FILE_PARTIAL_HASH, FILE_HASH: Hashes opcionales de cada archivo, reutilizados mientras no cambien tamaño ni mtime.
+# Métodos importantes:
+# - carry_hashes(): Copia los hashes de un archivo sin cambios al registro de un directorio re-escaneado.
+# - DiskSnapshot.top_level_sizes(): Tamaño recursivo de cada entrada de primer nivel.
+# - ScanDiff.between(), ScanDiff.apply(): Calculan y aplican los cambios (añadidos, eliminados, redimensionados) sobre Disk.contents.
+# - SnapshotStore.load(), save(), delete(): Persistencia por id de disco (save también guarda el ContentTree).
+# - SnapshotStore.load_tree(): ContentTree del disco (core/content_tree.py) para navegar sus carpetas.
@@ -1,78 +1,304 @@
+import functools
 import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import threading
+import uuid
+import httpx
 from core.models import Disk, ContentItem
-from typing import List, Optional
+from core.repository import BatchResult, DiskRepository, RowFailure
+from services.metrics import metrics
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Tuple
 
-load_dotenv()
+if TYPE_CHECKING:
+    from supabase import Client
 
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
+# supabase, postgrest y dotenv tardan en importarse casi medio segundo: se cargan con el primer
+# uso del cliente (normalmente en un hilo, después de pintar la ventana) y no al importar el módulo
 
-class SupabaseService:
-    def __init__(self):
-        self.client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+@functools.lru_cache(maxsize=None)
+def supabase_credentials() -> Tuple[Optional[str], Optional[str]]:
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_KEY")
 
+# Filas por petición en las escrituras por lotes
+WRITE_CHUNK_SIZE = 500
+
+# Columnas que necesita Disk.from_dict; evita descargar las columnas auxiliares de búsqueda
+DISK_COLUMNS = "id,name,total_capacity_gb,used_space_gb,contents"
+# Listado ligero para las tarjetas: columnas escalares y el resumen generado en Postgres
+SUMMARY_COLUMNS = "id,name,total_capacity_gb,used_space_gb,contents_summary"
+# Lecturas incrementales (SyncEngine): además la marca de tiempo de la última modificación
+SYNC_COLUMNS = DISK_COLUMNS + ",updated_at"
+CHANGES_PAGE_SIZE = 1000
+# Errores atribuibles a filas concretas: SQLSTATE de clase 22 (datos) y 23 (restricciones), o HTTP 400/409
+# (PostgREST solo pone el estado HTTP en `code` cuando la respuesta de error no es JSON)
+ROW_ERROR_SQLSTATE_CLASSES = ("22", "23")
+ROW_ERROR_HTTP_STATUSES = ("400", "409")
+
+def _ilike_pattern(query: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _disk_payload(name: str, total_capacity_gb: int, contents: List[ContentItem]) -> dict:
+    # Convert ContentItem objects to dictionaries for JSONB storage
+    return {
+        "name": name,
+        "total_capacity_gb": total_capacity_gb,
+        "used_space_gb": sum(item.size_gb for item in contents),
+        "contents": [item.to_dict() for item in contents],
+    }
+
+def _is_row_error(error) -> bool:
+    code = str(error.code or "")
+    return (len(code) == 5 and code[:2] in ROW_ERROR_SQLSTATE_CLASSES) or code in ROW_ERROR_HTTP_STATUSES
+
+def _in_creation_order(query):
+    # Orden de alta, como los backends locales; id desempata las filas anteriores a created_at
+    # (ver supabase/migrations/*_listing_order.sql)
+    return query.order('created_at').order('id')
+
+def _row_id(row) -> Optional[str]:
+    return row.get("id") if isinstance(row, dict) else row
+
+def _to_disks(rows: List[dict]) -> List[Disk]:
+    # Se mide aparte de la petición para distinguir el coste de la red del de Disk.from_dict
+    with metrics.timer("model.from_dict") as measurement:
+        measurement.rows = len(rows)
+        return [Disk.from_dict(row) for row in rows]
+
+class SupabaseService(DiskRepository):
+    def __init__(self, client: Optional["Client"] = None, chunk_size: int = WRITE_CHUNK_SIZE):
+        self._client = client
+        self._client_lock = threading.Lock()
+        self.chunk_size = chunk_size
+
+    @property
+    def client(self) -> "Client":
+        # El cliente (y su conexión HTTP keep-alive) se crea en la primera petición y se reutiliza en todas
+        with self._client_lock:
+            if self._client is None:
+                from supabase import create_client
+                self._client = create_client(*supabase_credentials())
+        return self._client
+
+    def _table(self, name: str):
+        # El cliente de postgrest se recrea al cambiar la sesión: los hooks de métricas se comprueban en cada uso
+        metrics.instrument_http_client(self.client.postgrest.session)
+        return self.client.table(name)
+
+    # --- Escrituras por lotes ---
+
+    def _write_batches(self, rows: list, send: Callable[[list], None]) -> BatchResult:
+        """
+        Sends `rows` in chunks of chunk_size with `send`. PostgREST applies each
+        request in a single transaction, so when a chunk is rejected because of its
+        data (a row-level error, see _is_row_error) it is split in halves and retried
+        until the offending rows are isolated; every other row is still written. Any
+        other error (permissions, RLS, schema) would reject every half as well, so
+        the whole chunk fails at once. Returns the indexes of the written rows plus
+        one RowFailure per rejected row.
+        """
+        from postgrest.exceptions import APIError
+        result = BatchResult()
+        pending = [list(range(start, min(start + self.chunk_size, len(rows)))) for start in range(0, len(rows), self.chunk_size)]
+        pending.reverse()
+        while pending:
+            indexes = pending.pop()
+            try:
+                send([rows[index] for index in indexes])
+                result.extend(indexes)
+            except APIError as error:
+                if len(indexes) == 1 or not _is_row_error(error):
+                    message = error.message or str(error)
+                    result.failures.extend(RowFailure(index, _row_id(rows[index]), message) for index in indexes)
+                    continue
+                middle = len(indexes) // 2
+                pending.append(indexes[middle:])
+                pending.append(indexes[:middle])
+            except httpx.HTTPError as error:
+                # Fallo de red: no se sabe qué fila lo causó, así que se informa de todo el lote
+                result.failures.extend(RowFailure(index, _row_id(rows[index]), str(error), transport=True) for index in indexes)
+        return result
+
+    def _write_disks(self, disks: List[Disk], upsert: bool) -> BatchResult:
+        from postgrest import ReturnMethod
+        # Los ids se generan en el cliente para no tener que pedir las filas de vuelta (return=minimal)
+        stored = [Disk(disk.id or str(uuid.uuid4()), disk.name, disk.total_capacity_gb, disk.contents) for disk in disks]
+        rows = [dict(_disk_payload(disk.name, disk.total_capacity_gb, disk.contents), id=disk.id) for disk in stored]
+        table = self._table('disks')
+
+        def send(chunk: list):
+            if upsert:
+                table.upsert(chunk, on_conflict="id", returning=ReturnMethod.minimal).execute()
+            else:
+                table.insert(chunk, returning=ReturnMethod.minimal).execute()
+
+        written = self._write_batches(rows, send)
+        return BatchResult([stored[index] for index in written], written.failures)
+
+    @metrics.timed("supabase.add_disks")
+    def add_disks(self, disks: List[Disk]) -> BatchResult:
+        return self._write_disks(disks, upsert=False)
+
+    @metrics.timed("supabase.upsert_disks")
+    def upsert_disks(self, disks: List[Disk]) -> BatchResult:
+        return self._write_disks(disks, upsert=True)
+
+    @metrics.timed("supabase.delete_disks")
+    def delete_disks(self, disk_ids: List[str]) -> BatchResult:
+        from postgrest import ReturnMethod
+        table = self._table('disks')
+        written = self._write_batches(
+            list(disk_ids), lambda chunk: table.delete(returning=ReturnMethod.minimal).in_('id', chunk).execute()
+        )
+        return BatchResult([disk_ids[index] for index in written], written.failures)
+
+    # --- Sincronización incremental ---
+
+    def _fetch_pages(self, build_query: Callable[[], object]) -> List[dict]:
+        rows = []
+        while True:
+            page = build_query().range(len(rows), len(rows) + CHANGES_PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < CHANGES_PAGE_SIZE:
+                return rows
+
+    def get_changes(self, since: Optional[str] = None) -> Tuple[List[dict], List[dict]]:
+        """
+        Returns (rows, tombstones): the disks whose updated_at is later than `since`
+        (an ISO timestamp) and the ids deleted after it. With since=None every disk
+        is returned and no tombstones. See supabase/migrations/*_delta_sync.sql.
+        """
+        def changed_rows():
+            query = self._table('disks').select(SYNC_COLUMNS).order('updated_at').order('id')
+            return query.gt('updated_at', since) if since else query
+
+        with metrics.timer("supabase.get_changes") as measurement:
+            rows = self._fetch_pages(changed_rows)
+            tombstones = []
+            if since:
+                tombstones = self._fetch_pages(
+                    lambda: self._table('disk_tombstones').select('id,deleted_at').gt('deleted_at', since).order('deleted_at').order('id')
+                )
+            measurement.rows = len(rows) + len(tombstones)
+        return rows, tombstones
+
+    # --- Escrituras condicionales (cola offline) ---
+
+    @metrics.timed("supabase.update_disk_if_version")
+    def update_disk_if_version(self, disk: Disk, base_version: str) -> Optional[str]:
+        """
+        Writes `disk` only if its row still has updated_at == base_version. The
+        check and the write are one UPDATE, so no other client can write in
+        between. Returns the new updated_at (set by the trigger), or None when no
+        row matched: the disk changed or was deleted since base_version.
+        """
+        payload = _disk_payload(disk.name, disk.total_capacity_gb, disk.contents)
+        response = self._table('disks').update(payload).eq('id', disk.id).eq('updated_at', base_version).execute()
+        return response.data[0]["updated_at"] if response.data else None
+
+    @metrics.timed("supabase.delete_disk_if_version")
+    def delete_disk_if_version(self, disk_id: str, base_version: str) -> bool:
+        """Deletes the disk only if its row still has updated_at == base_version; False when no row matched."""
+        response = self._table('disks').delete().eq('id', disk_id).eq('updated_at', base_version).execute()
+        return bool(response.data)
+
+    # --- DiskRepository ---
+
+    @metrics.timed("supabase.add_disk")
     def add_disk(self, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
-        # Convert ContentItem objects to dictionaries for JSONB storage
-        contents_as_dicts = [item.to_dict() for item in contents]
-        usage_gb = sum(item.size_gb for item in contents)
-        
-        disk_data = {
-            "name": name,
-            "total_capacity_gb": total_capacity_gb,
-            "used_space_gb": usage_gb,
-            "contents": contents_as_dicts,
-        }
-        
-        response = self.client.table('disks').insert(disk_data).execute()
+        disk_data = _disk_payload(name, total_capacity_gb, contents)
+        response = self._table('disks').insert(disk_data).execute()
         
         if response.data:
             return Disk.from_dict(response.data[0])
         return None
 
+    @metrics.timed("supabase.get_all_disks")
     def get_all_disks(self) -> List[Disk]:
-        response = self.client.table('disks').select("*").execute()
+        response = self._table('disks').select(DISK_COLUMNS).execute()
+        return _to_disks(response.data or [])
+
+    @metrics.timed("supabase.get_disk_summaries")
+    def get_disk_summaries(self) -> List[Disk]:
+        # Sin la columna contents (JSONB): cada Disk pide sus contenidos la primera vez que se usan
+        rows = self._fetch_pages(lambda: _in_creation_order(self._table('disks').select(SUMMARY_COLUMNS)))
+        return [
+            Disk.lazy(row["id"], row["name"], row["total_capacity_gb"], row["used_space_gb"], row["contents_summary"], self._load_contents)
+            for row in rows
+        ]
+
+    @metrics.timed("supabase.load_contents")
+    def _load_contents(self, disk_id: str) -> List[ContentItem]:
+        response = self._table('disks').select('contents').eq('id', disk_id).execute()
         if response.data:
-            return [Disk.from_dict(disk_data) for disk_data in response.data]
+            return [ContentItem.from_dict(item) for item in response.data[0].get("contents") or []]
         return []
 
+    def iter_disks(self, page_size: int = 1000) -> Iterator[Disk]:
+        # Paginación por id (keyset) para no descargar todo el catálogo de una vez
+        last_id = None
+        while True:
+            query = self._table('disks').select(DISK_COLUMNS).order('id').limit(page_size)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            with metrics.timer("supabase.iter_disks.page") as measurement:
+                rows = query.execute().data or []
+                measurement.rows = len(rows)
+            yield from _to_disks(rows)
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]["id"]
+
+    @metrics.timed("supabase.get_disk_by_id")
     def get_disk_by_id(self, disk_id: str) -> Optional[Disk]:
-        response = self.client.table('disks').select("*").eq('id', disk_id).execute()
+        response = self._table('disks').select(DISK_COLUMNS).eq('id', disk_id).execute()
         if response.data:
             return Disk.from_dict(response.data[0])
         return None
 
+    @metrics.timed("supabase.update_disk")
     def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
-        contents_as_dicts = [item.to_dict() for item in contents]
-        
-        update_data = {
-            "name": name,
-            "total_capacity_gb": total_capacity_gb,
-            "contents": contents_as_dicts,
-        }
-        
-        response = self.client.table('disks').update(update_data).eq('id', disk_id).execute()
+        update_data = _disk_payload(name, total_capacity_gb, contents)
+        response = self._table('disks').update(update_data).eq('id', disk_id).execute()
         
         if response.data:
             return Disk.from_dict(response.data[0])
         return None
 
+    @metrics.timed("supabase.delete_disk")
     def delete_disk(self, disk_id: str) -> bool:
-        response = self.client.table('disks').delete().eq('id', disk_id).execute()
+        response = self._table('disks').delete().eq('id', disk_id).execute()
         return bool(response.data)
 
+    @metrics.timed("supabase.filter_disks")
     def filter_disks(self, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None) -> List[Disk]:
-        disks = self.get_all_disks()
+        # Filters run in Postgres (see supabase/migrations): trigram-indexed ilike on the
+        # name and on contents_search, plus a range predicate on the generated free_space_gb
+        query = self._table('disks').select(DISK_COLUMNS)
 
         if name_query:
-            disks = [d for d in disks if name_query.lower() in d.name.lower()]
+            query = query.ilike('name', _ilike_pattern(name_query))
 
         if content_query:
-            # Search query in the description of each content item
-            disks = [d for d in disks if any(content_query.lower() in item.description.lower() for item in d.contents)]
+            query = query.ilike('contents_search', _ilike_pattern(content_query))
 
         if min_free_gb is not None:
-            disks = [d for d in disks if d.free_space_gb >= min_free_gb]
+            query = query.gte('free_space_gb', min_free_gb)
+
+        response = query.execute()
+        return _to_disks(response.data or [])
 
-        return disks
+# Variables importantes:
+# - DISK_COLUMNS: Columnas que se piden en las lecturas.
+# - client: Cliente de Supabase, creado en la primera petición (supabase_credentials() lee el .env en ese momento).
+# - WRITE_CHUNK_SIZE: Filas por petición en add_disks, upsert_disks y delete_disks.
+# - ROW_ERROR_SQLSTATE_CLASSES, ROW_ERROR_HTTP_STATUSES: Errores por fila; solo ellos hacen dividir un lote para aislar las filas culpables.
+# Métodos importantes:
+# - add_disks(), upsert_disks(), delete_disks(): Escrituras de varias filas por petición con fallos por fila (BatchResult).
+# - get_disk_summaries(): Listado sin contents (en orden de alta); los contenidos se cargan por disco bajo demanda.
+# - get_changes(): Filas modificadas y tombstones posteriores a una marca de tiempo (sincronización incremental).
+# - update_disk_if_version(), delete_disk_if_version(): Escrituras que solo se aplican si updated_at no ha cambiado (conflictos de la cola offline).
+# - _table(): Tabla de postgrest con los hooks que cuentan los bytes de cada petición (services/metrics.py).
+# - Cada método público se mide con metrics.timed("supabase.<método>"); Disk.from_dict con "model.from_dict".
+# - filter_disks(): Filtrado resuelto en Postgres (ilike con índices de trigramas y rango sobre free_space_gb).
@@ -0,0 +1,258 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from core.models import Disk, ContentItem
+from core.repository import DiskRepository
+from services.disk_service import DiskService
+
+# Margen que se vuelve a pedir en cada sincronización: una transacción que empezó antes de
+# la última lectura puede confirmar después con un updated_at anterior a la marca de agua
+SYNC_OVERLAP_S = 30.0
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+class SyncStats(NamedTuple):
+    full: bool
+    fetched_rows: int
+    fetched_tombstones: int
+    changed: List[Disk]  # Discos nuevos o modificados aplicados a la réplica
+    removed: List[str]  # Ids borrados de la réplica
+    elapsed_s: float
+
+    @property
+    def upserted(self) -> int:
+        return len(self.changed)
+
+    @property
+    def deleted(self) -> int:
+        return len(self.removed)
+
+class SyncEngine(DiskRepository):
+    """
+    Keeps an in-memory replica (a DiskService) of the Supabase catalog and
+    refreshes it with deltas: only disks whose updated_at is newer than the last
+    watermark, plus tombstones of deleted disks, are downloaded. Reads and
+    filters are answered from the replica; writes go to Supabase first and are
+    then applied to the replica.
+    """
+
+    def __init__(self, remote, overlap_s: float = SYNC_OVERLAP_S,
+                 clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
+        self._remote = remote  # SupabaseService (o cualquier backend con get_changes)
+        self._clock = clock
+        self._replica = DiskService()
+        self._versions: Dict[str, Optional[datetime]] = {}  # disk_id -> updated_at aplicado
+        self._watermark: Optional[datetime] = None
+        self.overlap_s = overlap_s
+        self.last_stats: Optional[SyncStats] = None
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        return self._watermark
+
+    def version(self, disk_id: str) -> Optional[str]:
+        """updated_at (ISO) of the replica's copy of a disk; None if it is not in the replica or not synced yet."""
+        with self._lock:
+            updated_at = self._versions.get(disk_id)
+        return updated_at.isoformat() if updated_at else None
+
+    def sync(self) -> SyncStats:
+        # Dos sincronizaciones simultáneas harían el mismo trabajo: la segunda espera a la primera
+        with self._sync_lock:
+            start = time.perf_counter()
+            watermark = self._watermark
+            since = (watermark - timedelta(seconds=self.overlap_s)).isoformat() if watermark else None
+            rows, tombstones = self._remote.get_changes(since)
+
+            with self._lock:
+                if watermark is None:
+                    changed, removed = self._load_full(rows), []
+                else:
+                    changed = self._merge_rows(rows)
+                    removed = self._merge_tombstones(tombstones)
+                self._advance_watermark([row["updated_at"] for row in rows] + [row["deleted_at"] for row in tombstones])
+                if self._watermark is None:
+                    # Catálogo remoto vacío: sin marca de agua cada sincronización sería completa y nunca
+                    # leería tombstones. Se parte de la hora actual menos el margen (tolera ese desfase de reloj)
+                    self._watermark = self._clock() - timedelta(seconds=self.overlap_s)
+
+            self.last_stats = SyncStats(
+                full=watermark is None,
+                fetched_rows=len(rows),
+                fetched_tombstones=len(tombstones),
+                changed=changed,
+                removed=removed,
+                elapsed_s=time.perf_counter() - start,
+            )
+            return self.last_stats
+
+    def apply_change(self, event_type: str, record: Optional[dict], old_record: Optional[dict] = None) -> Tuple[List[Disk], List[str]]:
+        """
+        Applies one change pushed by Supabase Realtime (INSERT, UPDATE or DELETE on
+        disks) and returns (changed disks, removed ids). Events arrive in commit
+        order, so the watermark advances with them and a reconnect only has to
+        sync what happened while the channel was down.
+        """
+        with self._lock:
+            if event_type == "DELETE":
+                disk_id = (old_record or {}).get("id")
+                if disk_id is None or disk_id not in self._versions:
+                    return [], []
+                del self._versions[disk_id]
+                return [], self._replica.delete_disks([disk_id])
+            changed = self._merge_rows([record])
+            self._advance_watermark([record["updated_at"]])
+            return changed, []
+
+    def _advance_watermark(self, timestamps: List[str]):
+        stamps = [_parse_timestamp(value) for value in timestamps]
+        if self._watermark is not None:
+            stamps.append(self._watermark)
+        if stamps:
+            self._watermark = max(stamps)
+
+    def _load_full(self, rows: List[dict]) -> List[Disk]:
+        replica = DiskService()
+        disks = replica.add_disks([Disk.from_dict(row) for row in rows])
+        self._replica = replica
+        self._versions = {row["id"]: _parse_timestamp(row["updated_at"]) for row in rows}
+        return disks
+
+    def _merge_rows(self, rows: List[dict]) -> List[Disk]:
+        # Las filas ya aplicadas (margen de solapamiento, eventos de Realtime) se descartan comparando updated_at
+        changed = []
+        for row in rows:
+            updated_at = _parse_timestamp(row["updated_at"])
+            current = self._versions.get(row["id"])
+            if current is None or updated_at > current:
+                changed.append(Disk.from_dict(row))
+                self._versions[row["id"]] = updated_at
+        return self._replica.upsert_disks(changed) if changed else []
+
+    def _merge_tombstones(self, tombstones: List[dict]) -> List[str]:
+        gone = []
+        for tombstone in tombstones:
+            disk_id = tombstone["id"]
+            if disk_id not in self._versions:
+                continue
+            version = self._versions[disk_id]
+            # Si el disco se volvió a escribir después del borrado, gana la versión más reciente
+            if version is None or version <= _parse_timestamp(tombstone["deleted_at"]):
+                gone.append(disk_id)
+                del self._versions[disk_id]
+        return self._replica.delete_disks(gone) if gone else []
+
+    def _ensure_synced(self):
+        if self._watermark is None and self.last_stats is None:
+            self.sync()
+
+    def _apply_local(self, disks: List[Disk], versions: Optional[Dict[str, str]] = None):
+        # Escrituras propias con el updated_at que devolvió el servidor; las escrituras por lotes
+        # (return=minimal) no lo conocen y su versión exacta llega en la siguiente sincronización
+        with self._lock:
+            applied = []
+            for disk in disks:
+                version = _parse_timestamp(versions[disk.id]) if versions and disk.id in versions else None
+                current = self._versions.get(disk.id)
+                if version is not None and current is not None and current > version:
+                    continue  # Realtime ya trajo una escritura posterior a la nuestra
+                self._versions[disk.id] = version
+                applied.append(disk)
+            self._replica.upsert_disks(applied)
+
+    def _forget_local(self, disk_ids: List[str]):
+        with self._lock:
+            self._replica.delete_disks(disk_ids)
+            for disk_id in disk_ids:
+                self._versions.pop(disk_id, None)
+
+    # --- DiskRepository ---
+
+    def refresh(self):
+        self.sync()
+
+    def add_disk(self, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        disk = self._remote.add_disk(name, total_capacity_gb, contents)
+        if disk:
+            self._apply_local([disk])
+        return disk
+
+    def add_disks(self, disks: List[Disk]) -> List[Disk]:
+        stored = self._remote.add_disks(disks)
+        self._apply_local(list(stored))
+        return stored
+
+    def upsert_disks(self, disks: List[Disk]) -> List[Disk]:
+        stored = self._remote.upsert_disks(disks)
+        self._apply_local(list(stored))
+        return stored
+
+    def get_all_disks(self) -> List[Disk]:
+        self._ensure_synced()
+        with self._lock:
+            return self._replica.get_all_disks()
+
+    def iter_disks(self, page_size: int = 1000) -> Iterator[Disk]:
+        return iter(self.get_all_disks())
+
+    def get_disk_by_id(self, disk_id: str) -> Optional[Disk]:
+        self._ensure_synced()
+        with self._lock:
+            return self._replica.get_disk_by_id(disk_id)
+
+    def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        disk = self._remote.update_disk(disk_id, name, total_capacity_gb, contents)
+        if disk:
+            self._apply_local([disk])
+        return disk
+
+    def delete_disk(self, disk_id: str) -> bool:
+        deleted = self._remote.delete_disk(disk_id)
+        self._forget_local([disk_id])
+        return deleted
+
+    def delete_disks(self, disk_ids: List[str]) -> List[str]:
+        deleted = self._remote.delete_disks(disk_ids)
+        self._forget_local(list(deleted))
+        return deleted
+
+    def update_disk_if_version(self, disk: Disk, base_version: str) -> Optional[str]:
+        """Conditional write (see SupabaseService.update_disk_if_version); the replica keeps the new updated_at."""
+        version = self._remote.update_disk_if_version(disk, base_version)
+        if version is not None:
+            self._apply_local([disk], {disk.id: version})
+        return version
+
+    def delete_disk_if_version(self, disk_id: str, base_version: str) -> bool:
+        deleted = self._remote.delete_disk_if_version(disk_id, base_version)
+        if deleted:
+            self._forget_local([disk_id])
+        return deleted
+
+    def filter_disks(self, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None) -> List[Disk]:
+        # La réplica tiene todo el catálogo (con índice de contenidos), así que filtrar no usa la red
+        self._ensure_synced()
+        with self._lock:
+            return self._replica.filter_disks(name_query, content_query, min_free_gb)
+
+    def sorted_disks(self, key: str, descending: bool = False, offset: int = 0, limit: Optional[int] = None) -> List[Disk]:
+        # Índices ordenados de la réplica: O(log n + k) sin tocar la red
+        self._ensure_synced()
+        with self._lock:
+            return self._replica.sorted_disks(key, descending, offset, limit)
+
+# Variables importantes:
+# - _replica: DiskService en memoria con la copia local del catálogo.
+# - _versions, _watermark: updated_at aplicado por disco y el mayor visto (marca de agua de la sincronización).
+# - SYNC_OVERLAP_S: Margen que se vuelve a pedir para no perder transacciones confirmadas tarde.
+# - _clock: Hora actual (UTC); da la marca de agua inicial cuando el catálogo remoto está vacío.
+# Métodos importantes:
+# - version(): updated_at de la copia local de un disco (la cola de escrituras lo usa para detectar conflictos).
+# - sync() / refresh(): Descarga solo los cambios y tombstones desde la marca de agua y los fusiona en la réplica.
+# - apply_change(): Aplica un evento de Supabase Realtime (ver services/realtime_service.py).
+# - update_disk_if_version(), delete_disk_if_version(): Escrituras condicionales de la cola offline; guardan la versión nueva en _versions.
+# - Lecturas, filter_disks() y sorted_disks(): Se resuelven en la réplica; las escrituras van a Supabase y luego a la réplica.
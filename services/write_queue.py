@@ -0,0 +1,474 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from core.filters import DiskFilter
+from core.models import Disk, ContentItem
+from core.repository import DiskRepository, RowFailure, backend_errors
+from services.metrics import metrics
+
+DEFAULT_QUEUE_PATH = os.environ.get("DISK_QUEUE_PATH", os.path.join(os.path.expanduser("~"), ".gestor_discos", "write_queue.db"))
+# Operaciones (discos distintos) que se envían por vaciado
+FLUSH_BATCH_SIZE = 500
+# Espera tras la primera escritura para agrupar en un mismo lote las que llegan seguidas
+FLUSH_DELAY_S = 0.5
+# Reintentos tras un fallo de red: BACKOFF_BASE_S * 2^n con jitter, hasta BACKOFF_MAX_S
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 60.0
+# Una fila que el servidor rechaza (mientras las demás sí se escriben) se aparta tras estos intentos
+MAX_ROW_ATTEMPTS = 3
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+MIGRATIONS = [
+    """
+    CREATE TABLE pending_ops (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        disk_id TEXT NOT NULL,
+        op TEXT NOT NULL,
+        payload TEXT,
+        base_version TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX idx_pending_ops_disk ON pending_ops(disk_id);
+    CREATE TABLE rejected_ops (
+        seq INTEGER PRIMARY KEY,
+        disk_id TEXT NOT NULL,
+        op TEXT NOT NULL,
+        payload TEXT,
+        base_version TEXT,
+        remote_version TEXT,
+        reason TEXT NOT NULL,
+        rejected_at REAL NOT NULL
+    );
+    """,
+]
+
+class PendingOp:
+    """Latest queued operation of one disk (several saves of the same disk collapse into one)."""
+    __slots__ = ("disk_id", "op", "disk", "base_version", "seqs", "attempts")
+
+    def __init__(self, disk_id: str, op: str, disk: Optional[Disk], base_version: Optional[str]):
+        self.disk_id = disk_id
+        self.op = op
+        self.disk = disk  # Estado que se enviará (None en los borrados)
+        self.base_version = base_version  # updated_at remoto sobre el que se hizo el cambio (None = sin comprobar)
+        self.seqs: List[int] = []  # Filas del diario que representa
+        self.attempts = 0
+
+class RejectedOp(NamedTuple):
+    seq: int
+    disk_id: str
+    op: str
+    disk: Optional[Disk]
+    base_version: Optional[str]
+    remote_version: Optional[str]
+    reason: str  # "conflict" o el error del servidor
+
+    @property
+    def is_conflict(self) -> bool:
+        return self.reason == "conflict"
+
+class FlushResult(NamedTuple):
+    flushed: List[str]  # Ids escritos (o borrados) en el servidor
+    rejected: List[RejectedOp]  # Conflictos y filas rechazadas en este vaciado
+    error: Optional[str]  # Fallo de red: el lote entero se reintentará
+    pending: int  # Operaciones que siguen en la cola
+
+class OfflineWriteQueue(DiskRepository):
+    """
+    Offline-first writes in front of a remote DiskRepository (normally the
+    SyncEngine over Supabase). add/update/delete are written to a local SQLite
+    journal and answered at once (ids are generated in the client), and reads
+    see the queued changes on top of the remote data. A background thread
+    flushes the journal with batched upsert_disks/delete_disks, retrying with
+    exponential backoff while the server is unreachable.
+
+    When the remote exposes version(disk_id) (SyncEngine), every change records
+    the version it was based on and is sent with update_disk_if_version or
+    delete_disk_if_version, which only write while the server still has that
+    version. If the disk changed on the server in between, nothing is written
+    and the change is moved to rejected_ops, so nothing is lost and resolve()
+    can still apply or discard it.
+    """
+
+    def __init__(self, remote: DiskRepository, path: str = DEFAULT_QUEUE_PATH, batch_size: int = FLUSH_BATCH_SIZE,
+                 flush_delay_s: float = FLUSH_DELAY_S, on_flush: Optional[Callable[[FlushResult], None]] = None,
+                 autostart: bool = True):
+        self.remote = remote
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_delay_s = flush_delay_s
+        self.on_flush = on_flush  # Se llama desde el hilo de vaciado
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, PendingOp] = {}  # disk_id -> operación pendiente, en orden de llegada
+        self._wake = threading.Event()
+        self._closed = False
+        self._failures = 0  # Vaciados seguidos que han fallado por la red
+        self._retry_at = 0.0
+        self.last_error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._migrate()
+        self._load_pending()
+        if autostart:
+            self.start()
+
+    def _migrate(self):
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for index, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                with self._conn:
+                    self._conn.executescript(script)
+                    self._conn.execute(f"PRAGMA user_version = {index}")
+
+    def _load_pending(self):
+        # Lo que quedó sin enviar en la sesión anterior se vuelve a encolar
+        rows = self._conn.execute(
+            "SELECT seq, disk_id, op, payload, base_version, attempts FROM pending_ops ORDER BY seq"
+        ).fetchall()
+        for seq, disk_id, op, payload, base_version, attempts in rows:
+            entry = self._track(disk_id, op, _decode(payload), base_version, seq)
+            entry.attempts = max(entry.attempts, attempts)
+
+    # --- Diario ---
+
+    def _track(self, disk_id: str, op: str, disk: Optional[Disk], base_version: Optional[str], seq: int) -> PendingOp:
+        entry = self._pending.get(disk_id)
+        if entry is None:
+            entry = self._pending[disk_id] = PendingOp(disk_id, op, disk, base_version)
+        else:
+            # Se conserva la versión base del primer cambio: es la que tenía el servidor
+            entry.op = op
+            entry.disk = disk
+        entry.seqs.append(seq)
+        return entry
+
+    @metrics.timed("queue.enqueue")
+    def _enqueue(self, op: str, disk_id: str, disk: Optional[Disk], base_version: Optional[str] = None) -> PendingOp:
+        payload = json.dumps(disk.to_dict()) if disk is not None else None
+        with self._lock:
+            entry = self._pending.get(disk_id)
+            if entry is not None:
+                base_version = entry.base_version
+            with self._conn:
+                seq = self._conn.execute(
+                    "INSERT INTO pending_ops (disk_id, op, payload, base_version, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (disk_id, op, payload, base_version, time.time()),
+                ).lastrowid
+            entry = self._track(disk_id, op, disk, base_version, seq)
+        self._wake.set()
+        return entry
+
+    def _remote_version(self, disk_id: str) -> Optional[str]:
+        version = getattr(self.remote, "version", None)
+        return version(disk_id) if version else None
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def has_pending(self, disk_id: str) -> bool:
+        with self._lock:
+            return disk_id in self._pending
+
+    def rejected(self) -> List[RejectedOp]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, disk_id, op, payload, base_version, remote_version, reason FROM rejected_ops ORDER BY seq"
+            ).fetchall()
+        return [RejectedOp(seq, disk_id, op, _decode(payload), base, remote, reason)
+                for seq, disk_id, op, payload, base, remote, reason in rows]
+
+    def resolve(self, disk_id: str, keep_local: bool):
+        """Applies (keep_local=True, overwriting the server) or discards the rejected change of a disk."""
+        latest = [op for op in self.rejected() if op.disk_id == disk_id]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM rejected_ops WHERE disk_id = ?", (disk_id,))
+        if keep_local and latest:
+            last = latest[-1]
+            self._enqueue(last.op, disk_id, last.disk, base_version=None)
+
+    # --- Vaciado en segundo plano ---
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-queue-flush", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        # Lo pendiente sigue en el diario y se envía en la próxima sesión
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+        with self._lock:
+            self._conn.close()
+
+    def _run(self):
+        while not self._closed:
+            delay = max(0.0, self._retry_at - time.monotonic()) if self.pending_count else None
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._closed:
+                return
+            if not self.pending_count or time.monotonic() < self._retry_at:
+                continue  # Escritura nueva durante la espera tras un fallo: se respeta el backoff
+            time.sleep(self.flush_delay_s)
+            try:
+                self.flush()
+            except Exception as error:
+                # El hilo no debe morir: el fallo queda como error de red y se reintenta
+                self._schedule_retry(str(error))
+
+    def _schedule_retry(self, error: str):
+        self._failures += 1
+        delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (self._failures - 1))
+        self._retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+        self.last_error = error
+
+    def flush(self) -> FlushResult:
+        """Sends one batch of queued operations; safe to call from any thread."""
+        with self._flush_lock, metrics.timer("queue.flush") as measurement:
+            with self._lock:
+                # Se copia la operación de cada disco: un guardado que llegue durante el envío no se mezcla con este lote
+                batch = [(entry, len(entry.seqs), entry.op, entry.disk) for entry in list(self._pending.values())[:self.batch_size]]
+            if not batch:
+                return FlushResult([], [], None, 0)
+            measurement.rows = len(batch)
+            try:
+                result = self._send(batch)
+            except Exception as error:
+                self._schedule_retry(str(error))
+                result = FlushResult([], [], str(error), self.pending_count)
+        if self.on_flush is not None:
+            self.on_flush(result)
+        return result
+
+    def _send_conditional(self, batch: List[tuple], failures: Dict[str, RowFailure],
+                          versions: Dict[str, str]) -> Tuple[List[tuple], List[tuple]]:
+        """
+        Sends the operations that carry a base version one by one, each written
+        only if the server still has that version. Returns (sent, conflicts); row
+        failures go to `failures` and the new updated_at of each write to `versions`.
+        """
+        sent, conflicts = [], []
+        transport_error = None
+        for index, (entry, count, op, disk) in enumerate(batch):
+            if transport_error is not None:
+                # Sin red no tiene sentido esperar el timeout de cada fila restante
+                failures[entry.disk_id] = RowFailure(index, entry.disk_id, transport_error, transport=True)
+                sent.append((entry, count, op, disk))
+                continue
+            try:
+                if op == UPSERT:
+                    version = self.remote.update_disk_if_version(disk, entry.base_version)
+                    written = version is not None
+                else:
+                    version, written = None, self.remote.delete_disk_if_version(entry.disk_id, entry.base_version)
+            except backend_errors() as error:
+                import httpx
+                transport = isinstance(error, httpx.HTTPError)
+                message = getattr(error, "message", None) or str(error)
+                failures[entry.disk_id] = RowFailure(index, entry.disk_id, message, transport=transport)
+                transport_error = message if transport else None
+                sent.append((entry, count, op, disk))
+                continue
+            if not written:
+                # Ninguna fila tenía ya base_version: el disco cambió (o se borró) en el servidor
+                conflicts.append((entry, count, op, disk))
+                continue
+            if version is not None:
+                versions[entry.disk_id] = version
+            sent.append((entry, count, op, disk))
+        return sent, conflicts
+
+    def _send(self, batch: List[tuple]) -> FlushResult:
+        rejected = []
+        failures: Dict[str, RowFailure] = {}
+        versions: Dict[str, str] = {}  # disk_id -> updated_at que devolvió la escritura condicional
+        outgoing, conflicts = self._send_conditional(
+            [item for item in batch if item[0].base_version is not None], failures, versions
+        )
+        if conflicts:
+            try:
+                # Se trae lo último del servidor para mostrar su versión junto al conflicto
+                self.remote.refresh()
+            except backend_errors():
+                pass  # El conflicto se registra con la versión que ya tenía la réplica
+            for entry, count, op, disk in conflicts:
+                rejected.append(self._reject(entry, count, op, disk, "conflict", self._remote_version(entry.disk_id)))
+
+        unconditional = [item for item in batch if item[0].base_version is None]
+        outgoing.extend(unconditional)
+        upserts = [disk for _, _, op, disk in unconditional if op == UPSERT]
+        deletes = [entry.disk_id for entry, _, op, _ in unconditional if op == DELETE]
+        if upserts:
+            stored = self.remote.upsert_disks(upserts)
+            failures.update((failure.disk_id, failure) for failure in getattr(stored, "failures", []))
+        if deletes:
+            deleted = self.remote.delete_disks(deletes)
+            failures.update((failure.disk_id, failure) for failure in getattr(deleted, "failures", []))
+
+        # Fallos de red: esas filas no llegaron al servidor, así que no cuentan como intento
+        transport_error = next((failure.error for failure in failures.values() if failure.transport), None)
+        if outgoing and len(failures) == len(outgoing) and all(failure.transport for failure in failures.values()):
+            # Nada ha llegado al servidor: se trata como caída de la red y se reintenta el lote entero
+            self._schedule_retry(transport_error)
+            return FlushResult([], rejected, transport_error, self.pending_count)
+
+        flushed = []
+        for entry, count, op, disk in outgoing:
+            failure = failures.get(entry.disk_id)
+            if failure is None:
+                self._complete(entry, count, versions.get(entry.disk_id))
+                flushed.append(entry.disk_id)
+            elif not failure.transport:
+                # El servidor rechazó la fila: tras MAX_ROW_ATTEMPTS se aparta en rejected_ops
+                error = failure.error
+                entry.attempts += 1
+                with self._lock, self._conn:
+                    self._conn.execute("UPDATE pending_ops SET attempts = ?, last_error = ? WHERE disk_id = ?",
+                                       (entry.attempts, error, entry.disk_id))
+                if entry.attempts >= MAX_ROW_ATTEMPTS:
+                    rejected.append(self._reject(entry, count, op, disk, error, None))
+        if transport_error is not None:
+            # Parte del lote se perdió por la red: se reintenta con backoff
+            self._schedule_retry(transport_error)
+        else:
+            self._failures = 0
+            self._retry_at = 0.0
+            self.last_error = None
+        return FlushResult(flushed, rejected, transport_error, self.pending_count)
+
+    def _complete(self, entry: PendingOp, count: int, version: Optional[str] = None):
+        # Solo se borran las filas enviadas: un guardado que llegó durante el envío sigue en la cola
+        with self._lock, self._conn:
+            sent = entry.seqs[:count]
+            self._conn.executemany("DELETE FROM pending_ops WHERE seq = ?", [(seq,) for seq in sent])
+            del entry.seqs[:count]
+            if not entry.seqs:
+                self._pending.pop(entry.disk_id, None)
+            else:
+                # Lo que queda se hizo sobre nuestra propia escritura: su versión es la que devolvió el
+                # servidor (None si se escribió sin condición y aún no se conoce)
+                entry.base_version = version
+                self._conn.execute("UPDATE pending_ops SET base_version = ? WHERE disk_id = ?", (version, entry.disk_id))
+
+    def _reject(self, entry: PendingOp, count: int, op: str, disk: Optional[Disk], reason: str,
+                remote_version: Optional[str]) -> RejectedOp:
+        with self._lock, self._conn:
+            seq = entry.seqs[count - 1]
+            payload = json.dumps(disk.to_dict()) if disk is not None else None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rejected_ops (seq, disk_id, op, payload, base_version, remote_version, reason, rejected_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (seq, entry.disk_id, op, payload, entry.base_version, remote_version, reason, time.time()),
+            )
+            self._conn.executemany("DELETE FROM pending_ops WHERE seq = ?", [(seq,) for seq in entry.seqs[:count]])
+            del entry.seqs[:count]
+            if not entry.seqs:
+                self._pending.pop(entry.disk_id, None)
+        return RejectedOp(seq, entry.disk_id, op, disk, entry.base_version, remote_version, reason)
+
+    # --- Lecturas con los cambios pendientes aplicados ---
+
+    def _overlay(self, disks: List[Disk], disk_filter: Optional[DiskFilter] = None) -> List[Disk]:
+        with self._lock:
+            if not self._pending:
+                return disks
+            pending = dict(self._pending)
+        merged = [disk for disk in disks if disk.id not in pending]
+        for entry in pending.values():
+            if entry.op == UPSERT and (disk_filter is None or disk_filter.matches(entry.disk)):
+                merged.append(entry.disk)
+        return merged
+
+    def get_all_disks(self) -> List[Disk]:
+        return self._overlay(self.remote.get_all_disks())
+
+    def get_disk_summaries(self) -> List[Disk]:
+        return self._overlay(self.remote.get_disk_summaries())
+
+    def iter_disks(self, page_size: int = 1000) -> Iterator[Disk]:
+        return iter(self._overlay(list(self.remote.iter_disks(page_size))))
+
+    def get_disk_by_id(self, disk_id: str) -> Optional[Disk]:
+        with self._lock:
+            entry = self._pending.get(disk_id)
+        if entry is not None:
+            return entry.disk
+        return self.remote.get_disk_by_id(disk_id)
+
+    def filter_disks(self, name_query: str = "", content_query: str = "", min_free_gb: Optional[int] = None) -> List[Disk]:
+        disk_filter = DiskFilter(name_query, content_query, min_free_gb)
+        return self._overlay(self.remote.filter_disks(name_query, content_query, min_free_gb), disk_filter)
+
+    def sorted_disks(self, key: str, descending: bool = False, offset: int = 0, limit: Optional[int] = None) -> List[Disk]:
+        # Sin cambios pendientes se usan los índices del backend; con ellos hay que ordenar el listado combinado
+        if not self.pending_count:
+            return self.remote.sorted_disks(key, descending, offset, limit)
+        return super().sorted_disks(key, descending, offset, limit)
+
+    def refresh(self):
+        self.remote.refresh()
+
+    # --- Escrituras (solo diario local) ---
+
+    def add_disk(self, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        disk = Disk(str(uuid.uuid4()), name, total_capacity_gb, list(contents))
+        self._enqueue(UPSERT, disk.id, disk)
+        return disk
+
+    def add_disks(self, disks: List[Disk]) -> List[Disk]:
+        return self.upsert_disks([Disk(disk.id or str(uuid.uuid4()), disk.name, disk.total_capacity_gb, disk.contents) for disk in disks])
+
+    def upsert_disks(self, disks: List[Disk]) -> List[Disk]:
+        for disk in disks:
+            self._enqueue(UPSERT, disk.id, disk, self._remote_version(disk.id))
+        return list(disks)
+
+    def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]) -> Optional[Disk]:
+        disk = Disk(disk_id, name, total_capacity_gb, list(contents))
+        self._enqueue(UPSERT, disk_id, disk, self._remote_version(disk_id))
+        return disk
+
+    def delete_disk(self, disk_id: str) -> bool:
+        self._enqueue(DELETE, disk_id, None, self._remote_version(disk_id))
+        return True
+
+    def delete_disks(self, disk_ids: List[str]) -> List[str]:
+        for disk_id in disk_ids:
+            self.delete_disk(disk_id)
+        return list(disk_ids)
+
+def _decode(payload: Optional[str]) -> Optional[Disk]:
+    return Disk.from_dict(json.loads(payload)) if payload else None
+
+# Variables importantes:
+# - DEFAULT_QUEUE_PATH: Diario SQLite de escrituras pendientes (configurable con DISK_QUEUE_PATH).
+# - pending_ops, rejected_ops: Operaciones por enviar y las apartadas por conflicto o rechazo del servidor.
+# - _pending: Última operación pendiente por disco (los guardados repetidos de un disco se agrupan).
+# - FLUSH_BATCH_SIZE, FLUSH_DELAY_S, BACKOFF_BASE_S, BACKOFF_MAX_S, MAX_ROW_ATTEMPTS: Lotes, agrupación y reintentos.
+# Métodos importantes:
+# - add_disk(), update_disk(), delete_disk(): Escriben en el diario y devuelven al momento (ids generados en el cliente).
+# - Lecturas: Datos del backend remoto con los cambios pendientes aplicados encima.
+# - flush(): Envía un lote (escrituras condicionales por disco si hay versión base, upsert_disks/delete_disks si no); sin red programa un reintento con backoff exponencial.
+# - rejected(), resolve(): Cambios en conflicto (el disco cambió en el servidor) para aplicarlos o descartarlos.
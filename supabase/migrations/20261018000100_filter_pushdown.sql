@@ -0,0 +1,23 @@
+-- Columnas calculadas e índices para que SupabaseService.filter_disks filtre en el servidor.
+
+create extension if not exists pg_trgm;
+
+-- Descripciones de todos los ContentItem en minúsculas, separadas por saltos de línea
+create or replace function public.disk_contents_text(contents jsonb)
+returns text
+language sql
+immutable
+as $$
+    select coalesce(string_agg(lower(item->>'description'), E'\n'), '')
+    from jsonb_array_elements(coalesce(contents, '[]'::jsonb)) as item
+$$;
+
+alter table public.disks
+    add column if not exists free_space_gb numeric
+        generated always as (total_capacity_gb - used_space_gb) stored,
+    add column if not exists contents_search text
+        generated always as (public.disk_contents_text(contents)) stored;
+
+create index if not exists disks_name_trgm_idx on public.disks using gin (name gin_trgm_ops);
+create index if not exists disks_contents_search_trgm_idx on public.disks using gin (contents_search gin_trgm_ops);
+create index if not exists disks_free_space_gb_idx on public.disks (free_space_gb);
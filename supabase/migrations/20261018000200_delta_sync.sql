@@ -0,0 +1,54 @@
+-- Marcas de tiempo y tombstones para que SyncEngine solo descargue los cambios desde la última sincronización.
+
+alter table public.disks
+    add column if not exists updated_at timestamptz not null default now();
+
+create index if not exists disks_updated_at_idx on public.disks (updated_at);
+
+create or replace function public.touch_disk_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := clock_timestamp();
+    return new;
+end;
+$$;
+
+drop trigger if exists disks_touch_updated_at on public.disks;
+create trigger disks_touch_updated_at
+    before insert or update on public.disks
+    for each row execute function public.touch_disk_updated_at();
+
+-- Un tombstone por disco borrado; se elimina si el id vuelve a insertarse
+create table if not exists public.disk_tombstones (
+    id uuid primary key,
+    deleted_at timestamptz not null default clock_timestamp()
+);
+
+create index if not exists disk_tombstones_deleted_at_idx on public.disk_tombstones (deleted_at);
+
+create or replace function public.record_disk_tombstone()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'DELETE' then
+        insert into public.disk_tombstones (id) values (old.id)
+        on conflict (id) do update set deleted_at = excluded.deleted_at;
+        return old;
+    end if;
+    delete from public.disk_tombstones where id = new.id;
+    return new;
+end;
+$$;
+
+drop trigger if exists disks_record_tombstone on public.disks;
+create trigger disks_record_tombstone
+    after insert or delete on public.disks
+    for each row execute function public.record_disk_tombstone();
+
+alter table public.disk_tombstones enable row level security;
+
+drop policy if exists "disk_tombstones_read" on public.disk_tombstones;
+create policy "disk_tombstones_read" on public.disk_tombstones for select using (true);
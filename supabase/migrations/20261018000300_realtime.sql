@@ -0,0 +1,12 @@
+-- Publica los cambios de disks en Supabase Realtime (postgres_changes) para que HomeView se actualice en vivo.
+
+do $$
+begin
+    if not exists (
+        select 1 from pg_publication_tables
+        where pubname = 'supabase_realtime' and schemaname = 'public' and tablename = 'disks'
+    ) then
+        alter publication supabase_realtime add table public.disks;
+    end if;
+end;
+$$;
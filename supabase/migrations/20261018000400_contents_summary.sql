@@ -0,0 +1,15 @@
+-- Resumen de contenidos precalculado para que el listado de tarjetas no descargue la columna contents.
+
+-- Primeros 40 caracteres de las descripciones, en el orden de la lista y separadas por ", "
+create or replace function public.disk_contents_summary(contents jsonb)
+returns text
+language sql
+immutable
+as $$
+    select left(coalesce(string_agg(item->>'description', ', ' order by position), ''), 40)
+    from jsonb_array_elements(coalesce(contents, '[]'::jsonb)) with ordinality as t(item, position)
+$$;
+
+alter table public.disks
+    add column if not exists contents_summary text
+        generated always as (public.disk_contents_summary(contents)) stored;
@@ -0,0 +1,24 @@
+-- record_disk_tombstone() se ejecuta con el rol de quien borra (anon/authenticated) y RLS solo permite
+-- leer disk_tombstones: el insert del tombstone fallaba y deshacía el borrado del disco, y el delete al
+-- reinsertar un id se filtraba sin error. Con security definer el trigger escribe como propietario de la
+-- tabla, que sigue siendo de solo lectura para los clientes.
+
+create or replace function public.record_disk_tombstone()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op = 'DELETE' then
+        insert into public.disk_tombstones (id) values (old.id)
+        on conflict (id) do update set deleted_at = excluded.deleted_at;
+        return old;
+    end if;
+    delete from public.disk_tombstones where id = new.id;
+    return new;
+end;
+$$;
+
+-- Solo el trigger debe ejecutarla
+revoke execute on function public.record_disk_tombstone() from public, anon, authenticated;
@@ -0,0 +1,18 @@
+-- Orden del listado de tarjetas y columnas para ordenar en el servidor (sorted_disks).
+
+-- Orden de alta, como en los backends locales (rowid en SQLite, inserción en memoria). Las filas que ya
+-- existían reciben la hora de la migración y quedan ordenadas entre sí por id.
+alter table public.disks
+    add column if not exists created_at timestamptz not null default now();
+
+create index if not exists disks_created_at_idx on public.disks (created_at, id);
+
+-- Mismo cálculo que Disk.usage_percentage (0 con capacidad 0), para ORDER BY sobre columna indexada
+alter table public.disks
+    add column if not exists usage_percentage numeric
+        generated always as (
+            case when total_capacity_gb > 0 then used_space_gb * 100.0 / total_capacity_gb else 0 end
+        ) stored;
+
+create index if not exists disks_usage_percentage_idx on public.disks (usage_percentage);
+create index if not exists disks_total_capacity_gb_idx on public.disks (total_capacity_gb);
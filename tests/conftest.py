@@ -0,0 +1,34 @@
+import pytest
+from core.database import SQLiteService
+from core.models import ContentItem, Disk
+from services.disk_service import DiskService
+
+def _sample_disks():
+    return [
+        Disk("d1", "Películas HD", 1000, [ContentItem("Películas/Matrix.mkv", 40), ContentItem("Series/Dark s01", 120)]),
+        Disk("d2", "Backup Fotos", 500, [ContentItem("Fotos 2020", 300), ContentItem("fotos_2021", 150)]),
+        Disk("d3", "USB vacío", 64, []),
+        Disk("d4", "Juegos 100%", 2000, [ContentItem("Juegos/Zelda", 60.5), ContentItem("Backups/juegos.zip", 900)]),
+    ]
+
+@pytest.fixture
+def sample_disks():
+    """Factory of a small catalog with accents, mixed case and LIKE wildcards in the texts."""
+    return _sample_disks
+
+@pytest.fixture
+def sqlite_service():
+    service = SQLiteService(":memory:")
+    yield service
+    service.close()
+
+@pytest.fixture
+def memory_service():
+    return DiskService()
+
+@pytest.fixture(params=["sqlite", "memory"])
+def service(request):
+    # Mismos tests contra los dos backends locales
+    if request.param == "sqlite":
+        return request.getfixturevalue("sqlite_service")
+    return request.getfixturevalue("memory_service")
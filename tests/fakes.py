@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from core.models import ContentItem
+from services.disk_service import DiskService
+
+class FakeSupabase(DiskService):
+    """
+    In-memory stand-in for SupabaseService as seen by SyncEngine: every write
+    stamps updated_at and deletes leave a tombstone (removed when the id is
+    inserted again), like supabase/migrations/*_delta_sync.sql. Each write
+    advances a fake clock by one second. The *_if_version writes only apply
+    while updated_at still matches, like the filtered UPDATE/DELETE.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.clock = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.updated_at = {}
+        self.tombstones = {}
+
+    def _tick(self) -> datetime:
+        self.clock += timedelta(seconds=1)
+        return self.clock
+
+    def _store(self, disks):
+        super()._store(disks)
+        for disk in disks:
+            self.updated_at[disk.id] = self._tick()
+            self.tombstones.pop(disk.id, None)
+
+    def update_disk(self, disk_id: str, name: str, total_capacity_gb: int, contents: List[ContentItem]):
+        disk = super().update_disk(disk_id, name, total_capacity_gb, contents)
+        if disk:
+            self.updated_at[disk_id] = self._tick()
+        return disk
+
+    def _forget(self, disk_id: str) -> bool:
+        if not super()._forget(disk_id):
+            return False
+        del self.updated_at[disk_id]
+        self.tombstones[disk_id] = self._tick()
+        return True
+
+    def update_disk_if_version(self, disk, base_version: str) -> Optional[str]:
+        current = self.updated_at.get(disk.id)
+        if current is None or current.isoformat() != base_version:
+            return None
+        self.update_disk(disk.id, disk.name, disk.total_capacity_gb, disk.contents)
+        return self.updated_at[disk.id].isoformat()
+
+    def delete_disk_if_version(self, disk_id: str, base_version: str) -> bool:
+        current = self.updated_at.get(disk_id)
+        return current is not None and current.isoformat() == base_version and self.delete_disk(disk_id)
+
+    def get_changes(self, since: Optional[str] = None) -> Tuple[List[dict], List[dict]]:
+        after = datetime.fromisoformat(since) if since else None
+        rows = [dict(disk.to_dict(), updated_at=self.updated_at[disk.id].isoformat())
+                for disk in self.get_all_disks() if after is None or self.updated_at[disk.id] > after]
+        rows.sort(key=lambda row: row["updated_at"])
+        tombstones = []
+        if after is not None:
+            tombstones = sorted(({"id": disk_id, "deleted_at": deleted_at.isoformat()}
+                                 for disk_id, deleted_at in self.tombstones.items() if deleted_at > after),
+                                key=lambda row: row["deleted_at"])
+        return rows, tombstones
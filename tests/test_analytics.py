@@ -0,0 +1,82 @@
+import random
+import pytest
+from core.models import ContentItem, Disk
+from services.analytics import CatalogAnalytics
+
+def _catalog(rng, count):
+    disks = []
+    for i in range(count):
+        capacity = rng.choice([0, 64, 250, 500, 1000, 2000])
+        contents = [ContentItem(f"item{j}", rng.randint(0, 300)) for j in range(rng.randint(0, 5))]
+        disks.append(Disk(f"d{i}", f"Disco {i}", capacity, contents))
+    return disks
+
+def _best_fit_decreasing(free, sizes):
+    # Referencia directa: para cada elemento (de mayor a menor) se recorre la lista de discos completa
+    remaining = list(free)
+    unplaced = set()
+    for index in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        fits = [position for position, left in enumerate(remaining) if left >= sizes[index] - 1e-9]
+        if not fits:
+            unplaced.add(index)
+            continue
+        best = min(fits, key=remaining.__getitem__)
+        remaining[best] = max(remaining[best] - sizes[index], 0.0)
+    return sorted(remaining), unplaced
+
+def _check_feasible(analytics, plan, sizes, reserve_gb, candidates):
+    free = {disk.id: disk.free_space_gb for disk in analytics.disks}
+    assert set(plan.remaining_gb) == set(candidates)
+    assigned = plan.assignments
+    assert set(assigned) <= set(candidates)
+    for disk_id in candidates:
+        placed = sum(sizes[index] for index in assigned.get(disk_id, []))
+        assert placed <= max(free[disk_id] - reserve_gb, 0.0) + 1e-6
+        assert plan.remaining_gb[disk_id] == pytest.approx(max(max(free[disk_id] - reserve_gb, 0.0) - placed, 0.0))
+    # Lo que no se colocó no cabe ni siquiera en el espacio que quedó al final
+    largest_left = max(plan.remaining_gb.values(), default=0.0)
+    assert all(sizes[index] > largest_left for index in plan.unplaced)
+    assert plan.placed_gb == pytest.approx(sum(size for index, size in enumerate(sizes) if index not in plan.unplaced))
+
+@pytest.mark.parametrize("seed", range(20))
+def test_plan_placement_matches_reference_best_fit(seed):
+    rng = random.Random(seed)
+    analytics = CatalogAnalytics(_catalog(rng, rng.randint(1, 12)))
+    sizes = [rng.choice([rng.randint(1, 400), rng.randint(1, 40) / 4]) for _ in range(rng.randint(0, 30))]
+    reserve_gb = rng.choice([0.0, 10.0, 100.0])
+    plan = analytics.plan_placement(sizes, reserve_gb=reserve_gb)
+
+    candidates = [disk.id for disk in analytics.disks]
+    _check_feasible(analytics, plan, sizes, reserve_gb, candidates)
+    free = [max(disk.free_space_gb - reserve_gb, 0.0) for disk in analytics.disks]
+    remaining, unplaced = _best_fit_decreasing(free, sizes)
+    assert set(plan.unplaced) == unplaced
+    assert sorted(plan.remaining_gb.values()) == pytest.approx(remaining)
+
+def test_plan_placement_prefers_tightest_disk():
+    disks = [Disk("big", "Grande", 1000, []), Disk("exact", "Justo", 300, []), Disk("small", "Pequeño", 100, [])]
+    plan = CatalogAnalytics(disks).plan_placement([300, 50, 50, 2000])
+    assert plan.item_disk_ids == ["exact", "small", "small", None]
+    assert plan.unplaced == [3]
+    assert plan.remaining_gb == {"big": 1000.0, "exact": 0.0, "small": 0.0}
+    assert plan.waste_gb == 0.0
+
+def test_reserve_is_kept_free_on_every_disk():
+    disks = [Disk("a", "A", 100, [ContentItem("x", 40)]), Disk("b", "B", 50, [ContentItem("y", 45)])]
+    plan = CatalogAnalytics(disks).plan_placement([30, 30], reserve_gb=20)
+    assert plan.item_disk_ids == ["a", None]
+    assert plan.remaining_gb == {"a": pytest.approx(10.0), "b": 0.0}
+
+def test_disk_ids_limit_the_candidates():
+    disks = [Disk("a", "A", 100, []), Disk("b", "B", 500, []), Disk("c", "C", 200, [])]
+    plan = CatalogAnalytics(disks).plan_placement([150, 90], disk_ids=["c", "a", "desconocido"])
+    assert plan.item_disk_ids == ["c", "a"]
+    assert set(plan.remaining_gb) == {"a", "c"}
+    assert CatalogAnalytics(disks).plan_placement([10], disk_ids=[]).unplaced == [0]
+
+def test_empty_catalog_and_empty_items():
+    plan = CatalogAnalytics([]).plan_placement([5, 1])
+    assert plan.unplaced == [0, 1] and plan.assignments == {} and plan.remaining_gb == {}
+    assert plan.placed_gb == 0.0 and plan.waste_gb == 0.0
+    empty = CatalogAnalytics([Disk("a", "A", 10, [])]).plan_placement([])
+    assert empty.item_disk_ids == [] and empty.remaining_gb == {"a": 10.0}
@@ -0,0 +1,58 @@
+import os
+import sqlite3
+from services.batch_catalog import DONE, FAILED, BatchCataloguer, drive_name
+from services.disk_service import DiskService
+from services.snapshot import SnapshotStore
+
+def _drive(root, *parts, files=("a.bin", "b.bin")):
+    path = root.joinpath(*parts)
+    path.mkdir(parents=True)
+    for name in files:
+        (path / name).write_bytes(b"x" * 1000)
+    return str(path)
+
+def _cataloguer(service, tmp_path):
+    return BatchCataloguer(service, snapshot_store=SnapshotStore(str(tmp_path / "snapshots")), threads_per_drive=1)
+
+def test_creates_then_updates_disks(tmp_path):
+    service = DiskService()
+    usb = _drive(tmp_path, "media", "USB")
+    backup = _drive(tmp_path, "media", "Backup", files=("c.bin",))
+    report = _cataloguer(service, tmp_path).run([usb, backup])
+    assert [(r.name, r.ok, r.created) for r in report.results] == [("USB", True, True), ("Backup", True, True)]
+    assert sorted(d.name for d in service.get_all_disks()) == ["Backup", "USB"]
+
+    (tmp_path / "media" / "USB" / "nuevo.bin").write_bytes(b"y")
+    report = _cataloguer(service, tmp_path).run([usb])
+    assert report.results[0].created is False
+    disk = service.filter_disks(name_query="usb")[0]
+    assert sorted(item.description for item in disk.contents) == ["a.bin", "b.bin", "nuevo.bin"]
+
+def test_same_name_on_two_mount_points_is_reported(tmp_path):
+    service = DiskService()
+    first = _drive(tmp_path, "a", "USB")
+    second = _drive(tmp_path, "b", "usb")
+    other = _drive(tmp_path, "c", "Fotos")
+    report = _cataloguer(service, tmp_path).run([first, second, other])
+    assert [r.progress.state for r in report.results] == [FAILED, FAILED, DONE]
+    assert second in report.results[0].error and first in report.results[1].error
+    assert [d.name for d in service.get_all_disks()] == ["Fotos"]
+
+def test_backend_error_only_fails_its_drive(tmp_path):
+    class FailingService(DiskService):
+        def upsert_disks(self, disks):
+            if disks[0].name == "Roto":
+                raise sqlite3.OperationalError("database is locked")
+            return super().upsert_disks(disks)
+
+    service = FailingService()
+    broken = _drive(tmp_path, "Roto")
+    fine = _drive(tmp_path, "Bien")
+    missing = str(tmp_path / "no-existe")
+    report = _cataloguer(service, tmp_path).run([broken, fine, missing])
+    assert [(r.name, r.ok) for r in report.results] == [("Roto", False), ("Bien", True), ("no-existe", False)]
+    assert "database is locked" in report.results[0].error
+    assert [d.name for d in service.get_all_disks()] == ["Bien"]
+
+def test_drive_name():
+    assert drive_name(os.path.join("media", "USB") + os.sep) == "USB"
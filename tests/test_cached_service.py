@@ -0,0 +1,83 @@
+from collections import Counter
+import pytest
+from core.models import ContentItem, Disk
+from services.cached_service import CachedDiskService
+from services.disk_service import DiskService
+
+class CountingService(DiskService):
+    """DiskService that counts the reads reaching the backend."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = Counter()
+
+    def get_all_disks(self):
+        self.calls["get_all_disks"] += 1
+        return super().get_all_disks()
+
+    def get_disk_summaries(self):
+        self.calls["get_disk_summaries"] += 1
+        return super().get_disk_summaries()
+
+    def iter_disks(self, page_size=1000):
+        self.calls["iter_disks"] += 1
+        return super().iter_disks(page_size)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def cached(sample_disks):
+    backend = CountingService()
+    backend.add_disks(sample_disks())
+    clock = FakeClock()
+    return CachedDiskService(backend, ttl_seconds=10, clock=clock), backend, clock
+
+def _snapshot(disks):
+    return [(disk.id, disk.name, disk.total_capacity_gb, disk.used_space_gb) for disk in disks]
+
+def test_summaries_are_served_from_cache(cached):
+    service, backend, _ = cached
+    first = service.get_disk_summaries()
+    assert _snapshot(service.get_disk_summaries()) == _snapshot(first)
+    assert backend.calls["get_disk_summaries"] == 1
+    assert service.stats["hits"] == 1
+
+def test_writes_patch_summary_listing_in_place(cached):
+    service, backend, _ = cached
+    service.get_disk_summaries()
+    service.update_disk("d2", "Fotos", 800, [ContentItem("Fotos 2022", 10)])
+    service.upsert_disks([Disk("d5", "Nuevo", 100, []), Disk("d1", "Películas", 1000, [])])
+    added = service.add_disk("Otro", 50, [ContentItem("x", 1)])
+    service.add_disks([Disk("d6", "Lote", 10, [])])
+    service.delete_disk("d3")
+    service.delete_disks(["d4"])
+
+    assert _snapshot(service.get_disk_summaries()) == _snapshot(backend.get_disk_summaries())
+    assert [disk.id for disk in service.get_disk_summaries()] == ["d1", "d2", "d5", added.id, "d6"]
+    assert backend.calls["get_disk_summaries"] == 2  # la carga inicial y la comparación de arriba
+
+def test_summaries_expire_and_invalidate(cached):
+    service, backend, clock = cached
+    service.get_disk_summaries()
+    clock.now = 11
+    service.get_disk_summaries()
+    assert backend.calls["get_disk_summaries"] == 2
+    service.invalidate("d1")
+    service.get_disk_summaries()
+    assert backend.calls["get_disk_summaries"] == 3
+
+def test_iter_disks_uses_fresh_full_listing(cached):
+    service, backend, clock = cached
+    assert list(service.iter_disks()) == backend.get_all_disks()
+    assert backend.calls["iter_disks"] == 1
+    service.get_all_disks()
+    assert [disk.id for disk in service.iter_disks()] == ["d1", "d2", "d3", "d4"]
+    assert backend.calls["iter_disks"] == 1
+    clock.now = 11
+    list(service.iter_disks())
+    assert backend.calls["iter_disks"] == 2
@@ -0,0 +1,55 @@
+import gzip
+import json
+import os
+import pytest
+from core.models import ContentItem, Disk
+from services.catalog_cache import CatalogCache
+
+def test_round_trip(tmp_path):
+    cache = CatalogCache(str(tmp_path / "cache" / "catalog.json.gz"))
+    disks = [Disk("a", "Fotos", 100, [ContentItem("raw", 10)]), Disk("b", "Vacío", 5, [])]
+    assert cache.save(disks)
+    loaded = cache.load()
+    assert [(d.id, d.name, d.total_capacity_gb, d.used_space_gb, d.summary) for d in loaded] == \
+        [("a", "Fotos", 100, 10, "raw"), ("b", "Vacío", 5, 0, "")]
+    assert not loaded[0].contents_loaded
+
+def test_unwritable_path_is_not_an_error(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = CatalogCache(str(blocker / "catalog.json.gz"))  # El directorio padre es un archivo
+    assert cache.save([Disk("a", "Fotos", 100, [])]) is False
+    assert cache.load() == []
+
+def test_unknown_version_is_ignored(tmp_path):
+    path = tmp_path / "catalog.json.gz"
+    cache = CatalogCache(str(path))
+    cache.save([Disk("a", "Fotos", 100, [])])
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"version": 999, "disks": []}, f)
+    assert cache.load() == []
+
+def test_truncated_file_is_ignored(tmp_path):
+    path = tmp_path / "catalog.json.gz"
+    cache = CatalogCache(str(path))
+    cache.save([Disk(f"d{i}", f"Disco {i}", 100, [ContentItem("x", 1)]) for i in range(200)])
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])  # Cierre a mitad de escritura sin rename atómico
+    assert cache.load() == []
+
+@pytest.mark.parametrize("payload", [[], {"version": 1}, {"version": 1, "disks": [["a", "Fotos"]]}, {"version": 1, "disks": 5}, "texto"])
+def test_malformed_payload_is_ignored(tmp_path, payload):
+    path = tmp_path / "catalog.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(payload, f)
+    assert CatalogCache(str(path)).load() == []
+
+def test_save_syncs_the_file_before_replacing(tmp_path, monkeypatch):
+    path = tmp_path / "catalog.json.gz"
+    calls = []
+    monkeypatch.setattr(os, "fsync", lambda fd: calls.append(("fsync", os.path.exists(str(path) + ".tmp"))))
+    real_replace = os.replace
+    monkeypatch.setattr(os, "replace", lambda src, dst: (calls.append(("replace", src)), real_replace(src, dst)))
+    assert CatalogCache(str(path)).save([Disk("a", "Fotos", 100, [])])
+    assert calls == [("fsync", True), ("replace", str(path) + ".tmp")]
+    assert [disk.id for disk in CatalogCache(str(path)).load()] == ["a"]
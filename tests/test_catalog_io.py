@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import pytest
+from core.models import ContentItem, Disk
+from services.catalog_io import ImportCheckpoint, export_catalog, import_catalog, read_catalog, read_csv
+from services.disk_service import DiskService
+
+def _tricky_disks():
+    return [
+        Disk("d1", "Películas, HD", 1000, [ContentItem("Matrix \"1999\".mkv", 40), ContentItem("Dark s01", 120.5, "abc123")]),
+        Disk("d2", "Notas", 50, [ContentItem("Línea 1\nLínea 2, con coma\n\"citada\"", 0.25), ContentItem("", 3)]),
+        Disk("d3", "USB vacío", 64, []),
+        Disk("d4", "Windows", 500, [ContentItem("fin de línea\r\nCRLF", 1), ContentItem("ñandú 100%", 2)]),
+        Disk("d5", "Último", 10, [ContentItem("x", 1)]),
+    ]
+
+def _rows(disks):
+    return [disk.to_dict() for disk in disks]
+
+def _service(disks):
+    service = DiskService()
+    service.add_disks(disks)
+    return service
+
+class FailingService(DiskService):
+    """DiskService whose upsert_disks fails from the `fail_on`-th call (an interrupted import)."""
+
+    def __init__(self, fail_on=None):
+        super().__init__()
+        self.fail_on = fail_on
+        self.batches = []
+
+    def upsert_disks(self, disks):
+        if self.fail_on is not None and len(self.batches) + 1 >= self.fail_on:
+            raise sqlite3.OperationalError("disk I/O error")
+        self.batches.append([disk.id for disk in disks])
+        return super().upsert_disks(disks)
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_export_import_round_trip(tmp_path, fmt):
+    path = str(tmp_path / f"catalogo.{fmt}")
+    assert export_catalog(_service(_tricky_disks()), path, page_size=2) == 5
+    assert not os.path.exists(path + ".part")
+
+    target = DiskService()
+    result = import_catalog(target, path, batch_size=2)
+    assert (result.imported, result.resumed_from, result.failed) == (5, 0, 0)
+    assert result.offset == os.path.getsize(path)
+    assert _rows(target.get_all_disks()) == _rows(_tricky_disks())
+    assert not os.path.exists(path + ".checkpoint.json")
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_offsets_resume_reading_after_each_disk(tmp_path, fmt):
+    # También con descripciones de varias líneas: el offset cae siempre tras la última fila del disco
+    path = str(tmp_path / f"catalogo.{fmt}")
+    export_catalog(_service(_tricky_disks()), path)
+    entries = list(read_catalog(path))
+    assert [disk.id for disk, _ in entries] == ["d1", "d2", "d3", "d4", "d5"]
+    for position, (_, offset) in enumerate(entries):
+        assert _rows(disk for disk, _ in read_catalog(path, start=offset)) == _rows(_tricky_disks()[position + 1:])
+
+def test_csv_multiline_descriptions(tmp_path):
+    path = tmp_path / "manual.csv"
+    path.write_text('disk_id,name,total_capacity_gb,description,size_gb\n'
+                    'a,Uno,100,"primera\nsegunda, con coma",1.5\n'
+                    'a,Uno,100,"dice ""hola""",2\n'
+                    'b,Dos,50,,\n', encoding="utf-8")
+    disks = [disk for disk, _ in read_csv(str(path))]
+    assert _rows(disks) == [
+        {"id": "a", "name": "Uno", "total_capacity_gb": 100,
+         "contents": [{"description": "primera\nsegunda, con coma", "size_gb": 1.5}, {"description": 'dice "hola"', "size_gb": 2}]},
+        {"id": "b", "name": "Dos", "total_capacity_gb": 50, "contents": []},
+    ]
+
+def test_csv_without_required_columns_is_rejected(tmp_path):
+    path = tmp_path / "malo.csv"
+    path.write_text("disk_id,name\nd1,Uno\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(read_csv(str(path)))
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_interrupted_import_resumes_from_checkpoint(tmp_path, fmt):
+    path = str(tmp_path / f"catalogo.{fmt}")
+    export_catalog(_service(_tricky_disks()), path)
+
+    service = FailingService(fail_on=3)
+    with pytest.raises(sqlite3.OperationalError):
+        import_catalog(service, path, batch_size=2)
+    assert service.batches == [["d1", "d2"], ["d3", "d4"]]
+    offset, imported = ImportCheckpoint(path + ".checkpoint.json", path).load()
+    assert imported == 4
+    assert [disk.id for disk, _ in read_catalog(path, start=offset)] == ["d5"]
+
+    service.fail_on = None
+    result = import_catalog(service, path, batch_size=2)
+    assert (result.imported, result.resumed_from) == (5, 4)
+    assert service.batches[2:] == [["d5"]]  # los lotes ya guardados no se reenvían
+    assert _rows(service.get_all_disks()) == _rows(_tricky_disks())
+    assert not os.path.exists(path + ".checkpoint.json")
+
+def test_checkpoint_is_ignored_for_a_changed_source_or_without_resume(tmp_path):
+    path = str(tmp_path / "catalogo.jsonl")
+    export_catalog(_service(_tricky_disks()), path)
+    service = FailingService(fail_on=2)
+    with pytest.raises(sqlite3.OperationalError):
+        import_catalog(service, path, batch_size=2)
+
+    service.fail_on = None
+    assert import_catalog(service, path, batch_size=2, resume=False).resumed_from == 0
+    assert service.batches[1] == ["d1", "d2"]
+
+    with pytest.raises(sqlite3.OperationalError):
+        import_catalog(FailingService(fail_on=2), path, batch_size=2)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert ImportCheckpoint(path + ".checkpoint.json", path).load() == (0, 0)
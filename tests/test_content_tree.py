@@ -0,0 +1,84 @@
+import os
+import random
+from core.content_tree import FOLDER_PREFIX, GB, ContentTree
+from core.models import ContentItem
+from services.snapshot import DirectoryRecord, DiskSnapshot
+
+def _folder_sizes(files):
+    """Brute force: size and file count of every folder from a {path: size} dict."""
+    sizes = {}
+    for path, size in files.items():
+        parts = path.split("/")
+        for depth in range(len(parts)):
+            folder = "/".join(parts[:depth])
+            total, count = sizes.get(folder, (0, 0))
+            sizes[folder] = (total + size, count + 1)
+    return sizes
+
+def _random_files(rng, count=300):
+    folders = ["", "a", "a/b", "a/b/c", "d", "d/e", "f g", "peli/ñ"]
+    return {f"{rng.choice(folders)}/file{i}.bin".lstrip("/"): rng.randint(1, 10 ** 6) for i in range(count)}
+
+def _check(tree, files):
+    expected = _folder_sizes(files)
+    for folder, (size, count) in expected.items():
+        node = tree.find(folder)
+        assert (node.size_bytes, node.file_count) == (size, count), folder
+    ranking = sorted((size for folder, (size, _) in expected.items() if folder), reverse=True)
+    assert [node.size_bytes for node in tree.largest_folders(len(ranking))] == ranking
+
+def test_incremental_changes_match_brute_force():
+    rng = random.Random(7)
+    files = _random_files(rng)
+    tree = ContentTree()
+    for path, size in files.items():
+        tree.insert(path, size)
+    _check(tree, files)
+    for path in rng.sample(sorted(files), 60):
+        files[path] = rng.randint(1, 10 ** 6)  # Redimensionar
+        tree.insert(path, files[path])
+    for path in rng.sample(sorted(files), 80):
+        assert tree.remove(path)
+        del files[path]
+    _check(tree, files)
+
+def test_removing_a_folder_removes_its_subtree():
+    tree = ContentTree()
+    tree.insert("a/b/1.bin", 10)
+    tree.insert("a/b/c/2.bin", 20)
+    tree.insert("a/3.bin", 5)
+    assert tree.remove("a/b")
+    assert tree.find("a/b") is None
+    assert (tree.find("a").size_bytes, tree.file_count) == (5, 1)
+    assert [node.path for node in tree.largest_folders()] == ["a"]
+    assert not tree.remove("a/b")
+    assert not tree.remove("")
+
+def test_from_snapshot_matches_insert():
+    rng = random.Random(3)
+    files = _random_files(rng, 100)
+    directories = {}
+    for path, size in files.items():
+        folder, _, name = path.rpartition("/")
+        directories.setdefault(folder.replace("/", os.sep), DirectoryRecord(0, 0, [], [])).files.append([name, size, 0, 0])
+    tree = ContentTree.from_snapshot(DiskSnapshot("/mnt/x", directories))
+    _check(tree, files)
+
+def test_from_contents_keeps_folder_totals():
+    tree = ContentTree.from_contents([ContentItem(FOLDER_PREFIX + "Series", 2), ContentItem("a.iso", 0.5)])
+    assert tree.find("Series").size_bytes == 2 * GB
+    assert tree.size_bytes == int(2.5 * GB)
+    assert tree.file_count == 1
+
+def test_compact_round_trip():
+    rng = random.Random(11)
+    tree = ContentTree()
+    for path, size in _random_files(rng, 150).items():
+        tree.insert(path, size)
+    tree._folder(["vacía"], create=True)
+    tree._folder(["sin desglosar"], create=True).unlisted_bytes += 42
+    tree._propagate(tree.find("sin desglosar"), 42, 0)
+    restored = ContentTree.from_compact(tree.to_compact())
+    assert list(restored._entries()) == list(tree._entries())
+    assert restored.size_bytes == tree.size_bytes
+    assert [(n.path, n.size_bytes) for n in restored.largest_folders(20)] == [(n.path, n.size_bytes) for n in tree.largest_folders(20)]
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import pytest
+from core.models import ContentItem
+from services import dedup
+from services.dedup import PARTIAL_BYTES, DedupEngine, annotate_contents
+from services.scanner import DirectoryScanner
+from services.snapshot import FILE_HASH, FILE_NAME, FILE_PARTIAL_HASH
+
+BIG = 3 * PARTIAL_BYTES  # Mayor que 2 * PARTIAL_BYTES: el hash parcial no lee el archivo entero
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def _blob(seed, size=BIG):
+    return hashlib.shake_256(bytes([seed])).digest(size)
+
+def _snapshot(root):
+    scanner = DirectoryScanner(max_workers=2)
+    scanner.scan(str(root), record_snapshot=True)
+    return scanner.snapshot
+
+@pytest.fixture
+def drives(tmp_path):
+    original = _blob(1)
+    middle_changed = original[:PARTIAL_BYTES] + _blob(2, PARTIAL_BYTES) + original[2 * PARTIAL_BYTES:]
+    tail_changed = original[:-10] + b"0123456789"
+    files = {
+        "uno/peli.mkv": original,
+        "uno/notas.txt": b"hola" * 100,
+        "uno/sub/copia.txt": b"hola" * 100,
+        "uno/unico.bin": _blob(3, 1000),
+        "dos/backup/peli.mkv": original,  # duplicado en otro disco
+        "dos/casi.mkv": middle_changed,  # mismo tamaño, principio y final: solo lo separa el hash completo
+        "dos/cola.mkv": tail_changed,  # mismo tamaño y principio, final distinto: lo separa el hash parcial
+        "dos/vacio.txt": b"",
+        "dos/otro_vacio.txt": b"",
+    }
+    for relpath, data in files.items():
+        _write(str(tmp_path / relpath), data)
+    os.link(str(tmp_path / "uno/peli.mkv"), str(tmp_path / "uno/enlace.mkv"))  # enlace duro: no ocupa más espacio
+    return tmp_path, files
+
+def _expected_groups(tmp_path, snapshots, min_size=1):
+    # Fuerza bruta: hash completo de cada archivo (sin contar los enlaces duros repetidos)
+    by_digest = {}
+    for disk_id, snapshot in snapshots.items():
+        seen = set()
+        for relpath, directory in snapshot.directories.items():
+            for record in directory.files:
+                path = os.path.join(snapshot.root, relpath, record[FILE_NAME])
+                if record[1] < min_size or record[3] in seen:
+                    continue
+                seen.add(record[3])
+                with open(path, "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+                by_digest.setdefault(digest, set()).add((disk_id, os.path.join(relpath, record[FILE_NAME])))
+    return sorted(sorted(files) for files in by_digest.values() if len(files) > 1)
+
+def _groups(report):
+    return sorted(sorted((file.disk_id, file.path) for file in group.files) for group in report.groups)
+
+def test_find_duplicates_matches_brute_force(drives):
+    tmp_path, files = drives
+    snapshots = {"d1": _snapshot(tmp_path / "uno"), "d2": _snapshot(tmp_path / "dos")}
+    progress = []
+    report = DedupEngine(max_workers=1).find_duplicates(snapshots, on_progress=lambda *args: progress.append(args))
+
+    assert _groups(report) == _expected_groups(tmp_path, snapshots)
+    # De peli.mkv y su enlace duro solo cuenta el primero que aparece en el snapshot
+    kept_link = next(record[FILE_NAME] for record in snapshots["d1"].directories[""].files if record[FILE_NAME].endswith(".mkv"))
+    assert _groups(report) == sorted([
+        [("d1", "notas.txt"), ("d1", os.path.join("sub", "copia.txt"))],
+        [("d1", kept_link), ("d2", os.path.join("backup", "peli.mkv"))],
+    ])
+    big = report.groups[0]
+    assert big.size_bytes == BIG and big.reclaimable_bytes == BIG
+    assert big.digest == next(record for record in snapshots["d2"].directories["backup"].files)[FILE_HASH]
+    assert report.reclaimable_gb_by_disk() == {"d2": round(BIG / 1024 ** 3, 2), "d1": 0.0}
+
+    # Pasada parcial: los 5 archivos grandes de igual tamaño (uno es enlace duro) y los 2 pequeños;
+    # pasada completa: solo los 3 grandes que siguen coincidiendo (los pequeños ya se leyeron enteros)
+    assert report.hashed_files == 4 + 2 + 3
+    assert report.bytes_read == 4 * 2 * PARTIAL_BYTES + 2 * 400 + 3 * BIG
+    assert {kind for kind, _, _ in progress} == {"partial", "full"}
+
+def test_hashes_are_cached_in_snapshots_and_reused(drives):
+    tmp_path, _ = drives
+    snapshots = {"d1": _snapshot(tmp_path / "uno"), "d2": _snapshot(tmp_path / "dos")}
+    engine = DedupEngine(max_workers=1)
+    first = engine.find_duplicates(snapshots)
+
+    unique = next(record for record in snapshots["d1"].directories[""].files if record[FILE_NAME] == "unico.bin")
+    assert len(unique) == FILE_PARTIAL_HASH  # tamaño único: nunca se lee
+
+    second = engine.find_duplicates(snapshots)
+    assert _groups(second) == _groups(first)
+    assert second.hashed_files == 0 and second.bytes_read == 0
+    assert second.reused_hashes == first.hashed_files + first.reused_hashes
+
+    # Un re-escaneo conserva los hashes de los archivos sin cambios (carry_hashes)
+    rescanned = {"d1": DirectoryScanner(max_workers=2), "d2": DirectoryScanner(max_workers=2)}
+    rescanned["d1"].scan(str(tmp_path / "uno"), previous=snapshots["d1"])
+    rescanned["d2"].scan(str(tmp_path / "dos"), previous=snapshots["d2"])
+    third = engine.find_duplicates({disk_id: scanner.snapshot for disk_id, scanner in rescanned.items()})
+    assert third.hashed_files == 0 and _groups(third) == _groups(first)
+
+def test_file_rewritten_in_place_is_revalidated(drives):
+    tmp_path, files = drives
+    snapshots = {"d1": _snapshot(tmp_path / "uno"), "d2": _snapshot(tmp_path / "dos")}
+    engine = DedupEngine(max_workers=1)
+    engine.find_duplicates(snapshots)
+
+    # Misma longitud, otro contenido y otro mtime; el mtime del directorio no cambia, así que el snapshot no se entera
+    path = str(tmp_path / "dos" / "backup" / "peli.mkv")
+    with open(path, "r+b") as f:
+        f.write(b"distinto")
+    os.utime(path, ns=(1, 1))
+
+    report = engine.find_duplicates(snapshots)
+    assert [("d1", "notas.txt"), ("d1", os.path.join("sub", "copia.txt"))] in _groups(report)
+    assert len(report.groups) == 1
+    assert _groups(report) == _expected_groups(tmp_path, snapshots)
+    assert report.hashed_files == 1  # solo el hash parcial del archivo cambiado
+
+    without_check = DedupEngine(max_workers=1, verify_cached=False)
+    os.utime(path, ns=(2, 2))
+    assert without_check.find_duplicates(snapshots).hashed_files == 0
+
+def test_unmounted_disk_only_contributes_cached_hashes(drives):
+    tmp_path, _ = drives
+    snapshots = {"d1": _snapshot(tmp_path / "uno"), "d2": _snapshot(tmp_path / "dos")}
+    engine = DedupEngine(max_workers=1)
+    first = engine.find_duplicates(snapshots)
+
+    os.rename(str(tmp_path / "dos"), str(tmp_path / "desmontado"))
+    report = engine.find_duplicates(snapshots)
+    assert _groups(report) == _groups(first)
+    assert report.unreadable_files == 0 and report.hashed_files == 0
+
+    fresh = {"d1": _snapshot(tmp_path / "uno"), "d2": snapshots["d2"]}
+    for directory in fresh["d2"].directories.values():
+        for record in directory.files:
+            del record[FILE_PARTIAL_HASH:]
+    report = engine.find_duplicates(fresh)
+    assert _groups(report) == [[("d1", "notas.txt"), ("d1", os.path.join("sub", "copia.txt"))]]
+
+def test_process_pool_gives_the_same_groups(drives, monkeypatch):
+    monkeypatch.setattr(dedup, "INLINE_BYTES", 0)
+    monkeypatch.setattr(dedup, "BATCH_FILES", 1)
+    tmp_path, _ = drives
+    snapshots = {"d1": _snapshot(tmp_path / "uno"), "d2": _snapshot(tmp_path / "dos")}
+    report = DedupEngine(max_workers=2).find_duplicates(snapshots)
+    assert _groups(report) == _expected_groups(tmp_path, snapshots)
+
+def test_min_size_and_empty_files(drives):
+    tmp_path, _ = drives
+    snapshots = {"d1": _snapshot(tmp_path / "uno"), "d2": _snapshot(tmp_path / "dos")}
+    assert all(group.size_bytes >= 1 for group in DedupEngine(max_workers=1).find_duplicates(snapshots).groups)
+    report = DedupEngine(max_workers=1, min_size_bytes=1000).find_duplicates(snapshots)
+    assert _groups(report) == _expected_groups(tmp_path, snapshots, min_size=1000)
+    assert all(group.size_bytes == BIG for group in report.groups)
+
+def test_annotate_contents(drives):
+    tmp_path, _ = drives
+    snapshots = {"d1": _snapshot(tmp_path / "uno"), "d2": _snapshot(tmp_path / "dos")}
+    DedupEngine(max_workers=1).find_duplicates(snapshots)
+    hashes = {record[FILE_NAME]: record[FILE_HASH] for record in snapshots["d1"].directories[""].files if len(record) > FILE_HASH}
+
+    contents = [ContentItem("notas.txt", 0), ContentItem("unico.bin", 0), ContentItem("(Carpeta) sub", 0),
+                ContentItem("Anotado a mano", 1, "mio")]
+    annotated = annotate_contents(contents, snapshots["d1"])
+    assert [item.content_hash for item in annotated] == [hashes["notas.txt"], None, None, "mio"]
+    assert annotated[1] is contents[1] and annotated[3] is contents[3]
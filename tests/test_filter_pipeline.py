@@ -0,0 +1,53 @@
+import asyncio
+from core.filters import DiskFilter
+from core.models import ContentItem
+from services.async_service import ThreadedAsyncService
+from services.disk_service import DiskService
+from services.filter_pipeline import FilterPipeline
+
+class FlakyService(DiskService):
+    def __init__(self):
+        super().__init__()
+        self.fail = True
+
+    def filter_disks(self, *args, **kwargs):
+        if self.fail:
+            raise ConnectionError("sin red")
+        return super().filter_disks(*args, **kwargs)
+
+def test_backend_error_is_reported_and_worker_recovers():
+    service = FlakyService()
+    service.add_disk("Fotos", 100, [ContentItem("raw", 1)])
+    results, errors = [], []
+
+    async def scenario():
+        pipeline = FilterPipeline(ThreadedAsyncService(service), on_result=lambda f, disks: results.append(disks),
+                                  debounce_s=0.01, on_error=lambda f, error: errors.append((f, error)))
+        pipeline.submit(DiskFilter(name_query="fot"))
+        await pipeline._task
+        assert pipeline._pending is None
+        service.fail = False
+        pipeline.submit(DiskFilter(name_query="fot"))
+        await pipeline._task
+
+    asyncio.run(scenario())
+    assert [(f.name_query, type(error)) for f, error in errors] == [("fot", ConnectionError)]
+    assert [[disk.name for disk in disks] for disks in results] == [["Fotos"]]
+
+def test_narrowing_is_refined_locally():
+    service = DiskService()
+    service.add_disk("Películas", 100, [])
+    service.add_disk("Pelis viejas", 100, [])
+    results = []
+
+    async def scenario():
+        pipeline = FilterPipeline(ThreadedAsyncService(service), on_result=lambda f, disks: results.append(disks), debounce_s=0.01)
+        pipeline.submit(DiskFilter(name_query="pel"))
+        await pipeline._task
+        pipeline.submit(DiskFilter(name_query="pelí"))
+        await pipeline._task
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+    assert [[disk.name for disk in disks] for disks in results] == [["Películas", "Pelis viejas"], ["Películas"]]
+    assert (pipeline.backend_evaluations, pipeline.local_evaluations) == (1, 1)
@@ -0,0 +1,120 @@
+import asyncio
+import sqlite3
+from unittest.mock import MagicMock
+import pytest
+from core.models import ContentItem, Disk
+from services.catalog_cache import CatalogCache
+from services.disk_service import DiskService
+from ui.components.disk_card import DiskCard
+from ui.views.home_view import HomeView
+
+class FailingService(DiskService):
+    """DiskService whose reads of a single disk fail like an unreachable backend."""
+
+    def get_disk_by_id(self, disk_id):
+        raise sqlite3.OperationalError("database is locked")
+
+class OfflineService(DiskService):
+    """DiskService whose listing fails while `offline` is set, like a backend unreachable at start."""
+
+    def __init__(self):
+        super().__init__()
+        self.offline = True
+
+    def get_disk_summaries(self):
+        if self.offline:
+            raise sqlite3.OperationalError("unable to open database file")
+        return super().get_disk_summaries()
+
+class FakeRealtime:
+    """Records the callback RealtimeSubscriber.start() would call after each catch-up."""
+
+    def __init__(self):
+        self.on_changes = None
+
+    async def start(self, on_changes):
+        self.on_changes = on_changes
+
+@pytest.fixture
+def make_view(monkeypatch):
+    """Headless HomeView: the page is a MagicMock and control.update() does nothing."""
+    monkeypatch.setattr(DiskCard, "update", lambda self, *args, **kwargs: None)
+
+    def make(service, **kwargs):
+        view = HomeView(MagicMock(), service, **kwargs)
+        for control in (view._disk_cards_container, view._load_more_button, view._cards_summary,
+                        view._loading_indicator, view._sync_status):
+            control.update = MagicMock()
+        view._filter_pipeline.debounce_s = 0.01
+        return view
+    return make
+
+def _snackbar_text(view):
+    return view.page.open.call_args[0][0].content.value
+
+def test_open_disk_details_reports_backend_errors(make_view):
+    view = make_view(FailingService())
+    view._show_disk_details_dialog = MagicMock()
+    disk = Disk.lazy("d1", "Películas", 1000, 40, "Matrix.mkv", loader=None)
+
+    asyncio.run(view._open_disk_details(disk))
+
+    assert _snackbar_text(view) == "No se pudo abrir el disco: database is locked"
+    view._show_disk_details_dialog.assert_not_called()
+    assert not disk.contents_loaded
+    assert view._pending_requests == 0 and not view._loading_indicator.visible
+
+def test_failed_initial_load_keeps_the_cache_and_reloads_on_catch_up(make_view, tmp_path):
+    service = OfflineService()
+    service.add_disks([Disk("a", "Fotos", 100, []), Disk("b", "Juegos", 500, [])])
+    cache = CatalogCache(str(tmp_path / "catalog.json.gz"))
+    cache.save([Disk("a", "Fotos", 100, []), Disk("gone", "Borrado", 50, [])])
+    realtime = FakeRealtime()
+    view = make_view(service, realtime=realtime, catalog_cache=cache)
+
+    asyncio.run(view._load_and_subscribe())
+
+    assert [disk.id for disk in view._visible_disks] == ["a", "gone"]
+    assert _snackbar_text(view) == "No se pudo cargar el catálogo: unable to open database file"
+    assert view._pending_requests == 0 and not view._loading_indicator.visible
+    assert realtime.on_changes is not None  # Realtime se arranca aunque la carga haya fallado
+
+    # La puesta al día de Realtime llega cuando el backend vuelve: se recarga el listado entero
+    service.offline = False
+    realtime.on_changes([], [])
+    view.page.run_task.assert_called_with(view._reload_stale_catalog)
+    asyncio.run(view._reload_stale_catalog())
+    assert [disk.id for disk in view._visible_disks] == ["a", "b"]
+    assert not view._catalog_stale
+
+def _card_order(view):
+    return [card.disk.id for card in view._disk_cards_container.controls]
+
+def test_updated_disk_moves_to_its_sorted_position(make_view):
+    service = DiskService()
+    service.add_disks([Disk("a", "Fotos", 100, [ContentItem("raw", 10)]), Disk("b", "Juegos", 500, []),
+                       Disk("c", "Series", 300, [ContentItem("temporada", 50)])])
+    view = make_view(service)
+    view._sort_dropdown.value = "free_desc"
+    asyncio.run(view._update_disk_cards())
+    assert _card_order(view) == ["b", "c", "a"]
+    cards = dict(view._cards_by_id)
+
+    # Juegos se llena: pasa de tener más espacio libre a tener menos que Fotos
+    view._upsert_disk_card(Disk("b", "Juegos", 500, [ContentItem("steam", 450)]))
+    assert _card_order(view) == ["c", "a", "b"]
+    assert [disk.id for disk in view._visible_disks] == ["c", "a", "b"]
+    assert view._cards_by_id == cards  # Se reutilizan las mismas tarjetas
+    assert view._cards_by_id["b"].disk.free_space_gb == 50
+
+def test_updated_disk_keeps_its_place_without_sort(make_view):
+    service = DiskService()
+    service.add_disks([Disk("a", "Fotos", 100, []), Disk("b", "Juegos", 500, [])])
+    view = make_view(service)
+    asyncio.run(view._update_disk_cards())
+    view._disk_cards_container.update.reset_mock()
+
+    view._upsert_disk_card(Disk("a", "Fotos 2", 100, [ContentItem("raw", 90)]))
+    assert _card_order(view) == ["a", "b"]
+    assert view._cards_by_id["a"].disk.name == "Fotos 2"
+    view._disk_cards_container.update.assert_not_called()  # Solo se envía la tarjeta cambiada
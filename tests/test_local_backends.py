@@ -0,0 +1,158 @@
+import sqlite3
+import pytest
+from core.database import MIGRATIONS, SQLiteService, _fold
+from core.models import ContentItem, Disk, summarize_contents
+
+def _snapshot(disks):
+    return [(d.id, d.name, d.total_capacity_gb, [(i.description, i.size_gb) for i in d.contents]) for d in disks]
+
+# --- CRUD ---
+
+def test_add_and_get(service):
+    disk = service.add_disk("Nuevo", 250, [ContentItem("a.txt", 1), ContentItem("b.txt", 2)])
+    stored = service.get_disk_by_id(disk.id)
+    assert stored.name == "Nuevo"
+    assert stored.total_capacity_gb == 250
+    assert [(i.description, i.size_gb) for i in stored.contents] == [("a.txt", 1), ("b.txt", 2)]
+    assert stored.used_space_gb == 3
+    assert [d.id for d in service.get_all_disks()] == [disk.id]
+
+def test_update_replaces_contents(service):
+    disk = service.add_disk("Viejo", 100, [ContentItem("x", 10)])
+    updated = service.update_disk(disk.id, "Renombrado", 200, [ContentItem("y", 5)])
+    assert updated.name == "Renombrado"
+    stored = service.get_disk_by_id(disk.id)
+    assert (stored.name, stored.total_capacity_gb, stored.free_space_gb) == ("Renombrado", 200, 195)
+    assert [i.description for i in stored.contents] == ["y"]
+
+def test_update_missing_disk(service):
+    assert service.update_disk("no-existe", "x", 1, []) is None
+
+def test_delete(service):
+    disk = service.add_disk("Borrar", 10, [ContentItem("x", 1)])
+    assert service.delete_disk(disk.id) is True
+    assert service.get_disk_by_id(disk.id) is None
+    assert service.delete_disk(disk.id) is False
+
+def test_batch_add_and_delete_keep_ids(service, sample_disks):
+    stored = service.add_disks(sample_disks())
+    assert [d.id for d in stored] == ["d1", "d2", "d3", "d4"]
+    assert service.delete_disks(["d2", "zz", "d4"]) == ["d2", "d4"]
+    assert [d.id for d in service.get_all_disks()] == ["d1", "d3"]
+
+def test_summaries_match_full_listing(service, sample_disks):
+    service.add_disks(sample_disks())
+    summaries = service.get_disk_summaries()
+    full = service.get_all_disks()
+    assert [(d.id, d.used_space_gb, d.summary) for d in summaries] == [(d.id, d.used_space_gb, d.summary) for d in full]
+    # Los contenidos se cargan al acceder
+    assert _snapshot(summaries) == _snapshot(full)
+
+# --- Filtros: mismos resultados en SQLite y en memoria ---
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"name_query": "pel"},
+    {"name_query": "PELÍ"},
+    {"name_query": "100%"},
+    {"name_query": "_"},
+    {"content_query": "fotos"},
+    {"content_query": "JUEGOS"},
+    {"content_query": "fotos_"},
+    {"min_free_gb": 0},
+    {"min_free_gb": 500},
+    {"name_query": "b", "content_query": "fotos", "min_free_gb": 10},
+    {"name_query": "nada"},
+])
+def test_filter_parity(sqlite_service, memory_service, sample_disks, kwargs):
+    sqlite_service.add_disks(sample_disks())
+    memory_service.add_disks(sample_disks())
+    assert _snapshot(sqlite_service.filter_disks(**kwargs)) == _snapshot(memory_service.filter_disks(**kwargs))
+
+def test_filter_follows_updates(service, sample_disks):
+    service.add_disks(sample_disks())
+    service.update_disk("d3", "USB lleno", 64, [ContentItem("iso", 60)])
+    assert [d.id for d in service.filter_disks(min_free_gb=10)] == ["d1", "d2", "d4"]
+    assert [d.id for d in service.filter_disks(name_query="lleno")] == ["d3"]
+
+# --- upsert_disks ---
+
+def test_upsert_replay_is_idempotent(service, sample_disks):
+    batch = sample_disks()
+    service.upsert_disks(batch)
+    first = _snapshot(service.get_all_disks())
+    service.upsert_disks(sample_disks())
+    assert _snapshot(service.get_all_disks()) == first
+
+def test_upsert_replaces_and_inserts(service, sample_disks):
+    service.add_disks(sample_disks())
+    service.upsert_disks([Disk("d2", "Fotos nuevas", 600, [ContentItem("raw", 10)]), Disk("d9", "Nuevo", 5, [])])
+    assert service.get_disk_by_id("d2").name == "Fotos nuevas"
+    assert [i.description for i in service.get_disk_by_id("d2").contents] == ["raw"]
+    assert service.get_disk_by_id("d9") is not None
+    assert len(service.get_all_disks()) == 5
+
+# --- Migraciones ---
+
+def _old_database(path, version):
+    conn = sqlite3.connect(path)
+    conn.create_function("fold", 1, _fold, deterministic=True)
+    for index, script in enumerate(MIGRATIONS[:version], start=1):
+        conn.executescript(script)
+        conn.execute(f"PRAGMA user_version = {index}")
+    return conn
+
+def test_fresh_database_reaches_last_version(sqlite_service):
+    assert sqlite_service._conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+
+def test_migrates_data_from_first_schema(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = _old_database(path, 1)
+    conn.execute("INSERT INTO disks (id, name, total_capacity_gb, used_space_gb) VALUES ('a', 'Películas', 100, 30)")
+    conn.executemany(
+        "INSERT INTO content_items (disk_id, position, description, size_gb) VALUES (?, ?, ?, ?)",
+        [("a", 0, "Matrix", 10), ("a", 1, "Alien", 20)],
+    )
+    conn.commit()
+    conn.close()
+
+    service = SQLiteService(path)
+    try:
+        assert service._conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+        assert [d.id for d in service.filter_disks(name_query="PELÍ", content_query="alien", min_free_gb=70)] == ["a"]
+        summary = service.get_disk_summaries()[0]
+        assert summary.summary == summarize_contents([ContentItem("Matrix", 10), ContentItem("Alien", 20)])
+    finally:
+        service.close()
+
+def test_summary_backfill_follows_position(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = _old_database(path, 2)
+    items = [ContentItem("Tercero", 1), ContentItem("Primero", 1), ContentItem("Segundo", 1)]
+    conn.execute("INSERT INTO disks (id, name, name_folded, total_capacity_gb, used_space_gb) VALUES ('a', 'A', 'a', 10, 3)")
+    # Filas insertadas en otro orden que position (p. ej. tras reordenar contenidos)
+    conn.executemany(
+        "INSERT INTO content_items (disk_id, position, description, description_folded, size_gb) VALUES ('a', ?, ?, ?, 1)",
+        [(2, "Segundo", "segundo"), (0, "Tercero", "tercero"), (1, "Primero", "primero")],
+    )
+    # Sin el índice (disk_id, position) el orden de group_concat depende solo del plan de la consulta
+    conn.execute("DROP INDEX idx_content_items_disk")
+    conn.commit()
+    conn.close()
+
+    service = SQLiteService(path)
+    try:
+        assert service.get_disk_summaries()[0].summary == summarize_contents(items)
+    finally:
+        service.close()
+
+def test_migrations_are_not_reapplied(tmp_path, sample_disks):
+    path = str(tmp_path / "catalog.db")
+    service = SQLiteService(path)
+    service.add_disks(sample_disks())
+    service.close()
+    reopened = SQLiteService(path)
+    try:
+        assert [d.id for d in reopened.get_all_disks()] == ["d1", "d2", "d3", "d4"]
+    finally:
+        reopened.close()
@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from services.metrics import Measurement, MetricsRegistry, Series
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    registry.enabled = True
+    return registry
+
+def _request(size):
+    return SimpleNamespace(content=b"x" * size)
+
+def _response(size):
+    return SimpleNamespace(read=lambda: None, num_bytes_downloaded=size)
+
+def test_series_percentiles_over_the_window():
+    series = Series(window=100)
+    for duration in range(100, 0, -1):
+        series.add(float(duration), Measurement("m"), failed=duration % 10 == 0)
+    summary = series.summary()
+    assert (summary["p50_ms"], summary["p90_ms"], summary["p99_ms"], summary["max_ms"]) == (50, 90, 99, 100)
+    assert summary["mean_ms"] == 50.5 and summary["count"] == 100 and summary["errors"] == 10
+
+    # La ventana solo conserva las últimas duraciones; los totales cuentan todas
+    small = Series(window=10)
+    for duration in range(1, 21):
+        small.add(float(duration), Measurement("m"), failed=False)
+    summary = small.summary()
+    assert (summary["p50_ms"], summary["p99_ms"]) == (15, 20)
+    assert summary["count"] == 20 and summary["mean_ms"] == 10.5
+
+    assert Series().summary()["p50_ms"] == 0.0 and Series().summary()["mean_ms"] == 0.0
+    single = Series()
+    single.add(7.0, Measurement("m"), failed=False)
+    assert single.summary()["p50_ms"] == single.summary()["p99_ms"] == 7.0
+
+def test_nested_timers_attribute_http_bytes_to_every_level(registry):
+    with registry.timer("outer") as outer:
+        registry.http_request_hook(_request(10))
+        registry.http_response_hook(_response(100))
+        with registry.timer("inner") as inner:
+            registry.http_request_hook(_request(1))
+            registry.http_response_hook(_response(1000))
+            with registry.timer("innermost"):
+                registry.http_request_hook(_request(5))
+        assert (inner.bytes_out, inner.bytes_in, inner.requests) == (6, 1000, 2)
+    assert (outer.bytes_out, outer.bytes_in, outer.requests) == (16, 1100, 3)
+
+    summary = registry.summary()
+    assert (summary["outer"]["bytes_out"], summary["outer"]["bytes_in"], summary["outer"]["requests"]) == (16, 1100, 3)
+    assert (summary["inner"]["bytes_out"], summary["inner"]["bytes_in"]) == (6, 1000)
+    assert summary["innermost"]["bytes_out"] == 5
+    # Fuera de un timer los hooks no cuentan nada
+    registry.http_request_hook(_request(50))
+    assert registry.summary() == summary
+
+def test_timed_async_functions(registry):
+    @registry.timed("fetch")
+    async def fetch(size, fail=False):
+        registry.http_request_hook(_request(size))
+        await asyncio.sleep(0.01)
+        registry.http_response_hook(_response(size * 10))
+        if fail:
+            raise RuntimeError("caído")
+        return list(range(size))
+
+    assert asyncio.iscoroutinefunction(fetch) and fetch.__name__ == "fetch"
+
+    async def scenario():
+        # Llamadas concurrentes: cada tarea tiene su propia medición (contextvars)
+        results = await asyncio.gather(fetch(1), fetch(2), fetch(3))
+        with pytest.raises(RuntimeError):
+            await fetch(4, fail=True)
+        return results
+
+    assert [len(result) for result in asyncio.run(scenario())] == [1, 2, 3]
+    summary = registry.summary()["fetch"]
+    assert summary["count"] == 4 and summary["errors"] == 1
+    assert summary["rows"] == 6  # la llamada fallida no devuelve filas
+    assert (summary["bytes_out"], summary["bytes_in"], summary["requests"]) == (10, 100, 4)
+    assert summary["p50_ms"] >= 10
+
+def test_timed_counts_rows_and_respects_disabled(registry):
+    @registry.timed("sync")
+    def load(value):
+        return value
+
+    load([1, 2, 3])
+    load(object())
+    load(None)
+    load(True)
+    assert registry.summary()["sync"]["rows"] == 4
+
+    registry.enabled = False
+    load([1])
+
+    @registry.timed("async_disabled")
+    async def disabled():
+        return [1]
+
+    assert asyncio.run(disabled()) == [1]
+    assert registry.summary()["sync"]["count"] == 4 and "async_disabled" not in registry.summary()
@@ -0,0 +1,89 @@
+import random
+import pytest
+from core.models import ContentColumns, ContentItem, ContentList, Disk
+
+SLICES = [slice(None), slice(1, 4), slice(-3, None), slice(None, None, 2), slice(None, None, -1), slice(5, 1, -2), slice(10, 20)]
+
+def _random_item(rng):
+    # Tamaños múltiplos de 1/4: las sumas son exactas y se pueden comparar con ==
+    return ContentItem(rng.choice(["Películas", "fotos_2020", "Juegos/Zelda", "año"]) + str(rng.randint(0, 99)),
+                       rng.randint(0, 400) / 4, rng.choice([None, None, "abc123"]))
+
+def _rows(items):
+    return [(item.description, item.size_gb, item.content_hash) for item in items]
+
+def _check_equivalent(contents, expected):
+    assert len(contents) == len(expected)
+    assert bool(contents) == bool(expected)
+    assert _rows(contents) == _rows(expected)
+    for index in range(-len(expected), len(expected)):
+        assert _rows([contents[index]]) == _rows([expected[index]])
+    for part in SLICES:
+        assert _rows(contents[part]) == _rows(expected[part])
+    with pytest.raises(IndexError):
+        contents[len(expected)]
+    assert contents.total == sum(item.size_gb for item in expected)
+    assert Disk("d", "D", 1000, contents).used_space_gb == sum(item.size_gb for item in expected)
+
+@pytest.mark.parametrize("container", [ContentList, ContentColumns])
+def test_append_extend_clear_match_plain_list(container):
+    rng = random.Random(container.__name__)
+    initial = [_random_item(rng) for _ in range(5)]
+    contents, expected = container(initial), list(initial)
+    _check_equivalent(contents, expected)
+    for _ in range(200):
+        operation = rng.random()
+        if operation < 0.5:
+            item = _random_item(rng)
+            contents.append(item)
+            expected.append(item)
+        elif operation < 0.8:
+            items = [_random_item(rng) for _ in range(rng.randint(0, 6))]
+            contents.extend(iter(items))  # también con iteradores de un solo uso
+            expected.extend(items)
+        elif operation < 0.85:
+            contents.clear()
+            expected.clear()
+        _check_equivalent(contents, expected)
+
+def test_content_list_mutations_keep_total():
+    rng = random.Random(7)
+    expected = [_random_item(rng) for _ in range(20)]
+    contents = ContentList(expected)
+    for _ in range(200):
+        operation = rng.randrange(7)
+        if operation == 0:
+            index, item = rng.randint(-5, len(expected)), _random_item(rng)
+            contents.insert(index, item)
+            expected.insert(index, item)
+        elif operation == 1 and expected:
+            item = rng.choice(expected)
+            contents.remove(item)
+            expected.remove(item)
+        elif operation == 2 and expected:
+            index = rng.randrange(-len(expected), len(expected))
+            assert contents.pop(index) is expected.pop(index)
+        elif operation == 3 and expected:
+            index, item = rng.randrange(len(expected)), _random_item(rng)
+            contents[index] = item
+            expected[index] = item
+        elif operation == 4 and len(expected) > 3:
+            part = rng.choice(SLICES[:4])
+            del contents[part]
+            del expected[part]
+        elif operation == 5:
+            items = [_random_item(rng) for _ in range(3)]
+            contents += items
+            expected += items
+        elif operation == 6 and len(expected) < 50:
+            contents *= 2
+            expected *= 2
+        _check_equivalent(contents, expected)
+
+def test_columns_total_and_sizes_with_inexact_floats():
+    items = [ContentItem(f"f{i}", 0.1) for i in range(10)] + [ContentItem("entero", 40)]
+    columns = ContentColumns(items)
+    assert columns.total == pytest.approx(41.0)
+    assert columns[-1].size_gb == 40 and isinstance(columns[-1].size_gb, int)
+    assert columns[0].size_gb == 0.1
+    assert Disk.from_dict(Disk("d", "D", 100, items).to_dict(), columnar=True).used_space_gb == pytest.approx(41.0)
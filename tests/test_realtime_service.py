@@ -0,0 +1,153 @@
+import asyncio
+from realtime import RealtimeSubscribeStates
+from core.models import ContentItem, Disk
+from services import realtime_service
+from services.realtime_service import CHANNEL_NAME, RealtimeSubscriber
+from services.sync_service import SyncEngine
+from tests.fakes import FakeSupabase
+
+class FakeChannel:
+    def __init__(self, name):
+        self.name = name
+        self.changes_callback = None
+        self.status_callback = None
+
+    def on_postgres_changes(self, event, schema, table, callback):
+        assert (event, schema, table) == ("*", "public", "disks")
+        self.changes_callback = callback
+        return self
+
+    async def subscribe(self, callback):
+        self.status_callback = callback
+        return self
+
+    def deliver(self, event_type, record=None, old_record=None, errors=None):
+        self.changes_callback({"data": {"type": event_type, "record": record, "old_record": old_record, "errors": errors}})
+
+class FakeClient:
+    """Realtime client that only creates channels; the test drives their statuses and events."""
+
+    def __init__(self):
+        self.channels = []
+        self.removed = []
+
+    def channel(self, name):
+        self.channels.append(FakeChannel(name))
+        return self.channels[-1]
+
+    async def remove_channel(self, channel):
+        self.removed.append(channel)
+
+async def _until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timeout"
+        await asyncio.sleep(0.005)
+
+def _row(remote, disk_id):
+    return dict(remote.get_disk_by_id(disk_id).to_dict(), updated_at=remote.updated_at[disk_id].isoformat())
+
+def _setup():
+    remote = FakeSupabase()
+    remote.add_disks([Disk("a", "Fotos", 100, [ContentItem("raw", 10)]), Disk("b", "Juegos", 500, [])])
+    subscriber = RealtimeSubscriber(SyncEngine(remote, overlap_s=0.0))
+    subscriber._client = FakeClient()
+    received = []
+
+    def on_changes(changed, removed):
+        received.append(([disk.id for disk in changed], list(removed)))
+    return remote, subscriber, received, on_changes
+
+def test_subscribe_catches_up_then_applies_events():
+    remote, subscriber, received, on_changes = _setup()
+    added = []
+
+    async def scenario():
+        await subscriber.start(on_changes)
+        channel = subscriber._client.channels[-1]
+        assert channel.name == CHANNEL_NAME
+
+        channel.status_callback(RealtimeSubscribeStates.SUBSCRIBED, None)
+        await _until(lambda: subscriber.catch_ups == 1)
+        assert subscriber.status == "SUBSCRIBED"
+
+        added.append(remote.add_disk("Nuevo", 10, []).id)
+        channel.deliver("INSERT", _row(remote, added[0]))
+        remote.update_disk("a", "Fotos 2", 100, [ContentItem("raw", 20)])
+        channel.deliver("UPDATE", _row(remote, "a"), {"id": "a"})
+        remote.delete_disk("b")
+        channel.deliver("DELETE", None, {"id": "b"})
+        channel.deliver("DELETE", None, {"id": "desconocido"})
+        await subscriber.stop()
+
+    asyncio.run(scenario())
+    assert received == [(["a", "b"], []), (added, []), (["a"], []), ([], ["b"])]
+    engine = subscriber.engine
+    assert [disk.id for disk in engine.get_all_disks()] == ["a", added[0]]
+    assert engine.get_disk_by_id("a").used_space_gb == 20
+    assert engine.watermark == remote.updated_at["a"]
+    assert subscriber.events_applied == 4  # el DELETE de un id desconocido se procesa sin cambios
+
+def test_event_without_record_falls_back_to_a_delta_sync():
+    remote, subscriber, received, on_changes = _setup()
+
+    async def scenario():
+        await subscriber.start(on_changes)
+        channel = subscriber._client.channels[-1]
+        channel.status_callback(RealtimeSubscribeStates.SUBSCRIBED, None)
+        await _until(lambda: subscriber.catch_ups == 1)
+
+        remote.update_disk("b", "Juegos PS", 500, [ContentItem("iso", 50)])
+        channel.deliver("UPDATE", None, {"id": "b"}, errors=["payload too large"])
+        await _until(lambda: subscriber.catch_ups == 2)
+        await subscriber.stop()
+
+    asyncio.run(scenario())
+    assert received[-1] == (["b"], [])
+    assert subscriber.engine.get_disk_by_id("b").name == "Juegos PS"
+    assert subscriber.events_applied == 0
+
+def test_channel_error_resubscribes_and_catches_up(monkeypatch):
+    monkeypatch.setattr(realtime_service, "RESUBSCRIBE_DELAY_S", 0.0)
+    remote, subscriber, received, on_changes = _setup()
+
+    async def scenario():
+        await subscriber.start(on_changes)
+        first = subscriber._client.channels[-1]
+        first.status_callback(RealtimeSubscribeStates.SUBSCRIBED, None)
+        await _until(lambda: subscriber.catch_ups == 1)
+
+        # Se cae la conexión: los cambios de ese intervalo no llegan como eventos
+        first.status_callback(RealtimeSubscribeStates.CHANNEL_ERROR, RuntimeError("socket closed"))
+        first.status_callback(RealtimeSubscribeStates.TIMED_OUT, None)  # no lanza una segunda resuscripción
+        remote.delete_disk("a")
+        remote.add_disks([Disk("c", "Series", 200, [])])
+        await _until(lambda: len(subscriber._client.channels) == 2)
+        assert subscriber._client.removed == [first]
+        assert subscriber.status == "TIMED_OUT"
+
+        second = subscriber._client.channels[-1]
+        second.status_callback(RealtimeSubscribeStates.SUBSCRIBED, None)
+        await _until(lambda: subscriber.catch_ups == 2)
+        await subscriber.stop()
+        assert subscriber._client.removed == [first, second]
+
+    asyncio.run(scenario())
+    assert received[-1] == (["c"], ["a"])
+    assert [disk.id for disk in subscriber.engine.get_all_disks()] == ["b", "c"]
+
+def test_stop_silences_late_events():
+    remote, subscriber, received, on_changes = _setup()
+
+    async def scenario():
+        await subscriber.start(on_changes)
+        channel = subscriber._client.channels[-1]
+        await subscriber.stop()
+        remote.update_disk("a", "Fotos 2", 100, [])
+        channel.deliver("UPDATE", _row(remote, "a"), {"id": "a"})
+        channel.status_callback(RealtimeSubscribeStates.CHANNEL_ERROR, None)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert received == []
+    assert len(subscriber._client.channels) == 1
@@ -0,0 +1,105 @@
+import random
+from core.filters import DiskFilter
+from core.models import ContentItem, Disk
+from core.search_index import EXACT_SCORE, PREFIX_SCORE, SUBSTRING_SCORE, ContentIndex, _tokenize
+
+WORDS = ["Películas", "peli", "series", "Fotos", "foto_2020", "música", "backup", "Juegos", "zelda", "año", "ISO", "mkv", "dark"]
+SEPARATORS = [" ", "/", "_", ".", " - ", ""]
+
+def _description(rng):
+    parts = [rng.choice(WORDS) + (str(rng.randint(1, 30)) if rng.random() < 0.3 else "") for _ in range(rng.randint(1, 4))]
+    text = parts[0]
+    for part in parts[1:]:
+        text += rng.choice(SEPARATORS) + part
+    return text
+
+def _catalog(rng, count=60):
+    return [Disk(f"d{i}", f"Disco {i}", 1000, [ContentItem(_description(rng), 1) for _ in range(rng.randint(0, 8))])
+            for i in range(count)]
+
+def _queries(rng, disks):
+    descriptions = [item.description for disk in disks for item in disk.contents]
+    # La consulta vacía no llega al índice: filter_disks solo lo consulta con texto
+    queries = [" ", "_", "pel", "PELÍ", "zz", "o_2", "s/f", "fotos 2", "1", "ñ"] + WORDS
+    for _ in range(80):
+        text = rng.choice(descriptions)
+        start = rng.randint(0, len(text) - 1)
+        queries.append(text[start:start + rng.randint(1, 12)])
+    return queries
+
+def _brute_force(disks, query):
+    return {disk.id for disk in DiskFilter(content_query=query).apply(disks)}
+
+def test_matching_disk_ids_equals_linear_filter():
+    rng = random.Random(3)
+    disks = _catalog(rng)
+    index = ContentIndex()
+    for disk in disks:
+        index.add_disk(disk)
+    for query in _queries(rng, disks):
+        assert index.matching_disk_ids(query) == _brute_force(disks, query), query
+
+def test_updates_and_removals_keep_index_consistent():
+    rng = random.Random(8)
+    disks = {disk.id: disk for disk in _catalog(rng)}
+    index = ContentIndex()
+    for disk in disks.values():
+        index.add_disk(disk)
+    for _ in range(40):
+        disk_id = rng.choice(sorted(disks))
+        if rng.random() < 0.4:
+            index.remove_disk(disk_id)
+            del disks[disk_id]
+        else:
+            disks[disk_id] = Disk(disk_id, "x", 1000, [ContentItem(_description(rng), 1) for _ in range(rng.randint(0, 5))])
+            index.update_disk(disks[disk_id])
+    for query in _queries(rng, list(disks.values())):
+        assert index.matching_disk_ids(query) == _brute_force(disks.values(), query), query
+    # Los tokens que ya no aparecen en ningún contenido desaparecen del vocabulario
+    vocabulary = {token for disk in disks.values() for item in disk.contents for token in _tokenize(item.description.lower())}
+    assert set(index._postings) == vocabulary
+    assert index._sorted_tokens == sorted(vocabulary)
+    assert len(index) == sum(len(disk.contents) for disk in disks.values())
+
+def test_rebuild_matches_incremental_index():
+    rng = random.Random(12)
+    disks = _catalog(rng, 20)
+    incremental = ContentIndex()
+    for disk in disks:
+        incremental.add_disk(disk)
+    rebuilt = ContentIndex()
+    rebuilt.rebuild(disks)
+    for query in _queries(rng, disks):
+        assert rebuilt.matching_disk_ids(query) == incremental.matching_disk_ids(query)
+
+def test_search_without_fuzzy_returns_every_substring_match():
+    rng = random.Random(5)
+    disks = _catalog(rng)
+    index = ContentIndex()
+    for disk in disks:
+        index.add_disk(disk)
+    for word in ["pel", "foto", "zel", "kv", "2020"]:
+        hits = index.search(word, limit=10_000, fuzzy=False)
+        expected = sorted((disk.id, item.description) for disk in disks for item in disk.contents
+                          if any(word in token for token in _tokenize(item.description.lower())))
+        assert sorted((hit.disk_id, hit.description) for hit in hits) == expected
+        scores = [hit.score for hit in hits]
+        assert scores == sorted(scores, reverse=True)
+
+def test_search_ranks_exact_prefix_substring_then_fuzzy():
+    index = ContentIndex()
+    index.add_disk(Disk("a", "A", 10, [ContentItem("peli", 1), ContentItem("peliculas", 1),
+                                       ContentItem("superpeli", 1), ContentItem("pelo", 1)]))
+    hits = index.search("peli")
+    assert [(hit.description, hit.score) for hit in hits[:3]] == [
+        ("peli", EXACT_SCORE), ("peliculas", PREFIX_SCORE), ("superpeli", SUBSTRING_SCORE)]
+    assert [hit.description for hit in index.search("pelicluas")][:1] == ["peliculas"]
+    assert index.search("peli", limit=2) == hits[:2]
+    assert index.search("  ") == []
+
+def test_multi_word_search_requires_every_word():
+    index = ContentIndex()
+    index.add_disk(Disk("a", "A", 10, [ContentItem("Fotos 2020 verano", 1), ContentItem("Fotos invierno", 1)]))
+    index.add_disk(Disk("b", "B", 10, [ContentItem("verano backup", 1)]))
+    hits = index.search("fotos verano", fuzzy=False)
+    assert [(hit.disk_id, hit.description) for hit in hits] == [("a", "Fotos 2020 verano")]
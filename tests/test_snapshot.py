@@ -0,0 +1,165 @@
+import gzip
+import os
+import pytest
+from core.content_tree import ContentTree
+from core.models import ContentItem
+from services.scanner import DirectoryScanner
+from services.snapshot import (FILE_HASH, FILE_NAME, FILE_PARTIAL_HASH, DirectoryRecord, DiskSnapshot, ScanDiff,
+                               SnapshotStore, carry_hashes)
+
+OLD_MTIME_NS = 1_000_000_000_000_000_000  # 2001: cualquier cambio posterior deja un mtime distinto
+
+def _write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+def _replace(path, size):
+    # Reescritura atómica (temporal + rename), como hacen los editores y las copias: cambia el mtime del directorio
+    _write(path + ".tmp", size)
+    os.replace(path + ".tmp", path)
+
+def _age_directories(root):
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+
+def _scan(root, previous=None):
+    scanner = DirectoryScanner(max_workers=4, progress_interval=0.01)
+    entries = scanner.scan(str(root), previous=previous, record_snapshot=True)
+    return scanner, {entry.name: (entry.is_dir, entry.size_bytes, entry.file_count) for entry in entries}
+
+def _listing(snapshot):
+    # Contenido comparable de un snapshot (sin depender del orden de scandir)
+    return {relpath: (record.mtime_ns, record.inode, sorted(map(tuple, record.files)), sorted(record.subdirs))
+            for relpath, record in snapshot.directories.items()}
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "disco"
+    _write(str(root / "leeme.txt"), 10)
+    _write(str(root / "fotos" / "2020" / "a.jpg"), 100)
+    _write(str(root / "fotos" / "2020" / "b.jpg"), 200)
+    _write(str(root / "fotos" / "2021" / "c.jpg"), 300)
+    _write(str(root / "series" / "dark" / "s01.mkv"), 1000)
+    _write(str(root / "juegos" / "zelda.iso"), 50)
+    _age_directories(root)
+    return root
+
+def test_full_scan_records_every_directory(tree):
+    scanner, entries = _scan(tree)
+    assert entries == {
+        "leeme.txt": (False, 10, 1),
+        "fotos": (True, 600, 3),
+        "series": (True, 1000, 1),
+        "juegos": (True, 50, 1),
+    }
+    assert set(scanner.snapshot.directories) == {"", "fotos", os.path.join("fotos", "2020"), os.path.join("fotos", "2021"),
+                                                 "series", os.path.join("series", "dark"), "juegos"}
+    assert scanner.snapshot.file_count == 6
+    assert scanner.progress().reused_directories == 0
+
+def test_incremental_scan_matches_full_scan(tree):
+    first, _ = _scan(tree)
+    previous = first.snapshot
+
+    _write(str(tree / "fotos" / "2021" / "d.jpg"), 400)  # añadido
+    os.remove(str(tree / "juegos" / "zelda.iso"))  # eliminado
+    _replace(str(tree / "series" / "dark" / "s01.mkv"), 1500)  # redimensionado
+    _write(str(tree / "nuevo" / "x.bin"), 5)  # carpeta nueva de primer nivel
+
+    incremental, incremental_entries = _scan(tree, previous=previous)
+    full, full_entries = _scan(tree)
+    assert incremental_entries == full_entries
+    assert _listing(incremental.snapshot) == _listing(full.snapshot)
+
+    changed = {"", os.path.join("fotos", "2021"), "juegos", os.path.join("series", "dark"), "nuevo"}
+    unchanged = set(previous.directories) - changed
+    assert unchanged == {"fotos", os.path.join("fotos", "2020"), "series"}
+    for relpath in unchanged:
+        assert incremental.snapshot.directories[relpath] is previous.directories[relpath]
+    for relpath in changed - {""}:
+        assert incremental.snapshot.directories[relpath] is not previous.directories.get(relpath)
+    assert incremental.progress().reused_directories == len(unchanged)
+
+def test_scan_diff_between_snapshots(tree):
+    first, _ = _scan(tree)
+    previous = first.snapshot
+    os.remove(str(tree / "leeme.txt"))
+    _write(str(tree / "notas.txt"), 20)
+    _replace(str(tree / "fotos" / "2020" / "a.jpg"), 150)
+    _write(str(tree / "nuevo" / "x.bin"), 5)
+    second, _ = _scan(tree, previous=previous)
+
+    diff = ScanDiff.between(previous, second.snapshot)
+    assert sorted(item.description for item in diff.added) == ["(Carpeta) nuevo", "notas.txt"]
+    assert [item.description for item in diff.removed] == ["leeme.txt"]
+    assert [item.description for item in diff.resized] == ["(Carpeta) fotos"]
+    assert ScanDiff.between(second.snapshot, second.snapshot).is_empty
+    assert sorted(item.description for item in ScanDiff.between(None, previous).added) == [
+        "(Carpeta) fotos", "(Carpeta) juegos", "(Carpeta) series", "leeme.txt"]
+
+def test_scan_diff_apply_keeps_manual_items():
+    contents = [ContentItem("(Carpeta) fotos", 1), ContentItem("leeme.txt", 0), ContentItem("Anotado a mano", 7)]
+    diff = ScanDiff(added=[ContentItem("(Carpeta) nuevo", 2), ContentItem("Anotado a mano", 9)],
+                    removed=[ContentItem("leeme.txt", 0)], resized=[ContentItem("(Carpeta) fotos", 3)])
+    result = diff.apply(contents)
+    assert [(item.description, item.size_gb) for item in result] == [
+        ("(Carpeta) fotos", 3), ("Anotado a mano", 7), ("(Carpeta) nuevo", 2)]
+    assert [item.size_gb for item in contents] == [1, 0, 7]  # la lista original no se modifica
+
+def test_carry_hashes_only_for_unchanged_files():
+    record = DirectoryRecord(0, 0, [["a", 10, 5, 1, "p", "h"], ["b", 20, 5, 2]], [])
+    cached = record.cached_hashes()
+    assert cached == {"a": [10, 5, "p", "h"]}
+
+    unchanged = ["a", 10, 5, 1]
+    carry_hashes(unchanged, cached)
+    assert unchanged[FILE_PARTIAL_HASH:] == ["p", "h"]
+    for changed in (["a", 11, 5, 1], ["a", 10, 6, 1], ["c", 10, 5, 3]):
+        carry_hashes(changed, cached)
+        assert len(changed) == FILE_PARTIAL_HASH
+
+def test_rescan_of_modified_directory_keeps_hashes_of_unchanged_files(tree):
+    first, _ = _scan(tree)
+    previous = first.snapshot
+    dir_2020 = os.path.join("fotos", "2020")
+    for record in previous.directories[dir_2020].files:
+        record.extend(["parcial-" + record[FILE_NAME], "completo-" + record[FILE_NAME]])
+    _replace(str(tree / "fotos" / "2020" / "b.jpg"), 250)
+
+    second, _ = _scan(tree, previous=previous)
+    files = {record[FILE_NAME]: record for record in second.snapshot.directories[dir_2020].files}
+    assert files["a.jpg"][FILE_HASH] == "completo-a.jpg"
+    assert len(files["b.jpg"]) == FILE_PARTIAL_HASH
+
+def test_snapshot_store_round_trip(tree, tmp_path):
+    scanner, _ = _scan(tree)
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+    assert store.load("d1") is None and store.load_tree("d1") is None
+
+    store.save("d1", scanner.snapshot)
+    loaded = store.load("d1")
+    assert loaded.root == scanner.snapshot.root and loaded.taken_at == scanner.snapshot.taken_at
+    assert _listing(loaded) == _listing(scanner.snapshot)
+    expected_tree = ContentTree.from_snapshot(scanner.snapshot).to_compact()
+    assert store.load_tree("d1").to_compact() == expected_tree
+
+    # Snapshots antiguos sin árbol: se reconstruye desde el snapshot y se guarda
+    os.remove(store._tree_path("d1"))
+    assert store.load_tree("d1").to_compact() == expected_tree
+    assert os.path.exists(store._tree_path("d1"))
+
+    store.delete("d1")
+    store.delete("d1")
+    assert store.load("d1") is None
+    assert not os.listdir(store.directory)
+
+def test_snapshot_store_ignores_corrupt_files(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    with open(store._path("d1"), "wb") as f:
+        f.write(b"no es gzip")
+    with gzip.open(store._path("d2"), "wt", encoding="utf-8") as f:
+        f.write("{roto")
+    assert store.load("d1") is None
+    assert store.load("d2") is None
+    assert DiskSnapshot.from_dict({}).directories == {}
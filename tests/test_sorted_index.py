@@ -0,0 +1,80 @@
+import random
+import pytest
+from core.models import ContentItem, Disk
+from core.repository import SORT_KEYS
+from core.sorted_index import SortedIndex
+
+def _expected(values, low=None, high=None):
+    return [disk_id for value, disk_id in sorted((v, k) for k, v in values.items())
+            if (low is None or value >= low) and (high is None or value <= high)]
+
+def test_random_operations_match_brute_force():
+    rng = random.Random(1)
+    index, values = SortedIndex(), {}
+    index.add_many((f"d{i}", rng.randint(0, 50)) for i in range(200))
+    values.update({f"d{i}": index.value(f"d{i}") for i in range(200)})
+    for _ in range(1500):
+        disk_id = f"d{rng.randint(0, 260)}"
+        if rng.random() < 0.6:
+            value = rng.choice([rng.randint(0, 50), rng.random() * 50])
+            index.add(disk_id, value)
+            values[disk_id] = value
+        else:
+            assert index.remove(disk_id) == (disk_id in values)
+            values.pop(disk_id, None)
+        low = rng.choice([None, rng.randint(0, 50)])
+        high = rng.choice([None, rng.randint(0, 50), rng.random() * 50])
+        assert index.range(low, high) == _expected(values, low, high)
+        assert index.count(low, high) == len(_expected(values, low, high))
+    assert len(index) == len(values)
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_pages(descending):
+    index = SortedIndex()
+    index.add_many((f"d{i}", i % 7) for i in range(50))
+    ordered = [disk_id for _, disk_id in sorted(((i % 7, f"d{i}") for i in range(50)), reverse=descending)]
+    for offset, limit in [(0, None), (0, 10), (45, 10), (50, 5), (10, 0)]:
+        end = None if limit is None else offset + limit
+        assert index.page(offset, limit, descending) == ordered[offset:end]
+
+def test_bulk_and_incremental_loads_agree():
+    pairs = [(f"d{i}", (i * 37) % 11) for i in range(100)]
+    bulk, incremental = SortedIndex(), SortedIndex()
+    bulk.add_many(pairs)
+    for disk_id, value in pairs:
+        incremental.add(disk_id, value)
+    assert bulk.range() == incremental.range()
+    # Lote con ids repetidos o ya indexados: se inserta uno a uno
+    bulk.add_many([("d1", 99), ("d1", 98), ("nuevo", 0)])
+    assert bulk.value("d1") == 98 and bulk.largest(1) == ["d1"] and len(bulk) == 101
+
+def test_bounds_are_inclusive():
+    index = SortedIndex()
+    index.add_many([("a", 1.0), ("b", 2.0), ("c", 2.0), ("d", 3.0)])
+    assert index.range(2.0, 2.0) == ["b", "c"]
+    assert index.range(2.5, 1.0) == []
+    assert (index.smallest(2), index.largest(2)) == (["a", "b"], ["d", "c"])
+
+def _catalog():
+    rng = random.Random(5)
+    return [Disk(f"d{i:03}", f"Disco {i}", rng.randint(1, 2000), [ContentItem("x", rng.randint(0, 800))]) for i in range(120)]
+
+@pytest.mark.parametrize("key", SORT_KEYS)
+@pytest.mark.parametrize("descending", [False, True])
+def test_backends_sort_like_python(service, key, descending):
+    service.add_disks([disk for disk in _catalog() if disk.free_space_gb >= 0])
+    for disk in service.get_all_disks()[:30]:
+        service.update_disk(disk.id, disk.name, disk.total_capacity_gb + 500, list(disk.contents))
+    service.delete_disks([disk.id for disk in service.get_all_disks()[30:40]])
+    expected = sorted(service.get_all_disks(), key=lambda disk: (getattr(disk, key), disk.id), reverse=descending)
+    got = service.sorted_disks(key, descending, offset=5, limit=20)
+    assert [getattr(disk, key) for disk in got] == pytest.approx([getattr(disk, key) for disk in expected[5:25]])
+
+def test_memory_range_queries(memory_service):
+    memory_service.add_disks(_catalog())
+    disks = memory_service.get_all_disks()
+    in_range = memory_service.disks_in_range("usage_percentage", 20, 60)
+    assert {disk.id for disk in in_range} == {disk.id for disk in disks if 20 <= disk.usage_percentage <= 60}
+    assert memory_service.count_in_range("free_space_gb", low=500) == sum(disk.free_space_gb >= 500 for disk in disks)
+    top = memory_service.top_disks("total_capacity_gb", 3)
+    assert [disk.total_capacity_gb for disk in top] == sorted((disk.total_capacity_gb for disk in disks), reverse=True)[:3]
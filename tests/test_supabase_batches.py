@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+from core.models import ContentItem, Disk
+from services.supabase_service import SupabaseService
+
+def _service(chunk_size=4):
+    return SupabaseService(client=MagicMock(), chunk_size=chunk_size)
+
+class FakeSend:
+    """Records every chunk sent and rejects the ones for which `error_for(chunk)` returns an error."""
+
+    def __init__(self, error_for):
+        self.error_for = error_for
+        self.chunks = []
+
+    def __call__(self, chunk):
+        self.chunks.append([row["id"] for row in chunk])
+        error = self.error_for(chunk)
+        if error is not None:
+            raise error
+
+def _rows(count):
+    return [{"id": f"d{i}", "name": f"Disco {i}"} for i in range(count)]
+
+def _rejecting(bad_ids, code):
+    return lambda chunk: APIError({"message": "fila rechazada", "code": code}) if any(row["id"] in bad_ids for row in chunk) else None
+
+@pytest.mark.parametrize("code", ["23505", "23514", "22P02", "22001", "400", "409", 409])
+def test_row_level_errors_isolate_the_offending_rows(code):
+    send = FakeSend(_rejecting({"d2", "d7"}, code))
+    result = _service()._write_batches(_rows(10), send)
+    assert sorted(result) == [0, 1, 3, 4, 5, 6, 8, 9]
+    assert [(failure.index, failure.disk_id, failure.transport) for failure in result.failures] == [(2, "d2", False), (7, "d7", False)]
+    assert ["d2"] in send.chunks and ["d7"] in send.chunks
+
+@pytest.mark.parametrize("code", ["42501", "PGRST301", "42P01", "42703", "401", "403", None])
+def test_other_errors_fail_the_whole_chunk_without_splitting(code):
+    send = FakeSend(_rejecting({"d2"}, code))
+    result = _service()._write_batches(_rows(10), send)
+    assert send.chunks == [["d0", "d1", "d2", "d3"], ["d4", "d5", "d6", "d7"], ["d8", "d9"]]
+    assert sorted(result) == [4, 5, 6, 7, 8, 9]
+    assert [failure.disk_id for failure in result.failures] == ["d0", "d1", "d2", "d3"]
+    assert all(failure.error == "fila rechazada" and not failure.transport for failure in result.failures)
+
+def test_transport_errors_fail_the_chunk_as_transport():
+    send = FakeSend(lambda chunk: httpx.ConnectError("sin conexión") if chunk[0]["id"] == "d4" else None)
+    result = _service()._write_batches(_rows(6), send)
+    assert sorted(result) == [0, 1, 2, 3]
+    assert [(failure.disk_id, failure.transport) for failure in result.failures] == [("d4", True), ("d5", True)]
+    assert len(send.chunks) == 2
+
+def test_plain_ids_are_reported_for_deletes():
+    # delete_disks envía listas de ids en lugar de filas
+    sent = []
+
+    def send(chunk):
+        sent.append(chunk)
+        if "b" in chunk:
+            raise APIError({"message": "permission denied", "code": "42501"})
+
+    result = _service(chunk_size=2)._write_batches(["a", "b", "c"], send)
+    assert sent == [["a", "b"], ["c"]]
+    assert list(result) == [2]
+    assert [failure.disk_id for failure in result.failures] == ["a", "b"]
+
+def test_conditional_update_filters_on_the_base_version():
+    service = _service()
+    update = service.client.table.return_value.update
+    matched = update.return_value.eq.return_value.eq.return_value.execute
+    matched.return_value.data = [{"id": "a", "updated_at": "2026-10-18T10:00:01+00:00"}]
+    disk = Disk("a", "Fotos", 100, [ContentItem("raw", 10)])
+    assert service.update_disk_if_version(disk, "2026-10-18T10:00:00+00:00") == "2026-10-18T10:00:01+00:00"
+    assert update.call_args.args[0]["used_space_gb"] == 10
+    update.return_value.eq.assert_called_with("id", "a")
+    update.return_value.eq.return_value.eq.assert_called_with("updated_at", "2026-10-18T10:00:00+00:00")
+    # Ninguna fila con esa versión: el disco cambió en el servidor
+    matched.return_value.data = []
+    assert service.update_disk_if_version(disk, "2026-10-18T10:00:00+00:00") is None
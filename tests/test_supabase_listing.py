@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import pytest
+from core.models import ContentItem, Disk, summarize_contents
+from core.repository import SORT_KEYS, _sort_page
+from services import async_supabase_service, supabase_service
+from services.async_supabase_service import AsyncSupabaseService
+from services.supabase_service import SupabaseService
+
+class FakeQuery:
+    """Enough of a postgrest select builder: order(), range() and eq() applied to in-memory rows."""
+
+    def __init__(self, rows, columns, log):
+        self.rows, self.columns, self.log = rows, columns.split(","), log
+        self.orders, self.filters, self.bounds = [], [], None
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def _result(self):
+        self.log.append((self.orders, self.bounds))
+        rows = [row for row in self.rows if all(row[column] == value for column, value in self.filters)]
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        if self.bounds is not None:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        return SimpleNamespace(data=[{column: row[column] for column in self.columns} for row in rows])
+
+    def execute(self):
+        return self._result()
+
+class AsyncFakeQuery(FakeQuery):
+    async def execute(self):
+        return self._result()
+
+class FakeClient:
+    def __init__(self, rows, query_class):
+        self.rows, self.query_class, self.log = rows, query_class, []
+        self.postgrest = MagicMock()
+
+    def table(self, name):
+        assert name == "disks"
+        return SimpleNamespace(select=lambda columns: self.query_class(self.rows, columns, self.log))
+
+def _rows():
+    # Altas en un orden distinto al de los ids; las tres primeras son anteriores a created_at (misma marca)
+    legacy = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    disks = [
+        Disk("c", "Tres", 100, [ContentItem("x", 50)]),
+        Disk("a", "Uno", 100, [ContentItem("y", 50)]),
+        Disk("b", "Dos", 0, []),
+        Disk("f", "Seis", 2000, [ContentItem("Películas", 100), ContentItem("Series", 300)]),
+        Disk("e", "Cinco", 500, [ContentItem("Fotos", 500)]),
+        Disk("d", "Cuatro", 1000, [ContentItem("Juegos", 250)]),
+        Disk("g", "Siete", 100, [ContentItem("z", 50)]),
+    ]
+    rows = []
+    for position, disk in enumerate(disks):
+        created_at = legacy if position < 3 else legacy + timedelta(minutes=position)
+        rows.append(dict(disk.to_dict(), used_space_gb=disk.used_space_gb, contents_summary=summarize_contents(disk.contents),
+                         created_at=created_at.isoformat(), free_space_gb=disk.free_space_gb,
+                         usage_percentage=disk.usage_percentage))
+    return rows
+
+CREATION_ORDER = ["a", "b", "c", "f", "e", "d", "g"]
+
+def _summaries(disks):
+    return [(disk.id, disk.name, disk.total_capacity_gb, disk.used_space_gb, disk.summary, disk.contents_loaded) for disk in disks]
+
+def test_sync_summaries_come_in_creation_order(monkeypatch):
+    monkeypatch.setattr(supabase_service, "CHANGES_PAGE_SIZE", 3)
+    client = FakeClient(_rows(), FakeQuery)
+    disks = SupabaseService(client=client).get_disk_summaries()
+    assert [disk.id for disk in disks] == CREATION_ORDER
+    assert all(orders == [("created_at", False), ("id", False)] for orders, _ in client.log)
+    assert [bounds for _, bounds in client.log] == [(0, 2), (3, 5), (6, 8)]
+
+@pytest.fixture
+def async_service(monkeypatch):
+    monkeypatch.setattr(async_supabase_service, "CHANGES_PAGE_SIZE", 3)
+    service = AsyncSupabaseService()
+    service._client = FakeClient(_rows(), AsyncFakeQuery)
+    service._contents_service = SupabaseService(client=FakeClient(_rows(), FakeQuery))
+    return service
+
+def test_async_summaries_are_lazy_and_in_creation_order(async_service):
+    disks = asyncio.run(async_service.get_disk_summaries())
+    assert [disk.id for disk in disks] == CREATION_ORDER
+    assert not any(disk.contents_loaded for disk in disks)
+    assert [(disk.id, disk.used_space_gb, disk.summary) for disk in disks][3] == ("f", 400, "Películas, Series")
+    # Los contenidos se piden al acceder, con el cliente síncrono
+    assert [item.description for item in disks[3].contents] == ["Películas", "Series"]
+
+@pytest.mark.parametrize("key", SORT_KEYS)
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("offset, limit", [(0, None), (0, 2), (2, 4), (5, None), (6, 10)])
+def test_async_sorted_disks_match_the_default_sort(async_service, key, descending, offset, limit):
+    # La implementación por defecto ordena en memoria el listado resumido: el servidor debe dar lo mismo
+    summaries = asyncio.run(async_service.get_disk_summaries())
+    expected = _sort_page(summaries, key, descending, offset, limit)
+    async_service._client.log.clear()
+    disks = asyncio.run(async_service.sorted_disks(key, descending, offset, limit))
+    assert _summaries(disks) == _summaries(expected)
+    orders, bounds = async_service._client.log[0]
+    assert orders == [(key, descending), ("created_at", False), ("id", False)]
+    assert bounds[0] == offset
+    if limit is not None:
+        assert all(end - start + 1 <= min(limit, 3) for _, (start, end) in async_service._client.log)
+
+def test_async_calls_are_timed(async_service, monkeypatch):
+    from services.metrics import metrics
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    asyncio.run(async_service.sorted_disks("free_space_gb", True, 0, 2))
+    summary = metrics.summary()["supabase_async.sorted_disks"]
+    assert summary["count"] == 1 and summary["rows"] == 2
@@ -0,0 +1,91 @@
+"""
+Runs the SQL migrations against a disposable Postgres database given in
+GESTOR_TEST_POSTGRES_URL (e.g. the one started by `supabase start`). Everything
+happens in one transaction that is rolled back, roles included.
+"""
+import os
+import pathlib
+import uuid
+import pytest
+
+POSTGRES_URL = os.environ.get("GESTOR_TEST_POSTGRES_URL")
+MIGRATIONS_DIR = pathlib.Path(__file__).resolve().parent.parent / "supabase" / "migrations"
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="GESTOR_TEST_POSTGRES_URL no está definida")
+
+@pytest.fixture
+def conn():
+    psycopg = pytest.importorskip("psycopg")
+    connection = psycopg.connect(POSTGRES_URL)
+    try:
+        with connection.cursor() as cursor:
+            # Tabla base del proyecto y un rol cliente sin privilegios de propietario, como anon/authenticated
+            cursor.execute("""
+                create table if not exists public.disks (
+                    id uuid primary key default gen_random_uuid(),
+                    name text not null,
+                    total_capacity_gb integer not null default 0,
+                    used_space_gb numeric not null default 0,
+                    contents jsonb not null default '[]'::jsonb
+                );
+                create role gestor_test_client nologin;
+                grant usage on schema public to gestor_test_client;
+                grant select, insert, update, delete on public.disks to gestor_test_client;
+            """)
+            for name in ("20261018000200_delta_sync.sql", "20261018000500_tombstone_security_definer.sql"):
+                sql = (MIGRATIONS_DIR / name).read_text(encoding="utf-8")
+                # anon/authenticated solo existen en Supabase
+                sql = sql.replace(", anon, authenticated", "")
+                cursor.execute(sql)
+            cursor.execute("grant select on public.disk_tombstones to gestor_test_client")
+        yield connection
+    finally:
+        connection.rollback()
+        connection.close()
+
+def _as_client(cursor, sql, params=()):
+    cursor.execute("set local role gestor_test_client")
+    try:
+        cursor.execute(sql, params)
+    finally:
+        cursor.execute("reset role")
+
+def test_client_role_can_delete_and_leaves_tombstone(conn):
+    disk_id = uuid.uuid4()
+    with conn.cursor() as cursor:
+        _as_client(cursor, "insert into public.disks (id, name) values (%s, 'USB')", (disk_id,))
+        _as_client(cursor, "delete from public.disks where id = %s", (disk_id,))
+        cursor.execute("select count(*) from public.disks where id = %s", (disk_id,))
+        assert cursor.fetchone()[0] == 0
+        cursor.execute("select count(*) from public.disk_tombstones where id = %s", (disk_id,))
+        assert cursor.fetchone()[0] == 1
+
+def test_reinserting_id_as_client_clears_tombstone(conn):
+    disk_id = uuid.uuid4()
+    with conn.cursor() as cursor:
+        _as_client(cursor, "insert into public.disks (id, name) values (%s, 'USB')", (disk_id,))
+        _as_client(cursor, "delete from public.disks where id = %s", (disk_id,))
+        _as_client(cursor, "insert into public.disks (id, name) values (%s, 'USB')", (disk_id,))
+        cursor.execute("select count(*) from public.disk_tombstones where id = %s", (disk_id,))
+        assert cursor.fetchone()[0] == 0
+
+def test_client_role_cannot_write_tombstones_directly(conn):
+    psycopg = pytest.importorskip("psycopg")
+    with conn.cursor() as cursor:
+        cursor.execute("savepoint direct_write")
+        cursor.execute("set local role gestor_test_client")
+        with pytest.raises(psycopg.errors.InsufficientPrivilege):
+            cursor.execute("insert into public.disk_tombstones (id) values (%s)", (uuid.uuid4(),))
+        # Deshace también el set local role
+        cursor.execute("rollback to savepoint direct_write")
+
+def test_listing_order_columns(conn):
+    with conn.cursor() as cursor:
+        existing = uuid.uuid4()
+        cursor.execute("insert into public.disks (id, name, total_capacity_gb, used_space_gb) values (%s, 'Viejo', 0, 5)", (existing,))
+        cursor.execute((MIGRATIONS_DIR / "20261018000600_listing_order.sql").read_text(encoding="utf-8"))
+        new = uuid.uuid4()
+        cursor.execute("insert into public.disks (id, name, total_capacity_gb, used_space_gb) values (%s, 'Nuevo', 200, 50)", (new,))
+        cursor.execute("select id, created_at is not null, usage_percentage from public.disks where id in (%s, %s) order by name",
+                       (existing, new))
+        assert cursor.fetchall() == [(new, True, 25), (existing, True, 0)]
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from core.models import ContentItem, Disk
+from services.sync_service import SyncEngine
+from tests.fakes import FakeSupabase
+
+def _engine(overlap_s=0.0):
+    remote = FakeSupabase()
+    remote.add_disks([Disk("a", "Fotos", 100, [ContentItem("raw", 10)]), Disk("b", "Juegos", 500, [])])
+    engine = SyncEngine(remote, overlap_s=overlap_s)
+    return remote, engine
+
+def test_first_sync_loads_everything():
+    remote, engine = _engine()
+    stats = engine.sync()
+    assert stats.full and stats.fetched_rows == 2
+    assert [d.id for d in engine.get_all_disks()] == ["a", "b"]
+    assert engine.watermark == remote.clock
+    assert engine.version("a") == remote.updated_at["a"].isoformat()
+
+def test_delta_only_downloads_changes():
+    remote, engine = _engine()
+    engine.sync()
+    remote.update_disk("b", "Juegos PS", 500, [ContentItem("iso", 50)])
+    remote.add_disk("Nuevo", 10, [])
+    stats = engine.sync()
+    assert not stats.full
+    assert stats.fetched_rows == 2
+    assert {d.name for d in stats.changed} == {"Juegos PS", "Nuevo"}
+    assert engine.get_disk_by_id("b").used_space_gb == 50
+    assert [d.id for d in engine.filter_disks(name_query="ps")] == ["b"]
+
+def test_overlap_does_not_reapply_rows():
+    remote, engine = _engine(overlap_s=30.0)
+    engine.sync()
+    stats = engine.sync()
+    assert stats.fetched_rows == 2  # El margen vuelve a pedirlas...
+    assert stats.changed == []  # ...pero ya estaban aplicadas
+
+def test_tombstone_removes_disk_from_replica():
+    remote, engine = _engine()
+    engine.sync()
+    remote.delete_disk("a")
+    stats = engine.sync()
+    assert stats.removed == ["a"]
+    assert engine.get_disk_by_id("a") is None
+    assert engine.version("a") is None
+
+def test_readded_id_survives_its_old_tombstone():
+    remote, engine = _engine()
+    engine.sync()
+    remote.delete_disk("a")
+    remote.add_disks([Disk("a", "Fotos otra vez", 100, [])])
+    stats = engine.sync()
+    assert stats.removed == []
+    assert engine.get_disk_by_id("a").name == "Fotos otra vez"
+
+def test_stale_tombstone_loses_against_newer_version():
+    remote, engine = _engine()
+    engine.sync()
+    remote.update_disk("a", "Fotos 2", 100, [])
+    # Tombstone anterior a la última escritura del disco (p. ej. llegó tarde por el margen de solapamiento)
+    remote.tombstones["a"] = remote.updated_at["a"] - timedelta(milliseconds=1)
+    engine._watermark -= timedelta(seconds=5)
+    stats = engine.sync()
+    assert stats.removed == []
+    assert engine.get_disk_by_id("a").name == "Fotos 2"
+
+def test_realtime_events_update_replica_and_watermark():
+    remote, engine = _engine()
+    engine.sync()
+    remote.update_disk("b", "Juegos viejos", 500, [])
+    record = dict(remote.get_disk_by_id("b").to_dict(), updated_at=remote.updated_at["b"].isoformat())
+    changed, removed = engine.apply_change("UPDATE", record)
+    assert [d.name for d in changed] == ["Juegos viejos"] and removed == []
+    assert engine.watermark == remote.updated_at["b"]
+    # El mismo evento repetido no cambia nada
+    assert engine.apply_change("UPDATE", record) == ([], [])
+    assert engine.apply_change("DELETE", None, {"id": "b"}) == ([], ["b"])
+    assert engine.apply_change("DELETE", None, {"id": "b"}) == ([], [])
+
+def test_own_writes_are_visible_before_next_sync():
+    remote, engine = _engine()
+    engine.sync()
+    disk = engine.add_disk("Local", 20, [])
+    assert engine.get_disk_by_id(disk.id).name == "Local"
+    assert engine.version(disk.id) is None
+    engine.sync()
+    assert engine.version(disk.id) == remote.updated_at[disk.id].isoformat()
+
+def test_empty_catalog_still_gets_a_watermark():
+    remote = FakeSupabase()
+    engine = SyncEngine(remote, overlap_s=5.0, clock=lambda: remote.clock)
+    stats = engine.sync()
+    assert stats.full and stats.fetched_rows == 0
+    assert engine.watermark == remote.clock - timedelta(seconds=5)
+
+    disk = engine.add_disk("Nuevo", 100, [])
+    remote.delete_disk(disk.id)  # borrado por otro cliente
+    stats = engine.sync()
+    assert not stats.full
+    assert stats.removed == [disk.id]
+    assert engine.get_all_disks() == []
+
+def test_conditional_writes_record_the_server_version():
+    remote, engine = _engine()
+    engine.sync()
+    base = engine.version("a")
+    version = engine.update_disk_if_version(Disk("a", "Fotos 2", 100, []), base)
+    assert version == remote.updated_at["a"].isoformat() and engine.version("a") == version
+    assert engine.get_disk_by_id("a").name == "Fotos 2"
+    # Con la versión anterior ya no se escribe nada, ni en el servidor ni en la réplica
+    assert engine.update_disk_if_version(Disk("a", "Fotos 3", 100, []), base) is None
+    assert not engine.delete_disk_if_version("a", base)
+    assert remote.get_disk_by_id("a").name == engine.get_disk_by_id("a").name == "Fotos 2"
+    assert engine.delete_disk_if_version("a", version)
+    assert engine.get_disk_by_id("a") is None and engine.version("a") is None
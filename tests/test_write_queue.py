@@ -0,0 +1,221 @@
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+from core.models import ContentItem, Disk
+from core.repository import BatchResult, RowFailure
+from services.sync_service import SyncEngine
+from services.write_queue import MAX_ROW_ATTEMPTS, OfflineWriteQueue
+from tests.fakes import FakeSupabase
+
+class FlakySupabase(FakeSupabase):
+    """FakeSupabase that can be taken offline or made to reject given rows."""
+
+    def __init__(self):
+        super().__init__()
+        self.offline = False
+        self.rejected_ids = set()
+        self.lost_ids = set()  # Filas que fallan por la red (RowFailure con transport=True)
+        self.before_write = None  # Se llama (una vez) justo antes de la siguiente escritura
+
+    def _about_to_write(self):
+        hook, self.before_write = self.before_write, None
+        if hook is not None:
+            hook()
+
+    def upsert_disks(self, disks):
+        self._about_to_write()
+        if self.offline:
+            raise httpx.ConnectError("sin conexión")
+        accepted, failures = [], []
+        for index, disk in enumerate(disks):
+            if disk.id in self.rejected_ids:
+                failures.append(RowFailure(index, disk.id, "violates check constraint"))
+            elif disk.id in self.lost_ids:
+                failures.append(RowFailure(index, disk.id, "connection reset", transport=True))
+            else:
+                accepted.append(disk)
+        return BatchResult(super().upsert_disks(accepted), failures)
+
+    def delete_disks(self, disk_ids):
+        if self.offline:
+            raise httpx.ConnectError("sin conexión")
+        return super().delete_disks(disk_ids)
+
+    def _check_row(self, disk_id):
+        # Las escrituras condicionales van de una en una: los fallos llegan como excepciones
+        self._about_to_write()
+        if self.offline:
+            raise httpx.ConnectError("sin conexión")
+        if disk_id in self.rejected_ids:
+            raise APIError({"message": "violates check constraint", "code": "23514"})
+        if disk_id in self.lost_ids:
+            raise httpx.ReadError("connection reset")
+
+    def update_disk_if_version(self, disk, base_version):
+        self._check_row(disk.id)
+        return super().update_disk_if_version(disk, base_version)
+
+    def delete_disk_if_version(self, disk_id, base_version):
+        self._check_row(disk_id)
+        return super().delete_disk_if_version(disk_id, base_version)
+
+@pytest.fixture
+def remote():
+    remote = FlakySupabase()
+    remote.add_disks([Disk("a", "Fotos", 100, [ContentItem("raw", 10)]), Disk("b", "Juegos", 500, [])])
+    return remote
+
+@pytest.fixture
+def make_queue(remote, tmp_path):
+    queues = []
+
+    def make(engine=None):
+        engine = engine or SyncEngine(remote, overlap_s=0.0)
+        engine.sync()
+        queue = OfflineWriteQueue(engine, path=str(tmp_path / "queue.db"), autostart=False)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        if not queue._closed:
+            queue.close()
+
+def test_writes_are_visible_before_flush(remote, make_queue):
+    queue = make_queue()
+    disk = queue.add_disk("Nuevo", 10, [])
+    queue.update_disk("a", "Fotos 2", 100, [])
+    queue.delete_disk("b")
+    assert remote.get_disk_by_id(disk.id) is None
+    assert {d.name for d in queue.get_all_disks()} == {"Nuevo", "Fotos 2"}
+    assert [d.id for d in queue.filter_disks(name_query="fotos")] == ["a"]
+    result = queue.flush()
+    assert set(result.flushed) == {disk.id, "a", "b"} and result.error is None
+    assert {d.name for d in remote.get_all_disks()} == {"Nuevo", "Fotos 2"}
+    assert queue.pending_count == 0
+
+def test_repeated_saves_collapse_into_one_operation(remote, make_queue):
+    queue = make_queue()
+    for size in (1, 2, 3):
+        queue.update_disk("a", "Fotos", 100, [ContentItem("raw", size)])
+    assert queue.pending_count == 1
+    queue.flush()
+    assert remote.get_disk_by_id("a").used_space_gb == 3
+
+def test_offline_keeps_operations_and_retries(remote, make_queue):
+    queue = make_queue()
+    remote.offline = True
+    queue.update_disk("a", "Fotos 2", 100, [])
+    for _ in range(MAX_ROW_ATTEMPTS + 2):
+        result = queue.flush()
+        assert result.error and result.pending == 1
+    assert queue._pending["a"].attempts == 0  # Las caídas de red no cuentan como intentos
+    assert queue.last_error and queue._retry_at > 0
+    remote.offline = False
+    result = queue.flush()
+    assert result.flushed == ["a"] and result.error is None
+    assert queue.last_error is None and queue._failures == 0
+    assert remote.get_disk_by_id("a").name == "Fotos 2"
+
+def test_transport_row_failures_are_not_attempts(remote, make_queue):
+    queue = make_queue()
+    remote.lost_ids.add("a")
+    queue.update_disk("a", "Fotos 2", 100, [])
+    for _ in range(MAX_ROW_ATTEMPTS + 1):
+        assert queue.flush().error == "connection reset"
+    assert queue.pending_count == 1 and queue.rejected() == []
+
+def test_lone_rejected_row_is_set_aside(remote, make_queue):
+    queue = make_queue()
+    remote.rejected_ids.add("a")
+    queue.update_disk("a", "Fotos 2", 100, [])
+    results = [queue.flush() for _ in range(MAX_ROW_ATTEMPTS)]
+    assert all(result.error is None for result in results)
+    assert [op.disk_id for op in results[-1].rejected] == ["a"]
+    assert queue.pending_count == 0
+    assert [(op.disk_id, op.reason) for op in queue.rejected()] == [("a", "violates check constraint")]
+    assert queue.last_error is None
+    assert remote.get_disk_by_id("a").name == "Fotos"
+
+def test_rejected_row_does_not_block_the_rest(remote, make_queue):
+    queue = make_queue()
+    remote.rejected_ids.add("a")
+    queue.update_disk("a", "Fotos 2", 100, [])
+    queue.update_disk("b", "Juegos 2", 500, [])
+    result = queue.flush()
+    assert result.flushed == ["b"] and result.error is None
+    assert queue.has_pending("a") and queue._pending["a"].attempts == 1
+
+def test_conflict_is_detected_and_can_be_resolved(remote, make_queue):
+    queue = make_queue()
+    queue.update_disk("a", "Fotos (mío)", 100, [])
+    remote.update_disk("a", "Fotos (otro equipo)", 100, [])  # Cambio hecho en otro equipo
+    result = queue.flush()
+    assert result.flushed == []
+    assert [(op.disk_id, op.is_conflict) for op in result.rejected] == [("a", True)]
+    assert remote.get_disk_by_id("a").name == "Fotos (otro equipo)"
+
+    queue.resolve("a", keep_local=True)
+    assert queue.rejected() == []
+    assert queue.flush().flushed == ["a"]
+    assert remote.get_disk_by_id("a").name == "Fotos (mío)"
+
+def test_write_landing_during_the_flush_is_not_overwritten(remote, make_queue):
+    queue = make_queue()
+    queue.update_disk("a", "Fotos (mío)", 100, [])
+    # El otro equipo escribe cuando la réplica ya estaba al día, justo antes de nuestro envío
+    remote.before_write = lambda: remote.update_disk("a", "Fotos (otro equipo)", 100, [])
+    result = queue.flush()
+    assert result.flushed == [] and result.rejected[0].is_conflict
+    assert result.rejected[0].remote_version == remote.updated_at["a"].isoformat()
+    assert remote.get_disk_by_id("a").name == "Fotos (otro equipo)"
+
+def test_flushed_write_records_the_server_version(remote, make_queue):
+    queue = make_queue()
+    queue.update_disk("a", "Fotos 2", 100, [])
+    # Un guardado que llega durante el envío se hizo sobre nuestra propia escritura
+    remote.before_write = lambda: queue.update_disk("a", "Fotos 3", 100, [])
+    assert queue.flush().flushed == ["a"]
+    version = remote.updated_at["a"].isoformat()
+    assert queue.remote.version("a") == version
+    assert queue._pending["a"].base_version == version
+    result = queue.flush()
+    assert result.flushed == ["a"] and result.rejected == []
+    assert remote.get_disk_by_id("a").name == "Fotos 3"
+    assert queue.remote.version("a") == remote.updated_at["a"].isoformat()
+
+def test_discarding_a_conflict_keeps_the_server_version(remote, make_queue):
+    queue = make_queue()
+    queue.delete_disk("a")
+    remote.update_disk("a", "Fotos (otro equipo)", 100, [])
+    assert queue.flush().rejected[0].is_conflict
+    queue.resolve("a", keep_local=False)
+    assert queue.pending_count == 0 and queue.rejected() == []
+    assert remote.get_disk_by_id("a") is not None
+
+def test_pending_operations_survive_a_restart(remote, make_queue):
+    queue = make_queue()
+    remote.offline = True
+    disk = queue.add_disk("Nuevo", 10, [ContentItem("x", 1)])
+    queue.delete_disk("b")
+    queue.flush()
+    queue.close()
+
+    remote.offline = False
+    reopened = make_queue()
+    assert reopened.pending_count == 2
+    assert reopened.get_disk_by_id(disk.id).name == "Nuevo"
+    assert set(reopened.flush().flushed) == {disk.id, "b"}
+    assert remote.get_disk_by_id(disk.id).used_space_gb == 1
+    assert remote.get_disk_by_id("b") is None
+
+def test_rejected_attempts_survive_a_restart(remote, make_queue):
+    queue = make_queue()
+    remote.rejected_ids.add("a")
+    queue.update_disk("a", "Fotos 2", 100, [])
+    for _ in range(MAX_ROW_ATTEMPTS - 1):
+        queue.flush()
+    queue.close()
+    reopened = make_queue()
+    assert reopened._pending["a"].attempts == MAX_ROW_ATTEMPTS - 1
+    assert [op.disk_id for op in reopened.flush().rejected] == ["a"]
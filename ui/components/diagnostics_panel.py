@@ -0,0 +1,99 @@
+import flet as ft
+from services.metrics import MetricsRegistry
+
+# Columnas de la tabla: (título, clave del resumen, formato)
+COLUMNS = [
+    ("Llamadas", "count", "{:d}"),
+    ("p50 ms", "p50_ms", "{:.1f}"),
+    ("p90 ms", "p90_ms", "{:.1f}"),
+    ("p99 ms", "p99_ms", "{:.1f}"),
+    ("Máx ms", "max_ms", "{:.1f}"),
+    ("Filas", "rows", "{:d}"),
+    ("KB rec.", "bytes_in", "{:.0f}"),
+    ("KB env.", "bytes_out", "{:.0f}"),
+]
+TOP_FUNCTIONS_SHOWN = 8
+
+class DiagnosticsPanel(ft.AlertDialog):
+    """Hidden panel (Ctrl+Shift+D in HomeView) with the latency metrics and the sampling profiler."""
+
+    def __init__(self, registry: MetricsRegistry):
+        super().__init__()
+        self.registry = registry
+        self.modal = False
+        self.title = ft.Text("Diagnóstico", weight=ft.FontWeight.BOLD)
+        self._table = ft.DataTable(
+            columns=[ft.DataColumn(ft.Text("Métrica"))] + [ft.DataColumn(ft.Text(title), numeric=True) for title, _, _ in COLUMNS],
+            column_spacing=14,
+            data_row_min_height=28,
+            data_row_max_height=28,
+        )
+        self._profile_text = ft.Text(size=11, selectable=True)
+        self._status_text = ft.Text(size=11, color=ft.Colors.WHITE54)
+        self._profile_button = ft.TextButton(on_click=lambda e: self._toggle_profiler())
+        self.content = ft.Column(
+            [self._table, ft.Divider(), self._profile_text, self._status_text],
+            scroll=ft.ScrollMode.ADAPTIVE,
+            width=900,
+            height=450,
+        )
+        self.actions = [
+            ft.TextButton("Actualizar", on_click=lambda e: self.refresh()),
+            self._profile_button,
+            ft.TextButton("Exportar JSON", on_click=lambda e: self._export()),
+            ft.TextButton("Reiniciar", on_click=lambda e: self._reset()),
+        ]
+        self.actions_alignment = ft.MainAxisAlignment.END
+        self._fill()
+
+    def _fill(self):
+        rows = []
+        for name, summary in self.registry.summary().items():
+            cells = [ft.DataCell(ft.Text(name, size=12))]
+            for _, key, fmt in COLUMNS:
+                value = summary[key] / 1024 if key.startswith("bytes") else summary[key]
+                cells.append(ft.DataCell(ft.Text(fmt.format(value), size=12)))
+            rows.append(ft.DataRow(cells=cells))
+        self._table.rows = rows
+
+        profiler = self.registry.profiler
+        self._profile_button.text = "Detener perfilador" if profiler.running else "Iniciar perfilador"
+        if profiler.samples:
+            lines = [f"Perfil: {profiler.samples} muestras cada {profiler.interval_s * 1000:.0f} ms (propias / totales)"]
+            lines += [f"  {row['self']:>6} {row['total']:>6}  {row['function']}" for row in profiler.top_functions(TOP_FUNCTIONS_SHOWN)]
+            self._profile_text.value = "\n".join(lines)
+        else:
+            self._profile_text.value = "Perfilador sin muestras"
+
+    def refresh(self):
+        self._fill()
+        if self.page:
+            self.update()
+
+    def _toggle_profiler(self):
+        profiler = self.registry.profiler
+        if profiler.running:
+            profiler.stop()
+        else:
+            profiler.start()
+        self.refresh()
+
+    def _export(self):
+        try:
+            path = self.registry.export()
+            self._status_text.value = f"Exportado a {path}"
+        except OSError as error:
+            self._status_text.value = f"No se pudo exportar: {error}"
+        self.refresh()
+
+    def _reset(self):
+        self.registry.reset()
+        self._status_text.value = ""
+        self.refresh()
+
+# Variables importantes:
+# - registry: MetricsRegistry que se muestra (services/metrics.py).
+# - COLUMNS: Columnas de la tabla (llamadas, percentiles, filas y KB recibidos/enviados).
+# Métodos importantes:
+# - refresh(): Vuelve a leer las métricas y el perfil muestreado.
+# - _toggle_profiler(), _export(), _reset(): Perfilador por muestreo, exportación a JSON y reinicio de las métricas.
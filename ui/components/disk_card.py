@@ -6,10 +6,11 @@ class DiskCard(ft.Card):
         super().__init__()
         self.disk = disk
         self.on_card_click = on_card_click
-        
+
         self.col = {"xs": 12, "sm": 6, "md": 4}
         self.elevation = 4
         self.content = self._build_card_content()
+        self._apply_disk_values()
 
     def _get_status_color(self) -> str:
         usage = self.disk.usage_percentage
@@ -21,27 +22,26 @@ class DiskCard(ft.Card):
             return ft.Colors.GREEN_600
 
     def _build_card_content(self):
-        status_color = self._get_status_color()
-
-        progress_bar = ft.ProgressBar(
-            value=self.disk.usage_percentage / 100,
-            color=status_color,
+        # Los controles se guardan para poder actualizarlos sin reconstruir la tarjeta
+        self._name_text = ft.Text(weight=ft.FontWeight.BOLD, size=16)
+        self._free_space_text = ft.Text(size=12, color=ft.Colors.WHITE70)
+        self._summary_text = ft.Text(size=11, color=ft.Colors.WHITE54, italic=True)
+        self._progress_bar = ft.ProgressBar(
             bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
             height=6
         )
+        self._usage_text = ft.Text(size=10, color=ft.Colors.WHITE54)
 
-        content_summary = ", ".join(item.description for item in self.disk.contents)
-
-        return ft.Container(
+        self._container = ft.Container(
             content=ft.Column(
                 controls=[
-                    ft.Text(self.disk.name, weight=ft.FontWeight.BOLD, size=16),
-                    ft.Text(f"{self.disk.free_space_gb} GB Libres", size=12, color=ft.Colors.WHITE70),
-                    ft.Text(f"Contenido: {content_summary[:40]}...", size=11, color=ft.Colors.WHITE54, italic=True),
-                    progress_bar,
+                    self._name_text,
+                    self._free_space_text,
+                    self._summary_text,
+                    self._progress_bar,
                     ft.Row(
                         [
-                            ft.Text(f"{self.disk.used_space_gb} GB / {self.disk.total_capacity_gb} GB", size=10, color=ft.Colors.WHITE54),
+                            self._usage_text,
                         ],
                         alignment=ft.MainAxisAlignment.SPACE_BETWEEN
                     )
@@ -49,15 +49,49 @@ class DiskCard(ft.Card):
                 spacing=6
             ),
             padding=12,
-            border=ft.border.only(left=ft.border.BorderSide(5, status_color)),
             border_radius=ft.border_radius.all(6),
             on_click=lambda e: self.on_card_click(self.disk)
         )
+        return self._container
+
+    def _render_key(self) -> tuple:
+        # disk.summary no obliga a cargar los contenidos de los discos resumidos
+        return (
+            self.disk.name,
+            self.disk.total_capacity_gb,
+            self.disk.used_space_gb,
+            self.disk.summary,
+        )
+
+    def _apply_disk_values(self):
+        self._rendered_key = self._render_key()
+        name, total_capacity_gb, used_space_gb, content_summary = self._rendered_key
+        status_color = self._get_status_color()
+
+        self._name_text.value = name
+        self._free_space_text.value = f"{self.disk.free_space_gb} GB Libres"
+        self._summary_text.value = f"Contenido: {content_summary}..."
+        self._progress_bar.value = self.disk.usage_percentage / 100
+        self._progress_bar.color = status_color
+        self._usage_text.value = f"{used_space_gb} GB / {total_capacity_gb} GB"
+        self._container.border = ft.border.only(left=ft.border.BorderSide(5, status_color))
+
+    def update_disk(self, disk: Disk, send_update: bool = True) -> bool:
+        """Patches the card in place; returns False when nothing visible changed."""
+        self.disk = disk
+        if self._render_key() == self._rendered_key:
+            return False
+        self._apply_disk_values()
+        if send_update and self.page:
+            self.update()
+        return True
 
 
 # Variables importantes:
 # - disk: El objeto Disk que esta tarjeta representa.
 # - on_card_click: Callback que se ejecutará al hacer clic en la tarjeta.
+# - _rendered_key: Valores visibles del último render, para detectar si un Disk cambió.
 # Métodos importantes:
-# - _get_card_color(): Determina el color de la tarjeta según el espacio libre.
-# - _build_card_content(): Construye la UI interna de la tarjeta.
\ No newline at end of file
+# - _get_status_color(): Determina el color de la tarjeta según el porcentaje de uso.
+# - _build_card_content(): Construye la UI interna de la tarjeta.
+# - update_disk(): Actualiza textos, barra de progreso y color de estado sin reconstruir la tarjeta.
@@ -1,8 +1,18 @@
 import flet as ft
 from core.models import Disk, ContentItem
-from typing import List
+from services.scanner import DirectoryScanner, ScanProgress, GB
+from services.snapshot import DiskSnapshot, ScanDiff, SnapshotStore
+from typing import List, Optional
+import asyncio
+import inspect
 import os
 import shutil
+import time
+
+def _parse_size(value: str):
+    # Los tamaños escaneados tienen decimales; los enteros se conservan como int
+    size = float(value) if value else 0
+    return int(size) if float(size).is_integer() else size
 
 # Clase auxiliar para una fila de contenido
 class ContentItemRow(ft.Row):
@@ -10,7 +20,7 @@ class ContentItemRow(ft.Row):
         super().__init__()
         self.vertical_alignment = ft.CrossAxisAlignment.CENTER
         self.description_input = ft.TextField(value=item.description, hint_text="Descripción", expand=True)
-        self.size_input = ft.TextField(value=str(item.size_gb), hint_text="GB", width=80, input_filter=ft.InputFilter(allow=True, regex_string=r"[0-9]"))
+        self.size_input = ft.TextField(value=str(item.size_gb), hint_text="GB", width=80, input_filter=ft.InputFilter(allow=True, regex_string=r"[0-9.]"))
         
         self.controls = [
             self.description_input,
@@ -19,12 +29,15 @@ class ContentItemRow(ft.Row):
         ]
 
 class DiskForm(ft.Column):
-    def __init__(self, on_save, on_clear, on_delete):
+    def __init__(self, on_save, on_clear, on_delete, snapshot_store: Optional[SnapshotStore] = None):
         super().__init__()
         self.on_save = on_save
         self.on_clear = on_clear
         self.on_delete = on_delete
         self.selected_disk_id = None
+        self._scanner: Optional[DirectoryScanner] = None
+        self.snapshot_store = snapshot_store or SnapshotStore()
+        self._pending_snapshot: Optional[DiskSnapshot] = None
 
         self._file_picker = ft.FilePicker(on_result=self._on_file_picker_result)
 
@@ -34,6 +47,8 @@ class DiskForm(ft.Column):
         self._capacity_input = ft.TextField(label="Capacidad Total (GB)", input_filter=ft.InputFilter(allow=True, regex_string=r"[0-9]"), **textfield_style)
         
         self._contents_list = ft.Column(spacing=10, scroll="auto", height= 180)
+        self._scan_status = ft.Text("", size=11, color=ft.Colors.WHITE54, visible=False)
+        self._cancel_scan_button = ft.TextButton("Cancelar escaneo", icon=ft.Icons.STOP_CIRCLE_OUTLINED, on_click=lambda e: self._cancel_scan(), visible=False)
         self._add_content_button = ft.TextButton("Añadir Contenido", icon=ft.Icons.ADD, on_click=self._add_content_row)
 
         self._save_button = ft.ElevatedButton(text="Guardar Disco", on_click=self._on_save_click, expand=True, style=ft.ButtonStyle(bgcolor=ft.Colors.BLUE_ACCENT_700, color=ft.Colors.WHITE))
@@ -51,6 +66,7 @@ class DiskForm(ft.Column):
             self._capacity_input,
             ft.Divider(),
             ft.Text("Contenidos del Disco"),
+            ft.Row([self._scan_status, self._cancel_scan_button], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
             self._contents_list,
             self._add_content_button,
             ft.Divider(),
@@ -73,23 +89,79 @@ class DiskForm(ft.Column):
             except FileNotFoundError:
                 self._capacity_input.value = ""
 
-            self._contents_list.controls.clear()
-            try:
-                for item_name in os.listdir(path):
-                    item_path = os.path.join(path, item_name)
-                    if os.path.isdir(item_path):
-                        # Es una carpeta, puedes manejarla como prefieras
-                        self._add_content_row(None, item=ContentItem(description=f"(Carpeta) {item_name}", size_gb=0))
-                    else:
-                        # Es un archivo
-                        size_bytes = os.path.getsize(item_path)
-                        size_gb = round(size_bytes / (1024**3), 2)
-                        self._add_content_row(None, item=ContentItem(description=item_name, size_gb=size_gb))
-            except Exception as ex:
-                print(f"Error al listar contenido: {ex}")
+            # Si el disco ya tiene un snapshot, se re-escanea de forma incremental sobre sus contenidos actuales
+            previous = self.snapshot_store.load(self.selected_disk_id) if self.selected_disk_id else None
+            if previous is None:
+                self._contents_list.controls.clear()
+            self._cancel_scan()
+            self._pending_snapshot = None
+            self._scanner = DirectoryScanner()
+            self._scan_status.value = "Escaneando..."
+            self._scan_status.visible = True
+            self._cancel_scan_button.visible = True
+            self.update()
+
+            # El escaneo corre en un hilo aparte para no bloquear la ventana
+            self.page.run_thread(self._scan_directory, path, self._scanner, previous)
+
+    def _scan_directory(self, path: str, scanner: DirectoryScanner, previous: Optional[DiskSnapshot] = None):
+        last_update = time.monotonic()
+        try:
+            for entry in scanner.iter_scan(path, on_progress=lambda progress: self._show_scan_progress(scanner, progress),
+                                           previous=previous, record_snapshot=True):
+                if scanner is not self._scanner:
+                    break
+                if previous is None:
+                    self._contents_list.controls.append(ContentItemRow(entry.to_content_item(), on_delete=self._remove_content_row))
+                if time.monotonic() - last_update >= scanner.progress_interval:
+                    self._show_scan_progress(scanner, scanner.progress())
+                    last_update = time.monotonic()
+        except Exception as ex:
+            print(f"Error al listar contenido: {ex}")
 
+        if scanner is self._scanner:
+            progress = scanner.progress()
+            if scanner.cancelled:
+                self._scan_status.value = f"Escaneo cancelado: {progress.files} archivos, {progress.total_bytes / GB:.2f} GB"
+            elif previous is not None:
+                diff = ScanDiff.between(previous, scanner.snapshot)
+                self._set_content_rows(diff.apply(self._current_contents()))
+                self._scan_status.value = (
+                    f"Re-escaneo: +{len(diff.added)} / -{len(diff.removed)} / ~{len(diff.resized)} "
+                    f"({progress.reused_directories} de {progress.directories} carpetas sin cambios, {progress.elapsed_s:.1f} s)"
+                )
+                self._pending_snapshot = scanner.snapshot
+            else:
+                self._scan_status.value = f"Escaneo completo: {progress.files} archivos, {progress.total_bytes / GB:.2f} GB en {progress.elapsed_s:.1f} s"
+                self._pending_snapshot = scanner.snapshot
+            self._cancel_scan_button.visible = False
+            self._scanner = None
             self.update()
 
+    def _current_contents(self) -> List[ContentItem]:
+        contents = []
+        for row in self._contents_list.controls:
+            if isinstance(row, ContentItemRow):
+                try:
+                    size = _parse_size(row.size_input.value)
+                except ValueError:
+                    size = 0
+                contents.append(ContentItem(description=row.description_input.value, size_gb=size))
+        return contents
+
+    def _set_content_rows(self, contents: List[ContentItem]):
+        self._contents_list.controls = [ContentItemRow(item, on_delete=self._remove_content_row) for item in contents]
+
+    def _show_scan_progress(self, scanner: DirectoryScanner, progress: ScanProgress):
+        if scanner is not self._scanner:
+            return
+        self._scan_status.value = f"Escaneando... {progress.files} archivos, {progress.total_bytes / GB:.2f} GB"
+        self.update()
+
+    def _cancel_scan(self):
+        if self._scanner:
+            self._scanner.cancel()
+
     def _add_content_row(self, e, item: ContentItem = None):
         if item is None:
             item = ContentItem(description="", size_gb=0)
@@ -102,7 +174,7 @@ class DiskForm(ft.Column):
         self._contents_list.controls.remove(row)
         self.update()
 
-    def _on_save_click(self, e):
+    async def _on_save_click(self, e):
         try:
             name = self._name_input.value
             capacity = int(self._capacity_input.value)
@@ -117,7 +189,7 @@ class DiskForm(ft.Column):
             for row in self._contents_list.controls:
                 if isinstance(row, ContentItemRow):
                     desc = row.description_input.value
-                    size = int(row.size_input.value) if row.size_input.value else 0
+                    size = _parse_size(row.size_input.value)
                     if desc and size > 0:
                         contents.append(ContentItem(description=desc, size_gb=size))
                         total_content_size += size
@@ -126,7 +198,15 @@ class DiskForm(ft.Column):
                 self.page.show_snack_bar(ft.SnackBar(ft.Text("El contenido total no puede exceder la capacidad del disco."), open=True))
                 return
 
-            self.on_save(self.selected_disk_id, name, capacity, contents)
+            saved_disk = self.on_save(self.selected_disk_id, name, capacity, contents)
+            if inspect.isawaitable(saved_disk):
+                saved_disk = await saved_disk
+            if saved_disk is None:
+                # No se guardó (p. ej. fallo del backend): se conserva el formulario para reintentar
+                return
+            if self._pending_snapshot:
+                # Comprimir el snapshot y construir su ContentTree tarda con escaneos grandes: fuera del bucle de eventos
+                await asyncio.to_thread(self.snapshot_store.save, saved_disk.id, self._pending_snapshot)
             self.clear_form()
 
         except (ValueError, TypeError):
@@ -152,6 +232,11 @@ class DiskForm(ft.Column):
 
     def clear_form(self):
         self.selected_disk_id = None
+        self._cancel_scan()
+        self._scanner = None
+        self._pending_snapshot = None
+        self._scan_status.visible = False
+        self._cancel_scan_button.visible = False
         self._name_input.value = ""
         self._capacity_input.value = ""
         self._contents_list.controls.clear()
@@ -162,10 +247,14 @@ class DiskForm(ft.Column):
 
 # Variables importantes:
 # - selected_disk_id: Guarda el ID del disco que se está editando (o None si es nuevo).
+# - _scanner: DirectoryScanner del escaneo en curso (o None); permite cancelarlo.
+# - snapshot_store, _pending_snapshot: Snapshot de metadatos del último escaneo, que se guarda junto al disco al guardarlo.
 # - _name_input, _capacity_input, etc.: Controles TextField para la entrada de datos.
 # - _save_button, _clear_button, _delete_button: Botones de acción.
 # - on_save, on_clear, on_delete: Callbacks para manejar las acciones del formulario.
 # Métodos importantes:
+# - _on_file_picker_result(), _scan_directory(): Escanean recursivamente el directorio en segundo plano y rellenan los contenidos.
+#   Si el disco ya tiene snapshot, el re-escaneo es incremental y solo aplica las diferencias (ScanDiff).
 # - _on_save_click(): Maneja el evento de guardar (crear o actualizar).
 # - _on_delete_click(): Maneja el evento de eliminar.
 # - load_disk_into_form(): Carga los datos de un disco en el formulario para edición.
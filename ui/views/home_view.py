@@ -1,16 +1,60 @@
+import asyncio
+import time
+from operator import attrgetter
 import flet as ft
 from ui.components.disk_card import DiskCard
 from ui.components.disk_form import DiskForm
-from services.supabase_service import SupabaseService
+from ui.components.diagnostics_panel import DiagnosticsPanel
+from services.async_service import ThreadedAsyncService
+from services.catalog_cache import CatalogCache
+from services.filter_pipeline import FilterPipeline
+from services.metrics import metrics
+from services.write_queue import FlushResult, OfflineWriteQueue
+from core.content_tree import ContentNode, ContentTree
+from core.filters import DiskFilter
 from core.models import Disk
-from typing import List
+from core.repository import AsyncDiskRepository, DiskRepository, backend_errors
+from typing import Dict, List, Optional, Union
 from core.models import Disk, ContentItem
 
+# Tiempo sin teclear antes de lanzar la consulta de filtrado
+FILTER_DEBOUNCE_S = 0.3
+# Tarjetas que se construyen por tanda; el resto se crea al acercarse al final del scroll
+CARD_PAGE_SIZE = 60
+# Distancia (px) al final del scroll a partir de la cual se carga la siguiente tanda
+LOAD_MORE_THRESHOLD_PX = 400
+# Carpetas más grandes que se muestran en el detalle y elementos por nivel del árbol de contenidos
+LARGEST_FOLDERS_SHOWN = 5
+TREE_LEVEL_LIMIT = 200
+# Opciones de orden de las tarjetas: valor del desplegable -> (clave de SORT_KEYS, descendente, texto)
+SORT_OPTIONS = {
+    "free_desc": ("free_space_gb", True, "Más espacio libre"),
+    "free_asc": ("free_space_gb", False, "Menos espacio libre"),
+    "usage_desc": ("usage_percentage", True, "Más llenos"),
+    "capacity_desc": ("total_capacity_gb", True, "Mayor capacidad"),
+}
+
 class HomeView(ft.Container):
-    def __init__(self, page: ft.Page):
+    def __init__(self, page: ft.Page, disk_service: Optional[Union[AsyncDiskRepository, DiskRepository]] = None, realtime=None,
+                 catalog_cache: Optional[CatalogCache] = None, started_at: Optional[float] = None):
         super().__init__()
         self.page = page
-        self.disk_service = SupabaseService()
+        self._catalog_cache = catalog_cache  # Último listado guardado, para pintar las tarjetas sin esperar al backend
+        self._started_at = started_at  # time.perf_counter() al arrancar el proceso (métricas startup.*)
+        # Cada page.update() (también los control.update() de las tarjetas) queda medido como ui.page_update
+        metrics.instrument_page(page)
+        self._realtime = realtime  # RealtimeSubscriber opcional: cambios de otros usuarios en vivo
+        if disk_service is None:
+            from services.supabase_service import SupabaseService
+            disk_service = SupabaseService()
+        # Con la cola de escrituras, guardar responde al momento y el envío se confirma después
+        self._write_queue: Optional[OfflineWriteQueue] = disk_service if isinstance(disk_service, OfflineWriteQueue) else None
+        if self._write_queue is not None:
+            self._write_queue.on_flush = self._on_queue_flush
+        # Los servicios síncronos se ejecutan en hilos para no bloquear los manejadores de eventos
+        if isinstance(disk_service, DiskRepository):
+            disk_service = ThreadedAsyncService(disk_service)
+        self.disk_service: AsyncDiskRepository = disk_service
         self.expand = True
         self.padding = 1 # Añadir padding general
 
@@ -43,6 +87,32 @@ class HomeView(ft.Container):
             active_color=ft.Colors.BLUE_ACCENT_400,
             inactive_color=ft.Colors.WHITE30
         )
+        self._sort_dropdown = ft.Dropdown(
+            label="Ordenar",
+            value="",
+            options=[ft.dropdown.Option("", "Orden de registro")]
+            + [ft.dropdown.Option(value, text) for value, (_, _, text) in SORT_OPTIONS.items()],
+            on_change=self._apply_sort,
+            border_color="transparent",
+            bgcolor=ft.Colors.WHITE10,
+            border_radius=6,
+            width=200,
+        )
+        self._loading_indicator = ft.ProgressRing(width=18, height=18, stroke_width=2, visible=False)
+        self._sync_status = ft.Text("", size=11, color=ft.Colors.WHITE54)
+        self._visible_disks: List[Disk] = []
+        self._cards_by_id: Dict[str, DiskCard] = {}
+        self._rendered_count = 0
+        self._cards_summary = ft.Text("", size=11, color=ft.Colors.WHITE54)
+        self._load_more_button = ft.TextButton("Cargar más", icon=ft.Icons.EXPAND_MORE, on_click=lambda e: self._render_more_cards(), visible=False)
+        self._pending_requests = 0
+        self._filter_pipeline = FilterPipeline(
+            self.disk_service,
+            on_result=self._on_filter_result,
+            debounce_s=FILTER_DEBOUNCE_S,
+            on_busy=self._set_loading,
+            on_error=self._on_filter_error
+        )
 
         self.content = ft.Row(
             controls=[
@@ -54,11 +124,12 @@ class HomeView(ft.Container):
                 ft.VerticalDivider(width=20, color="transparent"),
                 ft.Column(
                     [
-                        ft.Text("Discos Registrados", size=24, weight=ft.FontWeight.BOLD),
+                        ft.Row([ft.Text("Discos Registrados", size=24, weight=ft.FontWeight.BOLD), self._loading_indicator, self._sync_status], spacing=10),
                         ft.Row(
                             [
                                 self._filter_name_input,
                                 self._filter_content_input,
+                                self._sort_dropdown,
                                 ft.IconButton(icon=ft.Icons.REFRESH, on_click=self._refresh_disk_list, tooltip="Recargar Discos")
                             ],
                             spacing=10
@@ -66,7 +137,14 @@ class HomeView(ft.Container):
                         ft.Text("Filtrar por Espacio Libre:"),
                         self._filter_free_space_slider,
                         ft.Divider(height=10, color="transparent"),
-                        ft.Column([self._disk_cards_container], scroll=ft.ScrollMode.ADAPTIVE, expand=True)
+                        self._cards_summary,
+                        ft.Column(
+                            [self._disk_cards_container, self._load_more_button],
+                            scroll=ft.ScrollMode.ADAPTIVE,
+                            expand=True,
+                            on_scroll=self._on_cards_scroll,
+                            on_scroll_interval=100,
+                        )
                     ],
                     expand=True,
                     spacing=15
@@ -76,8 +154,6 @@ class HomeView(ft.Container):
             vertical_alignment=ft.CrossAxisAlignment.START
         )
 
-        self._update_disk_cards()
-
         # Dialogo de confirmación para eliminar
         self._confirm_delete_dialog = ft.AlertDialog(
             modal=True,
@@ -91,11 +167,167 @@ class HomeView(ft.Container):
         )
         self._disk_to_delete_id = None
         self._details_dialog = None
+        self._diagnostics_panel: Optional[DiagnosticsPanel] = None
+        self._cache_save: Optional[asyncio.Task] = None
+        self._catalog_stale = False  # La carga inicial falló y se muestra el catálogo de la caché
+
+    def did_mount(self):
+        # La carga inicial se hace en segundo plano para que la ventana aparezca de inmediato
+        self._record_startup("startup.shell")
+        self.page.run_task(self._load_and_subscribe)
+        self.page.on_keyboard_event = self._on_keyboard
+
+    def _on_keyboard(self, e: ft.KeyboardEvent):
+        # Panel de diagnóstico oculto: Ctrl+Shift+D
+        if e.ctrl and e.shift and e.key.upper() == "D":
+            self._toggle_diagnostics_panel()
+
+    def _toggle_diagnostics_panel(self):
+        if self._diagnostics_panel is None:
+            self._diagnostics_panel = DiagnosticsPanel(metrics)
+            self.page.overlay.append(self._diagnostics_panel)
+        else:
+            self._diagnostics_panel.refresh()
+        self._diagnostics_panel.open = not self._diagnostics_panel.open
+        self.page.update()
+
+    def will_unmount(self):
+        if self._realtime:
+            self.page.run_task(self._realtime.stop)
+
+    async def _load_and_subscribe(self):
+        await self._paint_cached_catalog()
+        try:
+            await self._update_disk_cards()
+        except backend_errors() as error:
+            # Se queda lo pintado desde la caché; Realtime se arranca igualmente y su puesta al día
+            # (SUBSCRIBED) provoca la recarga completa en cuanto el backend responda
+            self._catalog_stale = True
+            self._show_backend_error("cargar el catálogo", error)
+        else:
+            self._record_startup("startup.catalog_loaded", len(self._visible_disks))
+        self._update_sync_status()
+        if self._realtime:
+            await self._realtime.start(self._apply_remote_changes)
+
+    async def _paint_cached_catalog(self):
+        # Las tarjetas del último listado se pintan ya; al llegar el del backend se reutilizan por id y solo cambian las distintas
+        if self._catalog_cache is not None:
+            cached = await asyncio.to_thread(self._catalog_cache.load)
+            if cached and not self._visible_disks:
+                self._render_disk_cards(cached)
+        self._record_startup("startup.first_paint", len(self._visible_disks))
+
+    def _save_catalog_cache(self, disks: List[Disk]):
+        if self._catalog_cache is not None:
+            self._cache_save = asyncio.get_running_loop().create_task(asyncio.to_thread(self._catalog_cache.save, disks))
+
+    def _record_startup(self, name: str, rows: int = 0):
+        if self._started_at is not None:
+            metrics.record_duration(name, (time.perf_counter() - self._started_at) * 1000, rows)
+
+    def _update_sync_status(self, error: Optional[str] = None):
+        if self._write_queue is None:
+            return
+        pending = self._write_queue.pending_count
+        changes = "1 cambio" if pending == 1 else f"{pending} cambios"
+        if not pending:
+            self._sync_status.value = ""
+        elif error or self._write_queue.last_error:
+            self._sync_status.value = f"Sin conexión: {changes} pendientes" if pending > 1 else f"Sin conexión: {changes} pendiente"
+        else:
+            self._sync_status.value = f"{changes} sin sincronizar"
+        self._sync_status.update()
+
+    def _on_queue_flush(self, result: FlushResult):
+        # Llega desde el hilo de la cola: se pasa al bucle de eventos de la página
+        self.page.run_task(self._show_flush_result, result)
+
+    async def _show_flush_result(self, result: FlushResult):
+        self._update_sync_status(result.error)
+        if not result.rejected:
+            return
+        # El servidor conserva su versión: se recargan las tarjetas y se ofrece reaplicar el cambio propio
+        self._filter_pipeline.invalidate()
+        await self._update_disk_cards()
+        for rejected in result.rejected:
+            name = rejected.disk.name if rejected.disk else "El disco"
+            if rejected.is_conflict:
+                message = f"{name} se modificó en otro equipo; tu cambio no se ha aplicado."
+            else:
+                message = f"El servidor rechazó el cambio de {name}: {rejected.reason}"
+            self.page.open(ft.SnackBar(
+                ft.Text(message),
+                action="Conservar mi versión",
+                on_action=lambda e, disk_id=rejected.disk_id: self.page.run_task(self._keep_local_change, disk_id),
+            ))
+
+    async def _keep_local_change(self, disk_id: str):
+        await asyncio.to_thread(self._write_queue.resolve, disk_id, True)
+        self._filter_pipeline.invalidate()
+        await self._update_disk_cards()
+        self._update_sync_status()
+
+    def _show_backend_error(self, action: str, error: Exception):
+        # Los fallos del backend se avisan en lugar de perderse en la tarea de page.run_task
+        self.page.open(ft.SnackBar(ft.Text(f"No se pudo {action}: {error}")))
+
+    def _set_loading(self, loading: bool):
+        self._pending_requests += 1 if loading else -1
+        self._loading_indicator.visible = self._pending_requests > 0
+        self._loading_indicator.update()
+
+    async def _open_disk_details(self, disk: Disk):
+        if not disk.contents_loaded:
+            # Disco del listado resumido: los contenidos se piden fuera del hilo de la UI
+            self._set_loading(True)
+            try:
+                full_disk = await self.disk_service.get_disk_by_id(disk.id)
+            except backend_errors() as error:
+                self._show_backend_error("abrir el disco", error)
+                return
+            finally:
+                self._set_loading(False)
+            disk.contents = full_disk.contents if full_disk else []
+        tree = await asyncio.to_thread(self._load_content_tree, disk)
+        self._show_disk_details_dialog(disk, tree)
+
+    def _load_content_tree(self, disk: Disk) -> ContentTree:
+        # Con snapshot de escaneo se navega la jerarquía real; si no, solo el primer nivel de contents
+        tree = self._disk_form.snapshot_store.load_tree(disk.id) if disk.id else None
+        return tree or ContentTree.from_contents(disk.contents)
+
+    def _tree_controls(self, node: ContentNode) -> List[ft.Control]:
+        # Un nivel del árbol: las subcarpetas se construyen al desplegarlas por primera vez
+        controls = []
+        for child in node.sorted_children()[:TREE_LEVEL_LIMIT]:
+            tile = ft.ExpansionTile(
+                title=ft.Text(f"{child.name} ({child.size_gb} GB)"),
+                subtitle=ft.Text(f"{child.file_count} archivos", size=12),
+                controls=[],
+                controls_padding=ft.padding.only(left=15),
+            )
+            tile.on_change = lambda e, tile=tile, child=child: self._expand_tree_tile(tile, child)
+            controls.append(tile)
+        for name, size_bytes in node.sorted_files()[:max(0, TREE_LEVEL_LIMIT - len(controls))]:
+            controls.append(ft.Text(f"- {name} ({round(size_bytes / 1024 ** 3, 2)} GB)"))
+        hidden = len(node.children) + len(node.files) - len(controls)
+        if hidden > 0:
+            controls.append(ft.Text(f"... y {hidden} elementos más", italic=True, size=12))
+        return controls
+
+    def _expand_tree_tile(self, tile: ft.ExpansionTile, node: ContentNode):
+        if not tile.controls:
+            tile.controls = self._tree_controls(node)
+            tile.update()
 
-    def _show_disk_details_dialog(self, disk: Disk):
-        content_list = ft.ListView(spacing=5, padding=0, expand=True)
-        for item in disk.contents:
-            content_list.controls.append(ft.Text(f"- {item.description} ({item.size_gb} GB)"))
+    def _show_disk_details_dialog(self, disk: Disk, tree: Optional[ContentTree] = None):
+        tree = tree or ContentTree.from_contents(disk.contents)
+        content_list = ft.ListView(controls=self._tree_controls(tree.root), spacing=5, padding=0, expand=True)
+        largest = [
+            ft.Text(f"{folder.path} ({folder.size_gb} GB)", size=12)
+            for folder in tree.largest_folders(LARGEST_FOLDERS_SHOWN)
+        ]
 
         self._details_dialog = ft.AlertDialog(
             modal=False,
@@ -106,10 +338,11 @@ class HomeView(ft.Container):
                     ft.Text(f"Espacio Usado: {disk.used_space_gb} GB"),
                     ft.Text(f"Espacio Libre: {disk.free_space_gb} GB"),
                     ft.Divider(),
+                    *([ft.Text("Carpetas más grandes:"), *largest, ft.Divider()] if largest else []),
                     ft.Text("Contenido:"),
                     content_list,
                 ],
-                height=300,
+                height=400,
                 width=400,
                 spacing=10,
             ),
@@ -139,29 +372,168 @@ class HomeView(ft.Container):
         self._close_details_dialog()
         self._handle_disk_delete(disk_id)
 
-    def _update_disk_cards(self, disks_to_display=None):
-        self._disk_cards_container.controls.clear()
-        disks = disks_to_display if disks_to_display is not None else self.disk_service.get_all_disks()
+    @metrics.timed("ui.update_disk_cards")
+    async def _update_disk_cards(self, disks_to_display=None):
+        if disks_to_display is None:
+            # Un listado completo deja obsoleto cualquier filtrado en curso y sirve de base para refinar
+            self._filter_pipeline.cancel()
+            self._set_loading(True)
+            try:
+                # Listado ligero: los contenidos se cargan al abrir el detalle de un disco
+                sort = self._current_sort()
+                if sort is None:
+                    disks_to_display = await self.disk_service.get_disk_summaries()
+                else:
+                    # El backend devuelve el listado ya ordenado (índice ordenado u ORDER BY sobre columna indexada)
+                    disks_to_display = await self.disk_service.sorted_disks(*sort)
+            finally:
+                self._set_loading(False)
+            self._filter_pipeline.prime(DiskFilter(), disks_to_display)
+            self._save_catalog_cache(disks_to_display)
+        self._render_disk_cards(disks_to_display)
 
-        for disk in disks:
-            self._disk_cards_container.controls.append(
-                DiskCard(
-                    disk=disk,
-                    on_card_click=self._show_disk_details_dialog
-                )
-            )
-        self.page.update()
+    @metrics.timed("ui.render_disk_cards")
+    def _render_disk_cards(self, disks: List[Disk]):
+        # Las tarjetas existentes se reutilizan por id: solo se crean las nuevas y se parchean las que cambiaron
+        self._visible_disks = list(disks)
+        previous_cards = self._cards_by_id
+        self._cards_by_id = {}
+        controls = []
+        for disk in self._visible_disks[:CARD_PAGE_SIZE]:
+            card = previous_cards.get(disk.id)
+            if card is None:
+                card = self._create_card(disk)
+            else:
+                card.update_disk(disk, send_update=False)
+            self._cards_by_id[disk.id] = card
+            controls.append(card)
+        self._disk_cards_container.controls = controls
+        self._rendered_count = len(controls)
+        self._update_cards_footer()
+        self._send_cards_update()
+
+    def _create_card(self, disk: Disk) -> DiskCard:
+        card = DiskCard(
+            disk=disk,
+            on_card_click=lambda disk: self.page.run_task(self._open_disk_details, disk)
+        )
+        self._cards_by_id[disk.id] = card
+        return card
+
+    def _update_cards_footer(self):
+        self._load_more_button.visible = self._rendered_count < len(self._visible_disks)
+        self._cards_summary.value = f"Mostrando {self._rendered_count} de {len(self._visible_disks)} discos"
+
+    def _send_cards_update(self):
+        # Solo se envía la parte de la página que contiene las tarjetas
+        self._disk_cards_container.update()
+        self._load_more_button.update()
+        self._cards_summary.update()
+
+    def _render_more_cards(self):
+        if self._rendered_count >= len(self._visible_disks):
+            return
+        next_page = self._visible_disks[self._rendered_count:self._rendered_count + CARD_PAGE_SIZE]
+        for disk in next_page:
+            self._disk_cards_container.controls.append(self._create_card(disk))
+        self._rendered_count += len(next_page)
+        self._update_cards_footer()
+        self._send_cards_update()
+
+    def _upsert_disk_card(self, disk: Disk):
+        index = next((i for i, visible in enumerate(self._visible_disks) if visible.id == disk.id), None)
+        if index is not None:
+            self._visible_disks[index] = disk
+        else:
+            self._visible_disks.append(disk)
+        if self._current_sort() is not None:
+            # Con un orden activo el disco (nuevo o con otros valores) va en su posición; las tarjetas existentes se reutilizan
+            self._render_disk_cards(self._sorted(self._visible_disks))
+            return
+        if index is not None:
+            card = self._cards_by_id.get(disk.id)
+            if card:
+                # El mensaje de actualización contiene solo esta tarjeta
+                card.update_disk(disk)
+            return
+
+        if self._rendered_count == len(self._visible_disks) - 1:
+            self._disk_cards_container.controls.append(self._create_card(disk))
+            self._rendered_count += 1
+        self._update_cards_footer()
+        self._send_cards_update()
+
+    def _apply_remote_changes(self, changed: List[Disk], removed: List[str]):
+        # Cambios hechos por otros usuarios (Realtime): solo se tocan las tarjetas afectadas
+        self._filter_pipeline.invalidate()
+        if self._catalog_stale:
+            # La carga inicial falló: las tarjetas vienen de la caché y pueden tener discos ya borrados
+            self.page.run_task(self._reload_stale_catalog)
+            return
+        disk_filter = self._current_filter()
+        visible_ids = {disk.id for disk in self._visible_disks}
+        if self._write_queue is not None:
+            # Los discos con cambios propios sin enviar muestran la versión local
+            changed = [disk for disk in changed if not self._write_queue.has_pending(disk.id)]
+            removed = [disk_id for disk_id in removed if not self._write_queue.has_pending(disk_id)]
+        for disk in changed:
+            if disk_filter.matches(disk):
+                self._upsert_disk_card(disk)
+            elif disk.id in visible_ids:
+                self._remove_disk_card(disk.id)
+        for disk_id in removed:
+            if disk_id in visible_ids:
+                self._remove_disk_card(disk_id)
+
+    async def _reload_stale_catalog(self):
+        if not self._catalog_stale:
+            return
+        self._catalog_stale = False
+        try:
+            await self._update_disk_cards()
+        except backend_errors() as error:
+            self._catalog_stale = True
+            self._show_backend_error("cargar el catálogo", error)
+
+    def _remove_disk_card(self, disk_id: str):
+        self._visible_disks = [disk for disk in self._visible_disks if disk.id != disk_id]
+        card = self._cards_by_id.pop(disk_id, None)
+        if card:
+            self._disk_cards_container.controls.remove(card)
+            self._rendered_count -= 1
+        self._update_cards_footer()
+        self._send_cards_update()
 
+    def _on_cards_scroll(self, e: ft.OnScrollEvent):
+        if e.max_scroll_extent - e.pixels <= LOAD_MORE_THRESHOLD_PX:
+            self._render_more_cards()
 
     def _handle_edit_disk(self, disk: Disk):
         self._disk_form.load_disk_into_form(disk)
 
-    def _handle_disk_save(self, disk_id: str, name: str, capacity: int, contents: List[ContentItem]):
-        if disk_id:
-            self.disk_service.update_disk(disk_id, name, capacity, contents)
+    async def _handle_disk_save(self, disk_id: str, name: str, capacity: int, contents: List[ContentItem]) -> Optional[Disk]:
+        self._set_loading(True)
+        try:
+            if disk_id:
+                saved_disk = await self.disk_service.update_disk(disk_id, name, capacity, contents)
+            else:
+                saved_disk = await self.disk_service.add_disk(name, capacity, contents)
+        except backend_errors() as error:
+            self._show_backend_error("guardar el disco", error)
+            return None
+        finally:
+            self._set_loading(False)
+        self._filter_pipeline.invalidate()
+        if saved_disk:
+            # Igual que con los cambios remotos: el disco solo se muestra si cumple el filtro actual
+            if self._current_filter().matches(saved_disk):
+                self._upsert_disk_card(saved_disk)
+            elif any(disk.id == saved_disk.id for disk in self._visible_disks):
+                self._remove_disk_card(saved_disk.id)
         else:
-            self.disk_service.add_disk(name, capacity, contents)
-        self._update_disk_cards()
+            await self._update_disk_cards()
+        self._update_sync_status()
+        return saved_disk
 
     def _handle_disk_delete(self, disk_id: str):
         self._disk_to_delete_id = disk_id
@@ -169,50 +541,129 @@ class HomeView(ft.Container):
         self._confirm_delete_dialog.open = True
         self.page.update()
 
-    def _confirm_delete_action(self, e):
-        if self._disk_to_delete_id:
-            self.disk_service.delete_disk(self._disk_to_delete_id)
-            self._disk_to_delete_id = None
-            self._update_disk_cards() # Actualiza la lista de discos
+    async def _confirm_delete_action(self, e):
+        disk_id = self._disk_to_delete_id
+        self._disk_to_delete_id = None
+        # Se cierra el diálogo antes de esperar a la red
         self._confirm_delete_dialog.open = False
         self.page.update()
         self.page.overlay.pop()
 
+        if disk_id:
+            self._set_loading(True)
+            try:
+                deleted = await self.disk_service.delete_disk(disk_id)
+            except backend_errors() as error:
+                # El disco sigue en el catálogo: se conservan su tarjeta y su snapshot
+                self._show_backend_error("eliminar el disco", error)
+                return
+            finally:
+                self._set_loading(False)
+            self._filter_pipeline.invalidate()
+            if deleted:
+                self._disk_form.snapshot_store.delete(disk_id)
+                self._remove_disk_card(disk_id) # Quita solo la tarjeta eliminada
+            else:
+                await self._update_disk_cards()
+            self._update_sync_status()
+
     def _cancel_delete_action(self, e):
         self._disk_to_delete_id = None
         self._confirm_delete_dialog.open = False
         self.page.update()
         self.page.overlay.pop()
 
-    def _apply_filters(self, e=None):
-        name_query = self._filter_name_input.value
-        content_query = self._filter_content_input.value
+    def _current_filter(self) -> DiskFilter:
         min_free_gb = int(self._filter_free_space_slider.value) if self._filter_free_space_slider.value else 0
-
-        filtered_disks = self.disk_service.filter_disks(
-            name_query=name_query,
-            content_query=content_query,
+        return DiskFilter(
+            name_query=self._filter_name_input.value,
+            content_query=self._filter_content_input.value,
             min_free_gb=min_free_gb
         )
-        self._update_disk_cards(disks_to_display=filtered_disks)
 
-    def _refresh_disk_list(self, e):
+    def _current_sort(self):
+        option = SORT_OPTIONS.get(self._sort_dropdown.value or "")
+        return None if option is None else option[:2]
+
+    def _sorted(self, disks: List[Disk]) -> List[Disk]:
+        sort = self._current_sort()
+        if sort is None:
+            return list(disks)
+        key, descending = sort
+        return sorted(disks, key=attrgetter(key), reverse=descending)
+
+    def _has_active_filter(self) -> bool:
+        return bool(self._filter_name_input.value or self._filter_content_input.value or self._filter_free_space_slider.value)
+
+    async def _apply_sort(self, e=None):
+        if self._has_active_filter():
+            if self._current_sort() is None:
+                # Volver al orden de registro: se repite el filtro (el pipeline devuelve su último resultado, sin ordenar)
+                self._filter_pipeline.submit(self._current_filter())
+            else:
+                # Resultado filtrado (k discos): se ordena en memoria sin volver a consultar
+                self._render_disk_cards(self._sorted(self._visible_disks))
+        else:
+            await self._update_disk_cards()
+
+    async def _apply_filters(self, e=None):
+        # El pipeline agrupa las pulsaciones (debounce) y refina en memoria cuando la consulta se estrecha
+        self._filter_pipeline.submit(self._current_filter())
+
+    def _on_filter_result(self, disk_filter: DiskFilter, disks: List[Disk]):
+        self._render_disk_cards(self._sorted(disks))
+
+    def _on_filter_error(self, disk_filter: DiskFilter, error: Exception):
+        self._show_backend_error("aplicar el filtro", error)
+
+    async def _refresh_disk_list(self, e):
         self._filter_name_input.value = ""
         self._filter_content_input.value = ""
         self._filter_free_space_slider.value = 0
-        self._update_disk_cards()
+        try:
+            await self.disk_service.refresh()
+            await self._update_disk_cards()
+        except backend_errors() as error:
+            self._show_backend_error("recargar los discos", error)
 
 
 
 # Variables importantes:
 # - page: Referencia a la página de Flet, necesaria para actualizar la UI.
-# - disk_service: Instancia del servicio de lógica de negocio.
-# - _disk_cards_container: Contenedor donde se mostrarán todas las DiskCard.
+# - disk_service: Backend del catálogo (AsyncDiskRepository; los DiskRepository síncronos se envuelven en ThreadedAsyncService).
+# - _loading_indicator, _pending_requests: Indicador de carga mientras hay peticiones en curso.
+# - _filter_pipeline: FilterPipeline con debounce, agrupación de pulsaciones y refinado local de resultados.
+# - _disk_cards_container: Contenedor donde se mostrarán las DiskCard ya construidas.
+# - _visible_disks, _rendered_count: Discos a mostrar y cuántos tienen ya tarjeta (paginación por scroll).
+# - _cards_by_id: Mapa id de disco -> DiskCard construida, para parchear tarjetas en lugar de reconstruirlas.
 # - _disk_form: Instancia del formulario para crear/editar.
+# - _realtime: RealtimeSubscriber opcional que aplica los cambios de otros usuarios sin recargar.
 # - Controles de filtrado: _filter_name_input, _filter_content_input, _filter_free_space_slider.
+# - SORT_OPTIONS, _sort_dropdown: Orden de las tarjetas (espacio libre, % de uso o capacidad).
+# - _diagnostics_panel: Panel oculto de métricas y perfilador (Ctrl+Shift+D).
+# - _catalog_cache: CatalogCache con el último listado (primera pantalla sin esperar al backend).
+# - _write_queue, _sync_status: Cola de escrituras offline (si el backend la usa) y el texto con los cambios pendientes.
 # Métodos importantes:
 # - _load_initial_data(): Carga discos de ejemplo.
-# - _update_disk_cards(): Reconstruye la lista de tarjetas en la UI.
+# - _paint_cached_catalog(): Pinta el último listado guardado antes de que responda el backend.
+# - _update_disk_cards(): Carga el listado resumido (async), reconstruye la lista de tarjetas y guarda la caché.
+# - _record_startup(): Tiempos de arranque (startup.shell, startup.first_paint, startup.catalog_loaded).
+# - _open_disk_details(): Carga los contenidos del disco si aún no están y abre el diálogo de detalles.
+# - _load_content_tree(), _tree_controls(): Árbol de carpetas del disco (ContentTree) que se despliega por niveles
+#   bajo demanda, con las carpetas más grandes del disco en la cabecera del diálogo.
+# - _render_disk_cards(), _render_more_cards(), _on_cards_scroll(): Construyen las tarjetas por tandas según el scroll,
+#   reutilizando por id las que ya existen.
+# - _upsert_disk_card(), _remove_disk_card(): Insertan, parchean o quitan una sola tarjeta tras guardar o eliminar.
 # - _handle_edit_disk(), _handle_disk_save(), _handle_disk_delete(): Callbacks para el CRUD.
-# - _apply_filters(): Ejecuta la lógica de filtrado y actualiza la UI.
-# - _refresh_disk_list(): Resetea filtros y recarga la lista.
\ No newline at end of file
+# - _show_backend_error(): SnackBar con el error cuando el backend falla al abrir, guardar, eliminar o recargar.
+# - _on_queue_flush(), _show_flush_result(): Estado de la cola tras cada envío; los conflictos se avisan con la opción
+#   de reaplicar el cambio propio (_keep_local_change()).
+# - _apply_remote_changes(): Parchea las tarjetas de los discos cambiados o borrados en remoto (según el filtro actual).
+# - _load_and_subscribe(), _reload_stale_catalog(): Carga inicial; si el backend falla se queda la caché y el primer
+#   aviso de Realtime (su puesta al día al suscribirse) recarga el listado completo.
+# - _apply_filters(), _on_filter_result(): Envían el filtro actual al pipeline y pintan solo el resultado más reciente.
+# - _on_filter_error(): Avisa con un SnackBar cuando la consulta de filtrado falla.
+# - _apply_sort(), _sorted(): Sin filtros pide al backend el listado ordenado (sorted_disks); con filtros ordena
+#   en memoria el resultado filtrado.
+# - _refresh_disk_list(): Resetea filtros y recarga la lista.
+# - _on_keyboard(), _toggle_diagnostics_panel(): Atajo Ctrl+Shift+D que abre el panel de diagnóstico.
\ No newline at end of file